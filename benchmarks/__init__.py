@@ -0,0 +1,11 @@
+# -*- coding: utf-8 -*-
+
+# =================================================================================
+# osintgpt
+#
+# Author: @estebanpdl
+#
+# File: __init__.py
+# Description: Offline benchmarks for the retrieval and ingestion hot paths.
+#   Run with `python -m benchmarks.run`; see benchmarks/README.md.
+# =================================================================================
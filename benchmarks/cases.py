@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+
+# =================================================================================
+# osintgpt
+#
+# Author: @estebanpdl
+#
+# File: cases.py
+# Description: One entry per hot path. A case sets up outside the clock and
+#   returns the call to time, so only the path itself is measured.
+# =================================================================================
+
+# import submodules
+from contextlib import contextmanager
+from pathlib import Path
+from unittest import mock
+
+# type hints
+from typing import Any, Callable, Dict
+
+# import osintgpt config
+from osintgpt.config import Settings
+
+from .corpus import Corpus
+
+# The key only has to look like one; every embedding comes from the fake
+# backend.
+FAKE_KEY = 'sk-benchmark-0000000000000000000000000000'
+
+# Projects the corpus is split across for the cross-project case.
+PROJECTS = 8
+
+# Timed = a zero-argument call; Case = what builds it.
+Timed = Callable[[], Any]
+Case = Callable[[Corpus, Path, Settings], Timed]
+
+
+# the registered offline backend: vectors hashed from the text
+def fake_embedding(settings: Settings, dimension: int, **options):
+    from osintgpt.llm import build_embedding_provider
+
+    return build_embedding_provider(
+        'fake', settings, dimensions=dimension, **options
+    )
+
+
+# route the legacy surfaces' embeddings to the fake backend
+@contextmanager
+def offline(dimension: int):
+    '''
+    Args:
+        dimension (int): Length of the vectors the fake returns.
+    '''
+    with mock.patch(
+        'osintgpt.embeddings.openai_embeddings.build_embedding_provider',
+        lambda provider, settings, **options: fake_embedding(
+            settings, dimension, **options
+        )
+    ):
+        yield
+
+
+def _dataframe(corpus: Corpus):
+    import pandas as pd
+
+    return pd.DataFrame({
+        'text': corpus.texts,
+        'embeddings': list(corpus.vectors.tolist())
+    })
+
+
+def search_results_from_dataframe(corpus, workdir, settings) -> Timed:
+    from osintgpt.llms import OpenAIGPT
+
+    llm = OpenAIGPT(settings)
+    df = _dataframe(corpus)
+    query = corpus.query()
+
+    return lambda: llm.search_results_from_dataframe(
+        df, embeddings=query, top_k=10
+    )
+
+
+def two_stage_search(corpus, workdir, settings) -> Timed:
+    from osintgpt.llm.dimensions import shorten, two_stage_search as search
+
+    # A quarter of the width for the first pass, kept beside the full
+    # vectors the way an index would keep it.
+    coarse_dimensions = max(corpus.dimension // 4, 1)
+    coarse = shorten(corpus.vectors, coarse_dimensions)
+    query = corpus.query()
+
+    return lambda: search(
+        corpus.vectors, query, 10, coarse_dimensions, coarse=coarse
+    )
+
+
+def semantic_similarity_search(corpus, workdir, settings) -> Timed:
+    from osintgpt.semantic_operations import SemanticOperations
+
+    operations = SemanticOperations(settings)
+    df = _dataframe(corpus)
+
+    # Three rounds, each a full search; a threshold of -1 never stops early.
+    return lambda: operations.semantic_similarity_search(
+        corpus.texts[0], df=df, top_k=5, depth=3, score_threshold=-1.0
+    )
+
+
+def load_embeddings_from_csv(corpus, workdir, settings) -> Timed:
+    from osintgpt.llms import OpenAIGPT
+
+    path = workdir / 'embeddings.csv'
+    _dataframe(corpus).to_csv(path, index=False)
+    llm = OpenAIGPT(settings)
+
+    return lambda: llm.load_embeddings_from_csv(str(path), ['embeddings'])
+
+
+def provider_embed(corpus, workdir, settings) -> Timed:
+    provider = fake_embedding(settings, corpus.dimension)
+
+    return lambda: provider.embed(corpus.texts)
+
+
+def qdrant_add_vectors(corpus, workdir, settings) -> Timed:
+    from osintgpt.vector_store import Qdrant
+
+    if settings.qdrant_url or settings.qdrant_host:
+        engine = Qdrant(settings)
+    else:
+        # Qdrant's in-process mode: no server, same client API.
+        import qdrant_client
+
+        engine = Qdrant(
+            settings, client=qdrant_client.QdrantClient(location=':memory:')
+        )
+
+    engine.create_collection('benchmark', corpus.dimension)
+    vectors = corpus.vectors.tolist()
+    payload = [{'text': text} for text in corpus.texts]
+
+    # Upserts overwrite by id, so every run writes the same collection.
+    return lambda: engine.add_vectors('benchmark', vectors, payload=payload)
+
+
+def sql_inserts(corpus, workdir, settings) -> Timed:
+    from osintgpt.databases import SQLDatabaseManager
+
+    path = workdir / 'conversations.db'
+    manager = SQLDatabaseManager(Settings(sql_db_file_path=str(path)))
+
+    def run():
+        for index, text in enumerate(corpus.texts):
+            manager.insert_data_to_chat_gpt_conversations(
+                'benchmark', str(index), 'user', text
+            )
+
+    return run
+
+
+def search_projects(corpus, workdir, settings) -> Timed:
+    import numpy as np
+
+    from osintgpt.projects import Project
+    from osintgpt.projects.cross_project import search_projects as search
+
+    projects = [
+        Project.create(f'Case {index}', home=workdir / 'home')
+        for index in range(PROJECTS)
+    ]
+    shards = dict(zip(
+        (project.id for project in projects),
+        np.array_split(np.arange(corpus.size), PROJECTS)
+    ))
+    query = np.asarray(corpus.query(), dtype=np.float32)
+    scores = corpus.vectors @ query
+
+    def per_project(project):
+        rows = shards[project.id]
+        return zip(scores[rows].tolist(), rows.tolist())
+
+    return lambda: search(projects, per_project, limit=10)
+
+
+def near_duplicates(corpus, workdir, settings) -> Timed:
+    from osintgpt.ingestion import Chunk, MinHashDeduplicator
+
+    # Every fourth text comes back as a repost with a trailing tag.
+    texts = [
+        f'{corpus.texts[index - 1]} #repost' if index % 4 == 3 else text
+        for index, text in enumerate(corpus.texts)
+    ]
+    chunks = [
+        Chunk('benchmark', str(index), 0, text, 0, len(text))
+        for index, text in enumerate(texts)
+    ]
+
+    def run():
+        dedup = MinHashDeduplicator()
+        for chunk in chunks:
+            dedup.assign(chunk)
+
+    return run
+
+
+CASES: Dict[str, Case] = {
+    'search_results_from_dataframe': search_results_from_dataframe,
+    'two_stage_search': two_stage_search,
+    'semantic_similarity_search': semantic_similarity_search,
+    'load_embeddings_from_csv': load_embeddings_from_csv,
+    'provider_embed': provider_embed,
+    'qdrant_add_vectors': qdrant_add_vectors,
+    'sql_inserts': sql_inserts,
+    'search_projects': search_projects,
+    'near_duplicates': near_duplicates
+}
@@ -0,0 +1,80 @@
+# -*- coding: utf-8 -*-
+
+# =================================================================================
+# osintgpt
+#
+# Author: @estebanpdl
+#
+# File: corpus.py
+# Description: Synthetic corpora for the benchmarks — seeded, so two runs of
+#   the same size and dimension time exactly the same data.
+# =================================================================================
+
+# import modules
+import numpy as np
+
+# import submodules
+from dataclasses import dataclass
+
+# type hints
+from typing import List
+
+# Enough distinct words that texts differ in length and content the way
+# messages in an export do.
+VOCABULARY = (
+    'channel report source claim video image account post forward share '
+    'network region official statement attack border drone convoy protest '
+    'election campaign narrative bot amplification archive translation'
+).split()
+
+
+# Corpus class
+@dataclass(frozen=True)
+class Corpus:
+    '''
+    Texts and their unit-length vectors, row for row.
+    '''
+    texts: List[str]
+    vectors: np.ndarray
+    seed: int
+
+    @property
+    def size(self) -> int:
+        return len(self.texts)
+
+    @property
+    def dimension(self) -> int:
+        return self.vectors.shape[1]
+
+    # a query vector that is not in the corpus
+    def query(self, index: int = 0) -> List[float]:
+        rng = np.random.default_rng(self.seed + 1 + index)
+        vector = rng.standard_normal(self.dimension).astype(np.float32)
+
+        return (vector / np.linalg.norm(vector)).tolist()
+
+
+# build a corpus
+def make_corpus(size: int, dimension: int, seed: int = 0) -> Corpus:
+    '''
+    Args:
+        size (int): Texts and vectors to generate.
+        dimension (int): Vector length.
+        seed (int): Same seed, same corpus.
+
+    Returns:
+        Corpus: float32 vectors normalized to unit length.
+    '''
+    rng = np.random.default_rng(seed)
+    vectors = rng.standard_normal((size, dimension), dtype=np.float32)
+    vectors /= np.linalg.norm(vectors, axis=1, keepdims=True)
+
+    lengths = rng.integers(5, 60, size=size)
+    words = rng.integers(0, len(VOCABULARY), size=int(lengths.sum()))
+    texts, start = [], 0
+    for index, length in enumerate(lengths):
+        chosen = words[start:start + length]
+        texts.append(f'{index} ' + ' '.join(VOCABULARY[w] for w in chosen))
+        start += length
+
+    return Corpus(texts=texts, vectors=vectors, seed=seed)
@@ -0,0 +1,287 @@
+# -*- coding: utf-8 -*-
+
+# =================================================================================
+# osintgpt
+#
+# Author: @estebanpdl
+#
+# File: run.py
+# Description: Runs the benchmark cases over synthetic corpora, writes the
+#   timings as JSON and compares them with a stored baseline. Exits non-zero
+#   when a case has slowed past the tolerance, or when there is no baseline
+#   to compare with and none was asked to be skipped.
+# =================================================================================
+
+# import modules
+import argparse
+import json
+import platform
+import statistics
+import sys
+import tempfile
+import time
+import warnings
+
+# import submodules
+from datetime import datetime, timezone
+from pathlib import Path
+
+# type hints
+from typing import Dict, List, Optional, Sequence, Tuple
+
+# import osintgpt config
+from osintgpt.config import Settings
+
+from .cases import CASES, FAKE_KEY, offline
+from .corpus import make_corpus
+
+DEFAULT_SIZES = (10_000,)
+DEFAULT_DIMENSION = 256
+DEFAULT_REPEAT = 3
+
+# A case has regressed when its best run is this much slower than the
+# baseline's best. Generous, because two runs on one machine differ too.
+DEFAULT_TOLERANCE = 0.25
+
+BASELINE = Path(__file__).with_name('baseline.json')
+
+# Exit statuses besides 0.
+REGRESSED = 1
+NO_BASELINE = 2
+
+
+# time one case on one corpus
+def time_case(name: str, corpus, settings: Settings, repeat: int) -> Dict:
+    '''
+    Returns:
+        Dict: The case, corpus shape, every run's seconds and the best.
+    '''
+    with tempfile.TemporaryDirectory() as workdir:
+        # OpenAIGPT logs conversations; keep its database with the case.
+        settings = settings.with_overrides(
+            sql_db_file_path=str(Path(workdir) / 'osintgpt.db')
+        )
+        timed = CASES[name](corpus, Path(workdir), settings)
+        runs = []
+        for _ in range(repeat):
+            start = time.perf_counter()
+            timed()
+            runs.append(time.perf_counter() - start)
+
+    best = min(runs)
+
+    return {
+        'case': name,
+        'size': corpus.size,
+        'dimension': corpus.dimension,
+        'runs': runs,
+        'best_seconds': best,
+        'median_seconds': statistics.median(runs),
+        'items_per_second': corpus.size / best if best else None
+    }
+
+
+# run the suite
+def run(
+    cases: Sequence[str],
+    sizes: Sequence[int] = DEFAULT_SIZES,
+    dimension: int = DEFAULT_DIMENSION,
+    repeat: int = DEFAULT_REPEAT,
+    seed: int = 0,
+    settings: Optional[Settings] = None
+) -> Dict:
+    '''
+    Args:
+        cases (Sequence[str]): Names from CASES.
+        sizes (Sequence[int]): Corpus sizes, each run through every case.
+        dimension (int): Vector length.
+        repeat (int): Timed runs per case; the best is what is compared.
+        seed (int): Corpus seed.
+        settings (Settings, optional): Point qdrant_host/qdrant_port at a \
+            local server to time it instead of the in-process mode.
+
+    Returns:
+        Dict: 'environment' and 'results', ready for json.dump.
+    '''
+    unknown = sorted(set(cases) - set(CASES))
+    if unknown:
+        raise ValueError(
+            f'unknown cases {", ".join(unknown)}; '
+            f'known: {", ".join(CASES)}'
+        )
+
+    settings = (settings or Settings()).with_overrides(
+        openai_api_key=FAKE_KEY, openai_gpt_model='gpt-4o-mini'
+    )
+
+    results: List[Dict] = []
+    with offline(dimension), warnings.catch_warnings():
+        # The dataframe cases go through the deprecated OpenAIGPT surface.
+        warnings.simplefilter('ignore', DeprecationWarning)
+        for size in sizes:
+            corpus = make_corpus(size, dimension, seed)
+            for name in cases:
+                results.append(time_case(name, corpus, settings, repeat))
+
+    return {
+        'environment': {
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'machine': platform.machine(),
+            'repeat': repeat,
+            'seed': seed,
+            'created_at': datetime.now(timezone.utc).isoformat()
+        },
+        'results': results
+    }
+
+
+def _key(result: Dict) -> Tuple[str, int, int]:
+    return result['case'], result['size'], result['dimension']
+
+
+# compare a run with a baseline
+def compare(
+    current: Dict, baseline: Dict, tolerance: float = DEFAULT_TOLERANCE
+) -> List[Dict]:
+    '''
+    Args:
+        current (Dict): Output of run().
+        baseline (Dict): An earlier run() output.
+        tolerance (float): Allowed slowdown, e.g. 0.25 for 25%.
+
+    Returns:
+        List[Dict]: One row per case found in both, with the ratio of the \
+            best times and whether it regressed. Cases only one side ran \
+            are left out.
+    '''
+    before = {_key(result): result for result in baseline.get('results', [])}
+    rows = []
+    for result in current['results']:
+        old = before.get(_key(result))
+        if old is None or not old['best_seconds']:
+            continue
+
+        ratio = result['best_seconds'] / old['best_seconds']
+        rows.append({
+            'case': result['case'],
+            'size': result['size'],
+            'dimension': result['dimension'],
+            'baseline_seconds': old['best_seconds'],
+            'best_seconds': result['best_seconds'],
+            'ratio': ratio,
+            'regressed': ratio > 1 + tolerance
+        })
+
+    return rows
+
+
+def _table(results: Dict, rows: List[Dict]) -> str:
+    ratios = {(r['case'], r['size'], r['dimension']): r for r in rows}
+    lines = [f'{"case":32} {"size":>10} {"best s":>10} {"items/s":>12} vs base']
+    for result in results['results']:
+        row = ratios.get(_key(result))
+        versus = ''
+        if row is not None:
+            versus = f'{row["ratio"]:.2f}x' + (
+                '  REGRESSED' if row['regressed'] else ''
+            )
+        rate = result['items_per_second']
+        lines.append(
+            f'{result["case"]:32} {result["size"]:>10,} '
+            f'{result["best_seconds"]:>10.4f} '
+            f'{rate if rate is None else f"{rate:,.0f}":>12} {versus}'
+        )
+
+    return '\n'.join(lines)
+
+
+def main(argv: Optional[Sequence[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        prog='python -m benchmarks.run',
+        description='Time osintgpt hot paths over synthetic corpora, offline.'
+    )
+    parser.add_argument(
+        '--cases', default=','.join(CASES),
+        help='comma-separated case names (default: all)'
+    )
+    parser.add_argument(
+        '--sizes', default=','.join(map(str, DEFAULT_SIZES)),
+        help='comma-separated corpus sizes, e.g. 10000,100000,10000000'
+    )
+    parser.add_argument('--dimension', type=int, default=DEFAULT_DIMENSION)
+    parser.add_argument('--repeat', type=int, default=DEFAULT_REPEAT)
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--output', type=Path, help='write the JSON here')
+    parser.add_argument(
+        '--baseline', type=Path, default=BASELINE,
+        help='compare with this earlier output (default: %(default)s)'
+    )
+    parser.add_argument(
+        '--save-baseline', action='store_true',
+        help='store this run as the baseline instead of comparing'
+    )
+    parser.add_argument(
+        '--no-baseline', action='store_true',
+        help='time the cases without comparing; otherwise a missing '
+             'baseline fails the run'
+    )
+    parser.add_argument(
+        '--tolerance', type=float, default=DEFAULT_TOLERANCE,
+        help='allowed slowdown before a case fails (default: %(default)s)'
+    )
+    parser.add_argument('--qdrant-host', default='')
+    parser.add_argument('--qdrant-port', type=int)
+    args = parser.parse_args(argv)
+
+    results = run(
+        cases=[name for name in args.cases.split(',') if name],
+        sizes=[int(size) for size in args.sizes.split(',') if size],
+        dimension=args.dimension,
+        repeat=args.repeat,
+        seed=args.seed,
+        settings=Settings(
+            qdrant_host=args.qdrant_host, qdrant_port=args.qdrant_port
+        )
+    )
+    if args.output:
+        args.output.write_text(json.dumps(results, indent=2), encoding='utf-8')
+
+    if args.save_baseline:
+        args.baseline.write_text(json.dumps(results, indent=2), encoding='utf-8')
+        print(_table(results, []))
+        print(f'baseline stored in {args.baseline}')
+        return 0
+
+    if args.no_baseline:
+        print(_table(results, []))
+        return 0
+
+    # Timings only compare on the machine that made them, so no baseline
+    # ships with the repository; a check without one has checked nothing.
+    if not args.baseline.exists():
+        print(_table(results, []))
+        print(
+            f'no baseline at {args.baseline}; store one on this machine with '
+            f'--save-baseline, or pass --no-baseline to only time the cases',
+            file=sys.stderr
+        )
+        return NO_BASELINE
+
+    baseline = json.loads(args.baseline.read_text(encoding='utf-8'))
+    rows = compare(results, baseline, args.tolerance)
+    print(_table(results, rows))
+
+    regressed = [row for row in rows if row['regressed']]
+    if regressed:
+        print(
+            f'{len(regressed)} case(s) slower than the baseline by more than '
+            f'{args.tolerance:.0%}', file=sys.stderr
+        )
+        return REGRESSED
+
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
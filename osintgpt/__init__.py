@@ -15,8 +15,14 @@ from importlib.metadata import PackageNotFoundError, version
 # import osintgpt config
 from osintgpt.config import Settings
 
-# import osintgpt projects
-from osintgpt.projects import Project, ProjectSettings
+# import osintgpt utils
+from osintgpt.utils.lazy import lazy_exports
+
+# import osintgpt projects, on first use
+__getattr__, __dir__ = lazy_exports('osintgpt', {
+    'Project': 'osintgpt.projects',
+    'ProjectSettings': 'osintgpt.projects'
+})
 
 # define package-level variables and constants
 # The version lives in pyproject.toml; reading it back from the installed
@@ -38,6 +38,7 @@ ENV_VARS = {
     'openai_api_key': 'OPENAI_API_KEY',
     'openai_gpt_model': 'OPENAI_GPT_MODEL',
     'openai_embedding_model': 'OPENAI_EMBEDDING_MODEL',
+    'embedding_dimensions': 'EMBEDDING_DIMENSIONS',
     'gemini_api_key': 'GEMINI_API_KEY',
     'voyage_api_key': 'VOYAGE_API_KEY',
     'anthropic_api_key': 'ANTHROPIC_API_KEY',
@@ -62,6 +63,9 @@ class Settings:
     openai_api_key: str = ''
     openai_gpt_model: str = ''
     openai_embedding_model: str = ''
+    # Shortened embedding width, for models trained to be truncated
+    # (text-embedding-3-*). None keeps the model's full width.
+    embedding_dimensions: Optional[int] = None
     gemini_api_key: str = ''
     voyage_api_key: str = ''
     anthropic_api_key: str = ''
@@ -107,6 +111,10 @@ class Settings:
 
         if 'qdrant_port' in values:
             values['qdrant_port'] = _parse_port(values['qdrant_port'])
+        if 'embedding_dimensions' in values:
+            values['embedding_dimensions'] = _parse_int(
+                'embedding_dimensions', values['embedding_dimensions']
+            )
 
         values.update(overrides)
 
@@ -163,6 +171,24 @@ def _parse_port(value: Union[str, int, None]):
     Returns:
         Optional[int]: Port number, or None when unset.
     '''
+    return _parse_int('qdrant_port', value)
+
+
+# parse a whole-number setting
+def _parse_int(field: str, value: Union[str, int, None]):
+    '''
+    Parse a numeric setting into an int, treating an empty value as unset.
+
+    Args:
+        field (str): Setting name, for the error message.
+        value (Union[str, int, None]): Raw value.
+
+    Raises:
+        ValueError: If the value is present but not a number.
+
+    Returns:
+        Optional[int]: The number, or None when unset.
+    '''
     if value in (None, ''):
         return None
 
@@ -170,7 +196,7 @@ def _parse_port(value: Union[str, int, None]):
         return int(value)
     except (TypeError, ValueError):
         raise ValueError(
-            f'{ENV_VARS["qdrant_port"]} must be a number, got {value!r}'
+            f'{ENV_VARS[field]} must be a number, got {value!r}'
         ) from None
 
 
@@ -23,6 +23,9 @@ from typing import Union
 # import osintgpt config
 from osintgpt.config import Settings, resolve_settings
 
+# import osintgpt latency
+from osintgpt.llm.latency import SQL_READ, SQL_WRITE, timed
+
 # SQLDatabaseManager class
 class SQLDatabaseManager(object):
     '''
@@ -31,19 +34,22 @@ class SQLDatabaseManager(object):
     This class provides an abstracted interface for interacting with various SQL
     databases.
     '''
-    def __init__(self, config: Union[Settings, str]):
+    def __init__(self, config: Union[Settings, str], recorder=None):
         '''
         Initializes the instance of the class.
 
         Args:
             config (Union[Settings, str]): Settings, or a path to a .env file \
                 (deprecated).
+            recorder (UsageRecorder, optional): Receives the time each insert \
+                and load took.
 
         Raises:
             MissingEnvironmentVariableError: If 'sql_db_file_path' has no value.
         '''
         # settings
         self.settings = resolve_settings(config).require('sql_db_file_path')
+        self.recorder = recorder
 
         # set database file path
         self.db_file = self.settings.sql_db_file_path
@@ -169,16 +175,17 @@ class SQLDatabaseManager(object):
 
         # try to insert data
         try:
-            cursor.execute(
-                '''
-                INSERT INTO chat_gpt_index (id, created_at)
-                VALUES (?, ?)
-                ''',
-                (id, created_at)
-            )
-
-            # commit changes
-            self.conn.commit()
+            with timed(self.recorder, SQL_WRITE, 'sqlite', 'chat_gpt_index'):
+                cursor.execute(
+                    '''
+                    INSERT INTO chat_gpt_index (id, created_at)
+                    VALUES (?, ?)
+                    ''',
+                    (id, created_at)
+                )
+
+                # commit changes
+                self.conn.commit()
         
         except Error as e:
             print (f"The error '{e}' occurred")
@@ -204,16 +211,17 @@ class SQLDatabaseManager(object):
 
         # try to insert data
         try:
-            cursor.execute(
-                '''
-                INSERT INTO chat_gpt_conversations (ref_id, chat_id, role, message)
-                VALUES (?, ?, ?, ?)
-                ''',
-                (ref_id, chat_id, role, message)
-            )
-
-            # commit changes
-            self.conn.commit()
+            with timed(self.recorder, SQL_WRITE, 'sqlite', 'chat_gpt_conversations'):
+                cursor.execute(
+                    '''
+                    INSERT INTO chat_gpt_conversations (ref_id, chat_id, role, message)
+                    VALUES (?, ?, ?, ?)
+                    ''',
+                    (ref_id, chat_id, role, message)
+                )
+
+                # commit changes
+                self.conn.commit()
         
         except Error as e:
             print (f"The error '{e}' occurred")
@@ -249,16 +257,18 @@ class SQLDatabaseManager(object):
 
         # try to load messages
         try:
-            cursor.execute(
-                '''
-                SELECT role, message FROM chat_gpt_conversations
-                WHERE ref_id = ?
-                ''',
-                (ref_id,)
-            )
-
-            # fetch messages
-            messages = cursor.fetchall()
+            with timed(self.recorder, SQL_READ, 'sqlite',
+                'chat_gpt_conversations'):
+                cursor.execute(
+                    '''
+                    SELECT role, message FROM chat_gpt_conversations
+                    WHERE ref_id = ?
+                    ''',
+                    (ref_id,)
+                )
+
+                # fetch messages
+                messages = cursor.fetchall()
 
             # convert messages to dict -> {role: role, content: message}
             messages = [
@@ -1,2 +1,7 @@
-# import class methods
-from .openai_embeddings import OpenAIEmbeddingGenerator
+# import osintgpt utils
+from osintgpt.utils.lazy import lazy_exports
+
+# import class methods, on first use
+__getattr__, __dir__ = lazy_exports(
+    __name__, {'OpenAIEmbeddingGenerator': '.openai_embeddings'}
+)
@@ -12,7 +12,6 @@
 
 # import modules
 import warnings
-import pandas as pd
 
 # import submodules
 from ast import literal_eval
@@ -34,7 +33,7 @@ from osintgpt.llm import build_embedding_provider
 from osintgpt.pricing import estimate_cost
 
 # import utils
-from osintgpt.utils import encoding_for_model
+from osintgpt.utils import count_tokens_many
 
 # OpenAIEmbeddingGenerator class
 class OpenAIEmbeddingGenerator(object):
@@ -146,14 +145,10 @@ class OpenAIEmbeddingGenerator(object):
         Returns:
             int: Number of tokens.
         '''
-        # get model
-        encoding = encoding_for_model(self.get_openai_embedding_model())
-
-        # count tokens
-        self.num_tokens = 0
-        for d in self.data:
-            tokens = encoding.encode(d)
-            self.num_tokens += len(tokens)
+        # count tokens, in batches across threads
+        self.num_tokens = sum(
+            count_tokens_many(self.data, self.get_openai_embedding_model())
+        )
 
         return self.num_tokens
 
@@ -225,6 +220,10 @@ class OpenAIEmbeddingGenerator(object):
         Returns:
             list: Embeddings.
         '''
+        # Deferred, like every pandas use in osintgpt: only the CSV path
+        # needs it.
+        import pandas as pd
+
         data = pd.read_csv(embeddings_path, **kwargs)
         for col in columns:
             data[col] = data[col].apply(literal_eval)
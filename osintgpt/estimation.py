@@ -0,0 +1,351 @@
+# -*- coding: utf-8 -*-
+
+# =================================================================================
+# osintgpt
+#
+# Author: @estebanpdl
+#
+# File: estimation.py
+# Description: Pre-flight token and cost estimates over a source file, read in
+#   chunks so an export far larger than memory can be vetted before a single
+#   provider call is made.
+# =================================================================================
+
+# import modules
+import csv
+import json
+
+# import submodules
+from dataclasses import dataclass
+from itertools import islice
+from pathlib import Path
+
+# type hints
+from typing import Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+# import osintgpt config
+from osintgpt.config import DEFAULT_EMBEDDING_MODEL
+
+# import osintgpt pricing
+from osintgpt.pricing import estimate_cost
+
+# import utils
+from osintgpt.utils import (
+    COUNT_CHUNK_SIZE,
+    DEFAULT_COUNT_THREADS,
+    allow_long_csv_fields,
+    count_tokens_many,
+    encoding_for_model
+)
+
+# import exceptions
+from osintgpt.exceptions.errors import CostCeilingExceededError
+
+# File suffixes each reader handles.
+FORMATS = {
+    '.csv': 'csv',
+    '.jsonl': 'jsonl',
+    '.ndjson': 'jsonl',
+    '.parquet': 'parquet'
+}
+
+
+# ModelEstimate class
+@dataclass(frozen=True)
+class ModelEstimate:
+    '''
+    Tokens a source comes to on one model, and what sending them would cost.
+    '''
+    model: str
+    tokens: int
+    # None when the model carries no price, which is unknown rather than free.
+    cost: Optional[float]
+
+
+# CostEstimate class
+@dataclass(frozen=True)
+class CostEstimate:
+    '''
+    An estimate over a whole source, one entry per model asked about.
+    '''
+    source: str
+    texts: int
+    models: Tuple[ModelEstimate, ...]
+
+    @property
+    def by_model(self) -> Dict[str, ModelEstimate]:
+        return {estimate.model: estimate for estimate in self.models}
+
+    # the source's size in tokens
+    @property
+    def tokens(self) -> int:
+        '''
+        Returns:
+            int: Tokens on the first model asked about. Each model counts \
+                the same text in its own encoding, so the counts are never \
+                summed; by_model has the rest.
+        '''
+        return self.models[0].tokens if self.models else 0
+
+    # the sum, when every part could be priced
+    @property
+    def total_cost(self) -> Optional[float]:
+        '''
+        Returns:
+            Optional[float]: Estimated USD across models, or None when any \
+                of them is unpriced, so a partial sum is never read as whole.
+        '''
+        if any(estimate.cost is None for estimate in self.models):
+            return None
+
+        return sum(estimate.cost for estimate in self.models)
+
+    # hold the estimate to a ceiling
+    def check_ceiling(self, ceiling_usd: Optional[float]) -> None:
+        '''
+        Args:
+            ceiling_usd (float, optional): USD the job may cost. None is no \
+                ceiling.
+
+        Raises:
+            CostCeilingExceededError: If the estimate is over the ceiling, or \
+                cannot be priced while a ceiling is set.
+        '''
+        if ceiling_usd is None:
+            return
+
+        total = self.total_cost
+        if total is None or total > ceiling_usd:
+            raise CostCeilingExceededError(
+                total, ceiling_usd,
+                f'{self.summary} from {self.source}'
+            )
+
+    # operator-facing summary
+    @property
+    def summary(self) -> str:
+        parts = [f'{self.texts:,} texts']
+        for estimate in self.models:
+            cost = '~unpriced' if estimate.cost is None else (
+                f'~${estimate.cost:.4f}'
+            )
+            parts.append(f'{estimate.model}: {estimate.tokens:,} tokens {cost}')
+
+        return ', '.join(parts)
+
+
+# which reader a file needs
+def source_format(path: Union[str, Path], file_format: Optional[str] = None):
+    '''
+    Args:
+        path (Union[str, Path]): Source file.
+        file_format (str, optional): 'csv', 'jsonl' or 'parquet', overriding \
+            the suffix.
+
+    Raises:
+        ValueError: If the format is neither given nor recognisable.
+
+    Returns:
+        str: The format name.
+    '''
+    if file_format:
+        if file_format not in FORMATS.values():
+            raise ValueError(f'unsupported format {file_format!r}')
+        return file_format
+
+    suffix = Path(path).suffix.lower()
+    if suffix not in FORMATS:
+        known = ', '.join(sorted(FORMATS))
+        raise ValueError(
+            f'cannot tell the format of {Path(path).name}; use one of {known} '
+            'or pass file_format='
+        )
+
+    return FORMATS[suffix]
+
+
+def _missing_column(column: str, available: Sequence[str]) -> ValueError:
+    return ValueError(
+        f'no {column!r} column; found: {", ".join(map(str, available))}'
+    )
+
+
+def _read_csv(path: Path, column: str) -> Iterator[str]:
+    allow_long_csv_fields()
+    with open(path, newline='', encoding='utf-8') as handle:
+        reader = csv.DictReader(handle)
+        if column not in (reader.fieldnames or []):
+            raise _missing_column(column, reader.fieldnames or [])
+        for row in reader:
+            yield row[column] or ''
+
+
+def _read_jsonl(path: Path, column: str) -> Iterator[str]:
+    with open(path, encoding='utf-8') as handle:
+        for line in handle:
+            if not line.strip():
+                continue
+            value = json.loads(line).get(column)
+            if value is None:
+                yield ''
+            else:
+                yield value if isinstance(value, str) else str(value)
+
+
+def _read_parquet(path: Path, column: str, chunk_rows: int) -> Iterator[str]:
+    try:
+        import pyarrow.parquet as pq
+    except ImportError as error:
+        raise ImportError(
+            "reading Parquet needs the 'pyarrow' package: "
+            'pip install osintgpt[parquet]'
+        ) from error
+
+    parquet = pq.ParquetFile(path)
+    if column not in parquet.schema_arrow.names:
+        raise _missing_column(column, parquet.schema_arrow.names)
+
+    # Only the one column is read, one row batch at a time.
+    for batch in parquet.iter_batches(batch_size=chunk_rows, columns=[column]):
+        for value in batch.column(0).to_pylist():
+            yield '' if value is None else str(value)
+
+
+# stream the texts of a source file
+def read_texts(
+    path: Union[str, Path],
+    text_column: str = 'text',
+    file_format: Optional[str] = None,
+    chunk_rows: int = COUNT_CHUNK_SIZE
+) -> Iterator[str]:
+    '''
+    Args:
+        path (Union[str, Path]): CSV, JSONL or Parquet file.
+        text_column (str): Column, or JSON key, holding the text.
+        file_format (str, optional): Overrides the suffix.
+        chunk_rows (int): Rows per Parquet batch.
+
+    Raises:
+        ValueError: If the format is unknown or the column absent.
+        ImportError: If the file is Parquet and pyarrow is not installed.
+
+    Returns:
+        Iterator[str]: One text per row, read lazily. A missing value is ''.
+    '''
+    path = Path(path)
+    kind = source_format(path, file_format)
+    if kind == 'csv':
+        return _read_csv(path, text_column)
+    if kind == 'jsonl':
+        return _read_jsonl(path, text_column)
+
+    return _read_parquet(path, text_column, chunk_rows)
+
+
+# estimate what sending a source file would cost
+def estimate_file(
+    path: Union[str, Path],
+    models: Sequence[str] = (DEFAULT_EMBEDDING_MODEL,),
+    text_column: str = 'text',
+    file_format: Optional[str] = None,
+    chunk_rows: int = COUNT_CHUNK_SIZE,
+    num_threads: int = DEFAULT_COUNT_THREADS,
+    ceiling_usd: Optional[float] = None
+) -> CostEstimate:
+    '''
+    Count a source's tokens for each model and price them, reading the file
+    in chunks. Memory holds one chunk, whatever the size of the file.
+
+    Args:
+        path (Union[str, Path]): CSV, JSONL or Parquet file.
+        models (Sequence[str]): Models the texts will be sent to, e.g. the \
+            embedding model and a summarization model.
+        text_column (str): Column, or JSON key, holding the text.
+        file_format (str, optional): Overrides the suffix.
+        chunk_rows (int): Texts counted per batch.
+        num_threads (int): Counting threads per batch.
+        ceiling_usd (float, optional): Raise if the estimate is over it.
+
+    Raises:
+        CostCeilingExceededError: If a ceiling is given and the estimate is \
+            over it or unpriced.
+
+    Returns:
+        CostEstimate: Tokens and cost per model.
+    '''
+    models = list(dict.fromkeys(models))
+    if not models:
+        raise ValueError('name at least one model to estimate for')
+
+    # Models sharing an encoding share a count, so the file is encoded once
+    # per distinct encoding rather than once per model.
+    by_encoding: Dict[str, List[str]] = {}
+    for model in models:
+        by_encoding.setdefault(encoding_for_model(model).name, []).append(model)
+
+    tokens = {name: 0 for name in by_encoding}
+    texts = 0
+    stream = read_texts(path, text_column, file_format, chunk_rows)
+    while True:
+        chunk = list(islice(stream, chunk_rows))
+        if not chunk:
+            break
+
+        texts += len(chunk)
+        for name, group in by_encoding.items():
+            tokens[name] += sum(count_tokens_many(
+                chunk, group[0], num_threads=num_threads, chunk_size=chunk_rows
+            ))
+
+    estimate = CostEstimate(
+        source=str(path),
+        texts=texts,
+        models=tuple(
+            ModelEstimate(
+                model=model,
+                tokens=tokens[name],
+                cost=estimate_cost(model, tokens[name])
+            )
+            for name, group in by_encoding.items()
+            for model in group
+        )
+    )
+    estimate.check_ceiling(ceiling_usd)
+
+    return estimate
+
+
+# estimate a file against a project's choices and ceiling
+def estimate_for_project(
+    project,
+    path: Union[str, Path],
+    models: Optional[Sequence[str]] = None,
+    defaults=None,
+    **options
+) -> CostEstimate:
+    '''
+    Vet a source for a project before ingesting it.
+
+    Args:
+        project (Project): Supplies the embedding model and the ceiling.
+        path (Union[str, Path]): CSV, JSONL or Parquet file.
+        models (Sequence[str], optional): Models to price. Defaults to the \
+            project's embedding model.
+        defaults (ProjectSettings, optional): User defaults filling the \
+            project's gaps.
+        **options: estimate_file options.
+
+    Raises:
+        CostCeilingExceededError: If the project has a ceiling and the \
+            estimate is over it or unpriced.
+
+    Returns:
+        CostEstimate: Tokens and cost per model.
+    '''
+    settings = project.effective_settings(defaults)
+    if models is None:
+        models = [settings.embedding_model or DEFAULT_EMBEDDING_MODEL]
+
+    return estimate_file(
+        path, models, ceiling_usd=settings.cost_ceiling_usd, **options
+    )
@@ -27,3 +27,90 @@ class MissingEnvironmentVariableError(Exception):
             message = f'{message} — {hint}'
 
         super().__init__(message)
+
+# BatchJobError class
+class BatchJobError(Exception):
+    '''
+    BatchJobError class
+
+    Raised when a provider batch job ends without a result for every request
+    it was given.
+    '''
+    def __init__(self, job_id, status, missing=None):
+        '''
+        Args:
+            job_id (str): The provider's batch id.
+            status (str): The status the job ended in.
+            missing (List[str], optional): Requests that returned no result.
+        '''
+        self.job_id = job_id
+        self.status = status
+        self.missing = list(missing or [])
+
+        message = f'batch {job_id} ended {status}'
+        if self.missing:
+            shown = ', '.join(self.missing[:10])
+            more = len(self.missing) - 10
+            message = (
+                f'{message}; no result for {len(self.missing)} request(s): '
+                f'{shown}{f" and {more} more" if more > 0 else ""}'
+            )
+
+        super().__init__(message)
+
+# CostCeilingExceededError class
+class CostCeilingExceededError(Exception):
+    '''
+    CostCeilingExceededError class
+
+    Raised before any provider call when the estimated cost of a job is over
+    the project's ceiling, or cannot be estimated at all.
+    '''
+    def __init__(self, estimated, ceiling, detail=None):
+        '''
+        Args:
+            estimated (Optional[float]): Estimated USD; None when some model \
+                carries no price.
+            ceiling (float): The ceiling in USD.
+            detail (str, optional): What was estimated, for the message.
+        '''
+        self.estimated = estimated
+        self.ceiling = ceiling
+
+        if estimated is None:
+            message = (
+                f'cost cannot be checked against the ${ceiling:.2f} ceiling: '
+                'a model carries no price'
+            )
+        else:
+            message = (
+                f'estimated ${estimated:.2f} is over the ${ceiling:.2f} ceiling'
+            )
+        if detail:
+            message = f'{message} ({detail})'
+
+        super().__init__(message)
+
+# SimulatedProviderError class
+class SimulatedProviderError(Exception):
+    '''
+    SimulatedProviderError class
+
+    Raised by the fake backends where a real provider would have answered
+    with an error, so retry and back-off paths can be exercised offline.
+    '''
+    def __init__(self, status_code, retry_after=None):
+        '''
+        Args:
+            status_code (int): The HTTP status simulated, 429 or 500.
+            retry_after (float, optional): Seconds a 429 asks the caller to \
+                wait.
+        '''
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+        message = f'simulated {status_code} from the fake provider'
+        if retry_after is not None:
+            message = f'{message}; retry after {retry_after:g}s'
+
+        super().__init__(message)
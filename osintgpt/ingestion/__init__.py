@@ -0,0 +1,14 @@
+# import class methods
+from .checkpoint import IngestionCheckpoint, Progress
+from .chunking import TokenChunker
+from .dedup import ClusterStore, ExactDeduplicator, MinHashDeduplicator
+from .extracts import read_extract, write_extract
+from .pipeline import (
+    Chunk,
+    IngestionPipeline,
+    IngestionReport,
+    SourceReport,
+    qdrant_index,
+    whole_record
+)
+from .sources import Record, Source, load_sources, normalize_text, read_source
@@ -0,0 +1,163 @@
+# -*- coding: utf-8 -*-
+
+# =================================================================================
+# osintgpt
+#
+# Author: @estebanpdl
+#
+# File: checkpoint.py
+# Description: How far ingestion got, per source, kept in the project store.
+#   Advanced only after a batch is indexed, so a crash costs the batches in
+#   flight rather than everything embedded before them.
+# =================================================================================
+
+# import modules
+import sqlite3
+import threading
+import time
+
+# import submodules
+from dataclasses import dataclass
+from pathlib import Path
+
+# type hints
+from typing import Callable, Optional, Union
+
+CHECKPOINT_TABLE = 'ingestion_checkpoints'
+
+
+# Progress class
+@dataclass(frozen=True)
+class Progress:
+    '''
+    One source's ingestion state.
+    '''
+    source: str
+    # What the source and the pipeline looked like when this run started.
+    # A different fingerprint means the positions below no longer apply.
+    fingerprint: str
+    # Records in the extract.
+    records: int = 0
+    # Chunks, counted in stream order, whose vectors are indexed.
+    committed: int = 0
+    complete: bool = False
+
+
+# IngestionCheckpoint class
+class IngestionCheckpoint:
+    '''
+    Progress per source, in a SQLite table beside the project's other state.
+    '''
+    def __init__(
+        self, path: Union[str, Path], clock: Callable[[], float] = time.time
+    ) -> None:
+        '''
+        Args:
+            path (Union[str, Path]): SQLite file, typically a project store.
+            clock (Callable[[], float]): Time source, for tests.
+        '''
+        self.path = Path(path)
+        self.clock = clock
+
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute(
+            f'''
+            CREATE TABLE IF NOT EXISTS {CHECKPOINT_TABLE} (
+                source TEXT NOT NULL PRIMARY KEY,
+                fingerprint TEXT NOT NULL,
+                records INTEGER NOT NULL DEFAULT 0,
+                committed INTEGER NOT NULL DEFAULT 0,
+                complete INTEGER NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL
+            )
+            '''
+        )
+        self.conn.commit()
+
+    # a checkpoint inside a project's store
+    @classmethod
+    def for_project(cls, project, **kwargs):
+        '''
+        Args:
+            project (Project): The project whose store holds the checkpoint.
+            **kwargs: IngestionCheckpoint options.
+
+        Returns:
+            IngestionCheckpoint: A checkpoint sharing the project's store.
+        '''
+        return cls(project.paths.store, **kwargs)
+
+    # a source's progress
+    def get(self, source: str) -> Optional[Progress]:
+        '''
+        Args:
+            source (str): Source name.
+
+        Returns:
+            Optional[Progress]: None when the source was never started.
+        '''
+        with self._lock:
+            row = self.conn.execute(
+                f'SELECT source, fingerprint, records, committed, complete '
+                f'FROM {CHECKPOINT_TABLE} WHERE source = ?',
+                (source,)
+            ).fetchone()
+
+        if row is None:
+            return None
+
+        return Progress(*row[:4], complete=bool(row[4]))
+
+    # begin a source from nothing
+    def start(self, source: str, fingerprint: str, records: int) -> Progress:
+        '''
+        Args:
+            source (str): Source name.
+            fingerprint (str): See Progress.fingerprint.
+            records (int): Records in the fresh extract.
+
+        Returns:
+            Progress: With nothing committed.
+        '''
+        with self._lock:
+            self.conn.execute(
+                f'''
+                INSERT OR REPLACE INTO {CHECKPOINT_TABLE}
+                    (source, fingerprint, records, committed, complete,
+                     updated_at)
+                VALUES (?, ?, ?, 0, 0, ?)
+                ''',
+                (source, fingerprint, records, self.clock())
+            )
+            self.conn.commit()
+
+        return Progress(source, fingerprint, records)
+
+    # record that chunks up to a position are indexed
+    def commit(self, source: str, committed: int, complete: bool = False) -> None:
+        '''
+        Args:
+            source (str): Source name, already started.
+            committed (int): Chunks indexed so far, in stream order.
+            complete (bool): True once the whole source is indexed.
+        '''
+        with self._lock:
+            self.conn.execute(
+                f'UPDATE {CHECKPOINT_TABLE} SET committed = ?, complete = ?, '
+                f'updated_at = ? WHERE source = ?',
+                (committed, int(complete), self.clock(), source)
+            )
+            self.conn.commit()
+
+    # forget a source, so the next run starts it again
+    def reset(self, source: str) -> None:
+        with self._lock:
+            self.conn.execute(
+                f'DELETE FROM {CHECKPOINT_TABLE} WHERE source = ?', (source,)
+            )
+            self.conn.commit()
+
+    def close(self) -> None:
+        self.conn.close()
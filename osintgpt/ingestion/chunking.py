@@ -0,0 +1,196 @@
+# -*- coding: utf-8 -*-
+
+# =================================================================================
+# osintgpt
+#
+# Author: @estebanpdl
+#
+# File: chunking.py
+# Description: Splitting long records into spans an embedding model takes
+#   whole. Sized in the model's own tokens, overlapping so a sentence cut at
+#   one edge is whole in the next span, and ending at a sentence where one
+#   is near. Each span keeps its character offsets in the record, for citing.
+# =================================================================================
+
+# import modules
+import re
+
+# import submodules
+from itertools import islice
+
+# type hints
+from typing import Iterable, List, Sequence, Tuple
+
+# import osintgpt utils
+from osintgpt.utils import DEFAULT_COUNT_THREADS, encoding_for_model
+
+from .pipeline import Chunk
+from .sources import Record
+
+# Tokens per span. Far inside every embedding model's context, and short
+# enough that one vector still stands for one passage rather than an article.
+DEFAULT_CHUNK_TOKENS = 512
+
+# Tokens a span repeats from the end of the one before it.
+DEFAULT_OVERLAP_TOKENS = 64
+
+# How far back from a span's token limit a sentence end is looked for, as a
+# share of the span. Past it, the span is cut at the limit mid-sentence.
+DEFAULT_BOUNDARY_WINDOW = 0.25
+
+# Records handed to one encode_ordinary_batch call.
+ENCODE_BATCH_SIZE = 256
+
+# Where a sentence or paragraph ends: the whitespace after terminal
+# punctuation, or a blank line.
+_SENTENCE_END = re.compile(r'(?<=[.!?…。！？])\s+|\n\s*\n')
+
+
+# TokenChunker class
+class TokenChunker:
+    '''
+    A chunker for IngestionPipeline that cuts records by token count.
+
+    Records that fit in one span come back whole, as with whole_record, so
+    a source of short posts costs one tokenization per post and nothing
+    more. Records are tokenized in batches across threads; only the ones
+    that need cutting are decoded again for offsets.
+    '''
+    def __init__(
+        self,
+        model: str,
+        chunk_tokens: int = DEFAULT_CHUNK_TOKENS,
+        overlap_tokens: int = DEFAULT_OVERLAP_TOKENS,
+        boundary_window: float = DEFAULT_BOUNDARY_WINDOW,
+        num_threads: int = DEFAULT_COUNT_THREADS
+    ) -> None:
+        '''
+        Args:
+            model (str): The embedding model, whose encoding counts tokens.
+            chunk_tokens (int): Most tokens in a span.
+            overlap_tokens (int): Tokens shared by consecutive spans.
+            boundary_window (float): Share of a span, from its end, searched \
+                for a sentence end to stop at. 0 always cuts at the limit.
+            num_threads (int): Encoding threads.
+
+        Raises:
+            ValueError: If the overlap leaves no room for new tokens.
+        '''
+        if chunk_tokens < 1:
+            raise ValueError('chunk_tokens must be at least 1')
+        if not 0 <= overlap_tokens < chunk_tokens:
+            raise ValueError('overlap_tokens must be below chunk_tokens')
+        if not 0 <= boundary_window < 1:
+            raise ValueError('boundary_window must be in [0, 1)')
+
+        self.model = model
+        self.chunk_tokens = chunk_tokens
+        self.overlap_tokens = overlap_tokens
+        self.boundary_window = boundary_window
+        self.num_threads = num_threads
+        self.encoding = encoding_for_model(model)
+
+    # what the pipeline's checkpoint fingerprint records
+    @property
+    def signature(self) -> str:
+        return (
+            f'tokens:{self.encoding.name}:{self.chunk_tokens}:'
+            f'{self.overlap_tokens}:{self.boundary_window}'
+        )
+
+    def __call__(self, record: Record) -> List[Chunk]:
+        return self.chunk_many([record])[0]
+
+    # chunk several records with one tokenization call
+    def chunk_many(self, records: Sequence[Record]) -> List[List[Chunk]]:
+        '''
+        Args:
+            records (Sequence[Record]): Records to chunk.
+
+        Returns:
+            List[List[Chunk]]: Each record's chunks, in record order.
+        '''
+        tokenized = self.encoding.encode_ordinary_batch(
+            [record.text for record in records], num_threads=self.num_threads
+        )
+
+        return [
+            self._chunks(record, tokens)
+            for record, tokens in zip(records, tokenized)
+        ]
+
+    # chunk a stream of records, tokenizing a batch at a time
+    def chunk_stream(
+        self, records: Iterable[Record], batch_size: int = ENCODE_BATCH_SIZE
+    ) -> Iterable[Chunk]:
+        records = iter(records)
+        while True:
+            batch = list(islice(records, batch_size))
+            if not batch:
+                return
+            for chunks in self.chunk_many(batch):
+                yield from chunks
+
+    def _chunks(self, record: Record, tokens: List[int]) -> List[Chunk]:
+        if len(tokens) <= self.chunk_tokens:
+            spans = [(0, len(record.text))]
+        else:
+            spans = self.spans(record.text, tokens)
+
+        chunks = []
+        for start, end in spans:
+            # Trimmed inside the span, so the offsets still cite it exactly.
+            text = record.text[start:end]
+            lead = len(text) - len(text.lstrip())
+            text = text.strip()
+            if not text:
+                continue
+            chunks.append(Chunk(
+                source=record.source, record_id=record.id, index=len(chunks),
+                text=text, start=start + lead, end=start + lead + len(text),
+                metadata=record.metadata
+            ))
+
+        return chunks
+
+    # character spans of a long text
+    def spans(self, text: str, tokens: List[int]) -> List[Tuple[int, int]]:
+        '''
+        Args:
+            text (str): The record's text.
+            tokens (List[int]): Its tokens.
+
+        Returns:
+            List[Tuple[int, int]]: (start, end) character offsets, in order, \
+                covering the text with the configured overlap.
+        '''
+        _, offsets = self.encoding.decode_with_offsets(tokens)
+        count = len(tokens)
+
+        # The token each sentence end falls before, ascending.
+        boundaries = []
+        token = 0
+        for match in _SENTENCE_END.finditer(text):
+            while token < count and offsets[token] < match.end():
+                token += 1
+            if 0 < token < count and (not boundaries or boundaries[-1] != token):
+                boundaries.append(token)
+
+        window = int(self.chunk_tokens * self.boundary_window)
+        spans, start, cursor = [], 0, 0
+        while True:
+            limit = start + self.chunk_tokens
+            if limit >= count:
+                spans.append((offsets[start], len(text)))
+                return spans
+
+            end = limit
+            while cursor < len(boundaries) and boundaries[cursor] <= limit:
+                cursor += 1
+            # The last sentence end before the limit, if it is close enough.
+            if cursor and boundaries[cursor - 1] >= limit - window \
+                    and boundaries[cursor - 1] > start:
+                end = boundaries[cursor - 1]
+
+            spans.append((offsets[start], offsets[end]))
+            start = max(end - self.overlap_tokens, start + 1)
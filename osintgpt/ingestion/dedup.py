@@ -0,0 +1,367 @@
+# -*- coding: utf-8 -*-
+
+# =================================================================================
+# osintgpt
+#
+# Author: @estebanpdl
+#
+# File: dedup.py
+# Description: Duplicate detection before embedding. Channels repost the same
+#   message with a changed link or emoji; MinHash over character shingles,
+#   bucketed with LSH, finds those near-copies in one pass so each cluster is
+#   embedded and indexed once, and the store remembers who belongs to whom.
+# =================================================================================
+
+# import modules
+import hashlib
+import sqlite3
+import threading
+
+# import submodules
+from functools import lru_cache
+from pathlib import Path
+
+# type hints
+from typing import TYPE_CHECKING, Dict, Iterable, List, Optional, Tuple, Union
+
+if TYPE_CHECKING:
+    import numpy as np
+
+CLUSTER_TABLE = 'ingestion_clusters'
+
+# Estimated Jaccard similarity of shingle sets at which two texts count as
+# one. Reposts with a swapped link or signature line sit well above it;
+# distinct messages on one topic sit well below.
+DEFAULT_THRESHOLD = 0.8
+
+# Hash functions per signature. The error of the similarity estimate falls
+# with the square root of this; 128 puts it near 0.04.
+DEFAULT_NUM_PERM = 128
+
+# Characters per shingle. Short enough that a one-word edit disturbs only a
+# handful of shingles, long enough that unrelated texts share few.
+DEFAULT_SHINGLE_SIZE = 5
+
+
+# ExactDeduplicator class
+class ExactDeduplicator:
+    '''
+    Recognizes a chunk whose text was already seen in the same source, so a
+    repost is embedded once.
+    '''
+    signature = 'exact'
+
+    def __init__(self) -> None:
+        self._seen: Dict[bytes, str] = {}
+
+    # the chunk this one duplicates
+    def assign(self, chunk) -> Optional[str]:
+        '''
+        Args:
+            chunk (Chunk): The next chunk of the source, in stream order.
+
+        Returns:
+            Optional[str]: Key of the earlier chunk with the same text, or \
+                None when this one is new and should be embedded.
+        '''
+        digest = hashlib.blake2b(
+            chunk.text.encode('utf-8'), digest_size=16
+        ).digest()
+
+        earlier = self._seen.get(digest)
+        if earlier is None:
+            self._seen[digest] = chunk.key
+
+        return earlier
+
+
+# split a signature into LSH bands
+@lru_cache(maxsize=None)
+def optimal_bands(threshold: float, num_perm: int) -> Tuple[int, int]:
+    '''
+    The (bands, rows) split whose S-curve best separates pairs above the
+    threshold from pairs below it, weighing misses and false candidates
+    equally. False candidates only cost a comparison; misses cost an
+    embedding, which is why the threshold is checked again on every
+    candidate rather than trusted to the buckets.
+
+    Args:
+        threshold (float): Similarity that should become a candidate.
+        num_perm (int): Signature length.
+
+    Returns:
+        Tuple[int, int]: Bands and rows per band, bands * rows <= num_perm.
+    '''
+    def area(bands: int, rows: int, low: float, high: float) -> float:
+        steps = 100
+        width = (high - low) / steps
+        total = 0.0
+        for step in range(steps):
+            s = low + (step + 0.5) * width
+            candidate = 1 - (1 - s ** rows) ** bands
+            total += (candidate if high <= threshold else 1 - candidate) * width
+
+        return total
+
+    best, best_error = (1, num_perm), float('inf')
+    for rows in range(1, num_perm + 1):
+        bands = num_perm // rows
+        error = (
+            area(bands, rows, 0.0, threshold)
+            + area(bands, rows, threshold, 1.0)
+        )
+        if error < best_error:
+            best, best_error = (bands, rows), error
+
+    return best
+
+
+# MinHashDeduplicator class
+class MinHashDeduplicator:
+    '''
+    Near-duplicate detection over a stream of chunks. Each chunk's character
+    shingles are reduced to a MinHash signature; signatures are bucketed by
+    band, and a chunk sharing a bucket with a cluster representative whose
+    estimated similarity reaches the threshold joins that cluster.
+
+    Only representatives are kept, a signature and a text digest each, so
+    memory grows with the clusters rather than with the reposts, edited or
+    not. An exact repeat of a representative skips the signature; any other
+    repost is signed again, and lands in the same cluster. Hashing is seeded and
+    independent of the interpreter, so a resumed run makes the decisions
+    the interrupted one made.
+    '''
+    def __init__(
+        self,
+        threshold: float = DEFAULT_THRESHOLD,
+        num_perm: int = DEFAULT_NUM_PERM,
+        shingle_size: int = DEFAULT_SHINGLE_SIZE,
+        seed: int = 1
+    ) -> None:
+        '''
+        Args:
+            threshold (float): Estimated Jaccard similarity, between 0 and \
+                1, from which two chunks are one cluster.
+            num_perm (int): Hash functions per signature.
+            shingle_size (int): Characters per shingle.
+            seed (int): Seeds the hash functions.
+        '''
+        import numpy as np
+
+        if not 0 < threshold <= 1:
+            raise ValueError('threshold must be in (0, 1]')
+        if num_perm < 1 or shingle_size < 1:
+            raise ValueError('num_perm and shingle_size must be at least 1')
+
+        self.threshold = threshold
+        self.num_perm = num_perm
+        self.shingle_size = shingle_size
+        self.seed = seed
+        self.bands, self.rows = optimal_bands(threshold, num_perm)
+
+        # Multiply-shift hashing: odd 64-bit multipliers, products left to
+        # wrap, the high 32 bits kept. No modulo, which is what dominated.
+        rng = np.random.default_rng(seed)
+        self._a = rng.integers(
+            0, 1 << 64, num_perm, dtype=np.uint64, endpoint=False
+        ) | np.uint64(1)
+        self._b = rng.integers(
+            0, 1 << 64, num_perm, dtype=np.uint64, endpoint=False
+        )
+
+        self._exact: Dict[bytes, str] = {}
+        self._buckets: List[Dict[bytes, List[int]]] = [
+            {} for _ in range(self.bands)
+        ]
+        self._keys: List[str] = []
+        self._signatures: List['np.ndarray'] = []
+
+    # what the pipeline's checkpoint fingerprint records
+    @property
+    def signature(self) -> str:
+        return (
+            f'minhash:{self.threshold}:{self.num_perm}:'
+            f'{self.shingle_size}:{self.seed}'
+        )
+
+    @property
+    def clusters(self) -> int:
+        return len(self._keys)
+
+    # 32-bit hashes of a text's shingles
+    def _shingles(self, text: str) -> 'np.ndarray':
+        import numpy as np
+
+        # Case and spacing are the cheapest edits a repost makes.
+        data = ' '.join(text.lower().split()).encode('utf-8')
+        k = self.shingle_size
+        if len(data) < k:
+            data = data.ljust(k, b'\0')
+
+        view = np.frombuffer(data, dtype=np.uint8).astype(np.uint64)
+        count = len(view) - k + 1
+        # A polynomial over each window's bytes, then Fibonacci hashing;
+        # uint64 products wrap, which is deterministic.
+        hashes = view[:count].copy()
+        for offset in range(1, k):
+            hashes *= np.uint64(257)
+            hashes += view[offset:offset + count]
+        hashes *= np.uint64(0x9E3779B97F4A7C15)
+
+        return np.unique(hashes >> np.uint64(32))
+
+    # the MinHash signature of a text
+    def minhash(self, text: str) -> 'np.ndarray':
+        '''
+        Args:
+            text (str): Text to sign.
+
+        Returns:
+            np.ndarray: num_perm uint32 values. The share of positions two \
+                signatures agree on estimates their texts' Jaccard similarity.
+        '''
+        import numpy as np
+
+        shingles = self._shingles(text)
+        permuted = np.multiply.outer(self._a, shingles)
+        permuted += self._b[:, np.newaxis]
+        permuted >>= np.uint64(32)
+
+        return permuted.min(axis=1).astype(np.uint32)
+
+    def _bands(self, signature: 'np.ndarray') -> Iterable[Tuple[int, bytes]]:
+        for band in range(self.bands):
+            start = band * self.rows
+            yield band, signature[start:start + self.rows].tobytes()
+
+    # the cluster a chunk belongs to
+    def assign(self, chunk) -> Optional[str]:
+        '''
+        Args:
+            chunk (Chunk): The next chunk of the source, in stream order.
+
+        Returns:
+            Optional[str]: Key of the representative of the cluster it \
+                joined, or None when it starts a cluster of its own and \
+                should be embedded.
+        '''
+        import numpy as np
+
+        digest = hashlib.blake2b(
+            chunk.text.encode('utf-8'), digest_size=16
+        ).digest()
+        if digest in self._exact:
+            return self._exact[digest]
+
+        signature = self.minhash(chunk.text)
+        candidates = set()
+        for band, key in self._bands(signature):
+            candidates.update(self._buckets[band].get(key, ()))
+
+        best, best_similarity = None, self.threshold
+        for candidate in sorted(candidates):
+            similarity = np.count_nonzero(
+                self._signatures[candidate] == signature
+            ) / self.num_perm
+            if similarity >= best_similarity:
+                best, best_similarity = candidate, similarity
+                if similarity == 1.0:
+                    break
+
+        if best is not None:
+            representative = self._keys[best]
+        else:
+            representative = None
+            position = len(self._keys)
+            self._keys.append(chunk.key)
+            self._signatures.append(signature)
+            for band, key in self._bands(signature):
+                self._buckets[band].setdefault(key, []).append(position)
+            self._exact[digest] = chunk.key
+
+        return representative
+
+
+# ClusterStore class
+class ClusterStore:
+    '''
+    Which indexed chunk stands for each duplicate that was not embedded, in
+    a SQLite table of the project store. A search hit on a representative
+    can be expanded to every post that said the same thing.
+    '''
+    def __init__(self, path: Union[str, Path]) -> None:
+        '''
+        Args:
+            path (Union[str, Path]): SQLite file, typically a project store.
+        '''
+        self.path = Path(path)
+
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute(
+            f'''
+            CREATE TABLE IF NOT EXISTS {CLUSTER_TABLE} (
+                chunk_id TEXT NOT NULL PRIMARY KEY,
+                source TEXT NOT NULL,
+                representative_id TEXT NOT NULL
+            )
+            '''
+        )
+        self.conn.execute(
+            f'CREATE INDEX IF NOT EXISTS {CLUSTER_TABLE}_representative '
+            f'ON {CLUSTER_TABLE} (representative_id)'
+        )
+        self.conn.commit()
+
+    # a store inside a project's store
+    @classmethod
+    def for_project(cls, project):
+        return cls(project.paths.store)
+
+    # record duplicates and their representatives
+    def add(self, source: str, members: Iterable[Tuple[str, str]]) -> None:
+        '''
+        Args:
+            source (str): Source name.
+            members (Iterable[Tuple[str, str]]): (chunk id, representative \
+                id) pairs. Recording a pair again replaces it.
+        '''
+        with self._lock, self.conn:
+            self.conn.executemany(
+                f'INSERT OR REPLACE INTO {CLUSTER_TABLE} '
+                f'(chunk_id, source, representative_id) VALUES (?, ?, ?)',
+                [(chunk_id, source, rep) for chunk_id, rep in members]
+            )
+
+    # the duplicates an indexed chunk stands for
+    def members(self, representative_id: str) -> List[str]:
+        with self._lock:
+            rows = self.conn.execute(
+                f'SELECT chunk_id FROM {CLUSTER_TABLE} '
+                f'WHERE representative_id = ? ORDER BY rowid',
+                (representative_id,)
+            ).fetchall()
+
+        return [row[0] for row in rows]
+
+    # the indexed chunk standing for a duplicate
+    def representative_of(self, chunk_id: str) -> Optional[str]:
+        with self._lock:
+            row = self.conn.execute(
+                f'SELECT representative_id FROM {CLUSTER_TABLE} '
+                f'WHERE chunk_id = ?',
+                (chunk_id,)
+            ).fetchone()
+
+        return row[0] if row else None
+
+    # forget a source's clusters, when it is ingested from scratch
+    def reset(self, source: str) -> None:
+        with self._lock, self.conn:
+            self.conn.execute(
+                f'DELETE FROM {CLUSTER_TABLE} WHERE source = ?', (source,)
+            )
+
+    def close(self) -> None:
+        self.conn.close()
@@ -0,0 +1,83 @@
+# -*- coding: utf-8 -*-
+
+# =================================================================================
+# osintgpt
+#
+# Author: @estebanpdl
+#
+# File: extracts.py
+# Description: A project's extracts/ directory — every source normalized into
+#   one JSON line per record, whatever its original format, so the stages
+#   after it read a single shape and a re-run reads the same records in the
+#   same order.
+# =================================================================================
+
+# import modules
+import json
+
+# import submodules
+from pathlib import Path
+
+# type hints
+from typing import Iterator
+
+# import osintgpt projects
+from osintgpt.projects.paths import ProjectPaths
+from osintgpt.projects.toml_io import atomic_writer
+
+from .sources import Record, Source, read_source
+
+EXTRACT_SUFFIX = '.jsonl'
+
+
+# where a source's extract lives
+def extract_path(paths: ProjectPaths, source: Source) -> Path:
+    return paths.extracts / f'{source.name}{EXTRACT_SUFFIX}'
+
+
+# normalize a source into extracts/
+def write_extract(paths: ProjectPaths, source: Source) -> int:
+    '''
+    Streams the source, so its size is bounded by disk rather than memory.
+    The extract is replaced whole: a crash mid-write leaves the previous one.
+
+    Args:
+        paths (ProjectPaths): The project's paths.
+        source (Source): Source to read.
+
+    Returns:
+        int: Records written.
+    '''
+    written = 0
+    with atomic_writer(extract_path(paths, source)) as handle:
+        for record in read_source(source, paths.root):
+            handle.write(json.dumps(
+                {'id': record.id, 'text': record.text, 'metadata': record.metadata},
+                ensure_ascii=False
+            ))
+            handle.write('\n')
+            written += 1
+
+    return written
+
+
+# stream the records of an extract
+def read_extract(paths: ProjectPaths, source: Source) -> Iterator[Record]:
+    '''
+    Args:
+        paths (ProjectPaths): The project's paths.
+        source (Source): Source the extract was written from.
+
+    Raises:
+        FileNotFoundError: If the source has not been extracted.
+
+    Returns:
+        Iterator[Record]: Records in the order they were written.
+    '''
+    with open(extract_path(paths, source), encoding='utf-8') as handle:
+        for line in handle:
+            row = json.loads(line)
+            yield Record(
+                source=source.name, id=row['id'], text=row['text'],
+                metadata=row.get('metadata', {})
+            )
@@ -0,0 +1,434 @@
+# -*- coding: utf-8 -*-
+
+# =================================================================================
+# osintgpt
+#
+# Author: @estebanpdl
+#
+# File: pipeline.py
+# Description: Ingestion from sources.toml to a vector index — extract, chunk,
+#   deduplicate, embed in parallel batches, index — checkpointed per batch so
+#   a run that dies resumes where it stopped instead of embedding it all again.
+# =================================================================================
+
+# import modules
+import hashlib
+import uuid
+
+# import submodules
+from collections import deque
+from concurrent.futures import Future, ThreadPoolExecutor
+from dataclasses import dataclass, field
+
+# type hints
+from typing import (
+    Any, Callable, Deque, Dict, Iterable, Iterator, List, Optional, Tuple
+)
+
+# import osintgpt llm
+from osintgpt.llm.base import EmbeddingProvider
+
+# import osintgpt projects
+from osintgpt.projects.project import Project
+
+from .checkpoint import IngestionCheckpoint, Progress
+from .dedup import ClusterStore, MinHashDeduplicator
+from .extracts import extract_path, read_extract, write_extract
+from .sources import Record, Source, load_sources, source_fingerprint
+
+# Texts per embedding request. Providers accept more, but a smaller batch is
+# less to redo when a run dies, and keeps several requests in flight.
+DEFAULT_BATCH_SIZE = 256
+
+# Embedding requests in flight at once. Each waits on the network, so threads
+# overlap them; the shared rate limiter still holds the account's limits.
+DEFAULT_MAX_WORKERS = 4
+
+# Namespace of chunk ids. Derived, not random, so re-indexing a chunk
+# overwrites its point instead of adding a second one.
+CHUNK_NAMESPACE = uuid.uuid5(
+    uuid.NAMESPACE_URL, 'https://github.com/estebanpdl/osintgpt/chunks'
+)
+
+
+# Chunk class
+@dataclass(frozen=True)
+class Chunk:
+    '''
+    A span of one record, the unit that is embedded and indexed.
+    '''
+    source: str
+    record_id: str
+    # Position among the record's chunks.
+    index: int
+    text: str
+    # Character offsets of the span in the record's text, for citing it.
+    start: int
+    end: int
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+    # unique within a project
+    @property
+    def key(self) -> str:
+        return f'{self.source}/{self.record_id}/{self.index}'
+
+
+# Splits a record into chunks, in order.
+Chunker = Callable[[Record], Iterable[Chunk]]
+
+# Stores a batch: (point ids, vectors, payloads), all in the same order.
+# Must overwrite by id, because a resumed run re-sends the batches that were
+# in flight when the last one died. An index may also have a `forget(match)`
+# attribute that deletes the points whose payload holds every value in
+# `match`; the pipeline calls it to drop a changed source's old points. With
+# an index that lacks it, those points stay, and the caller must drop them.
+VectorIndex = Callable[
+    [List[str], List[List[float]], List[Dict[str, Any]]], None
+]
+
+# A batch in flight: its embedding, the stream position it ends at, its
+# chunks, and the duplicates seen since the batch before it.
+_Batch = Tuple[Future, int, List[Chunk], List[Tuple[str, str]]]
+
+
+# one chunk per record
+def whole_record(record: Record) -> List[Chunk]:
+    '''
+    The default chunker, for sources of short texts such as channel posts.
+
+    Args:
+        record (Record): Record to chunk.
+
+    Returns:
+        List[Chunk]: The record's whole text as a single chunk.
+    '''
+    return [Chunk(
+        source=record.source, record_id=record.id, index=0, text=record.text,
+        start=0, end=len(record.text), metadata=record.metadata
+    )]
+
+
+# SourceReport class
+@dataclass
+class SourceReport:
+    '''
+    What one source's ingestion did.
+    '''
+    source: str
+    records: int = 0
+    # Chunks the chunker produced in this run, duplicates included.
+    chunks: int = 0
+    # Chunks that joined an earlier chunk's cluster instead of being embedded.
+    duplicates: int = 0
+    embedded: int = 0
+    # Chunks an earlier run had already indexed.
+    resumed: int = 0
+    # True when an earlier run finished the source and nothing changed.
+    up_to_date: bool = False
+
+
+# IngestionReport class
+@dataclass
+class IngestionReport:
+    '''
+    What a run did, per source.
+    '''
+    sources: List[SourceReport] = field(default_factory=list)
+
+    @property
+    def embedded(self) -> int:
+        return sum(report.embedded for report in self.sources)
+
+    @property
+    def duplicates(self) -> int:
+        return sum(report.duplicates for report in self.sources)
+
+
+# what a stage contributes to a fingerprint
+def _signature(stage: Any) -> str:
+    return (
+        getattr(stage, 'signature', None)
+        or getattr(stage, '__qualname__', None)
+        or type(stage).__qualname__
+    )
+
+
+# an index that writes to a Qdrant collection
+def qdrant_index(
+    engine, collection_name: str, vector_name: str = 'main'
+) -> VectorIndex:
+    '''
+    Args:
+        engine (Qdrant): Engine holding the collection.
+        collection_name (str): Collection, already created.
+        vector_name (str): Named vector to store under.
+
+    Returns:
+        VectorIndex: Upserts by chunk id, and forgets by payload.
+    '''
+    def index(ids, vectors, payloads):
+        engine.add_vectors(
+            collection_name, vectors, vector_name, payloads, ids=ids
+        )
+
+    def forget(match):
+        engine.delete_points(collection_name, match)
+
+    index.forget = forget
+    return index
+
+
+# IngestionPipeline class
+class IngestionPipeline:
+    '''
+    Ingests a project's sources into a vector index.
+
+    Per source: the source is normalized into extracts/, the extract is
+    streamed through the chunker and the deduplicator, new chunks are
+    embedded in batches on a thread pool, and each batch is indexed and then
+    checkpointed in stream order. Only `max_workers` batches are held at a
+    time, so memory does not grow with the source.
+
+    A rerun skips sources that finished unchanged and resumes the others
+    after their last checkpointed batch. A source that changed on disk, or a
+    pipeline with a different model, chunker or deduplicator, starts over,
+    after the index forgets the source's old points; see VectorIndex.
+    '''
+    def __init__(
+        self,
+        project: Project,
+        embedder: EmbeddingProvider,
+        index: VectorIndex,
+        chunker: Chunker = whole_record,
+        deduplicator: Optional[Callable[[], Any]] = MinHashDeduplicator,
+        batch_size: int = DEFAULT_BATCH_SIZE,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        checkpoint: Optional[IngestionCheckpoint] = None,
+        clusters: Optional[ClusterStore] = None
+    ) -> None:
+        '''
+        Args:
+            project (Project): Project whose sources.toml is read.
+            embedder (EmbeddingProvider): Embeds the chunks; give it the \
+                project's recorder and limiter to hold it to the budget.
+            index (VectorIndex): Stores each batch, e.g. qdrant_index(...).
+            chunker (Chunker): Splits records. Defaults to one chunk each; \
+                chunking.TokenChunker cuts long documents by token count.
+            deduplicator (Callable[[], Any], optional): Builds a fresh \
+                deduplicator per source — anything with assign(chunk) and a \
+                `signature` — e.g. functools.partial(MinHashDeduplicator, \
+                threshold=0.9), or ExactDeduplicator for identical texts \
+                only. None embeds every chunk.
+            batch_size (int): Chunks per embedding request.
+            max_workers (int): Requests in flight.
+            checkpoint (IngestionCheckpoint, optional): Defaults to one in \
+                the project store.
+            clusters (ClusterStore, optional): Where duplicates are linked \
+                to the chunk indexed for them. Defaults to the project store.
+        '''
+        if batch_size < 1 or max_workers < 1:
+            raise ValueError('batch_size and max_workers must be at least 1')
+
+        self.project = project
+        self.embedder = embedder
+        self.index = index
+        self.chunker = chunker
+        self.deduplicator = deduplicator
+        self.batch_size = batch_size
+        self.max_workers = max_workers
+        self.checkpoint = checkpoint or IngestionCheckpoint.for_project(project)
+        self.clusters = clusters or ClusterStore.for_project(project)
+
+    # the id a chunk is indexed under
+    def chunk_id(self, chunk: Chunk) -> str:
+        return self._id_of(chunk.key)
+
+    def _id_of(self, key: str) -> str:
+        return str(uuid.uuid5(CHUNK_NAMESPACE, f'{self.project.id}/{key}'))
+
+    def _payload(self, chunk: Chunk) -> Dict[str, Any]:
+        return {
+            'text': chunk.text,
+            'project': self.project.id,
+            'source': chunk.source,
+            'record_id': chunk.record_id,
+            'chunk': chunk.index,
+            'start': chunk.start,
+            'end': chunk.end,
+            'metadata': chunk.metadata
+        }
+
+    def _fingerprint(self, source: Source) -> str:
+        parts = [
+            source_fingerprint(source, self.project.paths.root),
+            self.embedder.model,
+            str(getattr(self.embedder, 'dimensions', None)),
+            _signature(self.chunker),
+            # From an instance: a partial carries its options there.
+            _signature(self.deduplicator()) if self.deduplicator else 'none'
+        ]
+
+        return hashlib.sha256('\0'.join(parts).encode('utf-8')).hexdigest()
+
+    # where to pick a source up
+    def _progress(self, source: Source) -> Progress:
+        fingerprint = self._fingerprint(source)
+        progress = self.checkpoint.get(source.name)
+        paths = self.project.paths
+
+        if progress is None or progress.fingerprint != fingerprint:
+            # The new run may chunk differently, so points of the old run
+            # would linger under ids nothing overwrites.
+            forget = getattr(self.index, 'forget', None)
+            if progress is not None and forget is not None:
+                forget({'project': self.project.id, 'source': source.name})
+            records = write_extract(paths, source)
+            self.clusters.reset(source.name)
+            return self.checkpoint.start(source.name, fingerprint, records)
+
+        # Extraction is deterministic, so a lost extract of an unchanged
+        # source can be rebuilt without losing the positions.
+        if not progress.complete and not extract_path(paths, source).exists():
+            write_extract(paths, source)
+
+        return progress
+
+    def _chunks(self, source: Source) -> Iterator[Chunk]:
+        records = read_extract(self.project.paths, source)
+        # A chunker that tokenizes does it a batch of records at a time.
+        stream = getattr(self.chunker, 'chunk_stream', None)
+        if stream is not None:
+            yield from stream(records)
+            return
+
+        for record in records:
+            yield from self.chunker(record)
+
+    def _embed(self, chunks: List[Chunk]) -> List[List[float]]:
+        vectors = self.embedder.embed([chunk.text for chunk in chunks])
+        if len(vectors) != len(chunks):
+            raise ValueError(
+                f'{len(chunks)} texts sent, {len(vectors)} vectors returned'
+            )
+
+        return vectors
+
+    # index the oldest batch in flight and checkpoint past it
+    def _settle(
+        self,
+        source: Source,
+        window: Deque[_Batch],
+        report: SourceReport
+    ) -> None:
+        future, position, chunks, members = window.popleft()
+        vectors = future.result()
+        self.index(
+            [self.chunk_id(chunk) for chunk in chunks],
+            vectors,
+            [self._payload(chunk) for chunk in chunks]
+        )
+        # Membership before the checkpoint: rewriting it on a resume is
+        # harmless, losing it is not.
+        self.clusters.add(source.name, members)
+        self.checkpoint.commit(source.name, position)
+        report.embedded += len(chunks)
+
+    # ingest one source
+    def ingest_source(self, source: Source) -> SourceReport:
+        '''
+        Args:
+            source (Source): A source of this project.
+
+        Returns:
+            SourceReport: What was done.
+        '''
+        progress = self._progress(source)
+        report = SourceReport(source=source.name, records=progress.records)
+        if progress.complete:
+            report.up_to_date = True
+            return report
+
+        deduplicator = self.deduplicator() if self.deduplicator else None
+        window: Deque[_Batch] = deque()
+        batch: List[Chunk] = []
+        # Duplicates seen since the last batch was sent, recorded with it.
+        members: List[Tuple[str, str]] = []
+        position = 0
+
+        executor = ThreadPoolExecutor(max_workers=self.max_workers)
+        try:
+            for chunk in self._chunks(source):
+                position += 1
+                report.chunks += 1
+                # Chunks already indexed still pass the deduplicator, so it
+                # knows what a later chunk may duplicate.
+                representative = (
+                    deduplicator.assign(chunk) if deduplicator else None
+                )
+                if position <= progress.committed:
+                    report.resumed += 1
+                    continue
+                if representative is not None:
+                    report.duplicates += 1
+                    members.append((
+                        self.chunk_id(chunk), self._id_of(representative)
+                    ))
+                    continue
+
+                batch.append(chunk)
+                if len(batch) == self.batch_size:
+                    window.append((
+                        executor.submit(self._embed, batch), position, batch,
+                        members
+                    ))
+                    batch, members = [], []
+                    if len(window) >= self.max_workers:
+                        self._settle(source, window, report)
+
+            if batch:
+                window.append((
+                    executor.submit(self._embed, batch), position, batch,
+                    members
+                ))
+                members = []
+            while window:
+                self._settle(source, window, report)
+        finally:
+            # On failure, requests not yet started are dropped; the
+            # checkpoint already holds everything that was indexed.
+            executor.shutdown(wait=True, cancel_futures=True)
+
+        self.clusters.add(source.name, members)
+        self.checkpoint.commit(source.name, position, complete=True)
+
+        return report
+
+    # ingest every source, or the named ones
+    def run(self, names: Optional[Iterable[str]] = None) -> IngestionReport:
+        '''
+        Args:
+            names (Iterable[str], optional): Sources to ingest, by name. \
+                Defaults to every source in sources.toml.
+
+        Raises:
+            KeyError: Naming every source sources.toml does not list, before \
+                any is read.
+
+        Returns:
+            IngestionReport: One report per source, in the order ingested.
+        '''
+        sources = load_sources(self.project.paths)
+        if names is not None:
+            by_name = {source.name: source for source in sources}
+            names = list(names)
+            missing = [name for name in names if name not in by_name]
+            if missing:
+                raise KeyError(
+                    f'no source {", ".join(map(repr, missing))} in '
+                    f'{self.project.paths.sources}'
+                )
+            sources = [by_name[name] for name in names]
+
+        return IngestionReport(
+            sources=[self.ingest_source(source) for source in sources]
+        )
@@ -0,0 +1,313 @@
+# -*- coding: utf-8 -*-
+
+# =================================================================================
+# osintgpt
+#
+# Author: @estebanpdl
+#
+# File: sources.py
+# Description: What a project ingests — the sources listed in sources.toml —
+#   and reading them one record at a time, so a dump larger than memory
+#   streams through.
+# =================================================================================
+
+# import modules
+import csv
+import hashlib
+import json
+import re
+import unicodedata
+
+# import submodules
+from dataclasses import dataclass, field
+from pathlib import Path
+
+# type hints
+from typing import Any, Dict, Iterator, List, Tuple, Union
+
+# import osintgpt projects
+from osintgpt.projects.paths import ProjectPaths
+from osintgpt.projects.toml_io import read_toml
+
+# import osintgpt utils
+from osintgpt.utils import allow_long_csv_fields
+
+CSV = 'csv'
+JSONL = 'jsonl'
+TEXT = 'text'
+FORMATS = (CSV, JSONL, TEXT)
+
+# Format from extension when sources.toml does not say. A directory is read
+# as text files.
+EXTENSIONS = {
+    '.csv': CSV,
+    '.jsonl': JSONL,
+    '.ndjson': JSONL,
+    '.txt': TEXT,
+    '.md': TEXT
+}
+
+# Files a text source reads from a directory.
+TEXT_SUFFIXES = ('.txt', '.md')
+
+# Control characters other than tab and newline; exports from messaging apps
+# carry them, and they only cost tokens.
+_CONTROL = re.compile(r'[\x00-\x08\x0b\x0c\x0e-\x1f\x7f]')
+_TRAILING_SPACE = re.compile(r'[ \t]+\n')
+_BLANK_LINES = re.compile(r'\n{3,}')
+
+
+# Source class
+@dataclass(frozen=True)
+class Source:
+    '''
+    One entry of sources.toml: a file or directory, and how to read it.
+    '''
+    name: str
+    path: str
+    format: str = ''
+    # Column or key holding the text, for csv and jsonl.
+    text_field: str = 'text'
+    # Column or key holding a stable record id. Empty numbers records by
+    # position, which stays stable only while the source is append-only. A
+    # row with no id of its own is numbered too, as '#<position>'.
+    id_field: str = ''
+    # Further columns or keys carried into each record's metadata.
+    metadata_fields: Tuple[str, ...] = ()
+
+    # the format, from the entry or the path
+    @property
+    def resolved_format(self) -> str:
+        if self.format:
+            return self.format
+
+        return EXTENSIONS.get(Path(self.path).suffix.lower(), TEXT)
+
+    # the source's location, relative paths taken from the project root
+    def location(self, root: Path) -> Path:
+        path = Path(self.path).expanduser()
+
+        return path if path.is_absolute() else Path(root) / path
+
+
+# Record class
+@dataclass(frozen=True)
+class Record:
+    '''
+    One normalized document from a source.
+    '''
+    source: str
+    id: str
+    text: str
+    metadata: Dict[str, Any] = field(default_factory=dict)
+
+
+# tidy text the same way wherever it came from
+def normalize_text(text: str) -> str:
+    '''
+    Args:
+        text (str): Raw text.
+
+    Returns:
+        str: NFC-normalized, with Unix newlines, no control characters, no \
+            trailing spaces on a line, at most one blank line in a row, and \
+            trimmed.
+    '''
+    text = unicodedata.normalize('NFC', text)
+    text = text.replace('\r\n', '\n').replace('\r', '\n')
+    text = _CONTROL.sub('', text)
+    text = _TRAILING_SPACE.sub('\n', text)
+    text = _BLANK_LINES.sub('\n\n', text)
+
+    return text.strip()
+
+
+# read sources.toml
+def load_sources(paths: Union[ProjectPaths, Path, str]) -> List[Source]:
+    '''
+    Sources are `[[source]]` tables, e.g.
+
+        [[source]]
+        name = "channel-a"
+        path = "raw/channel_a.csv"
+        text_field = "message"
+        id_field = "message_id"
+        metadata_fields = ["date", "views"]
+
+    Args:
+        paths (Union[ProjectPaths, Path, str]): The project's paths, or the \
+            sources.toml file itself.
+
+    Raises:
+        ValueError: If an entry lacks a name or path, names an unknown \
+            format, or reuses a name.
+
+    Returns:
+        List[Source]: In file order; [] when there is no sources.toml.
+    '''
+    if isinstance(paths, ProjectPaths):
+        paths = paths.sources
+
+    sources: List[Source] = []
+    seen = set()
+    for entry in read_toml(paths).get('source', []):
+        name, path = entry.get('name'), entry.get('path')
+        if not name or not path:
+            raise ValueError(f'every source needs a name and a path: {entry}')
+        if name in seen:
+            raise ValueError(f'source {name!r} is listed twice')
+        if entry.get('format', '') not in ('',) + FORMATS:
+            raise ValueError(
+                f'source {name!r} has unknown format {entry["format"]!r}; '
+                f'known: {", ".join(FORMATS)}'
+            )
+        seen.add(name)
+
+        sources.append(Source(
+            name=name,
+            path=path,
+            format=entry.get('format', ''),
+            text_field=entry.get('text_field', 'text'),
+            id_field=entry.get('id_field', ''),
+            metadata_fields=tuple(entry.get('metadata_fields', ()))
+        ))
+
+    return sources
+
+
+# what a source looks like on disk right now
+def source_fingerprint(source: Source, root: Path) -> str:
+    '''
+    Args:
+        source (Source): Source to inspect.
+        root (Path): Project root.
+
+    Raises:
+        FileNotFoundError: If the source is missing.
+
+    Returns:
+        str: Changes when any file the source reads is added, removed or \
+            modified; built from names, sizes and mtimes, not contents.
+    '''
+    location = source.location(root)
+    if not location.exists():
+        raise FileNotFoundError(f'source {source.name!r}: no {location}')
+
+    digest = hashlib.sha256(repr(source).encode('utf-8'))
+    for path in _files(source, location):
+        stat = path.stat()
+        digest.update(
+            f'{path.relative_to(location) if path != location else ""}'
+            f'\0{stat.st_size}\0{stat.st_mtime_ns}\n'.encode('utf-8')
+        )
+
+    return digest.hexdigest()
+
+
+def _files(source: Source, location: Path) -> List[Path]:
+    if location.is_file():
+        return [location]
+
+    if source.resolved_format != TEXT:
+        raise ValueError(
+            f'source {source.name!r}: a directory can only be read as {TEXT}'
+        )
+
+    return sorted(
+        path for path in location.rglob('*')
+        if path.is_file() and path.suffix.lower() in TEXT_SUFFIXES
+    )
+
+
+def _metadata(source: Source, row: Dict[str, Any]) -> Dict[str, Any]:
+    return {key: row[key] for key in source.metadata_fields if key in row}
+
+
+def _csv_rows(path: Path) -> Iterator[Dict[str, Any]]:
+    allow_long_csv_fields()
+    with open(path, newline='', encoding='utf-8-sig') as handle:
+        yield from csv.DictReader(handle)
+
+
+def _jsonl_rows(path: Path) -> Iterator[Dict[str, Any]]:
+    with open(path, encoding='utf-8') as handle:
+        for line_number, line in enumerate(handle, 1):
+            if not line.strip():
+                continue
+            try:
+                row = json.loads(line)
+            except json.JSONDecodeError as error:
+                raise ValueError(
+                    f'{path}:{line_number}: not a JSON object ({error})'
+                ) from error
+            if not isinstance(row, dict):
+                raise ValueError(
+                    f'{path}:{line_number}: not a JSON object '
+                    f'({type(row).__name__})'
+                )
+            yield row
+
+
+# stream a source's records
+def read_source(source: Source, root: Path) -> Iterator[Record]:
+    '''
+    Args:
+        source (Source): Source to read.
+        root (Path): Project root, for relative paths.
+
+    Raises:
+        FileNotFoundError: If the source is missing.
+        ValueError: If a jsonl line is not a JSON object, a csv or jsonl \
+            row lacks the text field, or two rows share a record id. Chunk \
+            ids derive from record ids, so a repeated id would overwrite the \
+            earlier row's points.
+
+    Returns:
+        Iterator[Record]: Normalized records, in source order. Rows whose \
+            text normalizes to nothing are skipped.
+    '''
+    location = source.location(root)
+    if not location.exists():
+        raise FileNotFoundError(f'source {source.name!r}: no {location}')
+
+    files = _files(source, location)
+    kind = source.resolved_format
+    for path in files:
+        if kind == TEXT:
+            text = normalize_text(path.read_text(encoding='utf-8'))
+            if text:
+                record_id = (
+                    path.relative_to(location).as_posix()
+                    if path != location else path.name
+                )
+                yield Record(source=source.name, id=record_id, text=text)
+            continue
+
+        rows = _csv_rows(path) if kind == CSV else _jsonl_rows(path)
+        seen = set()
+        for position, row in enumerate(rows):
+            if source.text_field not in row:
+                raise ValueError(
+                    f'source {source.name!r}: row {position} has no '
+                    f'{source.text_field!r} field'
+                )
+            text = normalize_text(str(row[source.text_field] or ''))
+            if not text:
+                continue
+            if not source.id_field:
+                record_id = str(position)
+            elif row.get(source.id_field) not in (None, ''):
+                record_id = str(row[source.id_field])
+            else:
+                # Marked, so it cannot pass for another row's real id.
+                record_id = f'#{position}'
+            if record_id in seen:
+                raise ValueError(
+                    f'source {source.name!r}: row {position} repeats record '
+                    f'id {record_id!r}'
+                )
+            seen.add(record_id)
+            yield Record(
+                source=source.name, id=record_id, text=text,
+                metadata=_metadata(source, row)
+            )
@@ -18,15 +18,22 @@ from osintgpt.config import Settings
 
 from .anthropic_native import AnthropicGeneration
 from .base import EmbeddingProvider, GenerationProvider
+from .batch import BatchJob
+from .budget import BudgetRecorder
+from .cache import CachedGeneration, CompletionCache
+from .fake import FakeBehaviour, FakeEmbedding, FakeGeneration
+from .latency import Histogram, Timing, prometheus_text
 from .local import SentenceTransformerEmbedding
 from .locality import LocalityReport, ProviderLocality, audit_locality
-from .usage import Usage, UsageRecorder
+from .ratelimit import RateLimit, RateLimiter, shared_limiter
+from .usage import Usage, UsageRecorder, UsageTotals
 from .openai_compat import OpenAICompatEmbedding, OpenAICompatGeneration
 from .registry import (
     ANTHROPIC,
     EMBEDDING_BACKENDS,
     GENERATION_BACKENDS,
     BackendSpec,
+    FAKE,
     OPENAI_COMPAT,
     SENTENCE_TRANSFORMERS,
     backend_spec,
@@ -35,17 +42,31 @@ from .registry import (
 
 __all__ = [
     'BackendSpec',
+    'BatchJob',
+    'BudgetRecorder',
+    'CachedGeneration',
+    'CompletionCache',
     'LocalityReport',
     'ProviderLocality',
+    'RateLimit',
+    'RateLimiter',
+    'Timing',
     'audit_locality',
     'EMBEDDING_BACKENDS',
     'EmbeddingProvider',
+    'FakeBehaviour',
+    'FakeEmbedding',
+    'FakeGeneration',
     'GENERATION_BACKENDS',
     'GenerationProvider',
+    'Histogram',
     'Usage',
     'UsageRecorder',
+    'UsageTotals',
     'build_embedding_provider',
-    'build_generation_provider'
+    'build_generation_provider',
+    'prometheus_text',
+    'shared_limiter'
 ]
 
 
@@ -54,7 +75,9 @@ def build_embedding_provider(
     provider: str,
     settings: Settings,
     model: Optional[str] = None,
-    recorder: Optional[UsageRecorder] = None
+    recorder: Optional[UsageRecorder] = None,
+    limiter: Optional[RateLimiter] = None,
+    **options
 ) -> EmbeddingProvider:
     '''
     Construct the embedding backend named by `provider`.
@@ -65,9 +88,16 @@ def build_embedding_provider(
         model (str, optional): Model name. Defaults to the configured \
             embedding model, then the backend's own default — which differs \
             per backend, since a local model name is not an OpenAI one.
+        recorder (UsageRecorder, optional): Collects what each call consumed.
+        limiter (RateLimiter, optional): Holds calls to the account's limits. \
+            Defaults to the process-wide shared limiter.
+        **options: Passed to the backend's class, for settings only it \
+            has, e.g. batch_size, or latency= on the fake backend. \
+            dimensions= overrides settings.embedding_dimensions.
 
     Raises:
-        ValueError: If the provider id is not registered.
+        ValueError: If the provider id is not registered, or the \
+            dimensions are wider than the model produces.
         MissingEnvironmentVariableError: If its credential is missing.
 
     Returns:
@@ -83,13 +113,27 @@ def build_embedding_provider(
             'model= or set one in Settings'
         )
 
+    if settings.embedding_dimensions is not None:
+        options.setdefault('dimensions', settings.embedding_dimensions)
+
     if spec.kind == SENTENCE_TRANSFORMERS:
-        return SentenceTransformerEmbedding(model=model, recorder=recorder)
+        return SentenceTransformerEmbedding(
+            model=model, recorder=recorder, **options
+        )
+
+    if spec.kind == FAKE:
+        return FakeEmbedding(
+            model=model, recorder=recorder,
+            limiter=limiter or shared_limiter(), **options
+        )
 
     return OpenAICompatEmbedding(
         model=model, api_key=api_key, base_url=base_url,
-        discovers_models=spec.discovers_models,
-        billable=not spec.local, provider=provider, recorder=recorder
+        discovers_models=spec.discovers_models, batches=spec.batches,
+        billable=not spec.local, provider=provider, recorder=recorder,
+        limiter=limiter or shared_limiter(),
+        base64_embeddings=spec.base64_embeddings,
+        shortens=spec.shortens_embeddings, **options
     )
 
 
@@ -98,7 +142,9 @@ def build_generation_provider(
     provider: str,
     settings: Settings,
     model: Optional[str] = None,
-    recorder: Optional[UsageRecorder] = None
+    recorder: Optional[UsageRecorder] = None,
+    limiter: Optional[RateLimiter] = None,
+    **options
 ) -> GenerationProvider:
     '''
     Construct the generation backend named by `provider`.
@@ -107,7 +153,12 @@ def build_generation_provider(
         provider (str): Provider id from GENERATION_BACKENDS.
         settings (Settings): Configuration carrying credentials.
         model (str, optional): Model name. Defaults to the configured chat \
-            model.
+            model, then the backend's own default where it has one.
+        recorder (UsageRecorder, optional): Collects what each call consumed.
+        limiter (RateLimiter, optional): Holds calls to the account's limits. \
+            Defaults to the process-wide shared limiter.
+        **options: Passed to the backend's class, for settings only it \
+            has, e.g. batch_size, or latency= on the fake backend.
 
     Raises:
         ValueError: If the provider id is not registered, or no model is set.
@@ -119,7 +170,7 @@ def build_generation_provider(
     spec, base_url, api_key = connection_for(
         provider, GENERATION_BACKENDS, 'generation', settings
     )
-    model = model or settings.openai_gpt_model
+    model = model or settings.openai_gpt_model or spec.default_model
     if not model:
         raise ValueError(
             f'no model given for the {provider} generation provider; pass '
@@ -128,11 +179,19 @@ def build_generation_provider(
 
     if spec.kind == ANTHROPIC:
         return AnthropicGeneration(
-            model=model, api_key=api_key, recorder=recorder
+            model=model, api_key=api_key, recorder=recorder,
+            limiter=limiter or shared_limiter(), **options
+        )
+
+    if spec.kind == FAKE:
+        return FakeGeneration(
+            model=model, recorder=recorder,
+            limiter=limiter or shared_limiter(), **options
         )
 
     return OpenAICompatGeneration(
         model=model, api_key=api_key, base_url=base_url,
-        discovers_models=spec.discovers_models,
-        billable=not spec.local, provider=provider, recorder=recorder
+        discovers_models=spec.discovers_models, batches=spec.batches,
+        billable=not spec.local, provider=provider, recorder=recorder,
+        limiter=limiter or shared_limiter(), **options
     )
@@ -11,15 +11,22 @@
 # =================================================================================
 
 # type hints
-from typing import List, Optional
+from typing import List, Optional, Tuple
 
+from . import batch
 from .base import GenerationProvider
+from .ratelimit import RateLimiter
 from .usage import Usage, UsageRecorder
 
 # The API requires an explicit ceiling. Too low truncates a reply mid-thought
 # and costs a retry, so this is generous rather than frugal.
 DEFAULT_MAX_TOKENS = 16000
 
+# Anthropic caches nothing shorter than 1024 tokens, and more on some models.
+# Every token spans at least one UTF-8 byte, so a prompt under this many bytes
+# cannot reach the minimum and is sent unmarked.
+MIN_CACHEABLE_BYTES = 1024
+
 # Module named anthropic_native rather than anthropic: a module shadowing the
 # SDK it imports is a trap even where the import rules make it legal.
 
@@ -29,7 +36,9 @@ class AnthropicGeneration(GenerationProvider):
     '''
     Chat completions through the Anthropic SDK.
     '''
+    provider = 'anthropic'
     supports_model_discovery = True
+    supports_batches = True
 
     def __init__(
         self,
@@ -37,7 +46,9 @@ class AnthropicGeneration(GenerationProvider):
         api_key: str,
         max_tokens: int = DEFAULT_MAX_TOKENS,
         client: Optional[object] = None,
-        recorder: Optional[UsageRecorder] = None
+        recorder: Optional[UsageRecorder] = None,
+        cache_system: bool = True,
+        limiter: Optional[RateLimiter] = None
     ) -> None:
         '''
         Args:
@@ -45,6 +56,11 @@ class AnthropicGeneration(GenerationProvider):
             api_key (str): Anthropic API key.
             max_tokens (int): Ceiling on the reply.
             client (object, optional): A prepared client, for tests.
+            cache_system (bool): Mark a long system prompt as a cache \
+                breakpoint, so repeated calls read it from Anthropic's prompt \
+                cache instead of paying for it again.
+            limiter (RateLimiter, optional): Holds requests to the account's \
+                limits.
 
         Raises:
             ImportError: If the anthropic package is not installed.
@@ -52,6 +68,8 @@ class AnthropicGeneration(GenerationProvider):
         self.model = model
         self.max_tokens = max_tokens
         self.recorder = recorder
+        self.cache_system = cache_system
+        self.limiter = limiter
 
         if client is not None:
             self.client = client
@@ -67,25 +85,79 @@ class AnthropicGeneration(GenerationProvider):
 
         self.client = Anthropic(api_key=api_key)
 
-    def generate(self, system: str, user: str) -> str:
+    @property
+    def parameters(self):
+        return {'max_tokens': self.max_tokens}
+
+    # the system parameter, marked for caching when it can be cached
+    def _system(self, system: str):
+        '''
+        Args:
+            system (str): System instruction.
+
+        Returns:
+            The plain string, or one text block carrying a cache breakpoint \
+                when caching is on and the prompt is long enough to qualify.
+        '''
+        if not self.cache_system or (
+            len(system.encode('utf-8')) < MIN_CACHEABLE_BYTES
+        ):
+            return system
+
+        return [{
+            'type': 'text',
+            'text': system,
+            'cache_control': {'type': 'ephemeral'}
+        }]
+
+    # the messages.create arguments for one prompt
+    def _params(self, system: str, user: str) -> dict:
         # The system prompt is its own parameter here rather than a message,
         # which is the one shape difference from the OpenAI-compatible path.
-        response = self.client.messages.create(
-            model=self.model,
-            max_tokens=self.max_tokens,
-            system=system,
-            messages=[{'role': 'user', 'content': user}]
-        )
+        return {
+            'model': self.model,
+            'max_tokens': self.max_tokens,
+            'system': self._system(system),
+            'messages': [{'role': 'user', 'content': user}]
+        }
 
+    def generate(self, system: str, user: str) -> str:
+        with self._admitted([system, user]) as reservation:
+            with self._timed():
+                response = self.client.messages.create(
+                    **self._params(system, user)
+                )
+
+            # Anthropic limits input tokens on their own, and reads from the
+            # prompt cache do not count against that limit.
+            usage = getattr(response, 'usage', None)
+            reservation.settle(
+                (getattr(usage, 'input_tokens', 0) or 0)
+                + (getattr(usage, 'cache_creation_input_tokens', 0) or 0)
+            )
+
+            return self._read(response)
+
+    # record a message's usage and return its text
+    def _read(self, response, batched: bool = False) -> str:
         # Field names differ from the OpenAI shape: input_tokens rather than
-        # prompt_tokens.
+        # prompt_tokens, and it excludes what the cache read or wrote, where
+        # OpenAI's prompt_tokens includes it. Usage counts both inside input.
         usage = getattr(response, 'usage', None)
+        cache_read = getattr(usage, 'cache_read_input_tokens', 0) or 0
+        cache_write = getattr(usage, 'cache_creation_input_tokens', 0) or 0
         self._record(Usage(
-            provider='anthropic',
+            provider=self.provider,
             model=self.model,
-            input_tokens=getattr(usage, 'input_tokens', 0) or 0,
+            input_tokens=(
+                (getattr(usage, 'input_tokens', 0) or 0)
+                + cache_read + cache_write
+            ),
             output_tokens=getattr(usage, 'output_tokens', 0) or 0,
-            counted=usage is not None
+            counted=usage is not None,
+            cached_input_tokens=cache_read,
+            cache_write_tokens=cache_write,
+            batch=batched
         ))
 
         # A reply can carry thinking blocks alongside text; only text is asked
@@ -94,5 +166,26 @@ class AnthropicGeneration(GenerationProvider):
             block.text for block in response.content if block.type == 'text'
         )
 
+    def submit_batch(
+        self, prompts: List[Tuple[str, str]], requests_path=None
+    ):
+        # Checked against the budget, not held: the job may be collected by
+        # another session, which records what it cost.
+        texts = [text for prompt in prompts for text in prompt]
+        with self._admitted(texts, calls=len(prompts), batch=True):
+            return batch.submit_anthropic(
+                self.client, self.model,
+                [self._params(system, user) for system, user in prompts],
+                requests_path
+            )
+
+    def collect_batch(self, job, **wait) -> List[str]:
+        messages = batch.collect_anthropic(self.client, job, **wait)
+
+        return [
+            self._read(messages[custom_id], batched=True)
+            for custom_id in job.custom_ids
+        ]
+
     def list_models(self) -> List[str]:
         return sorted(model.id for model in self.client.models.list())
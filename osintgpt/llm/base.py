@@ -12,12 +12,19 @@
 
 # import submodules
 from abc import ABC, abstractmethod
+from contextlib import contextmanager
 
 # type hints
-from typing import List, Optional
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
 
+from .latency import EMBED, GENERATE, timed
+from .ratelimit import UNLIMITED, RateLimiter, Reservation
 from .usage import Usage, UsageRecorder
 
+# NumPy is only needed by callers that ask for arrays.
+if TYPE_CHECKING:
+    import numpy as np
+
 # EmbeddingProvider class
 class EmbeddingProvider(ABC):
     '''
@@ -26,6 +33,9 @@ class EmbeddingProvider(ABC):
     '''
     model: str
 
+    # Provider id from the registry, as recorded in Usage.
+    provider: str = ''
+
     # True when this provider can embed images into the same vector space as
     # text. A property of the model, not the vendor.
     supports_images: bool = False
@@ -34,14 +44,65 @@ class EmbeddingProvider(ABC):
     # registry, because it depends on the endpoint rather than the client.
     supports_model_discovery: bool = False
 
+    # True when the backend runs asynchronous batch jobs. Set from the
+    # registry, like model discovery.
+    supports_batches: bool = False
+
+    # False where the provider runs on infrastructure the operator owns.
+    billable: bool = True
+
     # Collects what each call consumed. Optional: a provider works without one
     # and simply reports nothing.
     recorder: Optional[UsageRecorder] = None
 
+    # Holds calls to the account's rate limits. The factories hand every
+    # provider the shared one; a provider built directly runs unthrottled.
+    limiter: Optional[RateLimiter] = None
+
     def _record(self, usage: Usage) -> None:
         if self.recorder is not None:
             self.recorder.record(usage)
 
+    def _timed(self, items: int = 1):
+        return timed(self.recorder, EMBED, self.provider, self.model, items)
+
+    def _acquire(
+        self, texts: List[str], extra_tokens: int = 0, calls: int = 1,
+        batch: bool = False
+    ) -> Reservation:
+        # The budget first: a call it refuses should not wait out a rate
+        # limit only to be turned away.
+        if self.recorder is not None:
+            self.recorder.admit(
+                self.provider, self.model, texts, self.billable,
+                calls=calls, batch=batch
+            )
+        # Batch jobs run outside the synchronous rate limits.
+        if self.limiter is None or batch:
+            return UNLIMITED
+
+        return self.limiter.acquire(
+            self.provider, self.model, texts, extra_tokens
+        )
+
+    # admit a call for the length of the block
+    @contextmanager
+    def _admitted(
+        self, texts: List[str], extra_tokens: int = 0, calls: int = 1,
+        batch: bool = False
+    ) -> Iterator[Reservation]:
+        '''
+        _acquire, with the budget's hold given back when the block exits. A
+        call recorded inside the block has already replaced its hold with
+        what it cost; one that raised leaves nothing held behind.
+        '''
+        reservation = self._acquire(texts, extra_tokens, calls, batch)
+        try:
+            yield reservation
+        finally:
+            if self.recorder is not None:
+                self.recorder.release()
+
     def list_models(self) -> List[str]:
         '''
         Ask the backend which models it offers.
@@ -60,6 +121,74 @@ class EmbeddingProvider(ABC):
             f'the {type(self).__name__} backend cannot list its models'
         )
 
+    def _unbatched(self):
+        return NotImplementedError(
+            f'the {type(self).__name__} backend does not run batch jobs'
+        )
+
+    # start a batch job
+    def submit_batch(self, texts: List[str], requests_path=None):
+        '''
+        Submit texts as one asynchronous job, billed at the batch rate.
+
+        Args:
+            texts (List[str]): Texts to embed.
+            requests_path (Union[str, Path], optional): Keep the submitted \
+                JSONL here.
+
+        Raises:
+            NotImplementedError: If this backend does not run batch jobs.
+
+        Returns:
+            BatchJob: What collect_batch needs, serializable with to_dict.
+        '''
+        raise self._unbatched()
+
+    # wait for a batch job
+    def collect_batch(self, job, **wait) -> List[List[float]]:
+        '''
+        Args:
+            job (BatchJob): A job from submit_batch.
+            **wait: poll_seconds, timeout, sleep, clock; see batch.wait_for.
+
+        Raises:
+            NotImplementedError: If this backend does not run batch jobs.
+            TimeoutError: If the job is still running at the timeout.
+            BatchJobError: If some input got no result.
+
+        Returns:
+            List[List[float]]: One vector per input, in submission order.
+        '''
+        raise self._unbatched()
+
+    # submit and wait
+    def embed_batch(self, texts: List[str], **wait) -> List[List[float]]:
+        '''
+        embed() through a batch job: slower to answer, cheaper to run and \
+        outside the synchronous rate limits.
+        '''
+        return self.collect_batch(self.submit_batch(texts), **wait)
+
+    # embed into one float32 array
+    def embed_array(self, texts: List[str]) -> 'np.ndarray':
+        '''
+        embed() as one contiguous float32 array, a quarter of the memory of \
+        the lists and ready for matrix search. Backends that can decode \
+        straight into an array override this; the default converts.
+
+        Args:
+            texts (List[str]): Texts to embed.
+
+        Returns:
+            np.ndarray: Shape (len(texts), dimensions), rows in input order.
+        '''
+        import numpy as np
+
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        return np.asarray(self.embed(texts), dtype=np.float32)
+
     @abstractmethod
     def embed(self, texts: List[str]) -> List[List[float]]:
         '''
@@ -80,16 +209,61 @@ class GenerationProvider(ABC):
     '''
     model: str
 
+    # See EmbeddingProvider.provider.
+    provider: str = ''
+
     # See EmbeddingProvider.supports_model_discovery.
     supports_model_discovery: bool = False
 
+    # See EmbeddingProvider.supports_batches.
+    supports_batches: bool = False
+
+    # See EmbeddingProvider.billable.
+    billable: bool = True
+
     # See EmbeddingProvider.recorder.
     recorder: Optional[UsageRecorder] = None
 
+    # See EmbeddingProvider.limiter.
+    limiter: Optional[RateLimiter] = None
+
     def _record(self, usage: Usage) -> None:
         if self.recorder is not None:
             self.recorder.record(usage)
 
+    def _timed(self, items: int = 1):
+        return timed(self.recorder, GENERATE, self.provider, self.model, items)
+
+    # See EmbeddingProvider._acquire.
+    def _acquire(
+        self, texts: List[str], extra_tokens: int = 0, calls: int = 1,
+        batch: bool = False
+    ) -> Reservation:
+        if self.recorder is not None:
+            self.recorder.admit(
+                self.provider, self.model, texts, self.billable,
+                calls=calls, batch=batch
+            )
+        if self.limiter is None or batch:
+            return UNLIMITED
+
+        return self.limiter.acquire(
+            self.provider, self.model, texts, extra_tokens
+        )
+
+    # See EmbeddingProvider._admitted.
+    @contextmanager
+    def _admitted(
+        self, texts: List[str], extra_tokens: int = 0, calls: int = 1,
+        batch: bool = False
+    ) -> Iterator[Reservation]:
+        reservation = self._acquire(texts, extra_tokens, calls, batch)
+        try:
+            yield reservation
+        finally:
+            if self.recorder is not None:
+                self.recorder.release()
+
     def list_models(self) -> List[str]:
         '''
         Ask the backend which models it offers.
@@ -104,6 +278,66 @@ class GenerationProvider(ABC):
             f'the {type(self).__name__} backend cannot list its models'
         )
 
+    # what, besides the prompt, shapes the reply
+    @property
+    def parameters(self) -> Dict[str, Any]:
+        '''
+        Returns:
+            Dict[str, Any]: Request settings that change what the model \
+                returns, so a cached reply is only reused under the same ones.
+        '''
+        return {}
+
+    def _unbatched(self):
+        return NotImplementedError(
+            f'the {type(self).__name__} backend does not run batch jobs'
+        )
+
+    # start a batch job
+    def submit_batch(self, prompts: List[Tuple[str, str]], requests_path=None):
+        '''
+        Submit prompts as one asynchronous job, billed at the batch rate.
+
+        Args:
+            prompts (List[Tuple[str, str]]): (system, user) pairs.
+            requests_path (Union[str, Path], optional): Keep the submitted \
+                JSONL here.
+
+        Raises:
+            NotImplementedError: If this backend does not run batch jobs.
+
+        Returns:
+            BatchJob: What collect_batch needs, serializable with to_dict.
+        '''
+        raise self._unbatched()
+
+    # wait for a batch job
+    def collect_batch(self, job, **wait) -> List[str]:
+        '''
+        Args:
+            job (BatchJob): A job from submit_batch.
+            **wait: poll_seconds, timeout, sleep, clock; see batch.wait_for.
+
+        Raises:
+            NotImplementedError: If this backend does not run batch jobs.
+            TimeoutError: If the job is still running at the timeout.
+            BatchJobError: If some prompt got no result.
+
+        Returns:
+            List[str]: One reply per prompt, in submission order.
+        '''
+        raise self._unbatched()
+
+    # submit and wait
+    def generate_batch(
+        self, prompts: List[Tuple[str, str]], **wait
+    ) -> List[str]:
+        '''
+        generate() over many prompts through a batch job: slower to answer, \
+        cheaper to run and outside the synchronous rate limits.
+        '''
+        return self.collect_batch(self.submit_batch(prompts), **wait)
+
     @abstractmethod
     def generate(self, system: str, user: str) -> str:
         '''
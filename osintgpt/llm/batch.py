@@ -0,0 +1,299 @@
+# -*- coding: utf-8 -*-
+
+# =================================================================================
+# osintgpt
+#
+# Author: @estebanpdl
+#
+# File: batch.py
+# Description: Provider batch jobs — requests written as JSONL, submitted once,
+#   polled, and mapped back to their inputs. Slower to answer and cheaper to
+#   run, which is the right trade for an overnight pass over an archive.
+# =================================================================================
+
+# import modules
+import json
+import time
+
+# import submodules
+from dataclasses import dataclass, field
+from pathlib import Path
+
+# type hints
+from typing import Any, Callable, Dict, Iterable, List, Optional, Union
+
+# import exceptions
+from osintgpt.exceptions.errors import BatchJobError
+
+# The only window either vendor offers. Most jobs finish well inside it.
+COMPLETION_WINDOW = '24h'
+
+# Batches take minutes to hours; polling faster only spends requests.
+DEFAULT_POLL_SECONDS = 30.0
+
+EMBEDDINGS_ENDPOINT = '/v1/embeddings'
+CHAT_ENDPOINT = '/v1/chat/completions'
+# Anthropic's batches are their own API rather than an endpoint in a file.
+ANTHROPIC_MESSAGES = 'anthropic/messages'
+
+# Statuses after which a job will not change.
+OPENAI_FINISHED = {'completed', 'failed', 'expired', 'cancelled'}
+ANTHROPIC_FINISHED = {'ended'}
+
+
+# BatchJob class
+@dataclass
+class BatchJob:
+    '''
+    A submitted job and what is needed to collect it. Plain data, so a job
+    submitted by one process can be collected by another.
+    '''
+    id: str
+    provider: str
+    model: str
+    endpoint: str
+    # One id per request line, in the order the inputs were given.
+    custom_ids: List[str] = field(default_factory=list)
+    # Inputs per request line; embedding lines carry several texts each.
+    sizes: List[int] = field(default_factory=list)
+    status: str = 'submitted'
+
+    @property
+    def requests(self) -> int:
+        return len(self.custom_ids)
+
+    def to_dict(self) -> dict:
+        return {
+            'id': self.id, 'provider': self.provider, 'model': self.model,
+            'endpoint': self.endpoint, 'custom_ids': list(self.custom_ids),
+            'sizes': list(self.sizes), 'status': self.status
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict):
+        return cls(**data)
+
+
+# one request line per body
+def request_lines(endpoint: str, bodies: Iterable[dict]) -> List[dict]:
+    '''
+    Args:
+        endpoint (str): The API path each request targets.
+        bodies (Iterable[dict]): Request bodies, in input order.
+
+    Returns:
+        List[dict]: Batch request lines. The custom id is the position, which \
+            is what maps a result back to its input.
+    '''
+    return [
+        {'custom_id': str(index), 'method': 'POST', 'url': endpoint, 'body': body}
+        for index, body in enumerate(bodies)
+    ]
+
+
+# serialize request lines
+def write_jsonl(
+    rows: Iterable[dict], path: Optional[Union[str, Path]] = None
+) -> bytes:
+    '''
+    Args:
+        rows (Iterable[dict]): Lines to serialize.
+        path (Union[str, Path], optional): Also write them here, for a record \
+            of exactly what was submitted.
+
+    Returns:
+        bytes: The JSONL document.
+    '''
+    content = ''.join(
+        json.dumps(row, ensure_ascii=False) + '\n' for row in rows
+    ).encode('utf-8')
+    if path is not None:
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(content)
+
+    return content
+
+
+# parse a JSONL document
+def read_jsonl(text: str) -> List[dict]:
+    return [json.loads(line) for line in text.splitlines() if line.strip()]
+
+
+# poll until a job stops changing
+def wait_for(
+    retrieve: Callable[[], Any],
+    status_of: Callable[[Any], str],
+    finished: set,
+    job: BatchJob,
+    poll_seconds: float = DEFAULT_POLL_SECONDS,
+    timeout: Optional[float] = None,
+    sleep: Callable[[float], None] = time.sleep,
+    clock: Callable[[], float] = time.monotonic
+):
+    '''
+    Args:
+        retrieve (Callable): Fetches the job's current state.
+        status_of (Callable): Reads the status off that state.
+        finished (set): Statuses that end the wait.
+        job (BatchJob): Updated with each status seen.
+        poll_seconds (float): Interval between polls.
+        timeout (float, optional): Give up after this many seconds. The job \
+            keeps running at the provider and can be collected later.
+
+    Raises:
+        TimeoutError: If the job has not finished in time.
+
+    Returns:
+        The job's final state as the provider reports it.
+    '''
+    deadline = None if timeout is None else clock() + timeout
+    while True:
+        state = retrieve()
+        job.status = status_of(state)
+        if job.status in finished:
+            return state
+
+        if deadline is not None and clock() + poll_seconds > deadline:
+            raise TimeoutError(
+                f'batch {job.id} still {job.status} after {timeout}s; '
+                'collect it again later'
+            )
+        sleep(poll_seconds)
+
+
+# submit a job to an OpenAI-compatible batch API
+def submit_openai(
+    client, provider: str, model: str, endpoint: str, bodies: List[dict],
+    sizes: List[int], requests_path: Optional[Union[str, Path]] = None
+) -> BatchJob:
+    '''
+    Upload the request file and start the job.
+
+    Args:
+        client: An OpenAI-compatible client.
+        provider (str): Provider id.
+        model (str): Model name.
+        endpoint (str): The API path each request targets.
+        bodies (List[dict]): Request bodies, in input order.
+        sizes (List[int]): Inputs carried by each body.
+        requests_path (Union[str, Path], optional): Keep the JSONL here.
+
+    Returns:
+        BatchJob: The submitted job.
+    '''
+    lines = request_lines(endpoint, bodies)
+    content = write_jsonl(lines, requests_path)
+    upload = client.files.create(
+        file=('batch.jsonl', content), purpose='batch'
+    )
+    batch = client.batches.create(
+        input_file_id=upload.id,
+        endpoint=endpoint,
+        completion_window=COMPLETION_WINDOW
+    )
+
+    return BatchJob(
+        id=batch.id, provider=provider, model=model, endpoint=endpoint,
+        custom_ids=[line['custom_id'] for line in lines], sizes=list(sizes),
+        status=getattr(batch, 'status', 'submitted') or 'submitted'
+    )
+
+
+# wait for an OpenAI-compatible job and read its output
+def collect_openai(client, job: BatchJob, **wait) -> Dict[str, dict]:
+    '''
+    Args:
+        client: An OpenAI-compatible client.
+        job (BatchJob): A job from submit_openai.
+        **wait: Options for wait_for.
+
+    Raises:
+        BatchJobError: If the job failed, or returned no successful result \
+            for some request.
+
+    Returns:
+        Dict[str, dict]: Response bodies by custom id.
+    '''
+    batch = wait_for(
+        lambda: client.batches.retrieve(job.id),
+        lambda state: state.status, OPENAI_FINISHED, job, **wait
+    )
+
+    bodies: Dict[str, dict] = {}
+    output_file_id = getattr(batch, 'output_file_id', None)
+    if output_file_id:
+        for line in read_jsonl(client.files.content(output_file_id).text):
+            response = line.get('response') or {}
+            if line.get('error') or response.get('status_code') != 200:
+                continue
+            bodies[line['custom_id']] = response.get('body') or {}
+
+    missing = [cid for cid in job.custom_ids if cid not in bodies]
+    if job.status != 'completed' or missing:
+        raise BatchJobError(job.id, job.status, missing)
+
+    return bodies
+
+
+# submit a job to Anthropic's message batches
+def submit_anthropic(
+    client, model: str, params: List[dict],
+    requests_path: Optional[Union[str, Path]] = None
+) -> BatchJob:
+    '''
+    Args:
+        client: An Anthropic client.
+        model (str): Model name.
+        params (List[dict]): messages.create arguments, in input order.
+        requests_path (Union[str, Path], optional): Keep the JSONL here.
+
+    Returns:
+        BatchJob: The submitted job.
+    '''
+    requests = [
+        {'custom_id': str(index), 'params': body}
+        for index, body in enumerate(params)
+    ]
+    write_jsonl(requests, requests_path)
+    batch = client.messages.batches.create(requests=requests)
+
+    return BatchJob(
+        id=batch.id, provider='anthropic', model=model,
+        endpoint=ANTHROPIC_MESSAGES,
+        custom_ids=[request['custom_id'] for request in requests],
+        sizes=[1] * len(requests),
+        status=getattr(batch, 'processing_status', 'submitted') or 'submitted'
+    )
+
+
+# wait for an Anthropic job and read its results
+def collect_anthropic(client, job: BatchJob, **wait) -> Dict[str, Any]:
+    '''
+    Args:
+        client: An Anthropic client.
+        job (BatchJob): A job from submit_anthropic.
+        **wait: Options for wait_for.
+
+    Raises:
+        BatchJobError: If some request did not succeed.
+
+    Returns:
+        Dict[str, Any]: Messages by custom id.
+    '''
+    wait_for(
+        lambda: client.messages.batches.retrieve(job.id),
+        lambda state: state.processing_status, ANTHROPIC_FINISHED, job, **wait
+    )
+
+    messages: Dict[str, Any] = {}
+    for entry in client.messages.batches.results(job.id):
+        result = entry.result
+        if getattr(result, 'type', '') == 'succeeded':
+            messages[entry.custom_id] = result.message
+
+    missing = [cid for cid in job.custom_ids if cid not in messages]
+    if missing:
+        raise BatchJobError(job.id, job.status, missing)
+
+    return messages
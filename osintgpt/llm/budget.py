@@ -0,0 +1,217 @@
+# -*- coding: utf-8 -*-
+
+# =================================================================================
+# osintgpt
+#
+# Author: @estebanpdl
+#
+# File: budget.py
+# Description: A recorder that holds a project to its cost ceiling while the
+#   work runs — each call is admitted against what has been spent, across
+#   sessions, plus what calls in flight are expected to cost.
+# =================================================================================
+
+# import modules
+import threading
+
+# import submodules
+from dataclasses import dataclass, field
+
+# type hints
+from typing import Callable, Dict, List, Optional
+
+# import osintgpt pricing
+from osintgpt.pricing import BATCH_RATE, estimate_cost, price_per_million
+
+from .usage import Usage, UsageRecorder
+
+# import exceptions
+from osintgpt.exceptions.errors import CostCeilingExceededError
+
+# Output is unknown until the reply arrives. Holding room for a modest reply
+# keeps parallel chat calls from all being admitted on input alone.
+DEFAULT_EXPECTED_OUTPUT_TOKENS = 500
+
+
+# BudgetRecorder class
+@dataclass
+class BudgetRecorder(UsageRecorder):
+    '''
+    A UsageRecorder that refuses calls the ceiling cannot cover.
+
+    Before a call, its estimated cost is held against the ceiling together
+    with everything already spent and everything still in flight. After it,
+    the hold is replaced by what the call actually cost. Spend is kept per
+    model in the project store, so the ceiling covers a case across sessions
+    rather than per run. With a store, each admission reads the spend on
+    record again, so recorders open at the same time on one store see what
+    the others have spent; the calls they still have in flight are not seen.
+    '''
+    ceiling_usd: Optional[float] = None
+    # Spend is flushed on every call, so a second worker on the same store
+    # sees it at its next admission and a crash loses none of it.
+    flush_every: int = 1
+    # Over the ceiling, wait for calls in flight to settle before refusing:
+    # their holds may turn out larger than what they cost.
+    wait: bool = False
+    expected_output_tokens: int = DEFAULT_EXPECTED_OUTPUT_TOKENS
+    # Counts the tokens in a text for a model. Defaults to utils.count_tokens.
+    counter: Optional[Callable[[str, str], int]] = None
+
+    spent_usd: float = field(default=0.0, init=False)
+    held_usd: float = field(default=0.0, init=False)
+
+    def __post_init__(self) -> None:
+        super().__post_init__()
+        self._condition = threading.Condition(self._lock)
+        # One hold per thread: a provider call is synchronous, so a thread
+        # has at most one call in flight.
+        self._holds = threading.local()
+        if self.store is not None:
+            self.spent_usd = self._stored_spend()
+        else:
+            self.spent_usd = self.estimated_cost
+
+    def _stored_spend(self) -> float:
+        return sum(
+            totals.estimated_cost for totals in self.stored_totals().values()
+        )
+
+    # a recorder for a project's ceiling and store
+    @classmethod
+    def for_project(cls, project, defaults=None, **kwargs):
+        '''
+        Args:
+            project (Project): Supplies the ceiling and the store.
+            defaults (ProjectSettings, optional): User defaults filling the \
+                project's gaps.
+            **kwargs: BudgetRecorder options.
+
+        Returns:
+            BudgetRecorder: A recorder carrying the spend recorded so far.
+        '''
+        settings = project.effective_settings(defaults)
+        kwargs.setdefault('ceiling_usd', settings.cost_ceiling_usd)
+
+        return cls(store=project.paths.store, **kwargs)
+
+    # spend on record, per model
+    @property
+    def spend_by_model(self) -> Dict[str, float]:
+        '''
+        Returns:
+            Dict[str, float]: Estimated USD per model, across sessions when \
+                the spend is stored.
+        '''
+        with self._condition:
+            if self.store is not None:
+                by_key = self.stored_totals()
+            else:
+                by_key = dict(self.totals_by_key)
+
+        spend: Dict[str, float] = {}
+        for (_, model), totals in by_key.items():
+            spend[model] = spend.get(model, 0.0) + totals.estimated_cost
+
+        return spend
+
+    @property
+    def remaining_usd(self) -> Optional[float]:
+        if self.ceiling_usd is None:
+            return None
+
+        return self.ceiling_usd - self.spent_usd - self.held_usd
+
+    def _estimate(
+        self, model: str, texts: List[str], calls: int = 1,
+        batch: bool = False
+    ) -> Optional[float]:
+        counter = self.counter
+        if counter is None:
+            from osintgpt.utils import count_tokens as counter
+
+        cost = estimate_cost(model, sum(counter(text, model) for text in texts))
+        if cost is None:
+            return None
+
+        if price_per_million(model, 'output') is not None:
+            cost += estimate_cost(
+                model, calls * self.expected_output_tokens, 'output'
+            )
+
+        return cost * BATCH_RATE if batch else cost
+
+    def _release(self) -> None:
+        hold = getattr(self._holds, 'usd', 0.0)
+        if hold:
+            self.held_usd -= hold
+            self._holds.usd = 0.0
+            self._condition.notify_all()
+
+    # hold room for a call, or refuse it
+    def admit(
+        self, provider: str, model: str, texts: List[str],
+        billable: bool = True, calls: int = 1, batch: bool = False
+    ) -> None:
+        '''
+        Args:
+            provider (str): Provider id.
+            model (str): Model name.
+            texts (List[str]): What the call sends.
+            billable (bool): False for a provider that cannot bill.
+            calls (int): Replies the texts ask for, each held room for \
+                expected_output_tokens. A batch job asks for many.
+            batch (bool): True for a batch job, estimated at the batch rate.
+
+        Raises:
+            CostCeilingExceededError: If the call's estimate does not fit \
+                under the ceiling, or the model is unpriced while a ceiling \
+                is set.
+        '''
+        if self.ceiling_usd is None or not billable:
+            return
+
+        estimate = self._estimate(model, texts, calls, batch)
+        with self._condition:
+            # A hold still on this thread belongs to a call that raised
+            # before it was recorded.
+            self._release()
+            if estimate is None:
+                raise CostCeilingExceededError(
+                    None, self.ceiling_usd, f'{provider} {model}'
+                )
+
+            while True:
+                # Other recorders on the store may have spent since.
+                if self.store is not None:
+                    self.spent_usd = self._stored_spend()
+                if self.spent_usd + self.held_usd + estimate <= self.ceiling_usd:
+                    break
+                if not (self.wait and self.held_usd > 0):
+                    raise CostCeilingExceededError(
+                        self.spent_usd + self.held_usd + estimate,
+                        self.ceiling_usd,
+                        f'${self.spent_usd:.4f} spent, '
+                        f'${self.held_usd:.4f} in flight, '
+                        f'${estimate:.4f} for this {model} call'
+                    )
+                self._condition.wait()
+
+            self.held_usd += estimate
+            self._holds.usd = estimate
+
+    # give back the calling thread's hold
+    def release(self) -> None:
+        '''
+        Called by a provider once an admitted call is over. A call that was
+        recorded has nothing left to give back; one that raised frees its
+        hold here, and wakes callers waiting for room.
+        '''
+        with self._condition:
+            self._release()
+
+    def record(self, usage: Usage) -> None:
+        with self._condition:
+            super().record(usage)
+            self._release()
+            self.spent_usd += usage.estimated_cost or 0.0
@@ -0,0 +1,320 @@
+# -*- coding: utf-8 -*-
+
+# =================================================================================
+# osintgpt
+#
+# Author: @estebanpdl
+#
+# File: cache.py
+# Description: Replies to requests already made, kept in the project store so a
+#   re-run analysis does not pay for the same answer twice. Opt-in: a cached
+#   reply is the first one the model gave, which is only the right answer when
+#   the caller wants repeatability.
+# =================================================================================
+
+# import modules
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+
+# import submodules
+from pathlib import Path
+
+# type hints
+from typing import Any, Callable, Dict, List, Optional, Tuple, Union
+
+from .base import GenerationProvider
+from .usage import Usage
+
+CACHE_TABLE = 'completion_cache'
+
+# A month: long enough to cover re-running an analysis, short enough that a
+# provider's model update eventually reaches the answers.
+DEFAULT_TTL_SECONDS = 30 * 24 * 60 * 60
+
+DEFAULT_MAX_ENTRIES = 10_000
+
+# Eviction trims below the ceiling rather than to it, so a full cache does not
+# pay for a trim on every insert.
+EVICTION_HEADROOM = 0.9
+
+
+# the key a request is cached under
+def request_key(
+    provider: str, model: str, messages: List[Dict],
+    parameters: Optional[Dict[str, Any]] = None
+) -> str:
+    '''
+    Args:
+        provider (str): Provider id.
+        model (str): Model name.
+        messages (List[Dict]): The request's messages, in order.
+        parameters (Dict[str, Any], optional): Settings that shape the reply.
+
+    Returns:
+        str: A digest that changes when any of them does.
+    '''
+    document = json.dumps(
+        {
+            'provider': provider,
+            'model': model,
+            'messages': messages,
+            'parameters': parameters or {}
+        },
+        sort_keys=True,
+        ensure_ascii=False
+    )
+
+    return hashlib.sha256(document.encode('utf-8')).hexdigest()
+
+
+# CompletionCache class
+class CompletionCache:
+    '''
+    Replies keyed by request, in a SQLite table. Entries expire after a TTL and
+    the least recently used go first once the table passes its size ceiling.
+    '''
+    def __init__(
+        self,
+        path: Union[str, Path],
+        ttl_seconds: Optional[float] = DEFAULT_TTL_SECONDS,
+        max_entries: Optional[int] = DEFAULT_MAX_ENTRIES,
+        clock: Callable[[], float] = time.time
+    ) -> None:
+        '''
+        Args:
+            path (Union[str, Path]): SQLite file, typically a project store.
+            ttl_seconds (float, optional): Age after which an entry is not \
+                served. None keeps entries until evicted for size.
+            max_entries (int, optional): Size ceiling. None never evicts for \
+                size.
+            clock (Callable[[], float]): Time source, for tests.
+        '''
+        self.path = Path(path)
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.clock = clock
+
+        # Providers may be called from several threads; one connection behind
+        # a lock keeps SQLite's own rules out of the caller's way.
+        self._lock = threading.Lock()
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        self.conn = sqlite3.connect(str(self.path), check_same_thread=False)
+        self.conn.execute(
+            f'''
+            CREATE TABLE IF NOT EXISTS {CACHE_TABLE} (
+                key TEXT NOT NULL PRIMARY KEY,
+                provider TEXT NOT NULL,
+                model TEXT NOT NULL,
+                response TEXT NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            '''
+        )
+        self.conn.execute(
+            f'CREATE INDEX IF NOT EXISTS {CACHE_TABLE}_last_used '
+            f'ON {CACHE_TABLE} (last_used)'
+        )
+        self.conn.commit()
+        self._size = self._count()
+
+    # a cache inside a project's store
+    @classmethod
+    def for_project(cls, project, **kwargs):
+        '''
+        Args:
+            project (Project): The project whose store holds the cache.
+            **kwargs: CompletionCache options.
+
+        Returns:
+            CompletionCache: A cache sharing the project's store.
+        '''
+        return cls(project.paths.store, **kwargs)
+
+    def _count(self) -> int:
+        return self.conn.execute(
+            f'SELECT COUNT(*) FROM {CACHE_TABLE}'
+        ).fetchone()[0]
+
+    def _expired(self, created_at: float, now: float) -> bool:
+        return self.ttl_seconds is not None and (
+            now - created_at > self.ttl_seconds
+        )
+
+    # look up a reply
+    def get(self, key: str) -> Optional[str]:
+        '''
+        Args:
+            key (str): A request_key.
+
+        Returns:
+            Optional[str]: The cached reply, or None when absent or expired.
+        '''
+        now = self.clock()
+        with self._lock:
+            row = self.conn.execute(
+                f'SELECT response, created_at FROM {CACHE_TABLE} WHERE key = ?',
+                (key,)
+            ).fetchone()
+            if row is None:
+                return None
+
+            response, created_at = row
+            if self._expired(created_at, now):
+                self.conn.execute(
+                    f'DELETE FROM {CACHE_TABLE} WHERE key = ?', (key,)
+                )
+                self.conn.commit()
+                self._size -= 1
+                return None
+
+            self.conn.execute(
+                f'UPDATE {CACHE_TABLE} SET last_used = ? WHERE key = ?',
+                (now, key)
+            )
+            self.conn.commit()
+
+        return response
+
+    # store a reply
+    def put(self, key: str, provider: str, model: str, response: str) -> None:
+        '''
+        Args:
+            key (str): A request_key.
+            provider (str): Provider id, kept for inspection.
+            model (str): Model name, kept for inspection.
+            response (str): The reply to serve next time.
+        '''
+        now = self.clock()
+        with self._lock:
+            cursor = self.conn.execute(
+                f'''
+                INSERT OR IGNORE INTO {CACHE_TABLE}
+                    (key, provider, model, response, created_at, last_used)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ''',
+                (key, provider, model, response, now, now)
+            )
+            if cursor.rowcount:
+                self._size += 1
+            else:
+                self.conn.execute(
+                    f'''
+                    UPDATE {CACHE_TABLE}
+                    SET response = ?, created_at = ?, last_used = ?
+                    WHERE key = ?
+                    ''',
+                    (response, now, now, key)
+                )
+            self.conn.commit()
+
+            if self.max_entries is not None and self._size > self.max_entries:
+                self._evict(now)
+
+    # drop expired entries, then the least recently used
+    def _evict(self, now: float) -> None:
+        if self.ttl_seconds is not None:
+            self.conn.execute(
+                f'DELETE FROM {CACHE_TABLE} WHERE created_at < ?',
+                (now - self.ttl_seconds,)
+            )
+
+        keep = int(self.max_entries * EVICTION_HEADROOM)
+        self.conn.execute(
+            f'''
+            DELETE FROM {CACHE_TABLE} WHERE key IN (
+                SELECT key FROM {CACHE_TABLE}
+                ORDER BY last_used DESC LIMIT -1 OFFSET ?
+            )
+            ''',
+            (keep,)
+        )
+        self.conn.commit()
+        self._size = self._count()
+
+    # empty the cache
+    def clear(self) -> None:
+        with self._lock:
+            self.conn.execute(f'DELETE FROM {CACHE_TABLE}')
+            self.conn.commit()
+            self._size = 0
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __len__(self) -> int:
+        return self._size
+
+
+# CachedGeneration class
+class CachedGeneration(GenerationProvider):
+    '''
+    Any generation provider, answering repeated requests from a cache. A hit
+    is recorded as a free call, so the recorder shows what was saved.
+    '''
+    def __init__(
+        self, provider: GenerationProvider, cache: CompletionCache
+    ) -> None:
+        '''
+        Args:
+            provider (GenerationProvider): The provider to consult on a miss.
+            cache (CompletionCache): Where replies are kept.
+        '''
+        self.inner = provider
+        self.cache = cache
+        self.model = provider.model
+        self.provider = provider.provider or type(provider).__name__
+        self.supports_model_discovery = provider.supports_model_discovery
+        self.supports_batches = provider.supports_batches
+
+    # one recorder for hits and misses alike
+    @property
+    def recorder(self):
+        return self.inner.recorder
+
+    @recorder.setter
+    def recorder(self, value):
+        self.inner.recorder = value
+
+    @property
+    def parameters(self) -> Dict[str, Any]:
+        return self.inner.parameters
+
+    def generate(self, system: str, user: str) -> str:
+        key = request_key(
+            self.provider,
+            self.model,
+            [
+                {'role': 'system', 'content': system},
+                {'role': 'user', 'content': user}
+            ],
+            self.parameters
+        )
+
+        cached = self.cache.get(key)
+        if cached is not None:
+            self._record(Usage(
+                provider=self.provider,
+                model=self.model,
+                billable=False,
+                cache_hit=True
+            ))
+            return cached
+
+        reply = self.inner.generate(system, user)
+        self.cache.put(key, self.provider, self.model, reply)
+
+        return reply
+
+    # batch jobs pass through to the provider, uncached
+    def submit_batch(self, prompts: List[Tuple[str, str]], requests_path=None):
+        return self.inner.submit_batch(prompts, requests_path)
+
+    def collect_batch(self, job, **wait) -> List[str]:
+        return self.inner.collect_batch(job, **wait)
+
+    def list_models(self) -> List[str]:
+        return self.inner.list_models()
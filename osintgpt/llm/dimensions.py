@@ -0,0 +1,186 @@
+# -*- coding: utf-8 -*-
+
+# =================================================================================
+# osintgpt
+#
+# Author: @estebanpdl
+#
+# File: dimensions.py
+# Description: Shortened embeddings. Models trained Matryoshka-style front-load
+#   what matters into the first values of a vector, so a prefix rescaled to
+#   unit length is itself an embedding — smaller to store, faster to search.
+# =================================================================================
+
+# type hints
+from typing import TYPE_CHECKING, List, Optional, Tuple
+
+if TYPE_CHECKING:
+    import numpy as np
+
+# Models known to be trained for truncation, and their full width. The only
+# ones OpenAI accepts the dimensions parameter for.
+SHORTENABLE_MODELS = {
+    'text-embedding-3-small': 1536,
+    'text-embedding-3-large': 3072
+}
+
+# Models known not to be: a prefix of their vectors is not an embedding, so
+# they only come at full width. Models in neither table are taken at the
+# caller's word.
+FIXED_WIDTH_MODELS = {
+    'text-embedding-ada-002': 1536
+}
+
+# How many coarse candidates a two-stage search keeps per result it returns.
+# Wide enough that the full-width pass rarely misses what a full scan finds.
+DEFAULT_OVERSAMPLE = 10
+
+
+# check a requested width against what the model produces
+def check_dimensions(model: str, dimensions: Optional[int]) -> Optional[int]:
+    '''
+    Args:
+        model (str): Embedding model.
+        dimensions (int, optional): Requested width; None keeps the full one.
+
+    Raises:
+        ValueError: If the width is not positive, is wider than a known \
+            model produces, or shortens a model known not to be trained \
+            for it.
+
+    Returns:
+        Optional[int]: The width, unchanged.
+    '''
+    if dimensions is None:
+        return None
+
+    if dimensions <= 0:
+        raise ValueError(f'embedding dimensions must be positive, got {dimensions}')
+
+    full = SHORTENABLE_MODELS.get(model)
+    if full is not None and dimensions > full:
+        raise ValueError(
+            f'{model} produces {full} dimensions; cannot shorten to {dimensions}'
+        )
+
+    fixed = FIXED_WIDTH_MODELS.get(model)
+    if fixed is not None and dimensions != fixed:
+        raise ValueError(
+            f'{model} is not trained to be shortened; it only produces '
+            f'{fixed} dimensions, so leave embedding_dimensions unset'
+        )
+
+    return dimensions
+
+
+# keep a prefix of each vector, at unit length
+def shorten(vectors, dimensions: int) -> 'np.ndarray':
+    '''
+    Args:
+        vectors (Sequence): One vector, or one per row — lists or an array.
+        dimensions (int): Width to keep.
+
+    Raises:
+        ValueError: If a vector is narrower than `dimensions`.
+
+    Returns:
+        np.ndarray: float32, the same number of rows, each of length \
+            `dimensions` and unit norm. A zero prefix stays zero.
+    '''
+    import numpy as np
+
+    matrix = np.asarray(vectors, dtype=np.float32)
+    single = matrix.ndim == 1
+    if single:
+        matrix = matrix[np.newaxis, :]
+    if matrix.size and matrix.shape[1] < dimensions:
+        raise ValueError(
+            f'vectors have {matrix.shape[1]} dimensions, fewer than the '
+            f'{dimensions} required'
+        )
+
+    head = np.array(matrix[:, :dimensions], dtype=np.float32)
+    norms = np.linalg.norm(head, axis=1, keepdims=True)
+    np.divide(head, norms, out=head, where=norms > 0)
+
+    return head[0] if single else head
+
+
+# shorten list vectors only where they are too wide
+def fit_vectors(
+    vectors: List[List[float]], dimensions: Optional[int]
+) -> List[List[float]]:
+    '''
+    Args:
+        vectors (List[List[float]]): As a provider returned them.
+        dimensions (int, optional): Width to enforce; None keeps them as is.
+
+    Returns:
+        List[List[float]]: The same vectors when already that wide, \
+            otherwise shortened ones.
+    '''
+    if dimensions is None or all(len(vector) == dimensions for vector in vectors):
+        return vectors
+
+    return shorten(vectors, dimensions).tolist()
+
+
+# cosine scores of unit-normalised rows against a query
+def _scores(matrix: 'np.ndarray', query: 'np.ndarray') -> 'np.ndarray':
+    import numpy as np
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        scores = (matrix @ query) / (
+            np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+        )
+
+    return np.where(np.isnan(scores), -np.inf, scores)
+
+
+# coarse pass on a prefix, re-ranked at full width
+def two_stage_search(
+    embeddings,
+    query,
+    top_k: int,
+    coarse_dimensions: int,
+    oversample: int = DEFAULT_OVERSAMPLE,
+    coarse: Optional['np.ndarray'] = None
+) -> Tuple[List[int], List[float]]:
+    '''
+    Rank every row on the first `coarse_dimensions` values, keep the best
+    `top_k * oversample`, and score only those at full width.
+
+    Args:
+        embeddings (Sequence): Full-width vectors, one per row.
+        query (List[float]): Full-width query.
+        top_k (int): Results to return.
+        coarse_dimensions (int): Prefix width of the first pass.
+        oversample (int): Candidates kept per result.
+        coarse (np.ndarray, optional): The rows already shortened, e.g. kept \
+            beside the index, so the first pass reads a compact array.
+
+    Returns:
+        Tuple[List[int], List[float]]: Row positions, best first, and their \
+            full-width cosine scores. Ties keep row order.
+    '''
+    import numpy as np
+
+    matrix = np.asarray(embeddings, dtype=np.float32)
+    if top_k <= 0 or not len(matrix):
+        return [], []
+
+    vector = np.asarray(query, dtype=np.float32)
+    if coarse is None:
+        coarse = matrix[:, :coarse_dimensions]
+    rough = _scores(coarse, vector[:coarse_dimensions])
+
+    keep = min(len(rough), top_k * max(oversample, 1))
+    if keep < len(rough):
+        candidates = np.argpartition(-rough, keep - 1)[:keep]
+    else:
+        candidates = np.arange(len(rough))
+
+    exact = _scores(matrix[candidates], vector)
+    order = np.lexsort((candidates, -exact))[:top_k]
+
+    return candidates[order].tolist(), exact[order].tolist()
@@ -0,0 +1,271 @@
+# -*- coding: utf-8 -*-
+
+# =================================================================================
+# osintgpt
+#
+# Author: @estebanpdl
+#
+# File: fake.py
+# Description: Offline backends that behave like a provider without being one —
+#   deterministic vectors and replies, token usage, latency, rate limits and
+#   failures — so concurrency, batching and caching can be load-tested.
+# =================================================================================
+
+# import modules
+import hashlib
+import math
+import random
+import threading
+import time
+
+# import submodules
+from collections import deque
+
+# type hints
+from typing import Callable, Deque, List, Optional
+
+from .base import EmbeddingProvider, GenerationProvider
+from .ratelimit import RateLimiter
+from .usage import Usage, UsageRecorder
+
+# import exceptions
+from osintgpt.exceptions.errors import SimulatedProviderError
+
+DEFAULT_FAKE_EMBEDDING_MODEL = 'fake-embedding'
+DEFAULT_FAKE_GENERATION_MODEL = 'fake-chat'
+DEFAULT_FAKE_DIMENSIONS = 256
+DEFAULT_FAKE_BATCH_SIZE = 100
+
+# What a simulated 429 asks the caller to wait.
+DEFAULT_RETRY_AFTER = 1.0
+
+
+# a stable seed for a text under a model
+def text_seed(model: str, text: str) -> int:
+    digest = hashlib.blake2b(
+        f'{model}\0{text}'.encode('utf-8'), digest_size=8
+    ).digest()
+
+    return int.from_bytes(digest, 'big')
+
+
+# whitespace tokens: cheap, deterministic and close enough for load
+def fake_tokens(text: str) -> int:
+    return len(text.split())
+
+
+# FakeBehaviour class
+class FakeBehaviour:
+    '''
+    How a fake backend misbehaves: how long a request takes, how often it is
+    refused with a 429, and how often it fails outright. Drawn from one seeded
+    generator, so a single-threaded run repeats exactly.
+    '''
+    def __init__(
+        self,
+        latency: float = 0.0,
+        latency_sigma: float = 0.0,
+        rate_limit_rate: float = 0.0,
+        failure_rate: float = 0.0,
+        requests_per_minute: Optional[int] = None,
+        retry_after: float = DEFAULT_RETRY_AFTER,
+        seed: int = 0,
+        sleep: Callable[[float], None] = time.sleep,
+        clock: Callable[[], float] = time.monotonic
+    ) -> None:
+        '''
+        Args:
+            latency (float): Median seconds per request.
+            latency_sigma (float): Spread of a log-normal around the median; \
+                0 makes every request take exactly `latency`. Around 0.5 \
+                gives the long tail real endpoints have.
+            rate_limit_rate (float): Chance a request is refused with a 429.
+            failure_rate (float): Chance a request fails with a 500.
+            requests_per_minute (int, optional): Refuse with a 429 past this \
+                many requests in any sliding minute, like an account limit.
+            retry_after (float): Seconds a 429 asks the caller to wait.
+            seed (int): Seeds latency and fault draws.
+            sleep (Callable[[float], None]): Injectable for tests.
+            clock (Callable[[], float]): Injectable for tests.
+        '''
+        for name, rate in (
+            ('rate_limit_rate', rate_limit_rate),
+            ('failure_rate', failure_rate)
+        ):
+            if not 0 <= rate <= 1:
+                raise ValueError(f'{name} must be between 0 and 1')
+
+        self.latency = latency
+        self.latency_sigma = latency_sigma
+        self.rate_limit_rate = rate_limit_rate
+        self.failure_rate = failure_rate
+        self.requests_per_minute = requests_per_minute
+        self.retry_after = retry_after
+        self.sleep = sleep
+        self.clock = clock
+
+        self._random = random.Random(seed)
+        self._lock = threading.Lock()
+        self._window: Deque[float] = deque()
+        self.requests = 0
+
+    def _draw(self):
+        with self._lock:
+            self.requests += 1
+            delay = self.latency
+            if delay and self.latency_sigma:
+                delay *= math.exp(self._random.gauss(0.0, self.latency_sigma))
+            roll = self._random.random()
+
+            limited = False
+            if self.requests_per_minute is not None:
+                now = self.clock()
+                while self._window and now - self._window[0] >= 60.0:
+                    self._window.popleft()
+                if len(self._window) >= self.requests_per_minute:
+                    limited = True
+                else:
+                    self._window.append(now)
+
+        return delay, roll, limited
+
+    # one simulated request's wait and outcome
+    def request(self) -> None:
+        '''
+        Raises:
+            SimulatedProviderError: 429 or 500, at the configured rates.
+        '''
+        delay, roll, limited = self._draw()
+        if limited or roll < self.rate_limit_rate:
+            # A refusal comes back fast; it is not billed or served.
+            raise SimulatedProviderError(429, self.retry_after)
+
+        if delay:
+            self.sleep(delay)
+        if roll < self.rate_limit_rate + self.failure_rate:
+            raise SimulatedProviderError(500)
+
+
+# FakeEmbedding class
+class FakeEmbedding(EmbeddingProvider):
+    '''
+    Unit-length vectors seeded from a hash of model and text: the same text
+    always gets the same vector, and different texts are near-orthogonal.
+    '''
+    provider = 'fake'
+    billable = False
+
+    def __init__(
+        self,
+        model: str = DEFAULT_FAKE_EMBEDDING_MODEL,
+        dimensions: int = DEFAULT_FAKE_DIMENSIONS,
+        batch_size: int = DEFAULT_FAKE_BATCH_SIZE,
+        behaviour: Optional[FakeBehaviour] = None,
+        recorder: Optional[UsageRecorder] = None,
+        limiter: Optional[RateLimiter] = None,
+        **behaviour_options
+    ) -> None:
+        '''
+        Args:
+            model (str): Any name; it seeds the vectors with the text.
+            dimensions (int): Vector length.
+            batch_size (int): Texts per simulated request.
+            behaviour (FakeBehaviour, optional): Latency and faults. Built \
+                from `behaviour_options` when not given.
+            recorder (UsageRecorder, optional): Collects usage and timing.
+            limiter (RateLimiter, optional): Holds requests to a limit.
+            **behaviour_options: FakeBehaviour arguments, e.g. latency=0.2.
+        '''
+        self.model = model
+        self.dimensions = dimensions
+        self.batch_size = batch_size
+        self.behaviour = behaviour or FakeBehaviour(**behaviour_options)
+        self.recorder = recorder
+        self.limiter = limiter
+
+    def _vector(self, text: str) -> List[float]:
+        import numpy as np
+
+        rng = np.random.default_rng(text_seed(self.model, text))
+        vector = rng.standard_normal(self.dimensions)
+
+        return (vector / np.linalg.norm(vector)).tolist()
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        vectors: List[List[float]] = []
+        for start in range(0, len(texts), self.batch_size):
+            chunk = texts[start:start + self.batch_size]
+            tokens = sum(fake_tokens(text) for text in chunk)
+            with self._admitted(chunk) as reservation:
+                with self._timed(len(chunk)):
+                    self.behaviour.request()
+                reservation.settle(tokens)
+                vectors.extend(self._vector(text) for text in chunk)
+                self._record(Usage(
+                    provider=self.provider,
+                    model=self.model,
+                    input_tokens=tokens,
+                    billable=False
+                ))
+
+        return vectors
+
+
+# FakeGeneration class
+class FakeGeneration(GenerationProvider):
+    '''
+    Replies derived from a hash of the prompt, so a repeated prompt gets the
+    same reply — which is what a completion cache needs in order to be tested.
+    '''
+    provider = 'fake'
+    billable = False
+
+    def __init__(
+        self,
+        model: str = DEFAULT_FAKE_GENERATION_MODEL,
+        reply: Optional[Callable[[str, str], str]] = None,
+        behaviour: Optional[FakeBehaviour] = None,
+        recorder: Optional[UsageRecorder] = None,
+        limiter: Optional[RateLimiter] = None,
+        **behaviour_options
+    ) -> None:
+        '''
+        Args:
+            model (str): Any name.
+            reply (Callable[[str, str], str], optional): Builds the reply \
+                from (system, user). Defaults to a hash of both.
+            behaviour (FakeBehaviour, optional): Latency and faults. Built \
+                from `behaviour_options` when not given.
+            recorder (UsageRecorder, optional): Collects usage and timing.
+            limiter (RateLimiter, optional): Holds requests to a limit.
+            **behaviour_options: FakeBehaviour arguments, e.g. latency=0.2.
+        '''
+        self.model = model
+        self.reply = reply
+        self.behaviour = behaviour or FakeBehaviour(**behaviour_options)
+        self.recorder = recorder
+        self.limiter = limiter
+
+    def generate(self, system: str, user: str) -> str:
+        with self._admitted([system, user]) as reservation:
+            with self._timed():
+                self.behaviour.request()
+
+            if self.reply is not None:
+                text = self.reply(system, user)
+            else:
+                seed = text_seed(self.model, system + user)
+                text = f'fake reply {seed:016x}'
+
+            input_tokens = fake_tokens(system) + fake_tokens(user)
+            output_tokens = fake_tokens(text)
+            reservation.settle(input_tokens + output_tokens)
+            self._record(Usage(
+                provider=self.provider,
+                model=self.model,
+                input_tokens=input_tokens,
+                output_tokens=output_tokens,
+                billable=False
+            ))
+
+        return text
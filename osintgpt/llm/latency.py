@@ -0,0 +1,319 @@
+# -*- coding: utf-8 -*-
+
+# =================================================================================
+# osintgpt
+#
+# Author: @estebanpdl
+#
+# File: latency.py
+# Description: How long each stage of a run took — provider calls, vector
+#   store and SQL — kept as fixed-bucket histograms so a slow run can be
+#   traced to the stage that made it slow.
+# =================================================================================
+
+# import modules
+import bisect
+import time
+
+# import submodules
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+
+# type hints
+from typing import Callable, Dict, Iterator, List, Optional, Tuple
+
+# Upper bounds in seconds. Fixed rather than adaptive, so histograms from
+# different workers and sessions can be added bucket by bucket, and so they
+# map one-to-one onto a Prometheus histogram.
+LATENCY_BUCKETS: Tuple[float, ...] = (
+    0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0
+)
+
+# Stage names the package records under.
+EMBED = 'embed'
+GENERATE = 'generate'
+VECTOR_SEARCH = 'vector_search'
+VECTOR_UPSERT = 'vector_upsert'
+SQL_READ = 'sql_read'
+SQL_WRITE = 'sql_write'
+
+
+# Timing class
+@dataclass(frozen=True)
+class Timing:
+    '''
+    One timed operation.
+    '''
+    stage: str
+    # Provider id, or the store ('qdrant', 'sqlite') for storage stages.
+    provider: str
+    # Model name, or the collection or table for storage stages.
+    model: str
+    seconds: float
+    # Texts, vectors or rows the operation carried, for throughput.
+    items: int = 1
+    # Attempts beyond the first, where the caller retried it.
+    retries: int = 0
+    # Time to the first chunk of a streamed reply. None for a call that
+    # returns its answer whole.
+    first_byte_seconds: Optional[float] = None
+    failed: bool = False
+
+
+# Histogram class
+@dataclass
+class Histogram:
+    '''
+    Counts of durations per bucket in LATENCY_BUCKETS, plus one overflow
+    bucket. Quantiles are interpolated inside a bucket, which is exact enough
+    to tell a 200ms stage from a 2s one.
+    '''
+    counts: List[int] = field(
+        default_factory=lambda: [0] * (len(LATENCY_BUCKETS) + 1)
+    )
+    count: int = 0
+    total_seconds: float = 0.0
+    max_seconds: float = 0.0
+    items: int = 0
+
+    def observe(self, seconds: float, items: int = 1) -> None:
+        self.counts[bisect.bisect_left(LATENCY_BUCKETS, seconds)] += 1
+        self.count += 1
+        self.total_seconds += seconds
+        self.max_seconds = max(self.max_seconds, seconds)
+        self.items += items
+
+    def merge(self, other: 'Histogram') -> None:
+        for index, count in enumerate(other.counts):
+            self.counts[index] += count
+        self.count += other.count
+        self.total_seconds += other.total_seconds
+        self.max_seconds = max(self.max_seconds, other.max_seconds)
+        self.items += other.items
+
+    # the duration under which a share of operations finished
+    def quantile(self, q: float) -> Optional[float]:
+        '''
+        Args:
+            q (float): Between 0 and 1, e.g. 0.95.
+
+        Returns:
+            Optional[float]: Seconds, or None before anything is observed. \
+                Never above the slowest duration seen.
+        '''
+        if not 0 <= q <= 1:
+            raise ValueError('q must be between 0 and 1')
+        if not self.count:
+            return None
+
+        rank = q * self.count
+        seen = 0
+        for index, count in enumerate(self.counts):
+            if count and seen + count >= rank:
+                lower = LATENCY_BUCKETS[index - 1] if index else 0.0
+                upper = (
+                    LATENCY_BUCKETS[index] if index < len(LATENCY_BUCKETS)
+                    else self.max_seconds
+                )
+                value = lower + (upper - lower) * (rank - seen) / count
+                return min(value, self.max_seconds)
+            seen += count
+
+        return self.max_seconds
+
+    @property
+    def p50(self) -> Optional[float]:
+        return self.quantile(0.5)
+
+    @property
+    def p95(self) -> Optional[float]:
+        return self.quantile(0.95)
+
+    @property
+    def p99(self) -> Optional[float]:
+        return self.quantile(0.99)
+
+    @property
+    def mean(self) -> Optional[float]:
+        return self.total_seconds / self.count if self.count else None
+
+    # texts, vectors or rows per second of time spent in the stage
+    @property
+    def throughput(self) -> Optional[float]:
+        if not self.total_seconds:
+            return None
+
+        return self.items / self.total_seconds
+
+
+# Stopwatch class
+class Stopwatch:
+    '''
+    What `timed` hands the code it times, for the parts only that code knows.
+    '''
+    def __init__(self, clock: Callable[[], float]):
+        self.clock = clock
+        self.started = clock()
+        self.first_byte_seconds: Optional[float] = None
+        self.retries = 0
+
+    # call when a streamed reply's first chunk arrives
+    def first_byte(self) -> None:
+        if self.first_byte_seconds is None:
+            self.first_byte_seconds = self.clock() - self.started
+
+
+# time a block and report it to a recorder
+@contextmanager
+def timed(
+    recorder,
+    stage: str,
+    provider: str = '',
+    model: str = '',
+    items: int = 1,
+    clock: Callable[[], float] = time.perf_counter
+) -> Iterator[Stopwatch]:
+    '''
+    Args:
+        recorder (UsageRecorder, optional): Receives the Timing. None times \
+            nothing and costs nothing.
+        stage (str): e.g. EMBED or VECTOR_SEARCH.
+        provider (str): Provider id or store name.
+        model (str): Model, collection or table.
+        items (int): Texts, vectors or rows the block carries.
+        clock (Callable[[], float]): Seconds; injectable for tests.
+
+    Returns:
+        Iterator[Stopwatch]: Mark the first byte or count retries on it. A \
+            block that raises is recorded as failed and the error re-raised.
+    '''
+    stopwatch = Stopwatch(clock)
+    failed = False
+    try:
+        yield stopwatch
+    except BaseException:
+        failed = True
+        raise
+    finally:
+        if recorder is not None:
+            recorder.observe(Timing(
+                stage=stage,
+                provider=provider,
+                model=model,
+                seconds=clock() - stopwatch.started,
+                items=items,
+                retries=stopwatch.retries,
+                first_byte_seconds=stopwatch.first_byte_seconds,
+                failed=failed
+            ))
+
+
+def _label(value: str) -> str:
+    return value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+# render a recorder's histograms for a Prometheus scrape
+def prometheus_text(recorder, prefix: str = 'osintgpt') -> str:
+    '''
+    Args:
+        recorder (UsageRecorder): Holds the histograms.
+        prefix (str): Metric name prefix.
+
+    Returns:
+        str: The Prometheus text exposition format, one histogram series per \
+            stage, provider and model. Serve it from any HTTP handler.
+    '''
+    histograms, first_byte, counters = recorder.latency_snapshot()
+    lines: List[str] = []
+
+    def histogram(name: str, series: Dict[Tuple[str, str, str], Histogram]):
+        lines.append(f'# TYPE {name} histogram')
+        for (stage, provider, model), hist in sorted(series.items()):
+            labels = (
+                f'stage="{_label(stage)}",provider="{_label(provider)}",'
+                f'model="{_label(model)}"'
+            )
+            cumulative = 0
+            for bound, count in zip(LATENCY_BUCKETS, hist.counts):
+                cumulative += count
+                lines.append(
+                    f'{name}_bucket{{{labels},le="{bound}"}} {cumulative}'
+                )
+            lines.append(f'{name}_bucket{{{labels},le="+Inf"}} {hist.count}')
+            lines.append(f'{name}_sum{{{labels}}} {hist.total_seconds}')
+            lines.append(f'{name}_count{{{labels}}} {hist.count}')
+
+    histogram(f'{prefix}_latency_seconds', histograms)
+    if first_byte:
+        histogram(f'{prefix}_first_byte_seconds', first_byte)
+
+    for counter, values in (
+        ('items_total', {key: hist.items for key, hist in histograms.items()}),
+        ('retries_total', counters['retries']),
+        ('failures_total', counters['failures'])
+    ):
+        name = f'{prefix}_{counter}'
+        lines.append(f'# TYPE {name} counter')
+        for (stage, provider, model), value in sorted(values.items()):
+            lines.append(
+                f'{name}{{stage="{_label(stage)}",provider="{_label(provider)}",'
+                f'model="{_label(model)}"}} {value}'
+            )
+
+    return '\n'.join(lines) + '\n'
+
+
+# forward timings to OpenTelemetry as they happen
+def opentelemetry_listener(meter=None, prefix: str = 'osintgpt'):
+    '''
+    Args:
+        meter (Meter, optional): Defaults to the global meter provider's.
+        prefix (str): Instrument name prefix.
+
+    Raises:
+        ImportError: If opentelemetry-api is not installed.
+
+    Returns:
+        Callable[[Timing], None]: Add it to a recorder's `listeners`.
+    '''
+    try:
+        from opentelemetry import metrics
+    except ImportError as error:
+        raise ImportError(
+            "exporting to OpenTelemetry needs the 'opentelemetry-api' "
+            'package: pip install osintgpt[otel]'
+        ) from error
+
+    if meter is None:
+        meter = metrics.get_meter('osintgpt')
+
+    latency = meter.create_histogram(
+        f'{prefix}.latency', unit='s', description='Wall time per operation'
+    )
+    first_byte = meter.create_histogram(
+        f'{prefix}.first_byte', unit='s',
+        description='Time to the first chunk of a streamed reply'
+    )
+    items = meter.create_counter(
+        f'{prefix}.items', description='Texts, vectors or rows carried'
+    )
+    retries = meter.create_counter(
+        f'{prefix}.retries', description='Attempts beyond the first'
+    )
+
+    def listener(timing: Timing) -> None:
+        attributes = {
+            'stage': timing.stage,
+            'provider': timing.provider,
+            'model': timing.model,
+            'failed': timing.failed
+        }
+        latency.record(timing.seconds, attributes)
+        if timing.first_byte_seconds is not None:
+            first_byte.record(timing.first_byte_seconds, attributes)
+        items.add(timing.items, attributes)
+        if timing.retries:
+            retries.add(timing.retries, attributes)
+
+    return listener
@@ -11,28 +11,50 @@
 # =================================================================================
 
 # type hints
-from typing import List, Optional
+from typing import TYPE_CHECKING, List, Optional
 
 from .base import EmbeddingProvider
+from .dimensions import check_dimensions, shorten
 from .usage import Usage, UsageRecorder
 
+# NumPy comes with sentence-transformers; it is only imported where vectors
+# are built, like the encoder itself.
+if TYPE_CHECKING:
+    import numpy as np
+
 # Small, fast, and the model most people start from. A local backend needs a
 # default that is actually local-shaped; an OpenAI model name would fail here.
 DEFAULT_LOCAL_EMBEDDING_MODEL = 'all-MiniLM-L6-v2'
 
+# Texts per forward pass. sentence-transformers defaults to 32, which leaves
+# a CPU idle between passes on short texts; larger batches pay off until
+# padding dominates, which length sorting holds off.
+DEFAULT_LOCAL_BATCH_SIZE = 64
+
 
 # SentenceTransformerEmbedding class
 class SentenceTransformerEmbedding(EmbeddingProvider):
     '''
     In-process embeddings. The model is loaded once and reused, because loading
     costs far more than encoding.
+
+    With `processes` above one, encoding runs on a pool of CPU workers, each
+    holding its own copy of the model. The pool starts on the first large
+    enough call and stops on close(); use the provider as a context manager to
+    have that done for you.
     '''
+    provider = 'sentence-transformers'
+
     def __init__(
         self,
         model: str = DEFAULT_LOCAL_EMBEDDING_MODEL,
         device: Optional[str] = None,
         encoder: Optional[object] = None,
-        recorder: Optional[UsageRecorder] = None
+        recorder: Optional[UsageRecorder] = None,
+        batch_size: int = DEFAULT_LOCAL_BATCH_SIZE,
+        processes: int = 1,
+        sort_by_length: bool = True,
+        dimensions: Optional[int] = None
     ) -> None:
         '''
         Args:
@@ -42,12 +64,29 @@ class SentenceTransformerEmbedding(EmbeddingProvider):
             device (str, optional): Torch device, e.g. 'cpu' or 'cuda'. \
                 Defaults to whatever sentence-transformers picks.
             encoder (object, optional): A prepared encoder, for tests.
+            batch_size (int): Texts per forward pass.
+            processes (int): CPU worker processes. 1 encodes in this \
+                process; os.cpu_count() uses every core.
+            sort_by_length (bool): Order texts by length before batching, so \
+                a batch pads to similar lengths. Results come back in input \
+                order either way.
+            dimensions (int, optional): Keep this many leading values of \
+                each vector, rescaled to unit length. Meant for models \
+                trained for it; None keeps the full width.
 
         Raises:
             ImportError: If sentence-transformers is not installed.
         '''
+        if batch_size < 1 or processes < 1:
+            raise ValueError('batch_size and processes must be at least 1')
+
         self.model = model
         self.recorder = recorder
+        self.batch_size = batch_size
+        self.processes = processes
+        self.sort_by_length = sort_by_length
+        self.dimensions = check_dimensions(model, dimensions)
+        self._pool = None
 
         if encoder is not None:
             self.encoder = encoder
@@ -63,24 +102,88 @@ class SentenceTransformerEmbedding(EmbeddingProvider):
 
         self.encoder = SentenceTransformer(model, device=device)
 
-    def embed(self, texts: List[str]) -> List[List[float]]:
+    # start the worker pool, once
+    def _worker_pool(self):
+        if self._pool is None:
+            self._pool = self.encoder.start_multi_process_pool(
+                target_devices=['cpu'] * self.processes
+            )
+
+        return self._pool
+
+    # stop the worker pool
+    def close(self) -> None:
+        if self._pool is not None:
+            self.encoder.stop_multi_process_pool(self._pool)
+            self._pool = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def _encode(self, texts: List[str]):
+        # A pool costs a pickle round trip per chunk; below a couple of
+        # batches per worker, one process is faster.
+        pooled = 2 * self.batch_size * self.processes
+        if self.processes > 1 and len(texts) >= pooled:
+            return self.encoder.encode_multi_process(
+                texts, self._worker_pool(), batch_size=self.batch_size
+            )
+
+        return self.encoder.encode(
+            texts, batch_size=self.batch_size, convert_to_numpy=True
+        )
+
+    # embed into one float32 array
+    def embed_array(self, texts: List[str]) -> 'np.ndarray':
+        '''
+        embed() without a Python float per value: one row per text, in input
+        order, as float32 — the encoder's own precision.
+
+        Args:
+            texts (List[str]): Texts to embed.
+
+        Returns:
+            np.ndarray: Shape (len(texts), dimensions).
+        '''
+        import numpy as np
+
         if not texts:
-            return []
+            return np.empty((0, 0), dtype=np.float32)
+
+        order = None
+        if self.sort_by_length:
+            order = sorted(range(len(texts)), key=lambda i: len(texts[i]))
+            texts = [texts[i] for i in order]
 
-        # Batching is the encoder's job; it already groups by length.
-        vectors = self.encoder.encode(texts)
+        with self._timed(len(texts)):
+            vectors = np.asarray(self._encode(texts), dtype=np.float32)
+
+        if order is not None:
+            restored = np.empty_like(vectors)
+            restored[order] = vectors
+            vectors = restored
+
+        if self.dimensions is not None:
+            vectors = shorten(vectors, self.dimensions)
 
         # An encoder returns vectors, not a usage block. Cost is a real zero;
         # the token count is genuinely absent, and says so.
         self._record(Usage(
-            provider='sentence-transformers',
+            provider=self.provider,
             model=self.model,
             billable=False,
             counted=False
         ))
 
-        # Returns a NumPy array, which is not what the interface promises.
-        return [
-            vector.tolist() if hasattr(vector, 'tolist') else list(vector)
-            for vector in vectors
-        ]
+        return vectors
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        if not texts:
+            return []
+
+        # The interface promises lists; a caller that can take the array
+        # should call embed_array and skip this conversion.
+        return self.embed_array(texts).tolist()
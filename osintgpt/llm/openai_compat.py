@@ -10,15 +10,35 @@
 #   Gemini's compatibility endpoint, Voyage and Ollama differ only by base URL.
 # =================================================================================
 
-# import submodules
-from openai import OpenAI
+# import modules
+import base64
 
 # type hints
-from typing import List, Optional
+from typing import TYPE_CHECKING, Iterator, List, Optional, Tuple
 
+from . import batch
+from .dimensions import (
+    SHORTENABLE_MODELS,
+    check_dimensions,
+    fit_vectors,
+    shorten
+)
 from .base import EmbeddingProvider, GenerationProvider
+from .ratelimit import RateLimiter
 from .usage import Usage, UsageRecorder
 
+if TYPE_CHECKING:
+    import numpy as np
+
+
+# construct the SDK client
+def _client(api_key: str, base_url: Optional[str]):
+    # Deferred: the SDK and its HTTP stack take longer to import than most
+    # short jobs spend calling it.
+    from openai import OpenAI
+
+    return OpenAI(api_key=api_key, base_url=base_url)
+
 
 # list the models an OpenAI-compatible endpoint reports
 def _list_models(client) -> List[str]:
@@ -40,6 +60,38 @@ def _prompt_tokens(response) -> int:
     return getattr(usage, 'prompt_tokens', 0) or 0
 
 
+# read the part of the prompt served from the provider's cache
+def _cached_prompt_tokens(usage) -> int:
+    details = getattr(usage, 'prompt_tokens_details', None)
+
+    return getattr(details, 'cached_tokens', 0) or 0
+
+
+# the same reading over a batch result, which arrives as plain JSON
+def _body_usage(body: dict) -> dict:
+    usage = body.get('usage') or {}
+    details = usage.get('prompt_tokens_details') or {}
+
+    return {
+        'input_tokens': usage.get('prompt_tokens', 0) or 0,
+        'output_tokens': usage.get('completion_tokens', 0) or 0,
+        'cached_input_tokens': details.get('cached_tokens', 0) or 0,
+        'counted': bool(body.get('usage'))
+    }
+
+
+# read one embedding into float32, whichever encoding it arrived in
+def _decode_embedding(value) -> 'np.ndarray':
+    import numpy as np
+
+    # encoding_format='base64' returns the raw little-endian float32 buffer;
+    # decoding it skips parsing a JSON float per value.
+    if isinstance(value, str):
+        return np.frombuffer(base64.b64decode(value), dtype='<f4')
+
+    return np.asarray(value, dtype=np.float32)
+
+
 # Gemini's compatibility endpoint rejects batches over 100 inputs. Other
 # backends allow more, so 100 is the safe floor rather than a tuning knob.
 MAX_BATCH = 100
@@ -59,7 +111,12 @@ class OpenAICompatEmbedding(EmbeddingProvider):
         discovers_models: bool = False,
         billable: bool = True,
         provider: str = '',
-        recorder: Optional[UsageRecorder] = None
+        recorder: Optional[UsageRecorder] = None,
+        batches: bool = False,
+        limiter: Optional[RateLimiter] = None,
+        base64_embeddings: bool = False,
+        dimensions: Optional[int] = None,
+        shortens: bool = False
     ) -> None:
         '''
         Args:
@@ -69,34 +126,144 @@ class OpenAICompatEmbedding(EmbeddingProvider):
             batch_size (int): Inputs per request.
             discovers_models (bool): Whether this endpoint answers a
                 list-models request.
+            batches (bool): Whether this endpoint serves the files and
+                batches routes.
+            limiter (RateLimiter, optional): Holds requests to the
+                account's limits.
+            base64_embeddings (bool): Whether this endpoint honours
+                encoding_format='base64', which embed_array decodes
+                straight into its array.
+            dimensions (int, optional): Width of the vectors returned. None
+                keeps the model's full width.
+            shortens (bool): Whether this endpoint honours the dimensions
+                parameter, which is only sent for SHORTENABLE_MODELS.
+                Otherwise full vectors are requested and shortened here,
+                so stored widths hold either way.
         '''
         self.model = model
-        self.client = OpenAI(api_key=api_key, base_url=base_url)
+        self.client = _client(api_key, base_url)
         self.batch_size = batch_size
+        self.base64_embeddings = base64_embeddings
+        self.dimensions = check_dimensions(model, dimensions)
+        self.shortens = shortens
         self.supports_model_discovery = discovers_models
+        self.supports_batches = batches
         self.billable = billable
         self.provider = provider
         self.recorder = recorder
+        self.limiter = limiter
 
-    def embed(self, texts: List[str]) -> List[List[float]]:
-        vectors: List[List[float]] = []
+    # request parameters beyond the model and input
+    def _params(self) -> dict:
+        # OpenAI answers 400 to the parameter for any other model.
+        if self.dimensions is not None and self.shortens and (
+            self.model in SHORTENABLE_MODELS
+        ):
+            return {'dimensions': self.dimensions}
+
+        return {}
+
+    # one request per chunk, recorded, items in input order
+    def _requests(self, texts: List[str], **params) -> Iterator[list]:
+        params.update(self._params())
         for start in range(0, len(texts), self.batch_size):
-            response = self.client.embeddings.create(
-                model=self.model,
-                input=texts[start:start + self.batch_size]
-            )
+            chunk = texts[start:start + self.batch_size]
+            with self._admitted(chunk) as reservation:
+                with self._timed(len(chunk)):
+                    response = self.client.embeddings.create(
+                        model=self.model,
+                        input=chunk,
+                        **params
+                    )
+                reservation.settle(_prompt_tokens(response))
+                self._record(Usage(
+                    provider=self.provider,
+                    model=self.model,
+                    input_tokens=_prompt_tokens(response),
+                    billable=self.billable,
+                    counted=getattr(response, 'usage', None) is not None
+                ))
+
             # Providers are not required to return the batch in order.
-            ordered = sorted(response.data, key=lambda item: item.index)
+            yield sorted(response.data, key=lambda item: item.index)
+
+    def embed(self, texts: List[str]) -> List[List[float]]:
+        vectors: List[List[float]] = []
+        for ordered in self._requests(texts):
             vectors.extend(item.embedding for item in ordered)
+
+        return fit_vectors(vectors, self.dimensions)
+
+    def embed_array(self, texts: List[str]) -> 'np.ndarray':
+        import numpy as np
+
+        if not texts:
+            return np.empty((0, 0), dtype=np.float32)
+
+        params = {'encoding_format': 'base64'} if self.base64_embeddings else {}
+        vectors = None
+        row = 0
+        for ordered in self._requests(texts, **params):
+            for item in ordered:
+                vector = _decode_embedding(item.embedding)
+                if vectors is None:
+                    # Sized from the first vector; rows are filled in place.
+                    vectors = np.empty(
+                        (len(texts), vector.shape[0]), dtype=np.float32
+                    )
+                vectors[row] = vector
+                row += 1
+
+        if self.dimensions is not None and vectors.shape[1] != self.dimensions:
+            return shorten(vectors, self.dimensions)
+
+        return vectors
+
+    def submit_batch(self, texts: List[str], requests_path=None):
+        if not self.supports_batches:
+            raise self._unbatched()
+
+        # Each request line carries a full chunk, as embed() sends it, so an
+        # archive is a few thousand lines rather than one per text.
+        chunks = [
+            texts[start:start + self.batch_size]
+            for start in range(0, len(texts), self.batch_size)
+        ]
+
+        # Checked against the budget, not held: the job may be collected by
+        # another session, which records what it cost.
+        with self._admitted(texts, calls=len(chunks), batch=True):
+            return batch.submit_openai(
+                self.client, self.provider, self.model,
+                batch.EMBEDDINGS_ENDPOINT,
+                [
+                    {'model': self.model, 'input': chunk, **self._params()}
+                    for chunk in chunks
+                ],
+                [len(chunk) for chunk in chunks], requests_path
+            )
+
+    def collect_batch(self, job, **wait) -> List[List[float]]:
+        if not self.supports_batches:
+            raise self._unbatched()
+
+        bodies = batch.collect_openai(self.client, job, **wait)
+        vectors: List[List[float]] = []
+        for custom_id in job.custom_ids:
+            body = bodies[custom_id]
+            ordered = sorted(body.get('data') or [], key=lambda d: d['index'])
+            vectors.extend(item['embedding'] for item in ordered)
+            read = _body_usage(body)
             self._record(Usage(
                 provider=self.provider,
-                model=self.model,
-                input_tokens=_prompt_tokens(response),
+                model=job.model,
+                input_tokens=read['input_tokens'],
                 billable=self.billable,
-                counted=getattr(response, 'usage', None) is not None
+                counted=read['counted'],
+                batch=True
             ))
 
-        return vectors
+        return fit_vectors(vectors, self.dimensions)
 
     def list_models(self) -> List[str]:
         return _list_models(self.client)
@@ -106,6 +273,10 @@ class OpenAICompatEmbedding(EmbeddingProvider):
 class OpenAICompatGeneration(GenerationProvider):
     '''
     Chat completions over any OpenAI-compatible endpoint.
+
+    OpenAI caches long prompt prefixes on its own, with no marker in the
+    request. What earns a hit is a prefix that repeats byte for byte, so the
+    system prompt always goes first and the varying user content after it.
     '''
     def __init__(
         self,
@@ -115,7 +286,10 @@ class OpenAICompatGeneration(GenerationProvider):
         discovers_models: bool = False,
         billable: bool = True,
         provider: str = '',
-        recorder: Optional[UsageRecorder] = None
+        recorder: Optional[UsageRecorder] = None,
+        prompt_cache_key: Optional[str] = None,
+        batches: bool = False,
+        limiter: Optional[RateLimiter] = None
     ) -> None:
         '''
         Args:
@@ -124,34 +298,98 @@ class OpenAICompatGeneration(GenerationProvider):
             base_url (str, optional): Endpoint, or None for OpenAI's own.
             discovers_models (bool): Whether this endpoint answers a
                 list-models request.
+            prompt_cache_key (str, optional): Routes requests sharing a long
+                prefix to the same cache, e.g. one key per bulk job. OpenAI
+                only; other compatible endpoints may reject the field, so it
+                is sent only when set.
+            batches (bool): Whether this endpoint serves the files and
+                batches routes.
+            limiter (RateLimiter, optional): Holds requests to the
+                account's limits.
         '''
         self.model = model
-        self.client = OpenAI(api_key=api_key, base_url=base_url)
+        self.client = _client(api_key, base_url)
         self.supports_model_discovery = discovers_models
+        self.supports_batches = batches
         self.billable = billable
         self.provider = provider
         self.recorder = recorder
+        self.prompt_cache_key = prompt_cache_key
+        self.limiter = limiter
 
-    def generate(self, system: str, user: str) -> str:
-        response = self.client.chat.completions.create(
-            model=self.model,
-            messages=[
+    # the request body for one prompt
+    def _body(self, system: str, user: str) -> dict:
+        body = {
+            'model': self.model,
+            # Stable first: the system prompt is the shared prefix a bulk job
+            # repeats, so it leads and the per-call content follows.
+            'messages': [
                 {'role': 'system', 'content': system},
                 {'role': 'user', 'content': user}
             ]
-        )
-
-        usage = getattr(response, 'usage', None)
-        self._record(Usage(
-            provider=self.provider,
-            model=self.model,
-            input_tokens=getattr(usage, 'prompt_tokens', 0) or 0,
-            output_tokens=getattr(usage, 'completion_tokens', 0) or 0,
-            billable=self.billable,
-            counted=usage is not None
-        ))
+        }
+        if self.prompt_cache_key:
+            body['prompt_cache_key'] = self.prompt_cache_key
+
+        return body
+
+    def generate(self, system: str, user: str) -> str:
+        with self._admitted([system, user]) as reservation:
+            with self._timed():
+                response = self.client.chat.completions.create(
+                    **self._body(system, user)
+                )
+
+            usage = getattr(response, 'usage', None)
+            # OpenAI counts input and output against the one token limit.
+            reservation.settle(getattr(usage, 'total_tokens', 0))
+            self._record(Usage(
+                provider=self.provider,
+                model=self.model,
+                input_tokens=getattr(usage, 'prompt_tokens', 0) or 0,
+                output_tokens=getattr(usage, 'completion_tokens', 0) or 0,
+                billable=self.billable,
+                counted=usage is not None,
+                cached_input_tokens=_cached_prompt_tokens(usage)
+            ))
 
         return response.choices[0].message.content or ''
 
+    def submit_batch(
+        self, prompts: List[Tuple[str, str]], requests_path=None
+    ):
+        if not self.supports_batches:
+            raise self._unbatched()
+
+        # See OpenAICompatEmbedding.submit_batch.
+        texts = [text for prompt in prompts for text in prompt]
+        with self._admitted(texts, calls=len(prompts), batch=True):
+            return batch.submit_openai(
+                self.client, self.provider, self.model, batch.CHAT_ENDPOINT,
+                [self._body(system, user) for system, user in prompts],
+                [1] * len(prompts), requests_path
+            )
+
+    def collect_batch(self, job, **wait) -> List[str]:
+        if not self.supports_batches:
+            raise self._unbatched()
+
+        bodies = batch.collect_openai(self.client, job, **wait)
+        replies: List[str] = []
+        for custom_id in job.custom_ids:
+            body = bodies[custom_id]
+            self._record(Usage(
+                provider=self.provider,
+                model=job.model,
+                billable=self.billable,
+                batch=True,
+                **_body_usage(body)
+            ))
+            choices = body.get('choices') or [{}]
+            message = choices[0].get('message') or {}
+            replies.append(message.get('content') or '')
+
+        return replies
+
     def list_models(self) -> List[str]:
         return _list_models(self.client)
@@ -0,0 +1,256 @@
+# -*- coding: utf-8 -*-
+
+# =================================================================================
+# osintgpt
+#
+# Author: @estebanpdl
+#
+# File: ratelimit.py
+# Description: Requests and tokens per minute, held to the account's limits
+#   across every provider instance in the process, so parallel workers queue
+#   here instead of in a provider's 429 retries.
+# =================================================================================
+
+# import modules
+import threading
+import time
+
+# import submodules
+from dataclasses import dataclass
+
+# type hints
+from typing import Callable, Dict, List, Optional, Tuple
+
+# Key a limit is held under: (provider id, model). A model of None covers
+# every model of that provider without a limit of its own.
+LimitKey = Tuple[str, Optional[str]]
+
+SECONDS_PER_MINUTE = 60.0
+
+
+# RateLimit class
+@dataclass(frozen=True)
+class RateLimit:
+    '''
+    An account limit, as the provider publishes it. None leaves that axis
+    unlimited.
+    '''
+    requests_per_minute: Optional[int] = None
+    tokens_per_minute: Optional[int] = None
+
+
+# TokenBucket class
+class TokenBucket:
+    '''
+    Holds up to one minute's allowance and refills continuously. Taking more
+    than it holds leaves it in debt; the debt is the wait.
+    '''
+    def __init__(self, per_minute: int, now: float) -> None:
+        self.capacity = float(per_minute)
+        self.rate = per_minute / SECONDS_PER_MINUTE
+        self.level = self.capacity
+        self.updated = now
+
+    def _refill(self, now: float) -> None:
+        self.level = min(
+            self.capacity, self.level + (now - self.updated) * self.rate
+        )
+        self.updated = now
+
+    # take an amount; the seconds until the bucket is out of debt
+    def take(self, amount: float, now: float) -> float:
+        self._refill(now)
+        # A request larger than a minute's allowance is charged a full
+        # minute, or it could never be admitted at all.
+        self.level -= min(amount, self.capacity)
+
+        return max(0.0, -self.level / self.rate)
+
+    # return or charge the difference between an estimate and the actual
+    def adjust(self, amount: float, now: float) -> None:
+        self._refill(now)
+        self.level = min(self.capacity, self.level + amount)
+
+
+# Reservation class
+class Reservation:
+    '''
+    What one request took from the token bucket, settled against what the
+    provider reports it used.
+    '''
+    def __init__(self, limiter=None, key=None, estimated: int = 0) -> None:
+        self.limiter = limiter
+        self.key = key
+        self.estimated = estimated
+
+    def settle(self, actual: Optional[int]) -> None:
+        '''
+        Args:
+            actual (int, optional): Tokens the provider reported. A missing \
+                count leaves the estimate standing.
+        '''
+        if self.limiter is None or not actual:
+            return
+
+        self.limiter._adjust(self.key, self.estimated - actual)
+
+
+# Unlimited requests reserve nothing and settle nothing.
+UNLIMITED = Reservation()
+
+
+# RateLimiter class
+class RateLimiter:
+    '''
+    Token buckets keyed by provider and model, one for requests and one for
+    tokens. A caller over the limit sleeps until its share is available.
+
+    Debt rather than polling: each caller takes its share immediately and
+    sleeps off whatever it overdrew, so waiting callers are admitted in the
+    order they arrived and none of them spins.
+    '''
+    def __init__(
+        self,
+        limits: Optional[Dict[LimitKey, RateLimit]] = None,
+        counter: Optional[Callable[[str, str], int]] = None,
+        clock: Callable[[], float] = time.monotonic,
+        sleep: Callable[[float], None] = time.sleep
+    ) -> None:
+        '''
+        Args:
+            limits (Dict[LimitKey, RateLimit], optional): Initial limits.
+            counter (Callable[[str, str], int], optional): Counts the tokens \
+                in a text for a model. Defaults to utils.count_tokens_many.
+            clock (Callable[[], float]): Time source, for tests.
+            sleep (Callable[[float], None]): Sleeper, for tests.
+        '''
+        self.limits: Dict[LimitKey, RateLimit] = dict(limits or {})
+        self.counter = counter
+        self.clock = clock
+        self.sleep = sleep
+
+        self._lock = threading.Lock()
+        self._buckets: Dict[Tuple[str, str, str], TokenBucket] = {}
+
+    # set a limit
+    def configure(
+        self,
+        provider: str,
+        model: Optional[str] = None,
+        requests_per_minute: Optional[int] = None,
+        tokens_per_minute: Optional[int] = None
+    ) -> None:
+        '''
+        Args:
+            provider (str): Provider id, as registered.
+            model (str, optional): Model name. None sets the provider-wide \
+                limit for models without one of their own.
+            requests_per_minute (int, optional): RPM limit.
+            tokens_per_minute (int, optional): TPM limit.
+        '''
+        with self._lock:
+            self.limits[(provider, model)] = RateLimit(
+                requests_per_minute, tokens_per_minute
+            )
+            # New limits start from full buckets.
+            for key in [k for k in self._buckets if k[:2] == (provider, model)]:
+                del self._buckets[key]
+
+    # the limit that applies to a request
+    def limit_for(self, provider: str, model: str) -> Optional[RateLimit]:
+        return self.limits.get((provider, model)) or self.limits.get(
+            (provider, None)
+        )
+
+    def _count(self, texts: List[str], model: str) -> int:
+        if self.counter is None:
+            # Ordinary encoding: scraped text may hold special-token markers.
+            from osintgpt.utils import count_tokens_many
+
+            return sum(count_tokens_many(texts, model))
+
+        return sum(self.counter(text, model) for text in texts)
+
+    def _bucket(self, limit_key, axis: str, per_minute: int, now: float):
+        key = (*limit_key, axis)
+        bucket = self._buckets.get(key)
+        if bucket is None:
+            bucket = self._buckets[key] = TokenBucket(per_minute, now)
+
+        return bucket
+
+    def _limit_key(self, provider: str, model: str) -> LimitKey:
+        return (provider, model) if (provider, model) in self.limits else (
+            provider, None
+        )
+
+    # wait for room for one request
+    def acquire(
+        self, provider: str, model: str, texts: List[str] = (),
+        extra_tokens: int = 0
+    ) -> Reservation:
+        '''
+        Block until one request carrying these texts fits under the limit.
+
+        Args:
+            provider (str): Provider id.
+            model (str): Model name.
+            texts (List[str]): What the request sends, counted only when a \
+                token limit applies.
+            extra_tokens (int): Tokens to reserve beyond the texts, e.g. the \
+                reply a chat request asks room for.
+
+        Returns:
+            Reservation: Settle it with the tokens the provider reports.
+        '''
+        limit = self.limit_for(provider, model)
+        if limit is None:
+            return UNLIMITED
+
+        estimated = 0
+        if limit.tokens_per_minute:
+            estimated = self._count(list(texts), model) + extra_tokens
+
+        key = self._limit_key(provider, model)
+        with self._lock:
+            now = self.clock()
+            wait = 0.0
+            if limit.requests_per_minute:
+                wait = self._bucket(
+                    key, 'requests', limit.requests_per_minute, now
+                ).take(1, now)
+            if limit.tokens_per_minute:
+                wait = max(wait, self._bucket(
+                    key, 'tokens', limit.tokens_per_minute, now
+                ).take(estimated, now))
+
+        if wait > 0:
+            self.sleep(wait)
+
+        if not limit.tokens_per_minute:
+            return UNLIMITED
+
+        return Reservation(self, key, estimated)
+
+    def _adjust(self, key: LimitKey, amount: int) -> None:
+        with self._lock:
+            bucket = self._buckets.get((*key, 'tokens'))
+            if bucket is not None:
+                bucket.adjust(amount, self.clock())
+
+
+# Providers built by the factories share this one, so every worker in the
+# process draws on the same allowance. It starts with no limits: the numbers
+# belong to the account, not to the library.
+_shared = RateLimiter()
+
+
+# the process-wide limiter
+def shared_limiter() -> RateLimiter:
+    '''
+    Returns:
+        RateLimiter: The limiter the provider factories hand out. Configure \
+            it once with the account's limits, e.g. \
+            shared_limiter().configure('openai', 'gpt-4o', 500, 30_000).
+    '''
+    return _shared
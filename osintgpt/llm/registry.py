@@ -24,6 +24,7 @@ from osintgpt.config import (
     Settings
 )
 
+from .fake import DEFAULT_FAKE_EMBEDDING_MODEL, DEFAULT_FAKE_GENERATION_MODEL
 from .local import DEFAULT_LOCAL_EMBEDDING_MODEL
 
 # import exceptions
@@ -66,16 +67,28 @@ class BackendSpec:
     # where its base URL points, so the flag alone is not the whole answer —
     # see locality.audit_locality.
     local: bool = False
+    # True where the vendor runs asynchronous batch jobs at a discount. Left
+    # false for compatible endpoints that do not serve the batch routes.
+    batches: bool = False
+    # True where the endpoint honours encoding_format='base64' for
+    # embeddings. Left false where that is unverified: an endpoint that
+    # ignores it still answers, in floats.
+    base64_embeddings: bool = False
+    # True where the endpoint accepts `dimensions` and returns shortened
+    # embeddings itself. Elsewhere a shortened width is cut client-side.
+    shortens_embeddings: bool = False
 
 
 OPENAI_COMPAT = 'openai-compat'
 ANTHROPIC = 'anthropic'
 SENTENCE_TRANSFORMERS = 'sentence-transformers'
+FAKE = 'fake'
 
 EMBEDDING_BACKENDS: Dict[str, BackendSpec] = {
     'openai': BackendSpec(
         OPENAI_COMPAT, 'openai_api_key',
-        default_model=DEFAULT_EMBEDDING_MODEL, discovers_models=True
+        default_model=DEFAULT_EMBEDDING_MODEL, discovers_models=True,
+        batches=True, base64_embeddings=True, shortens_embeddings=True
     ),
     'gemini': BackendSpec(OPENAI_COMPAT, 'gemini_api_key', GEMINI_COMPAT_URL),
     'voyage': BackendSpec(OPENAI_COMPAT, 'voyage_api_key', VOYAGE_COMPAT_URL),
@@ -88,12 +101,17 @@ EMBEDDING_BACKENDS: Dict[str, BackendSpec] = {
     'sentence-transformers': BackendSpec(
         SENTENCE_TRANSFORMERS, None, extra='local',
         default_model=DEFAULT_LOCAL_EMBEDDING_MODEL, local=True
+    ),
+    # Offline stand-in for load tests: deterministic vectors, simulated
+    # latency and faults, no network.
+    'fake': BackendSpec(
+        FAKE, None, default_model=DEFAULT_FAKE_EMBEDDING_MODEL, local=True
     )
 }
 
 GENERATION_BACKENDS: Dict[str, BackendSpec] = {
     'openai': BackendSpec(
-        OPENAI_COMPAT, 'openai_api_key', discovers_models=True
+        OPENAI_COMPAT, 'openai_api_key', discovers_models=True, batches=True
     ),
     'gemini': BackendSpec(OPENAI_COMPAT, 'gemini_api_key', GEMINI_COMPAT_URL),
     'ollama': BackendSpec(
@@ -103,7 +121,10 @@ GENERATION_BACKENDS: Dict[str, BackendSpec] = {
     # because it is preferred.
     'anthropic': BackendSpec(
         ANTHROPIC, 'anthropic_api_key', extra='anthropic',
-        discovers_models=True
+        discovers_models=True, batches=True
+    ),
+    'fake': BackendSpec(
+        FAKE, None, default_model=DEFAULT_FAKE_GENERATION_MODEL, local=True
     )
 }
 
@@ -10,14 +10,30 @@
 #   is a reading taken over them, and an approximate one.
 # =================================================================================
 
+# import modules
+import sqlite3
+import threading
+import time
+
 # import submodules
+from collections import deque
 from dataclasses import dataclass, field
+from pathlib import Path
 
 # type hints
-from typing import Dict, List, Optional
+from typing import Callable, Deque, Dict, List, Optional, Tuple, Union
 
 # import osintgpt pricing
-from osintgpt.pricing import estimate_cost
+from osintgpt.pricing import BATCH_RATE, estimate_cost
+
+from .latency import Histogram, Timing
+
+USAGE_TABLE = 'usage_totals'
+
+# A worker flushes its per-model totals this often, by calls or by seconds,
+# whichever comes first. A crash loses at most that much of the record.
+DEFAULT_FLUSH_EVERY = 100
+DEFAULT_FLUSH_SECONDS = 60.0
 
 
 # Usage class
@@ -36,6 +52,16 @@ class Usage:
     # False where the backend reports no counts at all — an in-process encoder
     # returns vectors, not a usage block. Keeps a real zero apart from silence.
     counted: bool = True
+    # Parts of input_tokens the provider's prompt cache served, and wrote.
+    # Both are included in input_tokens, whatever shape the vendor reports in.
+    cached_input_tokens: int = 0
+    cache_write_tokens: int = 0
+    # True where the reply came from osintgpt's own completion cache and no
+    # provider was called at all.
+    cache_hit: bool = False
+    # True where the call ran inside a provider batch job, billed at the
+    # batch rate.
+    batch: bool = False
 
     @property
     def total_tokens(self) -> int:
@@ -49,23 +75,76 @@ class Usage:
 
         Returns:
             Optional[float]: 0.0 for a provider that cannot bill, None when \
-                the model carries no price, otherwise an estimate that ignores \
-                cached input, batch rates and free allowances.
+                the model carries no price, otherwise an estimate that prices \
+                cached input at the cache rate and batch calls at the batch \
+                rate, and ignores free allowances.
         '''
-        if not self.billable:
+        if not self.billable or self.cache_hit:
             return 0.0
 
-        cost = estimate_cost(self.model, self.input_tokens)
+        uncached = (
+            self.input_tokens - self.cached_input_tokens
+            - self.cache_write_tokens
+        )
+        cost = estimate_cost(self.model, uncached)
         if cost is None:
             return None
 
-        if self.output_tokens:
-            output = estimate_cost(self.model, self.output_tokens, 'output')
-            if output is None:
+        for tokens, kind in (
+            (self.cached_input_tokens, 'cached_input'),
+            (self.cache_write_tokens, 'cache_write'),
+            (self.output_tokens, 'output')
+        ):
+            if not tokens:
+                continue
+            part = estimate_cost(self.model, tokens, kind)
+            if part is None:
                 return None
-            cost += output
+            cost += part
+
+        return cost * BATCH_RATE if self.batch else cost
+
+
+# UsageTotals class
+@dataclass
+class UsageTotals:
+    '''
+    Running sums over a set of calls. Updated once per call, so reading any
+    of them costs the same after a million calls as after one.
+    '''
+    calls: int = 0
+    input_tokens: int = 0
+    output_tokens: int = 0
+    cached_input_tokens: int = 0
+    cache_hits: int = 0
+    batch_calls: int = 0
+    unpriced_calls: int = 0
+    uncounted_calls: int = 0
+    # Over the calls that could be priced; read it with unpriced_calls.
+    estimated_cost: float = 0.0
 
-        return cost
+    @property
+    def total_tokens(self) -> int:
+        return self.input_tokens + self.output_tokens
+
+    def add(self, usage: Usage, cost: Optional[float]) -> None:
+        '''
+        Args:
+            usage (Usage): One call.
+            cost (Optional[float]): Its estimated_cost, computed once by the \
+                caller for every total it lands in.
+        '''
+        self.calls += 1
+        self.input_tokens += usage.input_tokens
+        self.output_tokens += usage.output_tokens
+        self.cached_input_tokens += usage.cached_input_tokens
+        self.cache_hits += usage.cache_hit
+        self.batch_calls += usage.batch
+        self.uncounted_calls += not usage.counted
+        if cost is None:
+            self.unpriced_calls += usage.billable
+        else:
+            self.estimated_cost += cost
 
 
 # UsageRecorder class
@@ -74,33 +153,329 @@ class UsageRecorder:
     '''
     Collects what a run consumed. One per project session; providers append to
     it when they are given one.
+
+    Totals are kept as calls arrive, overall and per provider and model. Raw
+    records are kept too, all of them by default or the most recent
+    `max_records` in a long-running worker. With a store, per-model totals are
+    flushed to it periodically, so a worker's consumption outlives it.
     '''
-    records: List[Usage] = field(default_factory=list)
+    records: Union[List[Usage], Deque[Usage]] = field(default_factory=list)
+    # Raw records retained; None keeps all, 0 keeps none. Totals cover every
+    # call either way.
+    max_records: Optional[int] = None
+    # SQLite file the totals are flushed to, typically the project store.
+    store: Optional[Union[str, Path]] = None
+    flush_every: int = DEFAULT_FLUSH_EVERY
+    flush_seconds: Optional[float] = DEFAULT_FLUSH_SECONDS
+    # Called with each Timing as it is observed, e.g. an OpenTelemetry
+    # exporter from latency.opentelemetry_listener.
+    listeners: List[Callable[[Timing], None]] = field(default_factory=list)
+
+    def __post_init__(self) -> None:
+        # Re-entrant, so a subclass can hold it around a call to record().
+        self._lock = threading.RLock()
+        if self.max_records is not None:
+            self.records = deque(self.records, maxlen=self.max_records)
+
+        self.totals = UsageTotals()
+        self.totals_by_key: Dict[Tuple[str, str], UsageTotals] = {}
+        self._unflushed: Dict[Tuple[str, str], UsageTotals] = {}
+        self._last_flush = time.monotonic()
+
+        # Per (stage, provider, model).
+        self.latency: Dict[Tuple[str, str, str], Histogram] = {}
+        self.first_byte: Dict[Tuple[str, str, str], Histogram] = {}
+        self.retries: Dict[Tuple[str, str, str], int] = {}
+        self.failures: Dict[Tuple[str, str, str], int] = {}
+
+        self._conn = None
+        if self.store is not None:
+            self._open(Path(self.store))
+
+        for usage in list(self.records):
+            self._add(usage)
+
+    def _open(self, path: Path) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._conn = sqlite3.connect(str(path), check_same_thread=False)
+        self._conn.execute(
+            f'''
+            CREATE TABLE IF NOT EXISTS {USAGE_TABLE} (
+                provider TEXT NOT NULL,
+                model TEXT NOT NULL,
+                calls INTEGER NOT NULL DEFAULT 0,
+                input_tokens INTEGER NOT NULL DEFAULT 0,
+                output_tokens INTEGER NOT NULL DEFAULT 0,
+                cached_input_tokens INTEGER NOT NULL DEFAULT 0,
+                unpriced_calls INTEGER NOT NULL DEFAULT 0,
+                cost_usd REAL NOT NULL DEFAULT 0,
+                updated_at REAL NOT NULL,
+                PRIMARY KEY (provider, model)
+            )
+            '''
+        )
+        self._conn.commit()
+
+    def _add(self, usage: Usage) -> None:
+        cost = usage.estimated_cost
+        key = (usage.provider, usage.model)
+        self.totals.add(usage, cost)
+        self.totals_by_key.setdefault(key, UsageTotals()).add(usage, cost)
+        if self._conn is not None:
+            self._unflushed.setdefault(key, UsageTotals()).add(usage, cost)
 
     def record(self, usage: Usage) -> None:
-        self.records.append(usage)
+        with self._lock:
+            if self.max_records != 0:
+                self.records.append(usage)
+            self._add(usage)
+
+            if self._conn is not None and self._flush_due():
+                self.flush()
+
+    def _flush_due(self) -> bool:
+        pending = sum(totals.calls for totals in self._unflushed.values())
+        if pending >= self.flush_every:
+            return True
+
+        return bool(pending) and self.flush_seconds is not None and (
+            time.monotonic() - self._last_flush >= self.flush_seconds
+        )
+
+    # a timed operation
+    def observe(self, timing: Timing) -> None:
+        key = (timing.stage, timing.provider, timing.model)
+        with self._lock:
+            self.latency.setdefault(key, Histogram()).observe(
+                timing.seconds, timing.items
+            )
+            if timing.first_byte_seconds is not None:
+                self.first_byte.setdefault(key, Histogram()).observe(
+                    timing.first_byte_seconds, timing.items
+                )
+            if timing.retries:
+                self.retries[key] = self.retries.get(key, 0) + timing.retries
+            if timing.failed:
+                self.failures[key] = self.failures.get(key, 0) + 1
+
+        for listener in self.listeners:
+            listener(timing)
+
+    # one stage's latency, across or within providers and models
+    def latency_for(
+        self, stage: str, provider: Optional[str] = None,
+        model: Optional[str] = None
+    ) -> Histogram:
+        '''
+        Args:
+            stage (str): e.g. 'embed' or 'vector_search'.
+            provider (str, optional): Narrow to one provider or store.
+            model (str, optional): Narrow to one model, collection or table.
+
+        Returns:
+            Histogram: The matching histograms merged; empty when none match.
+        '''
+        merged = Histogram()
+        with self._lock:
+            for (key_stage, key_provider, key_model), hist in (
+                self.latency.items()
+            ):
+                if key_stage != stage:
+                    continue
+                if provider is not None and key_provider != provider:
+                    continue
+                if model is not None and key_model != model:
+                    continue
+                merged.merge(hist)
+
+        return merged
+
+    # consistent copies for an exporter
+    def latency_snapshot(self):
+        '''
+        Returns:
+            tuple: (latency, first_byte, {'retries': ..., 'failures': ...}), \
+                copied under the lock so an exporter reads one instant.
+        '''
+        def copy(series):
+            return {
+                key: Histogram(
+                    counts=list(hist.counts), count=hist.count,
+                    total_seconds=hist.total_seconds,
+                    max_seconds=hist.max_seconds, items=hist.items
+                )
+                for key, hist in series.items()
+            }
+
+        with self._lock:
+            return copy(self.latency), copy(self.first_byte), {
+                'retries': dict(self.retries),
+                'failures': dict(self.failures)
+            }
+
+    # operator-facing latency profile
+    @property
+    def latency_summary(self) -> str:
+        '''
+        Returns:
+            str: One line per stage with its call count and p50/p95/p99.
+        '''
+        with self._lock:
+            stages = sorted({stage for stage, _, _ in self.latency})
+        if not stages:
+            return 'no timed operations'
+
+        lines = []
+        for stage in stages:
+            hist = self.latency_for(stage)
+            lines.append(
+                f'{stage}: {hist.count} op{"s" if hist.count != 1 else ""}, '
+                f'p50 {hist.p50:.3f}s, p95 {hist.p95:.3f}s, '
+                f'p99 {hist.p99:.3f}s'
+            )
+
+        return '\n'.join(lines)
+
+    # consulted before each call
+    def admit(
+        self, provider: str, model: str, texts: List[str],
+        billable: bool = True, calls: int = 1, batch: bool = False
+    ) -> None:
+        '''
+        Called by a provider before it sends texts. Collecting usage refuses
+        nothing; see BudgetRecorder for a recorder that does.
+        '''
+
+    # called when an admitted call is over, recorded or not
+    def release(self) -> None:
+        '''
+        Give back whatever admit held for the calling thread. Nothing is
+        held here; see BudgetRecorder.
+        '''
+
+    # write pending totals to the store
+    def flush(self) -> None:
+        '''
+        Add the totals recorded since the last flush to the store's running
+        per-model totals. A no-op without a store.
+        '''
+        with self._lock:
+            if self._conn is None or not self._unflushed:
+                self._last_flush = time.monotonic()
+                return
+
+            now = time.time()
+            self._conn.executemany(
+                f'''
+                INSERT INTO {USAGE_TABLE} (provider, model, calls,
+                    input_tokens, output_tokens, cached_input_tokens,
+                    unpriced_calls, cost_usd, updated_at)
+                VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+                ON CONFLICT (provider, model) DO UPDATE SET
+                    calls = calls + excluded.calls,
+                    input_tokens = input_tokens + excluded.input_tokens,
+                    output_tokens = output_tokens + excluded.output_tokens,
+                    cached_input_tokens =
+                        cached_input_tokens + excluded.cached_input_tokens,
+                    unpriced_calls = unpriced_calls + excluded.unpriced_calls,
+                    cost_usd = cost_usd + excluded.cost_usd,
+                    updated_at = excluded.updated_at
+                ''',
+                [
+                    (
+                        provider, model, totals.calls, totals.input_tokens,
+                        totals.output_tokens, totals.cached_input_tokens,
+                        totals.unpriced_calls, totals.estimated_cost, now
+                    )
+                    for (provider, model), totals in self._unflushed.items()
+                ]
+            )
+            self._conn.commit()
+            self._unflushed = {}
+            self._last_flush = time.monotonic()
+
+    # totals on record in the store, across sessions
+    def stored_totals(self) -> Dict[Tuple[str, str], UsageTotals]:
+        '''
+        Returns:
+            Dict[Tuple[str, str], UsageTotals]: Per (provider, model), \
+                including what this recorder has not flushed yet. Empty \
+                without a store.
+        '''
+        with self._lock:
+            if self._conn is None:
+                return {}
+
+            totals: Dict[Tuple[str, str], UsageTotals] = {}
+            for row in self._conn.execute(
+                f'''
+                SELECT provider, model, calls, input_tokens, output_tokens,
+                    cached_input_tokens, unpriced_calls, cost_usd
+                FROM {USAGE_TABLE}
+                '''
+            ):
+                totals[(row[0], row[1])] = UsageTotals(
+                    calls=row[2], input_tokens=row[3], output_tokens=row[4],
+                    cached_input_tokens=row[5], unpriced_calls=row[6],
+                    estimated_cost=row[7]
+                )
+            for key, pending in self._unflushed.items():
+                stored = totals.setdefault(key, UsageTotals())
+                for name in (
+                    'calls', 'input_tokens', 'output_tokens',
+                    'cached_input_tokens', 'unpriced_calls', 'estimated_cost'
+                ):
+                    setattr(
+                        stored, name, getattr(stored, name)
+                        + getattr(pending, name)
+                    )
+
+        return totals
+
+    # flush and release the store
+    def close(self) -> None:
+        with self._lock:
+            self.flush()
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
 
     def __len__(self) -> int:
-        return len(self.records)
+        return self.totals.calls
 
     def __iter__(self):
-        return iter(self.records)
+        return iter(list(self.records))
 
     @property
     def calls(self) -> int:
-        return len(self.records)
+        return self.totals.calls
 
     @property
     def input_tokens(self) -> int:
-        return sum(u.input_tokens for u in self.records)
+        return self.totals.input_tokens
 
     @property
     def output_tokens(self) -> int:
-        return sum(u.output_tokens for u in self.records)
+        return self.totals.output_tokens
 
     @property
     def total_tokens(self) -> int:
-        return self.input_tokens + self.output_tokens
+        return self.totals.total_tokens
+
+    # input served from a prompt cache
+    @property
+    def cached_input_tokens(self) -> int:
+        return self.totals.cached_input_tokens
+
+    # calls that ran inside a batch job
+    @property
+    def batch_calls(self) -> int:
+        return self.totals.batch_calls
+
+    # calls answered by the completion cache
+    @property
+    def cache_hits(self) -> int:
+        return self.totals.cache_hits
 
     # calls whose model carries no price
     @property
@@ -110,15 +485,12 @@ class UsageRecorder:
             int: Billable calls whose cost could not be estimated. Reported \
                 beside the total so a partial sum is never read as complete.
         '''
-        return sum(
-            1 for u in self.records
-            if u.billable and u.estimated_cost is None
-        )
+        return self.totals.unpriced_calls
 
     # calls the backend reported no counts for
     @property
     def uncounted_calls(self) -> int:
-        return sum(1 for u in self.records if not u.counted)
+        return self.totals.uncounted_calls
 
     @property
     def estimated_cost(self) -> float:
@@ -127,10 +499,7 @@ class UsageRecorder:
             float: Summed estimate over the calls that could be priced. Read \
                 it with `unpriced_calls`, not on its own.
         '''
-        return sum(
-            u.estimated_cost for u in self.records
-            if u.estimated_cost is not None
-        )
+        return self.totals.estimated_cost
 
     # per-model breakdown
     @property
@@ -140,9 +509,10 @@ class UsageRecorder:
             Dict[str, int]: Total tokens per model, which is what tells an \
                 operator where a run actually went.
         '''
-        totals: Dict[str, int] = {}
-        for usage in self.records:
-            totals[usage.model] = totals.get(usage.model, 0) + usage.total_tokens
+        with self._lock:
+            totals: Dict[str, int] = {}
+            for (_, model), key_totals in self.totals_by_key.items():
+                totals[model] = totals.get(model, 0) + key_totals.total_tokens
 
         return totals
 
@@ -154,21 +524,30 @@ class UsageRecorder:
             str: One line naming tokens first and money second, with the \
                 estimate's gaps stated rather than hidden.
         '''
-        if not self.records:
+        with self._lock:
+            totals = UsageTotals(**vars(self.totals))
+
+        if not totals.calls:
             return 'no provider calls'
 
         parts = [
-            f'{self.calls} call{"s" if self.calls != 1 else ""}',
-            f'{self.total_tokens:,} tokens'
+            f'{totals.calls} call{"s" if totals.calls != 1 else ""}',
+            f'{totals.total_tokens:,} tokens'
         ]
-        if self.unpriced_calls:
+        if totals.cache_hits:
+            parts[0] += f' ({totals.cache_hits} answered from cache)'
+        if totals.batch_calls:
+            parts[0] += f' ({totals.batch_calls} batched)'
+        if totals.cached_input_tokens:
+            parts.append(f'{totals.cached_input_tokens:,} from cache')
+        if totals.unpriced_calls:
             parts.append(
-                f'~${self.estimated_cost:.4f} '
-                f'({self.unpriced_calls} unpriced)'
+                f'~${totals.estimated_cost:.4f} '
+                f'({totals.unpriced_calls} unpriced)'
             )
         else:
-            parts.append(f'~${self.estimated_cost:.4f}')
-        if self.uncounted_calls:
-            parts.append(f'{self.uncounted_calls} not counted')
+            parts.append(f'~${totals.estimated_cost:.4f}')
+        if totals.uncounted_calls:
+            parts.append(f'{totals.uncounted_calls} not counted')
 
         return ', '.join(parts)
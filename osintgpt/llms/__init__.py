@@ -1,2 +1,5 @@
-# import class methods
-from .openai_gpt import OpenAIGPT
+# import osintgpt utils
+from osintgpt.utils.lazy import lazy_exports
+
+# import class methods, on first use
+__getattr__, __dir__ = lazy_exports(__name__, {'OpenAIGPT': '.openai_gpt'})
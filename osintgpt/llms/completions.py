@@ -13,11 +13,53 @@
 # type hints
 from typing import Union, Optional, List, Dict
 
+# import osintgpt llm
+from osintgpt.llm.cache import request_key
+from osintgpt.llm.usage import Usage
+
+# import conversation context
+from .context import DEFAULT_CONTEXT_TOKENS, ContextWindow, summarize_with
+
 # CompletionsMixin class
 class CompletionsMixin(object):
     '''
     Requests to the chat model, each logged to the conversation store.
     '''
+    # send one chat request through the provider's budget and rate limits
+    def _create_completion(self, messages: List[Dict], **kwargs):
+        '''
+        Args:
+            messages (List[Dict]): Message objects with 'role' and 'content'.
+            **kwargs: Keyword arguments for OpenAI's create completion.
+
+        Returns:
+            The completion response, recorded with the provider's recorder.
+        '''
+        provider = self.provider
+        texts = [
+            message['content'] for message in messages
+            if isinstance(message.get('content'), str)
+        ]
+        with provider._admitted(texts) as reservation:
+            response = self.client.chat.completions.create(
+                model=self.OPENAI_GPT_MODEL,
+                messages=messages,
+                **kwargs
+            )
+
+            usage = getattr(response, 'usage', None)
+            reservation.settle(getattr(usage, 'total_tokens', 0))
+            provider._record(Usage(
+                provider=provider.provider,
+                model=self.OPENAI_GPT_MODEL,
+                input_tokens=getattr(usage, 'prompt_tokens', 0) or 0,
+                output_tokens=getattr(usage, 'completion_tokens', 0) or 0,
+                billable=provider.billable,
+                counted=usage is not None
+            ))
+
+        return response
+
     # get GPT model completion when adding a system role
     def get_model_completion_using_system_role(self, messages: List[Dict],
         verbose: bool = True, **kwargs):
@@ -42,14 +84,8 @@ class CompletionsMixin(object):
         if not self.OPENAI_GPT_MODEL:
             raise ValueError('No OpenAI GPT model provided. Please provide one.')
 
-        model = self.OPENAI_GPT_MODEL
-
         # get completion response
-        response = self.client.chat.completions.create(
-            model=model,
-            messages=messages,
-            **kwargs
-        )
+        response = self._create_completion(messages, **kwargs)
 
         # insert system prompt into sql database
         system_prompt = messages[0]['content']
@@ -99,8 +135,6 @@ class CompletionsMixin(object):
         if not self.OPENAI_GPT_MODEL:
             raise ValueError('No OpenAI GPT model provided. Please provide one.')
 
-        model = self.OPENAI_GPT_MODEL
-
         # build messages
         if messages is None:
             messages = [
@@ -126,10 +160,8 @@ class CompletionsMixin(object):
                 pass
 
         # get completion response
-        response = self.client.chat.completions.create(
-            model=model,
-            messages=messages,
-            temperature=temperature
+        response = self._create_completion(
+            messages, temperature=temperature
         )
 
         # insert user prompt into sql database
@@ -149,10 +181,16 @@ class CompletionsMixin(object):
     # interactive completion: role system
     def interactive_completion(self, prompt: Optional[str] = None,
         messages: Optional[Dict] = None, temperature: float = 0,
-        verbose: bool = False):
+        verbose: bool = False,
+        max_context_tokens: Optional[int] = DEFAULT_CONTEXT_TOKENS,
+        summarize_history: bool = False):
         '''
         Interactive completion. Interact with the GPT model using the command line.
 
+        Each turn sends the system prompt and the most recent turns that fit
+        `max_context_tokens`, so a long session costs no more per turn than a
+        short one. Every turn is still logged in full to the conversation store.
+
         Args:
             prompt (str, optional): The input prompt for the GPT model.
             messages (List[Dict], optional): A list of message objects. Each object \
@@ -162,6 +200,11 @@ class CompletionsMixin(object):
                 If not provided, the output will be deterministic.
             verbose (bool, optional): If set to True, additional details about the \
                 request and response will be printed.
+            max_context_tokens (int, optional): Token budget for the messages \
+                sent on each turn. None resends the whole conversation.
+            summarize_history (bool, optional): If set to True, turns that leave \
+                the budget are folded into a summary sent in their place, at the \
+                cost of one extra model call whenever that happens.
         
         Returns:
             None
@@ -203,6 +246,14 @@ class CompletionsMixin(object):
             # build messages
             messages = messages['messages']
 
+        # context window
+        window = ContextWindow(
+            model,
+            budget=max_context_tokens,
+            summarizer=summarize_with(self.provider) if summarize_history else None
+        )
+        window.extend(messages)
+
         # interactive chat mode
         print ('Interactive chat mode with GPT. Type "exit" to quit.')
         print ('')
@@ -215,19 +266,19 @@ class CompletionsMixin(object):
             
             # accumulate messages
             msg = {'role': 'user', 'content': user_input}
-            messages.append(msg)
+            window.add(msg)
             
             # get completion
             gpt_response = self.get_model_completion(
                 user_input,
-                messages=messages,
+                messages=window.messages(),
                 temperature=temperature,
                 verbose=verbose
             )
 
             # accumulate messages
             msg = {'role': 'assistant', 'content': gpt_response}
-            messages.append(msg)
+            window.add(msg)
 
             print (f'{model}: ', gpt_response)
 
@@ -238,12 +289,15 @@ class CompletionsMixin(object):
         the central request or question, and the main theme or subject matter
         associated with that request.
 
+        When the instance carries a completion cache and temperature is 0, a
+        sentence analysed before is answered from the cache without a request.
+
         Args:
             sentence (str): The input sentence to be analyzed.
             temperature (float, optional): Controls the randomness of the model's \
                 output. The higher the value, the more random the output will be. \
                 If not provided, the output will be deterministic.
-        
+
         Returns:
             dict: A dictionary containing keys "Language", "Input request", and
             "Subject or topics" with their respective identified values.
@@ -285,11 +339,32 @@ class CompletionsMixin(object):
             {'role': 'user', 'content': sentence}
         ]
 
+        # cached reply; a sampled one is not worth repeating
+        cache = getattr(self, 'completion_cache', None)
+        key = None
+        if cache is not None and temperature == 0:
+            key = request_key(
+                self.provider.provider, model, messages,
+                {'temperature': temperature}
+            )
+            cached = cache.get(key)
+            if cached is not None:
+                # A free call, so the recorder shows what the cache saved.
+                self.provider._record(Usage(
+                    provider=self.provider.provider,
+                    model=model,
+                    billable=False,
+                    cache_hit=True
+                ))
+                return cached
+
         # get completion response
-        response = self.client.chat.completions.create(
-            model=model,
-            messages=messages,
-            temperature=temperature
+        response = self._create_completion(
+            messages, temperature=temperature
         )
 
-        return response.choices[0].message.content
+        content = response.choices[0].message.content
+        if key is not None and content is not None:
+            cache.put(key, 'openai', model, content)
+
+        return content
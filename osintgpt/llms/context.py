@@ -0,0 +1,199 @@
+# -*- coding: utf-8 -*-
+
+# ===============================================================================
+# osintgpt
+#
+# Author: @estebanpdl
+#
+# File: context.py
+# Description: The messages sent on each turn of a conversation, held to a token
+#   budget so a long session costs the same per turn as a short one.
+# ===============================================================================
+
+# import submodules
+from collections import deque
+
+# type hints
+from typing import Callable, Deque, Dict, List, Optional, Tuple
+
+# import prompts
+from osintgpt.prompts import conversation_memory_summarization
+
+# import utils
+from osintgpt.utils import encoding_for_model
+
+# Enough for a system prompt carrying retrieved context plus a working
+# conversation, and inside the window of every chat model the price table
+# lists. A reply needs room too, so this stays well under any model's limit.
+DEFAULT_CONTEXT_TOKENS = 8_000
+
+# Chat formats wrap each message in a few tokens of framing. Three is what
+# OpenAI's own counting guidance uses; being a token or two out per message is
+# a rounding error against the budget, not a failure.
+TOKENS_PER_MESSAGE = 3
+
+# Folds evicted turns into the running memory: (memory so far, evicted) -> memory.
+Summarizer = Callable[[str, List[Dict]], str]
+
+MEMORY_PREFIX = 'Summary of the earlier conversation:'
+
+
+# ContextWindow class
+class ContextWindow:
+    '''
+    System messages pinned, then as many recent turns as fit the budget. Turns
+    that no longer fit are dropped or, with a summarizer, folded into a memory
+    that travels in their place.
+
+    Each message is counted once, when it is added, so building the request
+    for a turn never re-encodes the history.
+    '''
+    def __init__(
+        self,
+        model: str,
+        budget: Optional[int] = DEFAULT_CONTEXT_TOKENS,
+        summarizer: Optional[Summarizer] = None,
+        encoding: Optional[object] = None
+    ) -> None:
+        '''
+        Args:
+            model (str): The chat model, whose encoding does the counting.
+            budget (int, optional): Token ceiling for the messages sent on one \
+                turn. None keeps every turn, which is the unbounded behaviour.
+            summarizer (Summarizer, optional): Folds evicted turns into a \
+                memory. Without one, evicted turns are simply gone.
+            encoding (object, optional): A prepared encoding, for tests.
+        '''
+        self.model = model
+        self.budget = budget
+        self.summarizer = summarizer
+        self.encoding = encoding or encoding_for_model(model)
+
+        self.system: List[Dict] = []
+        self.turns: Deque[Tuple[Dict, int]] = deque()
+        self.memory = ''
+
+        self._system_tokens = 0
+        self._turn_tokens = 0
+        self._memory_tokens = 0
+
+    # tokens one message costs
+    def count(self, message: Dict) -> int:
+        '''
+        Special-token markers in the content count as ordinary text, as the
+        provider counts them, rather than raising.
+
+        Args:
+            message (Dict): A message with 'role' and 'content'.
+
+        Returns:
+            int: Tokens in its content plus the framing around it.
+        '''
+        content = message.get('content') or ''
+
+        return len(self.encoding.encode_ordinary(content)) + TOKENS_PER_MESSAGE
+
+    @property
+    def tokens(self) -> int:
+        return self._system_tokens + self._memory_tokens + self._turn_tokens
+
+    # add one message
+    def add(self, message: Dict) -> None:
+        '''
+        Append a message, then evict whatever the budget no longer holds.
+
+        System messages are pinned: they carry the instructions and retrieved
+        context the whole conversation depends on, so they are never evicted.
+
+        Args:
+            message (Dict): A message with 'role' and 'content'.
+        '''
+        tokens = self.count(message)
+        if message.get('role') == 'system':
+            self.system.append(message)
+            self._system_tokens += tokens
+        else:
+            self.turns.append((message, tokens))
+            self._turn_tokens += tokens
+
+        self._fit()
+
+    # add several messages
+    def extend(self, messages: List[Dict]) -> None:
+        '''
+        Args:
+            messages (List[Dict]): Messages in conversation order, e.g. a \
+                history loaded from the conversation store.
+        '''
+        for message in messages:
+            self.add(message)
+
+    # the request for this turn
+    def messages(self) -> List[Dict]:
+        '''
+        Returns:
+            List[Dict]: System messages, the memory when there is one, then \
+                the turns still inside the budget, oldest first.
+        '''
+        messages = list(self.system)
+        if self.memory:
+            messages.append(self._memory_message())
+        messages.extend(message for message, _ in self.turns)
+
+        return messages
+
+    def _memory_message(self) -> Dict:
+        return {'role': 'system', 'content': f'{MEMORY_PREFIX}\n{self.memory}'}
+
+    # evict the oldest turns until the window fits
+    def _fit(self) -> None:
+        if self.budget is None:
+            return
+
+        # The newest turn always stays. A single message over the budget is
+        # the caller's to see as a provider error, not something to drop.
+        while self.tokens > self.budget and len(self.turns) > 1:
+            evicted = []
+            while self.tokens > self.budget and len(self.turns) > 1:
+                message, tokens = self.turns.popleft()
+                self._turn_tokens -= tokens
+                evicted.append(message)
+
+            if self.summarizer is None:
+                continue
+
+            # A new memory can be longer than the one it replaces, so the loop
+            # checks again and evicts further if the fold pushed it over.
+            self.memory = self.summarizer(self.memory, evicted)
+            self._memory_tokens = (
+                self.count(self._memory_message()) if self.memory else 0
+            )
+
+
+# build a summarizer from a generation provider
+def summarize_with(provider, max_words: int = 200) -> Summarizer:
+    '''
+    A summarizer that asks a chat model to fold turns into the memory.
+
+    Args:
+        provider: A GenerationProvider. Its calls are recorded like any other.
+        max_words (int): Length the memory is asked to stay within.
+
+    Returns:
+        Summarizer: Callable taking the memory so far and the evicted turns.
+    '''
+    system = conversation_memory_summarization(max_words)
+
+    def summarize(memory: str, evicted: List[Dict]) -> str:
+        transcript = '\n'.join(
+            f"{message.get('role', 'user')}: {message.get('content') or ''}"
+            for message in evicted
+        )
+        user = (
+            f'Summary so far:\n{memory or "(none)"}\n\n'
+            f'Turns to fold in:\n{transcript}'
+        )
+
+        return provider.generate(system, user).strip()
+
+    return summarize
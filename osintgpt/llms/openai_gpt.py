@@ -14,13 +14,17 @@
 import warnings
 
 # type hints
-from typing import Union
+from typing import Optional, Union
 
 # import osintgpt config
 from osintgpt.config import Settings, resolve_settings
 
 # import osintgpt llm
-from osintgpt.llm import build_generation_provider
+from osintgpt.llm import (
+    CompletionCache,
+    UsageRecorder,
+    build_generation_provider
+)
 
 # import osintgpt pricing
 from osintgpt.pricing import estimate_cost
@@ -38,13 +42,20 @@ class OpenAIGPT(SearchMixin, ConversationLogMixin, CompletionsMixin):
     '''
     OpenAIGPT class
     '''
-    def __init__(self, config: Union[Settings, str]):
+    def __init__(self, config: Union[Settings, str],
+        completion_cache: Optional[CompletionCache] = None,
+        recorder: Optional[UsageRecorder] = None):
         '''
         Initializes the instance of the class.
 
         Args:
             config (Union[Settings, str]): Settings, or a path to a .env file \
                 (deprecated).
+            completion_cache (CompletionCache, optional): Answers repeated \
+                deterministic sentence analyses without a request, e.g. \
+                `CompletionCache.for_project(project)`.
+            recorder (UsageRecorder, optional): Collects what each call \
+                consumed, cache hits included.
 
         Raises:
             MissingEnvironmentVariableError: If either 'openai_api_key' or \
@@ -57,6 +68,7 @@ class OpenAIGPT(SearchMixin, ConversationLogMixin, CompletionsMixin):
 
         self.OPENAI_API_KEY = self.settings.openai_api_key
         self.OPENAI_GPT_MODEL = self.settings.openai_gpt_model
+        self.completion_cache = completion_cache
 
         warnings.warn(
             'OpenAIGPT is deprecated and will be removed in 1.0; use '
@@ -69,7 +81,9 @@ class OpenAIGPT(SearchMixin, ConversationLogMixin, CompletionsMixin):
         # The provider owns connecting. The completion calls stay here because
         # they carry multi-turn messages and persist the response's own id and
         # timestamp, neither of which the provider interface exposes.
-        self.provider = build_generation_provider('openai', self.settings)
+        self.provider = build_generation_provider(
+            'openai', self.settings, recorder=recorder
+        )
 
         # set SQL unique id
         self.SQL_UNIQUE_ID = self._generate_unique_id()
@@ -10,21 +10,20 @@
 #   plus the helpers that load embeddings into memory.
 # ===============================================================================
 
-# import modules
-import pandas as pd
-
 # import submodules
-from scipy import spatial
 from ast import literal_eval
 
 # type hints
-from typing import Optional, List
+from typing import TYPE_CHECKING, Optional, List
 
 # import osintgpt vector stores
-from osintgpt.vector_store import BaseVectorEngine, Qdrant
+from osintgpt.vector_store import BaseVectorEngine
 
-# import osintgpt openai embeddings
-from osintgpt.embeddings import OpenAIEmbeddingGenerator
+# pandas, scipy, the Qdrant client and the embeddings module are imported
+# where they are used: OpenAIGPT inherits this mixin, and a chat session
+# should not pay for loading a dataframe library.
+if TYPE_CHECKING:
+    import pandas as pd
 
 # SearchMixin class
 class SearchMixin(object):
@@ -45,6 +44,8 @@ class SearchMixin(object):
         Returns:
             pd.DataFrame: Pandas dataframe.
         '''
+        import pandas as pd
+
         data = pd.read_csv(file_path, **kwargs)
         for col in columns:
             data[col] = data[col].apply(literal_eval)
@@ -56,7 +57,7 @@ class SearchMixin(object):
         return data
 
     # load embeddings from dataframe
-    def load_embeddings_from_dataframe(self, dataframe: pd.DataFrame,
+    def load_embeddings_from_dataframe(self, dataframe: 'pd.DataFrame',
         columns: List):
         '''
         Load embeddings from dataframe.
@@ -100,7 +101,9 @@ class SearchMixin(object):
         '''
         if not hasattr(self, '_embeddings'):
             raise AttributeError('No embeddings loaded. Please load embeddings.')
-        
+
+        import pandas as pd
+
         return pd.DataFrame(self._embeddings)
 
     # load search top k results from vector
@@ -126,6 +129,8 @@ class SearchMixin(object):
             raise ValueError('Either query or embeddings must be provided.')
 
         if not isinstance(vector_engine, BaseVectorEngine):
+            from osintgpt.vector_store import Qdrant
+
             supported_vector_engines = [
                 Qdrant
             ]
@@ -141,6 +146,8 @@ class SearchMixin(object):
         
         # OpenAIEmbeddingGenerator instance
         if query is not None:
+            from osintgpt.embeddings import OpenAIEmbeddingGenerator
+
             embedding_generator = OpenAIEmbeddingGenerator(self.settings)
             query_embedding = embedding_generator.generate_embedding(query)
         else:
@@ -174,13 +181,63 @@ class SearchMixin(object):
         Returns:
             float: Relatedness. 1.0 is most similar, 0.0 is least similar.
         '''
+        from scipy import spatial
+
         return 1 - spatial.distance.cosine(x, y)
 
+    # relatedness of every row to one query, at once
+    def _relatedness_scores(self, embeddings, query_embedding):
+        '''
+        Cosine relatedness of each embedding to the query, computed as one
+        matrix product in float32 instead of a distance call per row.
+
+        Args:
+            embeddings (Sequence): One embedding per row — lists, arrays, or \
+                a 2-D float array.
+            query_embedding (List[float]): The query.
+
+        Returns:
+            np.ndarray: One score per row, in row order. 1.0 is most similar.
+        '''
+        import numpy as np
+
+        if isinstance(embeddings, np.ndarray) and embeddings.ndim == 2:
+            matrix = np.asarray(embeddings, dtype=np.float32)
+        else:
+            rows = list(embeddings)
+            if not rows:
+                return np.empty(0, dtype=np.float32)
+            matrix = np.asarray(rows, dtype=np.float32)
+
+        query = np.asarray(query_embedding, dtype=np.float32)
+        with np.errstate(divide='ignore', invalid='ignore'):
+            return (matrix @ query) / (
+                np.linalg.norm(matrix, axis=1) * np.linalg.norm(query)
+            )
+
+    # positions of the top k scores, best first
+    def _top_indices(self, scores, top_k: int):
+        import numpy as np
+
+        if top_k <= 0 or not len(scores):
+            return []
+
+        # NaN, from a zero vector, ranks last rather than first.
+        ranked = np.where(np.isnan(scores), -np.inf, scores)
+        if top_k < len(ranked):
+            candidates = np.argpartition(-ranked, top_k - 1)[:top_k]
+        else:
+            candidates = np.arange(len(ranked))
+
+        # Ties keep row order, as the stable sort this replaced did.
+        return candidates[np.lexsort((candidates, -ranked[candidates]))].tolist()
+
     # load search top k results from dataframe
-    def search_results_from_dataframe(self, df: pd.DataFrame,
+    def search_results_from_dataframe(self, df: 'pd.DataFrame',
         query: Optional[str] = None, embeddings: Optional[List] = None,
         top_k: int = 10, embeddings_target_column: str = 'embeddings',
-        text_target_column: str = 'text', extract_sentence_details: bool = False):
+        text_target_column: str = 'text', extract_sentence_details: bool = False,
+        coarse_dimensions: Optional[int] = None):
         '''
         Search top k results from dataframe.
         
@@ -191,6 +248,10 @@ class SearchMixin(object):
             top_k (int): Top k results to be retrieved.
             embeddings_target_column (str): Embeddings target column.
             text_target_column (str): Text target column.
+            coarse_dimensions (Optional[int]): Search in two stages: rank \
+                every row on this many leading values, then re-rank the best \
+                candidates at full width. For embeddings from models trained \
+                to be truncated.
         
         Returns:
             List[Tuple[str, float]]: List of tuples containing the string and score.
@@ -201,6 +262,8 @@ class SearchMixin(object):
         
         # OpenAIEmbeddingGenerator instance
         if query is not None:
+            from osintgpt.embeddings import OpenAIEmbeddingGenerator
+
             embedding_generator = OpenAIEmbeddingGenerator(self.settings)
             if extract_sentence_details:
                 '''
@@ -220,19 +283,33 @@ class SearchMixin(object):
         else:
             query_embedding = embeddings
         
+        if coarse_dimensions is not None:
+            from osintgpt.llm.dimensions import two_stage_search
+
+            top, top_scores = two_stage_search(
+                list(df[embeddings_target_column]), query_embedding, top_k,
+                coarse_dimensions
+            )
+        else:
+            scores = self._relatedness_scores(
+                df[embeddings_target_column], query_embedding
+            )
+            top = self._top_indices(scores, top_k)
+            top_scores = [float(scores[i]) for i in top]
+
+        embeddings_column = df[embeddings_target_column]
+        text_column = df[text_target_column]
         strings_and_relatednesses = [
             (
-                row[embeddings_target_column],
-                row[text_target_column],
-                self._relatedness_fn(query_embedding, row[embeddings_target_column])
+                embeddings_column.iloc[i],
+                text_column.iloc[i],
+                score
             )
-            for _, row in df.iterrows()
+            for i, score in zip(top, top_scores)
         ]
 
-        strings_and_relatednesses.sort(key=lambda x: x[2], reverse=True)
-        
         return {
             'query': query,
             'query_embedding': query_embedding,
-            'results': strings_and_relatednesses[:top_k]
+            'results': strings_and_relatednesses
         }
@@ -21,13 +21,19 @@ from typing import Optional
 PRICES_UPDATED = '2026-08-21'
 
 # Chat models carry separate input and output prices; embedding models bill
-# input only.
+# input only. 'cached_input' is the rate for input served from the provider's
+# prompt cache, listed only where the provider publishes one.
 PRICES = {
-    'gpt-4o':                 {'input': 2.50,  'output': 10.00},
-    'gpt-4o-mini':            {'input': 0.15,  'output': 0.60},
-    'gpt-4.1':                {'input': 2.00,  'output': 8.00},
-    'gpt-4.1-mini':           {'input': 0.40,  'output': 1.60},
-    'gpt-4.1-nano':           {'input': 0.10,  'output': 0.40},
+    'gpt-4o':                 {'input': 2.50,  'output': 10.00,
+                               'cached_input': 1.25},
+    'gpt-4o-mini':            {'input': 0.15,  'output': 0.60,
+                               'cached_input': 0.075},
+    'gpt-4.1':                {'input': 2.00,  'output': 8.00,
+                               'cached_input': 0.50},
+    'gpt-4.1-mini':           {'input': 0.40,  'output': 1.60,
+                               'cached_input': 0.10},
+    'gpt-4.1-nano':           {'input': 0.10,  'output': 0.40,
+                               'cached_input': 0.025},
     'gpt-4-turbo':            {'input': 10.00, 'output': 30.00},
     'gpt-3.5-turbo':          {'input': 0.50,  'output': 1.50},
     'text-embedding-3-small': {'input': 0.02},
@@ -38,6 +44,24 @@ PRICES = {
 # tokens per pricing unit
 TOKENS_PER_UNIT = 1_000_000
 
+# Anthropic bills writing a prompt-cache entry (5-minute lifetime) at 1.25
+# times the input price.
+CACHE_WRITE_RATE = 1.25
+
+# Cache rates a model may not list, as (kind, multiplier) of a rate it does.
+# Reading the cache falls back to the plain input price, which overstates
+# what cached input cost; writing it costs more than plain input. Both err
+# high, the safe direction for an estimate; an unpriced model still
+# estimates to None.
+FALLBACK_KIND = {
+    'cached_input': ('input', 1.0),
+    'cache_write': ('input', CACHE_WRITE_RATE)
+}
+
+# Both OpenAI and Anthropic bill batch jobs at half the synchronous rate, on
+# input and output alike, in exchange for an answer within 24 hours.
+BATCH_RATE = 0.5
+
 # get the price for a model
 def price_per_million(model: str, kind: str = 'input') -> Optional[float]:
     '''
@@ -45,13 +69,23 @@ def price_per_million(model: str, kind: str = 'input') -> Optional[float]:
 
     Args:
         model (str): Model name.
-        kind (str): 'input' or 'output'.
+        kind (str): 'input', 'output', 'cached_input' or 'cache_write'. The \
+            cache kinds fall back to the input price, times CACHE_WRITE_RATE \
+            for writes, where none is listed.
 
     Returns:
         Optional[float]: USD per 1M tokens, or None when the model or the \
             direction is not priced.
     '''
-    return PRICES.get(model, {}).get(kind)
+    prices = PRICES.get(model, {})
+    price = prices.get(kind)
+    if price is None and kind in FALLBACK_KIND:
+        fallback, multiplier = FALLBACK_KIND[kind]
+        price = prices.get(fallback)
+        if price is not None:
+            price *= multiplier
+
+    return price
 
 # estimate the cost of a number of tokens
 def estimate_cost(model: str, tokens: int,
@@ -62,7 +96,7 @@ def estimate_cost(model: str, tokens: int,
     Args:
         model (str): Model name.
         tokens (int): Token count.
-        kind (str): 'input' or 'output'.
+        kind (str): 'input', 'output', 'cached_input' or 'cache_write'.
 
     Returns:
         Optional[float]: Estimated USD, or None when the model is not priced. \
@@ -2,13 +2,16 @@
 from .cross_project import (
     CrossProjectHit,
     CrossProjectResults,
+    CrossProjectStream,
     Exclusion,
     ProjectSelection,
     search_projects,
-    select_projects
+    select_projects,
+    select_projects_by_model,
+    stream_projects
 )
 from .home import load_user_defaults, save_user_defaults
 from .paths import ProjectPaths, default_home
 from .project import Project, slugify
-from .registry import Registry, RegistryEntry
+from .registry import Registry, RegistryEntry, SQLiteRegistry
 from .settings import ProjectSettings
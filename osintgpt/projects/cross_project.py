@@ -11,20 +11,34 @@
 #   dropped and said so rather than quietly ranked together.
 # =================================================================================
 
+# import modules
+import heapq
+import time
+
 # import submodules
 from collections import Counter
-from dataclasses import dataclass, field
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from dataclasses import dataclass, field, replace
+from itertools import chain
 
 # type hints
-from typing import Any, Callable, Iterable, List, Optional, Sequence, Tuple
-
-# import osintgpt config
-from osintgpt.config import DEFAULT_EMBEDDING_MODEL
+from typing import (
+    Any, Callable, Dict, Iterable, Iterator, List, Optional, Sequence, Tuple
+)
 
 from .project import Project
+from .registry import Registry
 from .settings import ProjectSettings
 
 MISMATCH = 'different embedding model'
+MISSING = 'project not found'
+TIMED_OUT = 'timed out'
+FAILED = 'search failed'
+
+# Per-project queries are mostly waiting on a vector store or a provider, so
+# threads overlap them well. Bounded so forty projects do not open forty
+# connections at once.
+DEFAULT_MAX_WORKERS = 8
 
 # One project's contribution to a cross-project search: (score, payload) pairs.
 # Scores must come from the same embedding model to be comparable, which
@@ -69,14 +83,19 @@ class ProjectSelection:
         if not self.excluded:
             return ''
 
-        named = ', '.join(
-            f'{e.slug} ({e.detail})' if e.detail else e.slug
-            for e in self.excluded
+        by_reason: Dict[str, List[str]] = {}
+        for e in self.excluded:
+            by_reason.setdefault(e.reason, []).append(
+                f'{e.slug} ({e.detail})' if e.detail else e.slug
+            )
+        reasons = '; '.join(
+            f'{reason}: {", ".join(named)}'
+            for reason, named in by_reason.items()
         )
 
         return (
             f'{len(self.excluded)} of {self.total} projects skipped — '
-            f'{MISMATCH}: {named}'
+            f'{reasons}'
         )
 
 
@@ -112,6 +131,95 @@ class CrossProjectResults:
         return len(self.hits)
 
 
+# CrossProjectStream class
+class CrossProjectStream:
+    '''
+    Hits from several projects, merged lazily, best first.
+
+    Each project's query must yield its hits best first. The merge holds one
+    pending hit per project and pulls the next only once that one has been
+    handed out, so with `limit` set no project is read further than its hits
+    that could still make the cut: memory stays at one hit per project plus
+    what the caller keeps.
+
+    Iterate it once. `selection` and `notice` are final once iteration ends:
+    a project whose query fails part-way is excluded then, though hits it
+    gave before failing have already gone out.
+    '''
+    def __init__(
+        self,
+        selection: ProjectSelection,
+        query: ProjectQuery,
+        limit: Optional[int] = None
+    ) -> None:
+        self.selection = selection
+        self.query = query
+        self.limit = limit
+        self._started = False
+
+    @property
+    def notice(self) -> str:
+        return self.selection.notice
+
+    def _exclude(self, project: Project, error: Exception) -> None:
+        self.selection = replace(
+            self.selection,
+            included=[p for p in self.selection.included if p.id != project.id],
+            excluded=self.selection.excluded + [Exclusion(
+                slug=project.slug, reason=FAILED,
+                detail=f'{type(error).__name__}: {error}'
+            )]
+        )
+
+    # queue a project's next hit, or drop the project when it has none
+    def _advance(self, heap: list, order: int, project: Project,
+        hits: Iterator, previous: Optional[float] = None) -> None:
+        try:
+            score, payload = next(hits)
+        except StopIteration:
+            return
+        except Exception as error:
+            self._exclude(project, error)
+            return
+
+        score = float(score)
+        if previous is not None and score > previous:
+            raise ValueError(
+                f'project {project.slug} yielded {score} after {previous}; '
+                'a streamed query must yield its best hits first'
+            )
+
+        # (score, order) is unique in the heap: one entry per project.
+        heapq.heappush(heap, (-score, order, CrossProjectHit(
+            project_slug=project.slug, score=score, payload=payload
+        ), project, hits))
+
+    def __iter__(self) -> Iterator[CrossProjectHit]:
+        if self._started:
+            raise RuntimeError('a CrossProjectStream can only be iterated once')
+        self._started = True
+        if self.limit is not None and self.limit <= 0:
+            return
+
+        heap: list = []
+        for order, project in enumerate(list(self.selection.included)):
+            try:
+                hits = iter(self.query(project))
+            except Exception as error:
+                self._exclude(project, error)
+                continue
+            self._advance(heap, order, project, hits)
+
+        given = 0
+        while heap:
+            _, order, hit, project, hits = heapq.heappop(heap)
+            yield hit
+            given += 1
+            if self.limit is not None and given >= self.limit:
+                return
+            self._advance(heap, order, project, hits, hit.score)
+
+
 # the embedding model a project actually searches with
 def embedding_model_of(
     project: Project, defaults: Optional[ProjectSettings] = None
@@ -123,11 +231,10 @@ def embedding_model_of(
             project left unset.
 
     Returns:
-        str: The embedding model, falling back to the library default.
+        str: The embedding model, falling back to the library default. A \
+            shortened width is part of it; see ProjectSettings.embedding_key.
     '''
-    settings = project.effective_settings(defaults)
-
-    return settings.embedding_model or DEFAULT_EMBEDDING_MODEL
+    return project.effective_settings(defaults).embedding_key
 
 
 # decide which projects may be searched together
@@ -185,13 +292,83 @@ def select_projects(
     )
 
 
+# select from the registry's model index, reading only what matches
+def select_projects_by_model(
+    registry: Registry,
+    embedding_model: Optional[str] = None,
+    defaults: Optional[ProjectSettings] = None
+) -> ProjectSelection:
+    '''
+    As select_projects over every indexed project, but decided from the
+    registry's per-model index: only the projects that share the target
+    model are read from disk, so setting up a search costs what it selects
+    rather than what the home holds.
+
+    Projects under other models are not listed as exclusions — they were
+    never candidates. An indexed project whose project.toml has since moved
+    to another model is, as is one whose directory is gone.
+
+    Args:
+        registry (Registry): Index of the home to search.
+        embedding_model (str, optional): Force a target model instead of \
+            taking the most common one. Ties go to the model indexed first.
+        defaults (ProjectSettings, optional): User defaults.
+
+    Returns:
+        ProjectSelection: Included projects, exclusions, and the target model.
+    '''
+    if embedding_model is None:
+        counts = registry.model_counts(defaults)
+        if not counts:
+            return ProjectSelection(embedding_model='')
+        best = max(counts.values())
+        embedding_model = next(
+            model for model, count in counts.items() if count == best
+        )
+
+    included, excluded = [], []
+    for entry in registry.entries_for_model(embedding_model, defaults):
+        try:
+            project = entry.open()
+        except FileNotFoundError:
+            excluded.append(Exclusion(slug=entry.slug, reason=MISSING))
+            continue
+
+        # The index may lag an edit to project.toml; the project decides.
+        model = embedding_model_of(project, defaults)
+        if model == embedding_model:
+            included.append(project)
+        else:
+            excluded.append(Exclusion(
+                slug=project.slug, reason=MISMATCH, detail=model
+            ))
+
+    return ProjectSelection(
+        embedding_model=embedding_model, included=included, excluded=excluded
+    )
+
+
+# one project's hits, gathered on a worker
+def _project_hits(project: Project, query: ProjectQuery) -> List[CrossProjectHit]:
+    # Drained here, not by the caller: a query may be a generator, and its
+    # work has to happen on the worker to overlap with the others.
+    return [
+        CrossProjectHit(
+            project_slug=project.slug, score=float(score), payload=payload
+        )
+        for score, payload in query(project)
+    ]
+
+
 # run one search across several projects
 def search_projects(
     projects: Sequence[Project],
     query: ProjectQuery,
     embedding_model: Optional[str] = None,
     defaults: Optional[ProjectSettings] = None,
-    limit: Optional[int] = None
+    limit: Optional[int] = None,
+    max_workers: int = DEFAULT_MAX_WORKERS,
+    timeout: Optional[float] = None
 ) -> CrossProjectResults:
     '''
     Search every compatible project and merge the results by score.
@@ -199,30 +376,136 @@ def search_projects(
     Merging is only sound because the selection guarantees one embedding model
     across the included projects; `query` is never called for an excluded one.
 
+    Projects are queried concurrently, so the search takes about as long as
+    its slowest project rather than the sum of them. A project that fails or
+    runs past `timeout` is excluded and named in the notice; the others still
+    answer.
+
     Args:
         projects (Sequence[Project]): Projects the caller chose to search.
         query (ProjectQuery): Runs the search for one project and yields \
-            (score, payload) pairs.
+            (score, payload) pairs. Called from worker threads.
         embedding_model (str, optional): Force a target model.
         defaults (ProjectSettings, optional): User defaults.
         limit (int, optional): Keep only the top N merged hits.
+        max_workers (int): Projects queried at once.
+        timeout (float, optional): Seconds one project may take, counted \
+            from when its query starts. A project past it is left running \
+            in the background and its hits are discarded.
 
     Returns:
         CrossProjectResults: Merged hits and the selection behind them.
     '''
     selection = select_projects(projects, embedding_model, defaults)
+    if not selection.included:
+        return CrossProjectResults(selection=selection)
 
-    hits: List[CrossProjectHit] = []
-    for project in selection.included:
-        hits.extend(
-            CrossProjectHit(
-                project_slug=project.slug, score=float(score), payload=payload
-            )
-            for score, payload in query(project)
+    started: Dict[str, float] = {}
+
+    def run(project: Project) -> List[CrossProjectHit]:
+        started[project.id] = time.monotonic()
+        return _project_hits(project, query)
+
+    executor = ThreadPoolExecutor(
+        max_workers=max(1, min(max_workers, len(selection.included))),
+        thread_name_prefix='osintgpt-search'
+    )
+    futures = {
+        executor.submit(run, project): project
+        for project in selection.included
+    }
+    answered: Dict[str, List[CrossProjectHit]] = {}
+    dropped: Dict[str, Exclusion] = {}
+    pending = set(futures)
+    abandoned = False
+    try:
+        while pending:
+            wake = None
+            if timeout is not None:
+                now = time.monotonic()
+                deadlines = [
+                    started[futures[f].id] + timeout for f in pending
+                    if futures[f].id in started
+                ]
+                # Nothing started yet: look again once a timeout could
+                # have passed for whatever starts next.
+                wake = max(min(deadlines) - now, 0) if deadlines else timeout
+
+            done, pending = wait(pending, timeout=wake, return_when=FIRST_COMPLETED)
+            for future in done:
+                project = futures[future]
+                try:
+                    answered[project.id] = future.result()
+                except Exception as error:
+                    dropped[project.id] = Exclusion(
+                        slug=project.slug, reason=FAILED,
+                        detail=f'{type(error).__name__}: {error}'
+                    )
+
+            if timeout is not None:
+                now = time.monotonic()
+                for future in list(pending):
+                    project = futures[future]
+                    begun = started.get(project.id)
+                    if begun is not None and now - begun >= timeout:
+                        pending.discard(future)
+                        abandoned = True
+                        dropped[project.id] = Exclusion(
+                            slug=project.slug, reason=TIMED_OUT,
+                            detail=f'over {timeout:g}s'
+                        )
+    finally:
+        # A timed-out query cannot be interrupted, only abandoned.
+        executor.shutdown(wait=not abandoned, cancel_futures=True)
+
+    if dropped:
+        selection = replace(
+            selection,
+            included=[p for p in selection.included if p.id not in dropped],
+            excluded=selection.excluded + [
+                dropped[p.id] for p in selection.included if p.id in dropped
+            ]
         )
 
-    hits.sort(key=lambda hit: hit.score, reverse=True)
+    # In selection order, so equal scores keep the order they always had.
+    merged = chain.from_iterable(
+        answered[project.id] for project in selection.included
+    )
     if limit is not None:
-        hits = hits[:limit]
+        hits = heapq.nlargest(limit, merged, key=lambda hit: hit.score)
+    else:
+        hits = sorted(merged, key=lambda hit: hit.score, reverse=True)
 
     return CrossProjectResults(hits=hits, selection=selection)
+
+
+# merge several projects' hits lazily
+def stream_projects(
+    projects: Sequence[Project],
+    query: ProjectQuery,
+    embedding_model: Optional[str] = None,
+    defaults: Optional[ProjectSettings] = None,
+    limit: Optional[int] = None
+) -> CrossProjectStream:
+    '''
+    search_projects for queries that can yield their hits in score order,
+    e.g. paging through a vector store: nothing past the top `limit` is read.
+
+    Args:
+        projects (Sequence[Project]): Projects the caller chose to search.
+        query (ProjectQuery): Runs the search for one project and yields \
+            (score, payload) pairs, best first. Called on first iteration.
+        embedding_model (str, optional): Force a target model.
+        defaults (ProjectSettings, optional): User defaults.
+        limit (int, optional): Stop after this many hits.
+
+    Raises:
+        ValueError: While iterating, if a query yields a better score after \
+            a worse one.
+
+    Returns:
+        CrossProjectStream: Iterate it for hits, best first.
+    '''
+    return CrossProjectStream(
+        select_projects(projects, embedding_model, defaults), query, limit
+    )
@@ -27,7 +27,7 @@ from osintgpt.config import Settings
 
 from .paths import ProjectPaths, default_home
 from .settings import ProjectSettings
-from .toml_io import read_toml, write_toml
+from .toml_io import FileCache, read_toml, write_toml
 
 # Written at the top of every project.toml. A project directory is the thing
 # people zip up and hand to a colleague, so the warning belongs where someone
@@ -40,6 +40,10 @@ CONFIG_HEADER = '''\
 
 '''
 
+# Projects as last read from disk, per project.toml. Project is frozen, so
+# every caller can share one instance.
+PROJECT_CACHE = FileCache()
+
 # turn a display name into a directory-safe slug
 def slugify(name: str) -> str:
     '''
@@ -126,7 +130,8 @@ class Project:
     @classmethod
     def load(cls, path: Union[str, Path]):
         '''
-        Read a project from its directory.
+        Read a project from its directory. A project.toml unchanged since
+        the last read is not parsed again.
 
         Args:
             path (Union[str, Path]): The project root.
@@ -141,6 +146,14 @@ class Project:
         if not paths.config.is_file():
             raise FileNotFoundError(f'no project at {paths.root}')
 
+        if cls is not Project:
+            return cls._parse(paths)
+
+        return PROJECT_CACHE.get(paths.config, lambda _: cls._parse(paths))
+
+    # build a project from its project.toml
+    @classmethod
+    def _parse(cls, paths: ProjectPaths):
         data = read_toml(paths.config)
         identity = data.get('project', {})
 
@@ -237,7 +250,8 @@ class Project:
 
         for field, target in (
             ('generation_model', 'openai_gpt_model'),
-            ('embedding_model', 'openai_embedding_model')
+            ('embedding_model', 'openai_embedding_model'),
+            ('embedding_dimensions', 'embedding_dimensions')
         ):
             if not getattr(base, target) and getattr(settings, field):
                 overrides[target] = getattr(settings, field)
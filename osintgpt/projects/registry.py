@@ -10,18 +10,34 @@
 #   searching across them does not walk the filesystem.
 # =================================================================================
 
+# import modules
+import os
+import sqlite3
+import threading
+
 # import submodules
-from dataclasses import dataclass
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, replace
 from pathlib import Path
 
 # type hints
-from typing import Iterator, List, Optional, Union
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple, Union
 
 from .paths import PROJECTS_DIR, ProjectPaths
 from .project import Project
-from .toml_io import read_toml, write_toml
+from .settings import ProjectSettings
+from .toml_io import FileCache, read_toml, write_toml
 
 REGISTRY_FILE = 'registry.toml'
+REGISTRY_DATABASE = 'registry.sqlite'
+
+# Entries as last read, per registry file. Entries are frozen and loads hold
+# them as a tuple, so loads can share them.
+REGISTRY_CACHE = FileCache()
+
+# A rebuild is mostly stat calls and small reads, which threads overlap well
+# on network and encrypted volumes where each one is slow.
+DEFAULT_SCAN_WORKERS = 16
 
 REGISTRY_HEADER = '''\
 # osintgpt project registry
@@ -44,6 +60,12 @@ class RegistryEntry:
     name: str
     path: str
     embedding_model: str = ''
+    # Shortened width; 0 when the project keeps the model's full width.
+    embedding_dimensions: int = 0
+    # project.toml as it was when indexed, so a rebuild can skip projects
+    # that have not changed. Zero when unknown, which always rereads.
+    config_mtime_ns: int = 0
+    config_size: int = 0
 
     # build from a project
     @classmethod
@@ -55,14 +77,29 @@ class RegistryEntry:
         Returns:
             RegistryEntry: The entry describing it.
         '''
-        return cls(
+        entry = cls(
             id=project.id,
             slug=project.slug,
             name=project.name,
             path=str(project.paths.root),
-            embedding_model=project.settings.embedding_model
+            embedding_model=project.settings.embedding_model,
+            embedding_dimensions=project.settings.embedding_dimensions or 0
+        )
+        try:
+            stat = os.stat(project.paths.config)
+        except OSError:
+            return entry
+
+        return replace(
+            entry, config_mtime_ns=stat.st_mtime_ns, config_size=stat.st_size
         )
 
+    # whether project.toml still matches what was indexed
+    def is_current(self, stat: os.stat_result) -> bool:
+        return bool(self.config_mtime_ns) and (
+            self.config_mtime_ns, self.config_size
+        ) == (stat.st_mtime_ns, stat.st_size)
+
     # load the project this entry points at
     def open(self) -> Project:
         '''
@@ -74,15 +111,97 @@ class RegistryEntry:
         return Project.load(self.path)
 
 
+# index every project under a home
+def scan_projects(
+    home: Path,
+    known: Optional[Dict[str, RegistryEntry]] = None,
+    max_workers: int = DEFAULT_SCAN_WORKERS
+) -> List[RegistryEntry]:
+    '''
+    Args:
+        home (Path): The osintgpt home.
+        known (Dict[str, RegistryEntry], optional): Entries by path from an \
+            earlier index, reused where project.toml is unchanged.
+        max_workers (int): Projects checked at once.
+
+    Returns:
+        List[RegistryEntry]: One entry per project directory, by path.
+    '''
+    known = known or {}
+    projects_root = Path(home) / PROJECTS_DIR
+    candidates = []
+    if projects_root.is_dir():
+        with os.scandir(projects_root) as listing:
+            candidates = sorted(
+                Path(item.path) for item in listing if item.is_dir()
+            )
+
+    def index(candidate: Path) -> Optional[RegistryEntry]:
+        try:
+            stat = os.stat(ProjectPaths(candidate).config)
+        except OSError:
+            return None
+
+        entry = known.get(str(candidate))
+        if entry is not None and entry.is_current(stat):
+            return entry
+
+        try:
+            return RegistryEntry.of(Project.load(candidate))
+        except FileNotFoundError:
+            # Deleted between the stat and the read.
+            return None
+
+    if len(candidates) > 1 and max_workers > 1:
+        with ThreadPoolExecutor(
+            max_workers=min(max_workers, len(candidates)),
+            thread_name_prefix='osintgpt-registry'
+        ) as executor:
+            scanned = list(executor.map(index, candidates))
+    else:
+        scanned = [index(candidate) for candidate in candidates]
+
+    return [entry for entry in scanned if entry is not None]
+
+
 # Registry class
-@dataclass
 class Registry:
     '''
     The projects under one home. Rebuildable from the directory it indexes, so
     a corrupted registry costs a command rather than a corpus.
     '''
-    home: Path
-    entries: List[RegistryEntry]
+    def __init__(
+        self, home: Union[str, Path], entries: Iterable[RegistryEntry] = ()
+    ) -> None:
+        '''
+        Args:
+            home (Union[str, Path]): The osintgpt home.
+            entries (Iterable[RegistryEntry]): The index, in order.
+        '''
+        self.home = Path(home)
+        self.entries = entries
+
+    # the indexed projects, in order
+    @property
+    def entries(self) -> Tuple[RegistryEntry, ...]:
+        '''
+        Returns:
+            Tuple[RegistryEntry, ...]: Read-only. Assign a new sequence to \
+                change the index, which is what keeps lookups current.
+        '''
+        return self._entries
+
+    @entries.setter
+    def entries(self, entries: Iterable[RegistryEntry]) -> None:
+        self._entries = tuple(entries)
+        # Lookups by id, by slug and by (model, width), built on first use.
+        self._index = None
+
+    def __repr__(self) -> str:
+        return (
+            f'{type(self).__name__}(home={self.home!r}, '
+            f'entries={list(self.entries)!r})'
+        )
 
     # the registry file for a home
     @staticmethod
@@ -93,7 +212,9 @@ class Registry:
     @classmethod
     def load(cls, home: Union[str, Path]):
         '''
-        Read the index for a home.
+        Read the index for a home. A registry file unchanged since the last
+        read is not parsed again. A home holding a registry database gets a
+        SQLiteRegistry instead, with the same interface.
 
         Args:
             home (Union[str, Path]): The osintgpt home.
@@ -101,23 +222,122 @@ class Registry:
         Returns:
             Registry: The index, empty when no registry file exists.
         '''
-        document = read_toml(cls.file_for(home))
-        entries = [
+        if cls is Registry and SQLiteRegistry.file_for(home).is_file():
+            return SQLiteRegistry.load(home)
+
+        path = cls.file_for(home)
+        if not path.is_file():
+            return cls(home=Path(home), entries=[])
+
+        return cls(home=Path(home), entries=REGISTRY_CACHE.get(path, cls._parse))
+
+    # entries from a registry file
+    @staticmethod
+    def _parse(path: Path) -> Tuple[RegistryEntry, ...]:
+        return tuple(
             RegistryEntry(
                 id=row.get('id', ''),
                 slug=row.get('slug', ''),
                 name=row.get('name', ''),
                 path=row.get('path', ''),
-                embedding_model=row.get('embedding_model', '')
+                embedding_model=row.get('embedding_model', ''),
+                embedding_dimensions=row.get('embedding_dimensions', 0),
+                config_mtime_ns=row.get('config_mtime_ns', 0),
+                config_size=row.get('config_size', 0)
             )
-            for row in document.get('project', [])
+            for row in read_toml(path).get('project', [])
+        )
+
+    # lookups by id and slug over the current entries
+    def _lookups(self) -> Tuple[
+        Dict[str, RegistryEntry], Dict[str, RegistryEntry],
+        Dict[Tuple[str, int], List[RegistryEntry]]
+    ]:
+        if self._index is None:
+            by_id, by_slug, by_model = {}, {}, {}
+            for entry in self.entries:
+                # The first entry wins, as a scan in order would have it.
+                by_id.setdefault(entry.id, entry)
+                by_slug.setdefault(entry.slug, entry)
+                by_model.setdefault(
+                    (entry.embedding_model, entry.embedding_dimensions), []
+                ).append(entry)
+            self._index = (by_id, by_slug, by_model)
+
+        return self._index
+
+    # project counts per (model, width) as recorded, defaults unresolved
+    def _model_groups(self) -> Dict[Tuple[str, int], int]:
+        return {key: len(group) for key, group in self._lookups()[2].items()}
+
+    # entries recorded under any of these (model, width) pairs
+    def _model_entries(self, keys: List[Tuple[str, int]]) -> List[RegistryEntry]:
+        by_model = self._lookups()[2]
+        if len(keys) == 1:
+            return list(by_model.get(keys[0], []))
+
+        # Several groups resolve to one key only through defaults; keep
+        # index order across them, as a scan would.
+        wanted = set(keys)
+        return [
+            entry for entry in self.entries
+            if (entry.embedding_model, entry.embedding_dimensions) in wanted
+        ]
+
+    # how many projects search under each embedding key
+    def model_counts(
+        self, defaults: Optional[ProjectSettings] = None
+    ) -> Dict[str, int]:
+        '''
+        Read from the index: the cost grows with the number of distinct
+        models, not the number of projects.
+
+        Args:
+            defaults (ProjectSettings, optional): User defaults, which decide \
+                the key of a project that left its model unset.
+
+        Returns:
+            Dict[str, int]: Embedding key to project count, keys in the \
+                order they first appear in the index.
+        '''
+        counts: Dict[str, int] = {}
+        for raw, count in self._model_groups().items():
+            key = _effective_key(raw, defaults)
+            counts[key] = counts.get(key, 0) + count
+
+        return counts
+
+    # entries that search under one embedding key
+    def entries_for_model(
+        self, embedding_key: str, defaults: Optional[ProjectSettings] = None
+    ) -> List[RegistryEntry]:
+        '''
+        Args:
+            embedding_key (str): e.g. 'text-embedding-3-small', or \
+                'text-embedding-3-small@256' for a shortened width.
+            defaults (ProjectSettings, optional): User defaults.
+
+        Returns:
+            List[RegistryEntry]: Matching entries in index order, found \
+                without visiting the others.
+        '''
+        keys = [
+            raw for raw in self._model_groups()
+            if _effective_key(raw, defaults) == embedding_key
         ]
+        if not keys:
+            return []
 
-        return cls(home=Path(home), entries=entries)
+        return self._model_entries(keys)
 
     # rebuild by rescanning
     @classmethod
-    def rebuild(cls, home: Union[str, Path]):
+    def rebuild(
+        cls,
+        home: Union[str, Path],
+        incremental: bool = True,
+        max_workers: int = DEFAULT_SCAN_WORKERS
+    ):
         '''
         Rescan the projects directory and replace the index with what is there.
 
@@ -126,21 +346,28 @@ class Registry:
 
         Args:
             home (Union[str, Path]): The osintgpt home.
+            incremental (bool): Reuse the entry of every project whose \
+                project.toml has the mtime and size it had when indexed, so \
+                only changed projects are read. False rereads everything.
+            max_workers (int): Projects checked at once.
 
         Returns:
-            Registry: The rebuilt index, already written to disk.
+            Registry: The rebuilt index, written to disk unless it was \
+                already current.
         '''
         home = Path(home)
-        entries = []
-        projects_root = home / PROJECTS_DIR
-        if projects_root.is_dir():
-            for candidate in sorted(projects_root.iterdir()):
-                if not ProjectPaths(candidate).config.is_file():
-                    continue
-                entries.append(RegistryEntry.of(Project.load(candidate)))
+        if cls is Registry and SQLiteRegistry.file_for(home).is_file():
+            return SQLiteRegistry.rebuild(home, incremental, max_workers)
+
+        path = cls.file_for(home)
+        previous = cls.load(home) if path.is_file() else None
+        known: Dict[str, RegistryEntry] = {}
+        if incremental and previous is not None:
+            known = {entry.path: entry for entry in previous.entries}
 
-        registry = cls(home=home, entries=entries)
-        registry.save()
+        registry = cls(home=home, entries=scan_projects(home, known, max_workers))
+        if previous is None or registry.entries != previous.entries:
+            registry.save()
 
         return registry
 
@@ -154,7 +381,10 @@ class Registry:
             {'project': [
                 {
                     'id': e.id, 'slug': e.slug, 'name': e.name,
-                    'path': e.path, 'embedding_model': e.embedding_model
+                    'path': e.path, 'embedding_model': e.embedding_model,
+                    'embedding_dimensions': e.embedding_dimensions,
+                    'config_mtime_ns': e.config_mtime_ns,
+                    'config_size': e.config_size
                 }
                 for e in self.entries
             ]},
@@ -171,8 +401,8 @@ class Registry:
         '''
         entry = RegistryEntry.of(project)
         self.entries = [
-            e for e in self.entries if e.id != entry.id
-        ] + [entry]
+            *(e for e in self.entries if e.id != entry.id), entry
+        ]
         self.save()
 
     # drop a project from the index
@@ -204,11 +434,24 @@ class Registry:
         Returns:
             Optional[RegistryEntry]: The entry, or None.
         '''
-        for entry in self.entries:
-            if key in (entry.id, entry.slug):
-                return entry
+        by_id, by_slug, _ = self._lookups()
 
-        return None
+        return by_id.get(key) or by_slug.get(key)
+
+    # entries searched with one embedding model
+    def by_model(self, embedding_model: str) -> List[RegistryEntry]:
+        '''
+        Args:
+            embedding_model (str): Model as recorded in the entries; '' for \
+                projects that left it to the defaults.
+
+        Returns:
+            List[RegistryEntry]: Matching entries, in index order.
+        '''
+        return [
+            entry for (model, _), group in self._lookups()[2].items()
+            if model == embedding_model for entry in group
+        ]
 
     # load a project by id or slug
     def open(self, key: str) -> Project:
@@ -231,8 +474,284 @@ class Registry:
 
         return entry.open()
 
+    # load several projects at once
+    def open_many(self, keys: Optional[Iterable[str]] = None) -> List[Project]:
+        '''
+        Resolve and read several projects, e.g. the set a cross-project
+        search runs over. Each project.toml is parsed only if it changed
+        since it was last read.
+
+        Args:
+            keys (Iterable[str], optional): Ids or slugs. Defaults to every \
+                indexed project.
+
+        Raises:
+            KeyError: Naming every key the index does not know, before any \
+                project is read.
+
+        Returns:
+            List[Project]: The projects, in the order asked for.
+        '''
+        if keys is None:
+            entries = self.entries
+        else:
+            keys = list(keys)
+            found = [(key, self.find(key)) for key in keys]
+            missing = [key for key, entry in found if entry is None]
+            if missing:
+                raise KeyError(
+                    f'no project {", ".join(map(repr, missing))} in '
+                    f'{self.file_for(self.home)}'
+                )
+            entries = [entry for _, entry in found]
+
+        return [entry.open() for entry in entries]
+
     def __iter__(self) -> Iterator[RegistryEntry]:
         return iter(self.entries)
 
     def __len__(self) -> int:
         return len(self.entries)
+
+
+# SQLiteRegistry class
+class SQLiteRegistry(Registry):
+    '''
+    The registry kept in a SQLite database beside the projects, for homes
+    with thousands of cases. Registering or dropping one project is a single
+    indexed write in a transaction rather than a rewrite of the whole index,
+    and two processes registering at once cannot lose each other's entry.
+
+    Opt in once with `SQLiteRegistry.create`; from then on `Registry.load`
+    returns this for the home, one open registry per home shared by every
+    load in the process. close() releases it; the next load opens it again.
+    Nothing is held in memory: `entries` reads the table each time, so
+    prefer find, by_model and len on a large home. Change it through
+    register and unregister; `entries` cannot be set.
+    '''
+    def __init__(self, home: Union[str, Path]) -> None:
+        '''
+        Args:
+            home (Union[str, Path]): The osintgpt home.
+        '''
+        self.home = Path(home)
+        self.home.mkdir(parents=True, exist_ok=True)
+
+        # One connection behind a lock, as the completion cache does; WAL
+        # lets other processes read while this one writes.
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(
+            str(self.file_for(self.home)), check_same_thread=False,
+            timeout=30.0
+        )
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        with self.conn:
+            self.conn.execute(
+                '''
+                CREATE TABLE IF NOT EXISTS projects (
+                    id TEXT NOT NULL PRIMARY KEY,
+                    slug TEXT NOT NULL,
+                    name TEXT NOT NULL,
+                    path TEXT NOT NULL,
+                    embedding_model TEXT NOT NULL DEFAULT '',
+                    embedding_dimensions INTEGER NOT NULL DEFAULT 0,
+                    config_mtime_ns INTEGER NOT NULL DEFAULT 0,
+                    config_size INTEGER NOT NULL DEFAULT 0
+                )
+                '''
+            )
+            self.conn.execute(
+                'CREATE INDEX IF NOT EXISTS projects_slug ON projects (slug)'
+            )
+            self.conn.execute(
+                'CREATE INDEX IF NOT EXISTS projects_model '
+                'ON projects (embedding_model, embedding_dimensions)'
+            )
+
+    # the registry database for a home
+    @staticmethod
+    def file_for(home: Union[str, Path]) -> Path:
+        return Path(home) / REGISTRY_DATABASE
+
+    # move a home onto a registry database
+    @classmethod
+    def create(cls, home: Union[str, Path]):
+        '''
+        Create the database, carrying over whatever registry.toml indexes.
+        The TOML file is left in place but no longer read.
+
+        Args:
+            home (Union[str, Path]): The osintgpt home.
+
+        Returns:
+            SQLiteRegistry: The registry, now what Registry.load returns.
+        '''
+        existing = Registry.load(home) if not cls.file_for(home).is_file() \
+            else None
+        registry = cls.load(home)
+        if existing is not None and existing.entries:
+            registry._replace(existing.entries)
+
+        return registry
+
+    # the open registry for a home
+    @classmethod
+    def load(cls, home: Union[str, Path]):
+        '''
+        Opening runs the schema statements and switches the file to WAL,
+        which is wasted on every load after the first; loads share one
+        connection instead.
+
+        Args:
+            home (Union[str, Path]): The osintgpt home.
+
+        Returns:
+            SQLiteRegistry: The registry open for this home, opened now if \
+                none is, or if its file was removed since.
+        '''
+        path = cls.file_for(home).resolve()
+        with _OPEN_LOCK:
+            registry = _OPEN_REGISTRIES.get(path)
+            if registry is None or not path.is_file():
+                if registry is not None:
+                    registry.conn.close()
+                registry = _OPEN_REGISTRIES[path] = cls(home)
+
+        return registry
+
+    @classmethod
+    def rebuild(
+        cls,
+        home: Union[str, Path],
+        incremental: bool = True,
+        max_workers: int = DEFAULT_SCAN_WORKERS
+    ):
+        registry = cls.load(home)
+        known = {}
+        if incremental:
+            known = {entry.path: entry for entry in registry.entries}
+        registry._replace(scan_projects(Path(home), known, max_workers))
+
+        return registry
+
+    def _rows(self, sql: str, parameters: tuple = ()) -> List[RegistryEntry]:
+        with self._lock:
+            rows = self.conn.execute(
+                'SELECT id, slug, name, path, embedding_model, '
+                'embedding_dimensions, config_mtime_ns, config_size '
+                'FROM projects ' + sql,
+                parameters
+            ).fetchall()
+
+        return [RegistryEntry(*row) for row in rows]
+
+    def _write(self, sql: str, rows: Iterable[tuple]) -> None:
+        with self._lock, self.conn:
+            self.conn.executemany(sql, rows)
+
+    # replace every row in one transaction
+    def _replace(self, entries: Iterable[RegistryEntry]) -> None:
+        with self._lock, self.conn:
+            self.conn.execute('DELETE FROM projects')
+            self.conn.executemany(_UPSERT, [_row(e) for e in entries])
+
+    @property
+    def entries(self) -> Tuple[RegistryEntry, ...]:
+        return tuple(self._rows('ORDER BY rowid'))
+
+    def save(self) -> None:
+        '''
+        Nothing to do: every change is written as it is made.
+        '''
+
+    def register(self, project: Project) -> None:
+        # A replaced row gets a new rowid, so a refreshed entry moves to the
+        # end, as it does in the TOML registry.
+        self._write(_UPSERT, [_row(RegistryEntry.of(project))])
+
+    def unregister(self, key: str) -> bool:
+        with self._lock, self.conn:
+            cursor = self.conn.execute(
+                'DELETE FROM projects WHERE id = ? OR slug = ?', (key, key)
+            )
+
+        return cursor.rowcount > 0
+
+    def find(self, key: str) -> Optional[RegistryEntry]:
+        found = self._rows('WHERE id = ?', (key,)) or self._rows(
+            'WHERE slug = ? ORDER BY rowid LIMIT 1', (key,)
+        )
+
+        return found[0] if found else None
+
+    def by_model(self, embedding_model: str) -> List[RegistryEntry]:
+        return self._rows(
+            'WHERE embedding_model = ? ORDER BY rowid', (embedding_model,)
+        )
+
+    def _model_groups(self) -> Dict[Tuple[str, int], int]:
+        with self._lock:
+            rows = self.conn.execute(
+                'SELECT embedding_model, embedding_dimensions, COUNT(*) '
+                'FROM projects GROUP BY embedding_model, embedding_dimensions '
+                'ORDER BY MIN(rowid)'
+            ).fetchall()
+
+        return {(model, dimensions): count for model, dimensions, count in rows}
+
+    def _model_entries(self, keys: List[Tuple[str, int]]) -> List[RegistryEntry]:
+        match = ' OR '.join(
+            '(embedding_model = ? AND embedding_dimensions = ?)' for _ in keys
+        )
+
+        return self._rows(
+            f'WHERE {match} ORDER BY rowid',
+            tuple(value for key in keys for value in key)
+        )
+
+    # release the connection; a later load opens a new one
+    def close(self) -> None:
+        with _OPEN_LOCK:
+            path = self.file_for(self.home).resolve()
+            if _OPEN_REGISTRIES.get(path) is self:
+                del _OPEN_REGISTRIES[path]
+        self.conn.close()
+
+    def __iter__(self) -> Iterator[RegistryEntry]:
+        return iter(self.entries)
+
+    def __len__(self) -> int:
+        with self._lock:
+            return self.conn.execute('SELECT COUNT(*) FROM projects').fetchone()[0]
+
+
+# The SQLiteRegistry each home's loads share, by database path.
+_OPEN_REGISTRIES: Dict[Path, SQLiteRegistry] = {}
+_OPEN_LOCK = threading.Lock()
+
+# Replaces by id, which is the primary key.
+_UPSERT = (
+    'INSERT OR REPLACE INTO projects (id, slug, name, path, embedding_model, '
+    'embedding_dimensions, config_mtime_ns, config_size) '
+    'VALUES (?, ?, ?, ?, ?, ?, ?, ?)'
+)
+
+
+def _row(entry: RegistryEntry) -> tuple:
+    return (
+        entry.id, entry.slug, entry.name, entry.path, entry.embedding_model,
+        entry.embedding_dimensions, entry.config_mtime_ns, entry.config_size
+    )
+
+
+# the key a recorded (model, width) searches under, given user defaults
+def _effective_key(
+    raw: Tuple[str, int], defaults: Optional[ProjectSettings]
+) -> str:
+    model, dimensions = raw
+    defaults = defaults or ProjectSettings()
+
+    return ProjectSettings(
+        embedding_model=model or defaults.embedding_model,
+        embedding_dimensions=dimensions or defaults.embedding_dimensions
+    ).embedding_key
@@ -13,6 +13,9 @@
 # import submodules
 from dataclasses import asdict, dataclass, fields
 
+# import osintgpt config
+from osintgpt.config import DEFAULT_EMBEDDING_MODEL
+
 # type hints
 from typing import Optional
 
@@ -26,6 +29,9 @@ class ProjectSettings:
     '''
     embedding_provider: str = 'openai'
     embedding_model: str = ''
+    # Shortened vector width for models trained to be truncated. Set once,
+    # before anything is indexed: vectors of two widths cannot share an index.
+    embedding_dimensions: Optional[int] = None
     generation_provider: str = 'openai'
     generation_model: str = ''
     # Vision model for document ingestion; empty inherits the generation model.
@@ -38,6 +44,22 @@ class ProjectSettings:
     storage_backend: str = 'sqlite'
     cost_ceiling_usd: Optional[float] = None
 
+    # what vectors must share to be compared
+    @property
+    def embedding_key(self) -> str:
+        '''
+        Returns:
+            str: The embedding model, falling back to the library default, \
+                with a shortened width appended, e.g. \
+                'text-embedding-3-small@256': vectors cut to different widths \
+                are no more comparable than vectors from different models.
+        '''
+        model = self.embedding_model or DEFAULT_EMBEDDING_MODEL
+        if self.embedding_dimensions is not None:
+            return f'{model}@{self.embedding_dimensions}'
+
+        return model
+
     # build from a parsed mapping
     @classmethod
     def from_dict(cls, data: dict):
@@ -10,13 +10,26 @@
 #   made of, including the parser fallback older Pythons need.
 # =================================================================================
 
+# import modules
+import os
+import threading
+import weakref
+
 # import submodules
 import tomli_w
 
+from collections import OrderedDict
+from contextlib import contextmanager
 from pathlib import Path
 
 # type hints
-from typing import Union
+from typing import IO, Callable, Iterator, Tuple, TypeVar, Union
+
+T = TypeVar('T')
+
+# Parsed files kept per cache. A project's metadata is a few hundred bytes,
+# so this covers a home with hundreds of projects several times over.
+DEFAULT_CACHE_SIZE = 4096
 
 # tomllib landed in 3.11; 3.10 is still a supported floor.
 try:
@@ -24,6 +37,80 @@ try:
 except ModuleNotFoundError:
     import tomli as tomllib
 
+# FileCache class
+class FileCache:
+    '''
+    Values built from files, reused while a file's modification time and size
+    are unchanged — listing hundreds of projects then parses only the ones
+    that changed since the last listing.
+
+    Writes through write_toml drop the entry at once. A write from another
+    process is caught by the changed mtime; one landing within the same
+    filesystem timestamp tick and leaving the size unchanged is not, which is
+    why the cache only holds metadata, never anything a decision about cost
+    or content rests on.
+    '''
+    def __init__(self, maxsize: int = DEFAULT_CACHE_SIZE) -> None:
+        self.maxsize = maxsize
+        self._entries: 'OrderedDict[str, Tuple[Tuple[int, int], object]]' = \
+            OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+        _CACHES.add(self)
+
+    # the cached value, rebuilt when the file changed
+    def get(self, path: Union[str, Path], build: Callable[[Path], T]) -> T:
+        '''
+        Args:
+            path (Union[str, Path]): The file the value is built from.
+            build (Callable[[Path], T]): Builds the value from the file. \
+                Called outside the lock; the value must not be mutated by \
+                whoever receives it, since later calls share it.
+
+        Raises:
+            FileNotFoundError: If the file does not exist.
+
+        Returns:
+            T: The value.
+        '''
+        path = Path(path)
+        key = os.path.abspath(path)
+        stat = os.stat(key)
+        signature = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._entries.get(key)
+            if cached is not None and cached[0] == signature:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+
+        value = build(path)
+        with self._lock:
+            self._entries[key] = (signature, value)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.maxsize:
+                self._entries.popitem(last=False)
+
+        return value
+
+    # forget one file, or everything
+    def invalidate(self, path: Union[str, Path, None] = None) -> None:
+        with self._lock:
+            if path is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(os.path.abspath(path), None)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+
+# Every live cache, so a write can invalidate them all.
+_CACHES: 'weakref.WeakSet[FileCache]' = weakref.WeakSet()
+
+
 # read a TOML document
 def read_toml(path: Union[str, Path]) -> dict:
     '''
@@ -43,6 +130,46 @@ def read_toml(path: Union[str, Path]) -> dict:
         return tomllib.load(handle)
 
 
+# write a file whole or not at all
+@contextmanager
+def atomic_writer(path: Union[str, Path]) -> Iterator[IO[str]]:
+    '''
+    A text handle on a temporary file beside `path`, renamed over it when the
+    block exits cleanly and removed when it raises. A reader sees the old
+    file or the new one, never half of one — even if the writer dies.
+
+    Args:
+        path (Union[str, Path]): File to write. Parent directories are \
+            created as needed.
+
+    Returns:
+        Iterator[IO[str]]: A UTF-8 handle to write through.
+    '''
+    path = Path(path)
+    path.parent.mkdir(parents=True, exist_ok=True)
+
+    # Same directory, so the rename never crosses a filesystem. Unique per
+    # thread, and created the way open() would, so the umask still applies.
+    temporary = path.parent / (
+        f'.{path.name}.{os.getpid()}.{threading.get_ident()}.tmp'
+    )
+    descriptor = os.open(
+        temporary, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o666
+    )
+    try:
+        with os.fdopen(descriptor, 'w', encoding='utf-8') as handle:
+            yield handle
+            handle.flush()
+            os.fsync(handle.fileno())
+        os.replace(temporary, path)
+    except BaseException:
+        try:
+            os.unlink(temporary)
+        except OSError:
+            pass
+        raise
+
+
 # write a TOML document
 def write_toml(
     path: Union[str, Path], document: dict, header: str = ''
@@ -51,7 +178,8 @@ def write_toml(
     Serialize a document to TOML, creating parent directories as needed.
 
     Writing through tomli_w rather than string formatting keeps Windows paths
-    and quoted names correctly escaped.
+    and quoted names correctly escaped. Written through atomic_writer, so a
+    reader never sees half a document.
 
     Args:
         path (Union[str, Path]): File to write.
@@ -61,5 +189,9 @@ def write_toml(
             supplies it again.
     '''
     path = Path(path)
-    path.parent.mkdir(parents=True, exist_ok=True)
-    path.write_text(header + tomli_w.dumps(document), encoding='utf-8')
+    text = header + tomli_w.dumps(document)
+    with atomic_writer(path) as handle:
+        handle.write(text)
+
+    for cache in list(_CACHES):
+        cache.invalidate(path)
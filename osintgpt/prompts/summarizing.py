@@ -70,3 +70,34 @@ def topic_modeling_summarization():
     3. Any observations or narrative patterns that can help understand the content.
     4. Always respond in the language in which the user made the request.
     '''
+
+# Conversation memory
+def conversation_memory_summarization(max_words: int = 200):
+    '''
+    Provides a prompt for folding older conversation turns into a memory.
+
+    This function returns a pre-defined prompt used when a conversation has
+    outgrown its token budget. It instructs the model to merge the turns that
+    no longer fit into the running summary, keeping what later turns may rely
+    on and staying within a fixed length.
+
+    Args:
+        max_words (int): Length the summary is asked to stay within.
+
+    Returns:
+        str: A descriptive prompt for conversation memory summarization.
+    '''
+    return f'''
+    You maintain the memory of an ongoing conversation between a user and an
+    assistant. You receive the summary so far and the oldest turns, which are
+    about to leave the conversation. Merge them into one updated summary.
+
+    Please, respond always after following the below procedure:
+    1. Keep facts, names, figures, decisions and open questions the user may
+       return to.
+    2. Drop greetings, repetition and anything the summary already states.
+    3. Focus only on the provided content; do not introduce external information.
+
+    Respond with the updated summary only, in at most {max_words} words, and in
+    the language the conversation is held in.
+    '''
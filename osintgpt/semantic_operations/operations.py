@@ -12,11 +12,11 @@
 #   semantic patterns within large text corpora.
 # =================================================================================
 
-# import modules
-import pandas as pd
-
 # type hints
-from typing import Union, Optional, List, Dict
+from typing import TYPE_CHECKING, Union, Optional, List, Dict
+
+if TYPE_CHECKING:
+    import pandas as pd
 
 # import osintgpt config
 from osintgpt.config import Settings, resolve_settings
@@ -99,7 +99,7 @@ class SemanticOperations(object):
     # Semantic similarity search
     def semantic_similarity_search(self, query: str,
         vector_engine: Optional[BaseVectorEngine] = None,
-        df: Optional[pd.DataFrame] = None, payload_ref_text_key: str = 'text',
+        df: Optional['pd.DataFrame'] = None, payload_ref_text_key: str = 'text',
         payload_ref_embeddings_key: str = 'embeddings', top_k: int = 5,
         depth: int = 50, score_threshold: float = 0.85,
         score_based_on_initial_query: bool = False, **kwargs):
@@ -1,11 +1,17 @@
 # A directory containing utility functions
 
 # import modules
+import csv
+import os
+import sys
 import uuid
-import tiktoken
+
+# import submodules
+from functools import lru_cache
+from itertools import islice
 
 # type hints
-from typing import List
+from typing import Iterable, List
 
 # create unique id using uuid4
 def create_unique_id(ids: List = []) -> str:
@@ -29,7 +35,29 @@ def create_unique_id(ids: List = []) -> str:
 # fallback encoding for models tiktoken does not know
 DEFAULT_ENCODING = 'o200k_base'
 
+# Texts handed to one encode_ordinary_batch call. Bounds the token lists held
+# in memory at once, whatever the size of the corpus being counted.
+COUNT_CHUNK_SIZE = 10_000
+
+# tiktoken encodes in Rust and releases the GIL, so threads scale with cores.
+DEFAULT_COUNT_THREADS = min(8, os.cpu_count() or 1)
+
+# let the csv module read long fields
+@lru_cache(maxsize=None)
+def allow_long_csv_fields() -> None:
+    '''
+    Raise the csv module's field size limit, which a long post in one cell
+    passes at the default of 128KB.
+
+    The limit is process-wide, so this runs once per process and only ever
+    raises it: a larger limit set by the caller is left alone.
+    '''
+    limit = min(sys.maxsize, 2 ** 31 - 1)
+    if csv.field_size_limit() < limit:
+        csv.field_size_limit(limit)
+
 # resolve the encoding for a model
+@lru_cache(maxsize=None)
 def encoding_for_model(model: str):
     '''
     Get the tiktoken encoding a model uses.
@@ -38,12 +66,20 @@ def encoding_for_model(model: str):
     raises rather than returning something usable. Falling back keeps counting
     approximate instead of fatal.
 
+    Cached per model: resolving a name walks tiktoken's prefix table, and the
+    fallback path raises and catches on every call, which shows when counting
+    millions of messages one at a time.
+
     Args:
         model (str): Model name.
 
     Returns:
         tiktoken.Encoding: The model's encoding, or the default fallback.
     '''
+    # Deferred: tiktoken loads its registry on import, and most imports of
+    # osintgpt never count a token.
+    import tiktoken
+
     try:
         return tiktoken.encoding_for_model(model)
     except KeyError:
@@ -53,7 +89,8 @@ def encoding_for_model(model: str):
 def count_tokens(prompt: str, model: str) -> int:
     '''
     Count tokens
-    It counts the number of tokens in the data.
+    It counts the number of tokens in the data. Special-token markers in the
+    text are counted as ordinary text, as count_tokens_many counts them.
 
     Args:
         prompt (str): The input prompt for the GPT model.
@@ -66,7 +103,46 @@ def count_tokens(prompt: str, model: str) -> int:
     encoding = encoding_for_model(model)
 
     # count tokens
-    tokens = encoding.encode(prompt)
+    tokens = encoding.encode_ordinary(prompt)
     num_tokens = len(tokens)
 
     return num_tokens
+
+# count tokens for many texts
+def count_tokens_many(texts: Iterable[str], model: str,
+    num_threads: int = DEFAULT_COUNT_THREADS,
+    chunk_size: int = COUNT_CHUNK_SIZE) -> List[int]:
+    '''
+    Count tokens for many texts at once.
+    Texts are encoded in chunks across threads, which is what makes a
+    pre-ingest estimate over millions of messages take seconds.
+
+    Special-token markers in the text are counted as ordinary text, as a
+    provider counts them in user content, rather than raising.
+
+    Args:
+        texts (Iterable[str]): Texts to count. Consumed one chunk at a time, \
+            so a generator over a large file is fine.
+        model (str): The model the tokens will be sent to.
+        num_threads (int): Encoding threads.
+        chunk_size (int): Texts per encoding call.
+
+    Returns:
+        List[int]: Number of tokens per text, in order.
+    '''
+    encoding = encoding_for_model(model)
+
+    counts: List[int] = []
+    texts = iter(texts)
+    while True:
+        chunk = list(islice(texts, chunk_size))
+        if not chunk:
+            break
+
+        counts.extend(
+            len(tokens) for tokens in encoding.encode_ordinary_batch(
+                chunk, num_threads=num_threads
+            )
+        )
+
+    return counts
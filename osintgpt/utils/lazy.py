@@ -0,0 +1,49 @@
+# -*- coding: utf-8 -*-
+
+# =================================================================================
+# osintgpt
+#
+# Author: @estebanpdl
+#
+# File: lazy.py
+# Description: Package attributes resolved on first use (PEP 562), so importing
+#   a package does not import every dependency its modules might need.
+# =================================================================================
+
+# import modules
+import importlib
+
+# type hints
+from typing import Callable, Dict, List, Tuple
+
+
+# module-level __getattr__ and __dir__ for a package
+def lazy_exports(
+    package: str, exports: Dict[str, str]
+) -> Tuple[Callable[[str], object], Callable[[], List[str]]]:
+    '''
+    Args:
+        package (str): The package's __name__.
+        exports (Dict[str, str]): Attribute name to the module defining it, \
+            relative to the package, e.g. {'Qdrant': '.qdrant'}.
+
+    Returns:
+        Tuple: __getattr__ and __dir__ for the package to assign. A resolved \
+            attribute is stored on the package, so the import runs once.
+    '''
+    def __getattr__(name: str):
+        module = exports.get(name)
+        if module is None:
+            raise AttributeError(
+                f'module {package!r} has no attribute {name!r}'
+            )
+
+        value = getattr(importlib.import_module(module, package), name)
+        setattr(importlib.import_module(package), name, value)
+
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(importlib.import_module(package))) | set(exports))
+
+    return __getattr__, __dir__
@@ -1,5 +1,9 @@
 # base class
 from .base import BaseVectorEngine
 
-# import class methods
-from .qdrant import Qdrant
+# import osintgpt utils
+from osintgpt.utils.lazy import lazy_exports
+
+# import class methods, on first use: the Qdrant client is the heaviest import
+# in the package
+__getattr__, __dir__ = lazy_exports(__name__, {'Qdrant': '.qdrant'})
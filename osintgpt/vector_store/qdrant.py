@@ -17,11 +17,17 @@ import qdrant_client
 from qdrant_client.http import models as rest
 
 # type hints
-from typing import List, Optional, Union
+from typing import Any, Dict, List, Optional, Union
 
 # import osintgpt config
 from osintgpt.config import Settings, resolve_settings
 
+# import osintgpt latency
+from osintgpt.llm.latency import VECTOR_SEARCH, VECTOR_UPSERT, timed
+
+# import osintgpt dimensions
+from osintgpt.llm.dimensions import DEFAULT_OVERSAMPLE, fit_vectors, shorten
+
 # import exceptions
 from osintgpt.exceptions.errors import MissingEnvironmentVariableError
 
@@ -50,19 +56,39 @@ class Qdrant(BaseVectorEngine):
     github.com/qdrant/qdrant-client/blob/master/qdrant_client/qdrant_client.py
     '''
     # constructor
-    def __init__(self, config: Union[Settings, str]):
+    def __init__(self, config: Union[Settings, str], recorder=None,
+        coarse_dimensions: Optional[int] = None,
+        oversample: int = DEFAULT_OVERSAMPLE,
+        client: Optional[qdrant_client.QdrantClient] = None):
         '''
         Constructor
 
         args:
             config (Union[Settings, str]): Settings, or a path to a .env file \
-                (deprecated).
+                (deprecated). Its embedding_dimensions sizes new collections \
+                and is enforced on every vector stored.
+            recorder (UsageRecorder, optional): Receives the time each \
+                search and upsert took.
+            coarse_dimensions (int, optional): Also store each vector's \
+                first values as a second, smaller vector, and search in two \
+                stages: candidates on the small one, ranked on the full one.
+            oversample (int): Coarse candidates kept per result.
+            client (QdrantClient, optional): An open client to use instead \
+                of connecting from the settings, e.g. \
+                `QdrantClient(location=':memory:')` for Qdrant's in-process \
+                mode.
         '''
         # settings
         self.settings = resolve_settings(config)
+        self.recorder = recorder
+        self.coarse_dimensions = coarse_dimensions
+        self.oversample = oversample
 
         # connect
-        self.set_required_variables()
+        if client is not None:
+            self.qdrant = client
+        else:
+            self.set_required_variables()
 
     # set required settings
     def set_required_variables(self):
@@ -216,34 +242,81 @@ class Qdrant(BaseVectorEngine):
         vector = collection.config.params
         return vector
     
+    # name of the prefix vector stored beside a full one
+    def _coarse_name(self, vector_name: str):
+        return f'{vector_name}_coarse'
+
+    # fit vectors to the configured width
+    def _fit(self, vectors: List):
+        '''
+        Fit vectors
+
+        Wider vectors are shortened to the configured width; narrower ones
+        are refused, since padding them would not make them comparable.
+
+        args:
+            vectors: vectors
+                type: list
+
+        returns:
+            vectors: vectors at the configured width
+        '''
+        return fit_vectors(vectors, self.settings.embedding_dimensions)
+
+    # named vectors for one point
+    def _point_vectors(self, vector: List[float], vector_name: str):
+        named = {vector_name: vector}
+        if self.coarse_dimensions is not None:
+            named[self._coarse_name(vector_name)] = shorten(
+                vector, self.coarse_dimensions
+            ).tolist()
+
+        return named
+
     # create collection
-    def create_collection(self, collection_name: str, vector_size: int,
-        vector_name: str = 'main'):
+    def create_collection(self, collection_name: str,
+        vector_size: Optional[int] = None, vector_name: str = 'main'):
         '''
         Create collection
 
         args:
             collection_name: collection name
                 type: str
-            vector_size: vector size
+            vector_size: vector size. Defaults to the configured \
+                embedding_dimensions.
                 type: int
             vector_name: name
                 type: str
         '''
+        vector_size = vector_size or self.settings.embedding_dimensions
+        if not vector_size:
+            raise ValueError(
+                'vector_size must be specified when Settings carries no '
+                'embedding_dimensions'
+            )
+
+        vectors_config = {
+            vector_name: rest.VectorParams(
+                distance=rest.Distance.COSINE,
+                size=vector_size
+            )
+        }
+        if self.coarse_dimensions is not None:
+            vectors_config[self._coarse_name(vector_name)] = rest.VectorParams(
+                distance=rest.Distance.COSINE,
+                size=self.coarse_dimensions
+            )
+
         # create collection
         self.qdrant.recreate_collection(
             collection_name=collection_name,
-            vectors_config={
-                vector_name: rest.VectorParams(
-                    distance=rest.Distance.COSINE,
-                    size=vector_size
-                )
-            }
+            vectors_config=vectors_config
         )
     
     # add vectors
     def add_vectors(self, collection_name: str, vectors: List,
-        vector_name: str = 'main', payload: Optional[List[dict]] = None):
+        vector_name: str = 'main', payload: Optional[List[dict]] = None,
+        ids: Optional[List[Union[int, str]]] = None):
         '''
         Add vectors
 
@@ -256,24 +329,33 @@ class Qdrant(BaseVectorEngine):
                 type: str
             payload: payload. Should be the same length as vectors and same order.
                 type: list
+            ids: point ids, unsigned integers or UUID strings. Defaults to \
+                positions, 0 to len(vectors) - 1. Stable ids make a repeated \
+                upsert overwrite rather than collide.
+                type: list
         '''
         # validate payload length
         self._validate_payload_length(payload, vectors)
+        if ids is not None and len(ids) != len(vectors):
+            raise ValueError('ids length must be the same as vectors length')
+        vectors = self._fit(vectors)
+        if ids is None:
+            ids = range(len(vectors))
         
         # add vectors
-        self.qdrant.upsert(
-            collection_name=collection_name,
-            points=[
-                rest.PointStruct(
-                    id=k,
-                    vector={
-                        vector_name: v
-                    },
-                    payload=payload[k] if payload else None
-                )
-                for k, v in enumerate(vectors)
-            ]
-        )
+        with timed(self.recorder, VECTOR_UPSERT, 'qdrant', collection_name,
+            len(vectors)):
+            self.qdrant.upsert(
+                collection_name=collection_name,
+                points=[
+                    rest.PointStruct(
+                        id=point_id,
+                        vector=self._point_vectors(v, vector_name),
+                        payload=payload[k] if payload else None
+                    )
+                    for k, (point_id, v) in enumerate(zip(ids, vectors))
+                ]
+            )
     
     # update vector collection
     def update_vector_collection(self, collection_name: str, vectors: List,
@@ -293,24 +375,54 @@ class Qdrant(BaseVectorEngine):
         '''
         # validate payload length
         self._validate_payload_length(payload, vectors)
+        vectors = self._fit(vectors)
 
         # count vectors
         count = self.count_vectors(collection_name=collection_name)
         n = count.count
 
         # add vectors
-        self.qdrant.upsert(
+        with timed(self.recorder, VECTOR_UPSERT, 'qdrant', collection_name,
+            len(vectors)):
+            self.qdrant.upsert(
+                collection_name=collection_name,
+                points=[
+                    rest.PointStruct(
+                        id=k + n,
+                        vector=self._point_vectors(v, vector_name),
+                        payload=payload[k] if payload else None
+                    )
+                    for k, v in enumerate(vectors)
+                ]
+            )
+    
+    # delete points by payload
+    def delete_points(self, collection_name: str, match: Dict[str, Any]):
+        '''
+        Delete every point whose payload holds all the given values
+
+        args:
+            collection_name: collection name
+                type: str
+            match: payload key to the value it must equal
+                type: dict
+        '''
+        if not match:
+            raise ValueError('match must name at least one payload key')
+
+        # delete points
+        self.qdrant.delete(
             collection_name=collection_name,
-            points=[
-                rest.PointStruct(
-                    id=k + n,
-                    vector={
-                        vector_name: v
-                    },
-                    payload=payload[k] if payload else None
+            points_selector=rest.FilterSelector(
+                filter=rest.Filter(
+                    must=[
+                        rest.FieldCondition(
+                            key=key, match=rest.MatchValue(value=value)
+                        )
+                        for key, value in match.items()
+                    ]
                 )
-                for k, v in enumerate(vectors)
-            ]
+            )
         )
     
     # delete collection
@@ -353,13 +465,27 @@ class Qdrant(BaseVectorEngine):
         # vector name
         vector_name = kwargs.get('vector_name', 'main')
 
+        # the query at the stored width
+        embedded_query = self._fit([embedded_query])[0]
+
+        # two stages: candidates on the prefix, ranked at full width
+        query = {}
+        if self.coarse_dimensions is not None:
+            query['prefetch'] = rest.Prefetch(
+                query=shorten(embedded_query, self.coarse_dimensions).tolist(),
+                using=self._coarse_name(vector_name),
+                limit=top_k * self.oversample
+            )
+
         # query results
         # query_points wraps its hits; unwrap to return a plain list of points.
-        response = self.qdrant.query_points(
-            collection_name=collection_name,
-            query=embedded_query,
-            using=vector_name,
-            limit=top_k
-        )
+        with timed(self.recorder, VECTOR_SEARCH, 'qdrant', collection_name):
+            response = self.qdrant.query_points(
+                collection_name=collection_name,
+                query=embedded_query,
+                using=vector_name,
+                limit=top_k,
+                **query
+            )
 
         return response.points
@@ -82,6 +82,12 @@ class TestConnection:
         with pytest.raises(ConnectionError):
             Qdrant(LOCAL)
 
+    def test_an_open_client_is_used_as_given(self, client):
+        given = object()
+
+        assert Qdrant(Settings(), client=given).qdrant is given
+        client.assert_not_called()
+
 
 class TestCollections:
     def test_get_collections(self, qdrant, client):
@@ -129,12 +135,35 @@ class TestVectors:
             ]
         )
 
+    def test_add_vectors_with_stable_ids(self, qdrant, client):
+        ids = ['2b1f0d3e-5c39-5a51-9b1c-6f3c7c1c0a01', 7]
+        qdrant.add_vectors('test_collection', [[0.1], [0.2]], 'v', ids=ids)
+
+        points = client.return_value.upsert.call_args.kwargs['points']
+
+        assert [point.id for point in points] == ids
+        with pytest.raises(ValueError):
+            qdrant.add_vectors('test_collection', [[0.1]], 'v', ids=[1, 2])
+
     def test_add_vectors_rejects_a_mismatched_payload(self, qdrant):
         with pytest.raises(ValueError):
             qdrant.add_vectors(
                 'test_collection', [[0.1], [0.2]], 'test_vector', [{'id': 1}]
             )
 
+    def test_delete_points_filters_on_every_payload_value(self, qdrant, client):
+        qdrant.delete_points('test_collection', {'project': 'p', 'source': 's'})
+
+        client.return_value.delete.assert_called_once_with(
+            collection_name='test_collection',
+            points_selector=rest.FilterSelector(filter=rest.Filter(must=[
+                rest.FieldCondition(key='project', match=rest.MatchValue(value='p')),
+                rest.FieldCondition(key='source', match=rest.MatchValue(value='s'))
+            ]))
+        )
+        with pytest.raises(ValueError):
+            qdrant.delete_points('test_collection', {})
+
     def test_update_vector_collection_continues_the_id_sequence(
         self, qdrant, client, mocker
     ):
@@ -178,6 +207,20 @@ class TestSearchQuery:
         )
         assert result == expected
 
+    def test_a_recorder_receives_the_search_time(self, client, mocker):
+        from osintgpt.llm import UsageRecorder
+
+        recorder = UsageRecorder()
+        client.return_value.query_points.return_value = mocker.MagicMock(
+            points=[]
+        )
+        Qdrant(LOCAL, recorder=recorder).search_query(
+            [0.1], collection_name='test_collection'
+        )
+
+        hist = recorder.latency_for('vector_search', 'qdrant', 'test_collection')
+        assert hist.count == 1
+
     def test_uses_the_current_client_api(self, qdrant, client):
         '''autospec fails here rather than passing against a method the
         installed client does not have.'''
@@ -186,3 +229,72 @@ class TestSearchQuery:
     def test_requires_a_collection_name(self, qdrant):
         with pytest.raises(ValueError, match='collection_name'):
             qdrant.search_query([0.1, 0.2], 5)
+
+
+class TestDimensions:
+    @pytest.fixture
+    def shortened(self, client):
+        return Qdrant(
+            LOCAL.with_overrides(embedding_dimensions=4), coarse_dimensions=2
+        )
+
+    def test_collections_are_sized_from_settings(self, shortened, client):
+        shortened.create_collection('test_collection')
+
+        client.return_value.recreate_collection.assert_called_with(
+            collection_name='test_collection',
+            vectors_config={
+                'main': rest.VectorParams(
+                    distance=rest.Distance.COSINE, size=4
+                ),
+                'main_coarse': rest.VectorParams(
+                    distance=rest.Distance.COSINE, size=2
+                )
+            }
+        )
+
+    def test_a_collection_needs_a_size(self, qdrant):
+        with pytest.raises(ValueError, match='vector_size'):
+            qdrant.create_collection('test_collection')
+
+    def test_wider_vectors_are_shortened_on_the_way_in(self, shortened, client):
+        shortened.add_vectors('test_collection', [[3.0, 4.0, 0.0, 0.0, 9.0]])
+
+        point = client.return_value.upsert.call_args.kwargs['points'][0]
+        assert point.vector['main'] == pytest.approx([0.6, 0.8, 0.0, 0.0])
+        assert point.vector['main_coarse'] == pytest.approx([0.6, 0.8])
+
+    def test_narrower_vectors_are_refused(self, shortened):
+        with pytest.raises(ValueError, match='fewer than'):
+            shortened.add_vectors('test_collection', [[0.1, 0.2]])
+
+    def test_a_wide_query_is_shortened_without_a_coarse_width(
+        self, client, mocker
+    ):
+        client.return_value.query_points.return_value = mocker.MagicMock(
+            points=[]
+        )
+        Qdrant(LOCAL.with_overrides(embedding_dimensions=2)).search_query(
+            [3.0, 4.0, 9.0], collection_name='test_collection'
+        )
+
+        kwargs = client.return_value.query_points.call_args.kwargs
+        assert kwargs['query'] == pytest.approx([0.6, 0.8])
+        assert 'prefetch' not in kwargs
+
+    def test_searches_the_prefix_then_the_full_vector(
+        self, shortened, client, mocker
+    ):
+        client.return_value.query_points.return_value = mocker.MagicMock(
+            points=[]
+        )
+        shortened.search_query(
+            [0.0, 2.0, 0.0, 0.0], 3, collection_name='test_collection'
+        )
+
+        kwargs = client.return_value.query_points.call_args.kwargs
+        assert kwargs['using'] == 'main'
+        assert kwargs['limit'] == 3
+        assert kwargs['prefetch'].using == 'main_coarse'
+        assert kwargs['prefetch'].query == [0.0, 1.0]
+        assert kwargs['prefetch'].limit == 3 * shortened.oversample
@@ -0,0 +1,84 @@
+# -*- coding: utf-8 -*-
+
+# =================================================================================
+# osintgpt
+#
+# Author: @estebanpdl
+#
+# File: test_benchmarks.py
+# Description: The benchmark suite runs end to end on a tiny corpus, offline,
+#   and fails a run that has slowed past its baseline.
+# =================================================================================
+
+# import modules
+import json
+import subprocess
+import sys
+
+# import submodules
+from pathlib import Path
+
+ROOT = Path(__file__).resolve().parents[1]
+
+# Small enough to run in a few seconds; this checks the suite, not speed.
+TINY = ['--sizes', '40', '--dimension', '8', '--repeat', '1']
+
+
+def bench(*args):
+    return subprocess.run(
+        [sys.executable, '-m', 'benchmarks.run', *TINY, *args],
+        cwd=ROOT, capture_output=True, text=True
+    )
+
+
+def baseline_from(results, factor):
+    return {
+        'results': [
+            {**result, 'best_seconds': result['best_seconds'] * factor}
+            for result in results['results']
+        ]
+    }
+
+
+class TestSuite:
+    def test_every_case_runs_and_writes_json(self, tmp_path):
+        output = tmp_path / 'results.json'
+        result = bench('--output', str(output), '--no-baseline')
+
+        assert result.returncode == 0, result.stderr
+        results = json.loads(output.read_text(encoding='utf-8'))
+        assert {entry['case'] for entry in results['results']} == {
+            'search_results_from_dataframe',
+            'two_stage_search',
+            'semantic_similarity_search',
+            'load_embeddings_from_csv',
+            'provider_embed',
+            'qdrant_add_vectors',
+            'sql_inserts',
+            'search_projects',
+            'near_duplicates'
+        }
+        assert all(entry['size'] == 40 for entry in results['results'])
+
+    def test_a_slowdown_past_the_tolerance_fails(self, tmp_path):
+        output = tmp_path / 'results.json'
+        args = ['--cases', 'search_projects', '--output', str(output)]
+        bench(*args, '--no-baseline')
+        results = json.loads(output.read_text(encoding='utf-8'))
+
+        slower = tmp_path / 'fast_baseline.json'
+        slower.write_text(json.dumps(baseline_from(results, 1e-6)))
+        faster = tmp_path / 'slow_baseline.json'
+        faster.write_text(json.dumps(baseline_from(results, 1e6)))
+
+        assert bench(*args, '--baseline', str(slower)).returncode == 1
+        assert bench(*args, '--baseline', str(faster)).returncode == 0
+
+    def test_a_missing_baseline_fails_the_check(self, tmp_path):
+        result = bench(
+            '--cases', 'search_projects',
+            '--baseline', str(tmp_path / 'none.json')
+        )
+
+        assert result.returncode == 2
+        assert '--save-baseline' in result.stderr
@@ -12,17 +12,24 @@
 
 # import modules
 import pytest
+import threading
+import time
 
 # import osintgpt config
 from osintgpt.config import DEFAULT_EMBEDDING_MODEL
 
 # import osintgpt projects
-from osintgpt.projects import Project, ProjectSettings
+from osintgpt.projects import Project, ProjectSettings, Registry
 from osintgpt.projects.cross_project import (
+    FAILED,
     MISMATCH,
+    MISSING,
+    TIMED_OUT,
     embedding_model_of,
     search_projects,
-    select_projects
+    select_projects,
+    select_projects_by_model,
+    stream_projects
 )
 
 LARGE = 'text-embedding-3-large'
@@ -54,6 +61,13 @@ class TestEmbeddingModelOf:
 
         assert model == LARGE
 
+    def test_a_shortened_width_is_part_of_the_model(self, tmp_path):
+        project = Project.create('A', home=tmp_path, settings=ProjectSettings(
+            embedding_model=LARGE, embedding_dimensions=256
+        ))
+
+        assert embedding_model_of(project) == f'{LARGE}@256'
+
 
 class TestSelect:
     def test_matching_projects_are_all_included(self, make_project):
@@ -136,6 +150,61 @@ class TestSelect:
         assert selection.notice == ''
 
 
+class TestSelectByModel:
+    @pytest.fixture
+    def registry(self, tmp_path, make_project):
+        registry = Registry.load(tmp_path)
+        for name, model in (
+            ('A', SMALL), ('B', LARGE), ('C', LARGE), ('D', ''), ('E', LARGE)
+        ):
+            registry.register(make_project(name, model))
+
+        return registry
+
+    def test_the_majority_model_is_read_from_the_index(self, registry, mocker):
+        load = mocker.spy(Project, 'load')
+        selection = select_projects_by_model(registry)
+
+        assert selection.embedding_model == LARGE
+        assert [p.slug for p in selection.included] == ['b', 'c', 'e']
+        # Only the selected projects are opened, and nobody is excluded
+        # for having a different model: they were never candidates.
+        assert load.call_count == 3
+        assert selection.excluded == []
+
+    def test_defaults_decide_where_unset_projects_fall(self, registry):
+        selection = select_projects_by_model(
+            registry, SMALL, ProjectSettings(embedding_model=SMALL)
+        )
+
+        assert [p.slug for p in selection.included] == ['a', 'd']
+
+    def test_a_project_edited_since_indexing_is_excluded(self, registry):
+        project = Project.load(registry.find('c').path)
+        project.with_settings(embedding_model=SMALL).save()
+
+        selection = select_projects_by_model(registry, LARGE)
+
+        assert [p.slug for p in selection.included] == ['b', 'e']
+        assert selection.excluded[0].reason == MISMATCH
+        assert selection.excluded[0].detail == SMALL
+
+    def test_a_removed_project_is_excluded(self, registry):
+        import shutil
+
+        shutil.rmtree(registry.find('b').path)
+        selection = select_projects_by_model(registry, LARGE)
+
+        assert [p.slug for p in selection.included] == ['c', 'e']
+        assert selection.excluded[0].reason == MISSING
+
+    def test_an_empty_registry_selects_nothing(self, tmp_path):
+        selection = select_projects_by_model(Registry.load(tmp_path / 'empty'))
+
+        assert selection.included == []
+        assert selection.embedding_model == ''
+
+
 class TestNotice:
     def test_is_empty_when_nothing_was_dropped(self, make_project):
         selection = select_projects([make_project('A', LARGE)])
@@ -215,3 +284,134 @@ class TestSearch:
 
         assert [hit.payload for hit in results] == ['only-a']
         assert results.notice == ''
+
+
+class TestFanOut:
+    def test_projects_are_queried_at_once(self, make_project):
+        projects = [make_project(name, LARGE) for name in 'ABCD']
+        gate = threading.Barrier(4, timeout=5)
+
+        def query(project):
+            # Only returns once all four are in flight together.
+            gate.wait()
+            return [(0.5, project.slug)]
+
+        results = search_projects(projects, query, max_workers=4)
+
+        assert sorted(hit.payload for hit in results) == ['a', 'b', 'c', 'd']
+
+    def test_a_slow_project_is_excluded_not_waited_for(self, make_project):
+        projects = [make_project('A', LARGE), make_project('Slow', LARGE)]
+        release = threading.Event()
+
+        def query(project):
+            if project.slug == 'slow':
+                release.wait(5)
+            return [(0.5, project.slug)]
+
+        started = time.monotonic()
+        results = search_projects(projects, query, timeout=0.2)
+        elapsed = time.monotonic() - started
+        release.set()
+
+        assert elapsed < 2
+        assert [hit.payload for hit in results] == ['a']
+        assert [p.slug for p in results.selection.included] == ['a']
+        assert results.selection.excluded[0].reason == TIMED_OUT
+        assert TIMED_OUT in results.notice and 'slow' in results.notice
+
+    def test_a_failing_project_is_excluded_with_its_error(self, make_project):
+        projects = [make_project('A', LARGE), make_project('Broken', LARGE)]
+
+        def query(project):
+            if project.slug == 'broken':
+                raise ConnectionError('collection unreachable')
+            return [(0.5, project.slug)]
+
+        results = search_projects(projects, query)
+
+        assert [hit.payload for hit in results] == ['a']
+        exclusion = results.selection.excluded[0]
+        assert exclusion.reason == FAILED
+        assert 'collection unreachable' in exclusion.detail
+
+    def test_a_generator_query_runs_on_the_worker(self, make_project):
+        projects = [make_project('A', LARGE)]
+        threads = []
+
+        def query(project):
+            threads.append(threading.current_thread())
+            yield 0.5, project.slug
+
+        search_projects(projects, query)
+
+        assert threads and threads[0] is not threading.main_thread()
+
+    def test_limit_keeps_ties_in_project_order(self, make_project):
+        projects = [make_project(name, LARGE) for name in 'ABC']
+
+        results = search_projects(
+            projects, lambda p: [(0.5, p.slug), (0.1, p.slug)], limit=2
+        )
+
+        assert [hit.payload for hit in results] == ['a', 'b']
+
+
+class TestStream:
+    def test_merges_sorted_projects_lazily(self, make_project):
+        projects = [make_project('A', LARGE), make_project('B', LARGE)]
+        scores = {'a': [(0.9, 'a1'), (0.3, 'a2')], 'b': [(0.7, 'b1'), (0.3, 'b2')]}
+
+        stream = stream_projects(projects, lambda p: scores[p.slug])
+
+        assert [hit.payload for hit in stream] == ['a1', 'b1', 'a2', 'b2']
+
+    def test_stops_reading_once_the_limit_is_met(self, make_project):
+        projects = [make_project(name, LARGE) for name in 'ABC']
+        pulled = {'a': 0, 'b': 0, 'c': 0}
+
+        def query(project):
+            for rank in range(1_000):
+                pulled[project.slug] += 1
+                yield 1.0 - rank / 1_000, (project.slug, rank)
+
+        hits = list(stream_projects(projects, query, limit=5))
+
+        assert len(hits) == 5
+        # Five handed out, plus at most one pending hit per project.
+        assert sum(pulled.values()) <= 5 + len(projects)
+
+    def test_an_unsorted_query_is_an_error(self, make_project):
+        projects = [make_project('A', LARGE)]
+        stream = stream_projects(projects, lambda p: [(0.1, 'x'), (0.9, 'y')])
+
+        with pytest.raises(ValueError, match='best hits first'):
+            list(stream)
+
+    def test_a_failing_project_is_excluded(self, make_project):
+        projects = [make_project('A', LARGE), make_project('Broken', LARGE)]
+
+        def query(project):
+            if project.slug == 'broken':
+                raise ConnectionError('down')
+            yield 0.5, project.slug
+
+        stream = stream_projects(projects, query)
+
+        assert [hit.payload for hit in stream] == ['a']
+        assert stream.selection.excluded[0].reason == FAILED
+        assert 'broken' in stream.notice
+
+    def test_carries_the_selection_notice(self, make_project):
+        projects = [make_project('A', LARGE), make_project('B', SMALL)]
+        stream = stream_projects(projects, lambda p: [(0.5, p.slug)])
+
+        assert [hit.payload for hit in stream] == ['a']
+        assert MISMATCH in stream.notice
+
+    def test_iterates_once(self, make_project):
+        stream = stream_projects([make_project('A', LARGE)], lambda p: [])
+        list(stream)
+
+        with pytest.raises(RuntimeError):
+            list(stream)
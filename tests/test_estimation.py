@@ -0,0 +1,202 @@
+# -*- coding: utf-8 -*-
+
+# =================================================================================
+# osintgpt
+#
+# Author: @estebanpdl
+#
+# File: test_estimation.py
+# Description: The streaming pre-flight estimator — every format read in
+#   chunks, tokens priced per model, and the project's ceiling enforced before
+#   anything is sent.
+# =================================================================================
+
+# import modules
+import csv
+import json
+import pytest
+
+# import osintgpt estimation
+from osintgpt import estimation
+from osintgpt.estimation import estimate_file, estimate_for_project, read_texts
+
+# import osintgpt pricing
+from osintgpt.pricing import estimate_cost
+
+# import osintgpt projects
+from osintgpt.projects import Project
+
+# import exceptions
+from osintgpt.exceptions.errors import CostCeilingExceededError
+
+ROWS = ['one two three', 'four five', '', 'six']
+
+
+class NamedWordEncoding:
+    '''One token per word, under a name so models can share or differ.'''
+
+    def __init__(self, name, per_word=1):
+        self.name = name
+        self.per_word = per_word
+        self.batches = []
+
+    def encode_ordinary_batch(self, texts, num_threads=1):
+        self.batches.append(len(texts))
+        return [text.split() * self.per_word for text in texts]
+
+
+@pytest.fixture
+def encodings(monkeypatch):
+    '''Embedding models share one encoding; chat models use a second.'''
+    shared = NamedWordEncoding('cl100k_base')
+    chat = NamedWordEncoding('o200k_base', per_word=2)
+
+    def lookup(model):
+        return chat if model.startswith('gpt-') else shared
+
+    monkeypatch.setattr(estimation, 'encoding_for_model', lookup)
+    monkeypatch.setattr('osintgpt.utils.encoding_for_model', lookup)
+
+    return shared, chat
+
+
+@pytest.fixture
+def csv_file(tmp_path):
+    path = tmp_path / 'export.csv'
+    with open(path, 'w', newline='', encoding='utf-8') as handle:
+        writer = csv.writer(handle)
+        writer.writerow(['id', 'text'])
+        for index, text in enumerate(ROWS):
+            writer.writerow([index, text])
+
+    return path
+
+
+@pytest.fixture
+def jsonl_file(tmp_path):
+    path = tmp_path / 'export.jsonl'
+    path.write_text(
+        ''.join(json.dumps({'text': text}) + '\n' for text in ROWS)
+        + json.dumps({'other': 'no text here'}) + '\n',
+        encoding='utf-8'
+    )
+
+    return path
+
+
+class TestReading:
+    def test_reads_a_csv_column(self, csv_file):
+        assert list(read_texts(csv_file)) == ROWS
+
+    def test_reads_jsonl_and_treats_a_missing_key_as_empty(self, jsonl_file):
+        assert list(read_texts(jsonl_file)) == ROWS + ['']
+
+    def test_a_missing_column_names_the_ones_found(self, csv_file):
+        with pytest.raises(ValueError, match="'body'.*id, text"):
+            list(read_texts(csv_file, text_column='body'))
+
+    def test_an_unknown_suffix_is_refused(self, tmp_path):
+        with pytest.raises(ValueError, match='file_format'):
+            read_texts(tmp_path / 'export.xlsx')
+
+    def test_an_explicit_format_overrides_the_suffix(self, tmp_path):
+        path = tmp_path / 'export.txt'
+        path.write_text('{"text": "a"}\n', encoding='utf-8')
+
+        assert list(read_texts(path, file_format='jsonl')) == ['a']
+
+    def test_parquet_reads_the_column_in_batches(self, tmp_path):
+        pa = pytest.importorskip('pyarrow')
+        pq = pytest.importorskip('pyarrow.parquet')
+        path = tmp_path / 'export.parquet'
+        pq.write_table(pa.table({'text': ROWS, 'id': [1, 2, 3, 4]}), path)
+
+        assert list(read_texts(path, chunk_rows=2)) == ROWS
+
+
+class TestEstimate:
+    def test_counts_and_prices_the_whole_file(self, csv_file, encodings):
+        estimate = estimate_file(csv_file, ['text-embedding-3-small'])
+
+        assert estimate.texts == 4
+        assert estimate.tokens == 6
+        assert estimate.total_cost == pytest.approx(
+            estimate_cost('text-embedding-3-small', 6)
+        )
+
+    def test_reads_in_chunks(self, csv_file, encodings):
+        shared, _ = encodings
+        estimate_file(csv_file, ['text-embedding-3-small'], chunk_rows=3)
+
+        assert shared.batches == [3, 1]
+
+    def test_models_sharing_an_encoding_share_one_pass(
+        self, csv_file, encodings
+    ):
+        shared, chat = encodings
+        estimate = estimate_file(
+            csv_file,
+            ['text-embedding-3-small', 'text-embedding-3-large', 'gpt-4o']
+        )
+
+        assert shared.batches == [4]
+        assert chat.batches == [4]
+        assert estimate.by_model['text-embedding-3-large'].tokens == 6
+        assert estimate.by_model['gpt-4o'].tokens == 12
+        assert estimate.tokens == 6
+
+    def test_an_unpriced_model_leaves_the_total_unknown(
+        self, csv_file, encodings
+    ):
+        estimate = estimate_file(
+            csv_file, ['text-embedding-3-small', 'nomic-embed-text']
+        )
+
+        assert estimate.by_model['nomic-embed-text'].cost is None
+        assert estimate.total_cost is None
+        assert 'unpriced' in estimate.summary
+
+
+class TestCeiling:
+    def test_over_the_ceiling_raises(self, csv_file, encodings):
+        with pytest.raises(CostCeilingExceededError, match='over'):
+            estimate_file(csv_file, ['gpt-4o'], ceiling_usd=0.0)
+
+    def test_the_refusal_reports_tokens_per_model(self, csv_file, encodings):
+        with pytest.raises(CostCeilingExceededError) as raised:
+            estimate_file(
+                csv_file, ['text-embedding-3-small', 'gpt-4o'],
+                ceiling_usd=0.0
+            )
+
+        assert 'text-embedding-3-small: 6 tokens' in str(raised.value)
+        assert 'gpt-4o: 12 tokens' in str(raised.value)
+        assert '18 tokens' not in str(raised.value)
+
+    def test_under_the_ceiling_passes(self, csv_file, encodings):
+        estimate_file(csv_file, ['gpt-4o'], ceiling_usd=1.0)
+
+    def test_an_unpriced_model_cannot_pass_a_ceiling(self, csv_file, encodings):
+        with pytest.raises(CostCeilingExceededError, match='no price'):
+            estimate_file(csv_file, ['nomic-embed-text'], ceiling_usd=100.0)
+
+    def test_the_project_supplies_model_and_ceiling(
+        self, tmp_path, csv_file, encodings
+    ):
+        project = Project.create('Case', home=tmp_path).with_settings(
+            embedding_model='text-embedding-3-large', cost_ceiling_usd=0.0
+        )
+
+        with pytest.raises(CostCeilingExceededError) as error:
+            estimate_for_project(project, csv_file)
+
+        assert error.value.ceiling == 0.0
+        assert 'text-embedding-3-large: 6 tokens' in str(error.value)
+
+    def test_no_project_ceiling_is_no_check(
+        self, tmp_path, csv_file, encodings
+    ):
+        project = Project.create('Case', home=tmp_path)
+        estimate = estimate_for_project(project, csv_file)
+
+        assert estimate.models[0].model == 'text-embedding-3-small'
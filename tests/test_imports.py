@@ -0,0 +1,108 @@
+# -*- coding: utf-8 -*-
+
+# =================================================================================
+# osintgpt
+#
+# Author: @estebanpdl
+#
+# File: test_imports.py
+# Description: Import cost — importing a package loads no heavy dependency
+#   until a code path needs it, and the whole surface imports inside a budget.
+# =================================================================================
+
+# import modules
+import json
+import pytest
+import subprocess
+import sys
+
+# Every package a short-lived job is likely to import.
+PACKAGES = [
+    'osintgpt',
+    'osintgpt.databases',
+    'osintgpt.embeddings',
+    'osintgpt.ingestion',
+    'osintgpt.llm',
+    'osintgpt.llms',
+    'osintgpt.projects',
+    'osintgpt.semantic_operations',
+    'osintgpt.vector_store'
+]
+
+# Loaded only on the path that uses them.
+HEAVY = ['anthropic', 'openai', 'pandas', 'qdrant_client', 'scipy', 'tiktoken']
+
+# Measured around 0.05s with every package imported; the heavy dependencies
+# alone took over 2s. Generous enough for a loaded CI machine, tight enough
+# that one eager import of any of them fails it.
+IMPORT_BUDGET_SECONDS = 0.5
+
+
+# run code in a fresh interpreter and read back what it prints
+def fresh(code):
+    result = subprocess.run(
+        [sys.executable, '-c', code],
+        capture_output=True, text=True, check=True
+    )
+
+    return json.loads(result.stdout)
+
+
+class TestLazyLoading:
+    def test_importing_the_packages_loads_no_heavy_dependency(self):
+        loaded = fresh(
+            'import json, sys\n'
+            + ''.join(f'import {package}\n' for package in PACKAGES)
+            + f'print(json.dumps([m for m in {HEAVY!r} if m in sys.modules]))'
+        )
+
+        assert loaded == []
+
+    def test_nor_does_reaching_the_public_classes(self):
+        '''OpenAIGPT and SemanticOperations load their heavy paths lazily.'''
+        loaded = fresh(
+            'import json, sys\n'
+            'from osintgpt import Project, Settings\n'
+            'from osintgpt.llms import OpenAIGPT\n'
+            'from osintgpt.semantic_operations import SemanticOperations\n'
+            'from osintgpt.embeddings import OpenAIEmbeddingGenerator\n'
+            f'print(json.dumps([m for m in {HEAVY!r} if m in sys.modules]))'
+        )
+
+        assert loaded == []
+
+    def test_the_qdrant_engine_loads_its_client(self):
+        loaded = fresh(
+            'import json, sys\n'
+            'from osintgpt.vector_store import Qdrant\n'
+            "print(json.dumps('qdrant_client' in sys.modules))"
+        )
+
+        assert loaded is True
+
+    def test_an_unknown_name_is_still_an_attribute_error(self):
+        import osintgpt.llms
+
+        with pytest.raises(AttributeError, match='NoSuchThing'):
+            osintgpt.llms.NoSuchThing
+
+    def test_lazy_names_are_listed(self):
+        import osintgpt.vector_store
+
+        assert 'Qdrant' in dir(osintgpt.vector_store)
+
+
+class TestBudget:
+    def test_importing_everything_fits_the_budget(self):
+        # Best of three: the first run can pay for a cold disk cache.
+        timings = [
+            fresh(
+                'import json, time\n'
+                'start = time.perf_counter()\n'
+                + ''.join(f'import {package}\n' for package in PACKAGES)
+                + 'print(json.dumps(time.perf_counter() - start))'
+            )
+            for _ in range(3)
+        ]
+
+        assert min(timings) < IMPORT_BUDGET_SECONDS
@@ -0,0 +1,461 @@
+# -*- coding: utf-8 -*-
+
+# =================================================================================
+# osintgpt
+#
+# Author: @estebanpdl
+#
+# File: test_ingestion.py
+# Description: Ingestion — sources.toml read into extracts/, chunks embedded
+#   and indexed in batches, and a run that dies resumed without embedding
+#   again what was already indexed.
+# =================================================================================
+
+# import modules
+import hashlib
+import json
+import pytest
+import re
+
+# import osintgpt ingestion
+from osintgpt.ingestion import (
+    Chunk,
+    ClusterStore,
+    ExactDeduplicator,
+    IngestionPipeline,
+    MinHashDeduplicator,
+    Record,
+    TokenChunker,
+    load_sources,
+    normalize_text,
+    read_extract,
+    read_source
+)
+
+# import osintgpt llm
+from osintgpt.llm.fake import FakeEmbedding
+
+# import osintgpt projects
+from osintgpt.projects import Project
+
+pytest.importorskip('numpy')
+
+# A repost: the same message with the link swapped and a tag appended.
+MESSAGE = (
+    'Convoy of trucks seen crossing the bridge north of the city at dawn, '
+    'local sources report at least forty vehicles. Details: https://t.me/a/1'
+)
+REPOST = MESSAGE.replace('t.me/a/1', 't.me/b/22') + ' #breaking'
+
+
+# texts that share nothing beyond chance
+def post(number):
+    return f'post {hashlib.sha256(str(number).encode()).hexdigest()[:32]}'
+
+
+class CountingEmbedding(FakeEmbedding):
+    def __init__(self, **options):
+        super().__init__(dimensions=8, **options)
+        self.texts = []
+
+    def embed(self, texts):
+        self.texts.extend(texts)
+        return super().embed(texts)
+
+
+class MemoryIndex:
+    '''Upserts by id, as a vector store does.'''
+
+    def __init__(self, fail_after=None):
+        self.points = {}
+        self.batches = 0
+        self.fail_after = fail_after
+
+    def __call__(self, ids, vectors, payloads):
+        if self.fail_after is not None and self.batches >= self.fail_after:
+            raise RuntimeError('index went away')
+        self.batches += 1
+        for point_id, vector, payload in zip(ids, vectors, payloads):
+            self.points[point_id] = (vector, payload)
+
+
+class ForgettingIndex(MemoryIndex):
+    '''A MemoryIndex that can also delete by payload.'''
+
+    def forget(self, match):
+        self.points = {
+            point_id: (vector, payload)
+            for point_id, (vector, payload) in self.points.items()
+            if any(payload.get(key) != value for key, value in match.items())
+        }
+
+
+class WordEncoding:
+    '''A token per word, trailing whitespace included; tokens are the words.'''
+
+    name = 'words'
+
+    def __init__(self):
+        self.batches = []
+
+    def encode_ordinary_batch(self, texts, num_threads=1):
+        self.batches.append(len(texts))
+        return [re.findall(r'^\s+|\S+\s*', text) for text in texts]
+
+    def decode_with_offsets(self, tokens):
+        offsets, position = [], 0
+        for token in tokens:
+            offsets.append(position)
+            position += len(token)
+
+        return ''.join(tokens), offsets
+
+
+def write_sources(project, *entries):
+    lines = []
+    for entry in entries:
+        lines.append('[[source]]')
+        lines.extend(f'{key} = {json.dumps(value)}' for key, value in entry.items())
+    project.paths.sources.write_text('\n'.join(lines) + '\n', encoding='utf-8')
+
+
+@pytest.fixture
+def project(tmp_path):
+    project = Project.create('Case', home=tmp_path)
+    raw = project.paths.root / 'raw'
+    raw.mkdir()
+    rows = ['message_id,message,views']
+    rows += [f'{i},{post(i)},{i * 10}' for i in range(10)]
+    # Two reposts of earlier messages and one empty row.
+    rows += [f'10,{post(3)},0', f'11,{post(7).upper()},0', '12,  ,0']
+    (raw / 'channel.csv').write_text('\n'.join(rows) + '\n', encoding='utf-8')
+    write_sources(project, {
+        'name': 'channel', 'path': 'raw/channel.csv', 'text_field': 'message',
+        'id_field': 'message_id', 'metadata_fields': ['views']
+    })
+
+    return project
+
+
+class TestSources:
+    def test_entries_are_read_in_order(self, project):
+        (source,) = load_sources(project.paths)
+
+        assert source.name == 'channel'
+        assert source.resolved_format == 'csv'
+        assert source.metadata_fields == ('views',)
+
+    def test_a_project_without_sources_has_none(self, tmp_path):
+        assert load_sources(Project.create('Empty', home=tmp_path).paths) == []
+
+    @pytest.mark.parametrize('entry', [
+        {'name': 'a'},
+        {'name': 'a', 'path': 'x', 'format': 'xml'}
+    ])
+    def test_bad_entries_are_refused(self, project, entry):
+        write_sources(project, entry)
+
+        with pytest.raises(ValueError):
+            load_sources(project.paths)
+
+    def test_csv_rows_become_records(self, project):
+        (source,) = load_sources(project.paths)
+        records = list(read_source(source, project.paths.root))
+
+        assert len(records) == 12
+        assert records[0].id == '0'
+        assert records[0].metadata == {'views': '0'}
+
+    def test_a_repeated_record_id_is_refused(self, project):
+        raw = project.paths.root / 'raw' / 'channel.csv'
+        raw.write_text(raw.read_text() + '4,a repost,0\n', encoding='utf-8')
+        (source,) = load_sources(project.paths)
+
+        with pytest.raises(ValueError, match='repeats record id'):
+            list(read_source(source, project.paths.root))
+
+    def test_a_row_without_an_id_cannot_take_another_rows(self, project):
+        raw = project.paths.root / 'raw' / 'channel.csv'
+        # Row 13 has no id; 13 is the id of the row after it.
+        raw.write_text(
+            raw.read_text() + ',no id,0\n13,the next post,0\n',
+            encoding='utf-8'
+        )
+        (source,) = load_sources(project.paths)
+        records = list(read_source(source, project.paths.root))
+
+        assert [record.id for record in records[-2:]] == ['#13', '13']
+
+    @pytest.mark.parametrize('line', ['[1, 2]', '7', '"text"'])
+    def test_a_jsonl_line_must_be_an_object(self, project, line):
+        raw = project.paths.root / 'raw' / 'posts.jsonl'
+        raw.write_text('{"text": "a post"}\n' + line + '\n', encoding='utf-8')
+        write_sources(project, {'name': 'posts', 'path': 'raw/posts.jsonl'})
+        (source,) = load_sources(project.paths)
+
+        with pytest.raises(ValueError, match='posts.jsonl:2: not a JSON object'):
+            list(read_source(source, project.paths.root))
+
+    def test_a_directory_reads_as_text_files(self, project):
+        docs = project.paths.root / 'docs'
+        (docs / 'sub').mkdir(parents=True)
+        (docs / 'a.txt').write_text('first\r\n\r\n\r\n\r\nreport ', encoding='utf-8')
+        (docs / 'sub' / 'b.md').write_text('second', encoding='utf-8')
+        (docs / 'skip.bin').write_bytes(b'\x00')
+        write_sources(project, {'name': 'docs', 'path': 'docs'})
+
+        (source,) = load_sources(project.paths)
+        records = list(read_source(source, project.paths.root))
+
+        assert [(r.id, r.text) for r in records] == [
+            ('a.txt', 'first\n\nreport'), ('sub/b.md', 'second')
+        ]
+
+    def test_normalize_text(self):
+        assert normalize_text('  a \t\r\nb\x00\n\n\n\nc  ') == 'a\nb\n\nc'
+
+
+class TestPipeline:
+    def test_ingests_every_new_chunk_once(self, project):
+        embedder, index = CountingEmbedding(), MemoryIndex()
+        report = IngestionPipeline(
+            project, embedder, index, batch_size=3, max_workers=2
+        ).run()
+
+        (source,) = report.sources
+        assert source.records == 12
+        assert source.duplicates == 2
+        assert report.embedded == 10
+        assert len(embedder.texts) == len(set(embedder.texts)) == 10
+        assert len(index.points) == 10
+
+        vector, payload = next(iter(index.points.values()))
+        assert len(vector) == 8
+        assert payload['source'] == 'channel'
+        assert payload['metadata'] == {'views': '0'}
+
+    def test_the_extract_is_written(self, project):
+        IngestionPipeline(project, CountingEmbedding(), MemoryIndex()).run()
+        (source,) = load_sources(project.paths)
+
+        assert [r.text for r in read_extract(project.paths, source)][:2] == [
+            post(0), post(1)
+        ]
+        assert (project.paths.extracts / 'channel.jsonl').exists()
+
+    def test_a_finished_source_is_not_read_again(self, project):
+        IngestionPipeline(project, CountingEmbedding(), MemoryIndex()).run()
+        embedder = CountingEmbedding()
+
+        report = IngestionPipeline(project, embedder, MemoryIndex()).run()
+
+        assert report.sources[0].up_to_date is True
+        assert embedder.texts == []
+
+    def test_a_crash_resumes_after_the_last_indexed_batch(self, project):
+        index = MemoryIndex(fail_after=2)
+        first = CountingEmbedding()
+        with pytest.raises(RuntimeError):
+            IngestionPipeline(
+                project, first, index, batch_size=3, max_workers=1
+            ).run()
+        assert index.batches == 2
+
+        index.fail_after = None
+        second = CountingEmbedding()
+        report = IngestionPipeline(
+            project, second, index, batch_size=3, max_workers=1
+        ).run()
+
+        # Two batches of three were kept; only the rest is embedded again.
+        assert report.sources[0].resumed == 6
+        assert len(second.texts) == 4
+        assert not set(second.texts) & set(first.texts[:6])
+        assert len(index.points) == 10
+
+    def test_a_changed_source_starts_over(self, project):
+        IngestionPipeline(project, CountingEmbedding(), MemoryIndex()).run()
+        raw = project.paths.root / 'raw' / 'channel.csv'
+        raw.write_text(raw.read_text() + '13,a new post,0\n', encoding='utf-8')
+        embedder = CountingEmbedding()
+
+        report = IngestionPipeline(project, embedder, MemoryIndex()).run()
+
+        assert report.sources[0].records == 13
+        assert len(embedder.texts) == 11
+
+    def test_a_changed_source_forgets_its_old_points(self, project):
+        index = ForgettingIndex()
+        IngestionPipeline(project, CountingEmbedding(), index).run()
+        index.points['other'] = ([0.0], {'project': 'other', 'source': 'channel'})
+        raw = project.paths.root / 'raw' / 'channel.csv'
+        raw.write_text('message_id,message,views\n0,only post,0\n', encoding='utf-8')
+
+        pipeline = IngestionPipeline(project, CountingEmbedding(), index)
+        pipeline.run()
+
+        assert index.points.keys() == {
+            'other', pipeline._id_of('channel/0/0')
+        }
+
+    def test_chunk_ids_are_stable_across_runs(self, project):
+        first, second = MemoryIndex(), MemoryIndex()
+        IngestionPipeline(project, CountingEmbedding(), first).run()
+        project.paths.store.unlink()
+        IngestionPipeline(project, CountingEmbedding(), second).run()
+
+        assert first.points.keys() == second.points.keys()
+
+    def test_duplicates_are_linked_to_what_was_indexed(self, project):
+        pipeline = IngestionPipeline(project, CountingEmbedding(), MemoryIndex())
+        pipeline.run()
+        clusters = ClusterStore.for_project(project)
+
+        def chunk_id(record_id):
+            return pipeline._id_of(f'channel/{record_id}/0')
+
+        assert clusters.members(chunk_id('3')) == [chunk_id('10')]
+        assert clusters.representative_of(chunk_id('11')) == chunk_id('7')
+
+    def test_exact_deduplication_keeps_case_edits(self, project):
+        embedder = CountingEmbedding()
+        report = IngestionPipeline(
+            project, embedder, MemoryIndex(), deduplicator=ExactDeduplicator
+        ).run()
+
+        assert report.duplicates == 1
+        assert len(embedder.texts) == 11
+
+    def test_unknown_sources_are_named(self, project):
+        pipeline = IngestionPipeline(project, CountingEmbedding(), MemoryIndex())
+
+        with pytest.raises(KeyError, match='nope'):
+            pipeline.run(['channel', 'nope'])
+
+
+class TestMinHash:
+    def chunk(self, key, text):
+        return Chunk('s', key, 0, text, 0, len(text))
+
+    def test_a_repost_joins_the_original(self):
+        dedup = MinHashDeduplicator()
+
+        assert dedup.assign(self.chunk('1', MESSAGE)) is None
+        assert dedup.assign(self.chunk('2', REPOST)) == 's/1/0'
+        assert dedup.assign(self.chunk('3', post(1))) is None
+        assert dedup.clusters == 2
+
+    def test_an_exact_repeat_of_a_duplicate_joins_its_representative(self):
+        dedup = MinHashDeduplicator()
+        dedup.assign(self.chunk('1', MESSAGE))
+        dedup.assign(self.chunk('2', REPOST))
+
+        assert dedup.assign(self.chunk('3', REPOST)) == 's/1/0'
+
+    def test_only_representatives_are_remembered(self):
+        dedup = MinHashDeduplicator()
+        dedup.assign(self.chunk('1', MESSAGE))
+        dedup.assign(self.chunk('2', REPOST))
+        dedup.assign(self.chunk('3', REPOST.upper()))
+
+        assert len(dedup._exact) == len(dedup._signatures) == dedup.clusters == 1
+
+    def test_signatures_estimate_similarity(self):
+        dedup = MinHashDeduplicator(num_perm=256)
+        near = (dedup.minhash(MESSAGE) == dedup.minhash(REPOST)).mean()
+        far = (dedup.minhash(MESSAGE) == dedup.minhash(post(1))).mean()
+
+        assert near > 0.7
+        assert far < 0.1
+
+    def test_signatures_do_not_depend_on_the_interpreter(self):
+        assert (
+            MinHashDeduplicator().minhash(MESSAGE)
+            == MinHashDeduplicator().minhash(MESSAGE)
+        ).all()
+
+    def test_a_stricter_threshold_keeps_the_repost(self):
+        dedup = MinHashDeduplicator(threshold=0.99)
+        dedup.assign(self.chunk('1', MESSAGE))
+
+        assert dedup.assign(self.chunk('2', REPOST)) is None
+
+    def test_bands_fit_the_signature(self):
+        dedup = MinHashDeduplicator(threshold=0.5, num_perm=100)
+
+        assert dedup.bands * dedup.rows <= 100
+
+
+class TestTokenChunker:
+    @pytest.fixture
+    def encoding(self, monkeypatch):
+        encoding = WordEncoding()
+        monkeypatch.setattr(
+            'osintgpt.ingestion.chunking.encoding_for_model',
+            lambda model: encoding
+        )
+
+        return encoding
+
+    def record(self, text):
+        return Record(source='docs', id='a.txt', text=text)
+
+    def test_a_short_record_stays_whole(self, encoding):
+        (chunk,) = TokenChunker(
+            'm', chunk_tokens=10, overlap_tokens=2
+        )(self.record('a b c'))
+
+        assert (chunk.text, chunk.start, chunk.end) == ('a b c', 0, 5)
+
+    def test_spans_overlap_and_cite_the_record(self, encoding):
+        text = ' '.join(f'w{i}' for i in range(25))
+        chunks = TokenChunker(
+            'm', chunk_tokens=10, overlap_tokens=3, boundary_window=0
+        )(self.record(text))
+
+        assert [len(c.text.split()) for c in chunks] == [10, 10, 10, 4]
+        assert chunks[1].text.split()[:3] == chunks[0].text.split()[-3:]
+        assert all(text[c.start:c.end] == c.text for c in chunks)
+        assert [c.index for c in chunks] == [0, 1, 2, 3]
+        assert chunks[-1].end == len(text)
+
+    def test_a_nearby_sentence_end_is_preferred(self, encoding):
+        text = 'one two three four five six seven. eight nine ten eleven twelve'
+        chunks = TokenChunker(
+            'm', chunk_tokens=8, overlap_tokens=0, boundary_window=0.5
+        )(self.record(text))
+
+        assert chunks[0].text == 'one two three four five six seven.'
+        assert chunks[1].text == 'eight nine ten eleven twelve'
+
+    def test_records_are_tokenized_in_batches(self, encoding):
+        records = [self.record(f'text {i}') for i in range(5)]
+        chunks = list(TokenChunker('m').chunk_stream(records, batch_size=2))
+
+        assert len(chunks) == 5
+        assert encoding.batches == [2, 2, 1]
+
+    def test_the_overlap_must_leave_room(self, encoding):
+        with pytest.raises(ValueError):
+            TokenChunker('m', chunk_tokens=4, overlap_tokens=4)
+
+    def test_long_documents_are_ingested_in_spans(self, project, encoding):
+        docs = project.paths.root / 'docs'
+        docs.mkdir()
+        (docs / 'report.txt').write_text(
+            ' '.join(f'w{i}' for i in range(50)), encoding='utf-8'
+        )
+        write_sources(project, {'name': 'docs', 'path': 'docs'})
+        index = MemoryIndex()
+
+        report = IngestionPipeline(
+            project, CountingEmbedding(), index,
+            chunker=TokenChunker('m', chunk_tokens=20, overlap_tokens=5)
+        ).run()
+
+        assert report.sources[0].records == 1
+        assert report.embedded == 3
+        assert sorted(
+            (payload['start'], payload['end'])
+            for _, payload in index.points.values()
+        )[0][0] == 0
@@ -114,6 +114,33 @@ class TestRequestShape:
             {'role': 'user', 'content': 'a question'}
         ]
 
+    def test_a_long_system_prompt_carries_a_cache_breakpoint(self, provider):
+        system = 'You analyse channel dumps. ' * 100
+        provider.generate(system, 'a question')
+        sent = provider.client.messages.calls[0]['system']
+
+        assert sent == [{
+            'type': 'text',
+            'text': system,
+            'cache_control': {'type': 'ephemeral'}
+        }]
+
+    def test_a_short_system_prompt_is_not_marked(self, provider):
+        '''Below the cacheable minimum a breakpoint buys nothing.'''
+        provider.generate('be terse', 'a question')
+
+        assert provider.client.messages.calls[0]['system'] == 'be terse'
+
+    def test_caching_can_be_turned_off(self):
+        provider = AnthropicGeneration(
+            model='claude-opus-5', api_key=FAKE_KEY,
+            client=StubAnthropic(), cache_system=False
+        )
+        system = 'x' * 5_000
+        provider.generate(system, 'u')
+
+        assert provider.client.messages.calls[0]['system'] == system
+
     def test_sends_a_token_ceiling(self, provider):
         provider.generate('s', 'u')
 
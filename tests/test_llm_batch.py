@@ -0,0 +1,368 @@
+# -*- coding: utf-8 -*-
+
+# =================================================================================
+# osintgpt
+#
+# Author: @estebanpdl
+#
+# File: test_llm_batch.py
+# Description: Batch jobs — requests written as JSONL, results mapped back to
+#   their inputs, and usage recorded at the batch rate. The OpenAI path runs
+#   the real client against a stand-in server on the loopback interface.
+# =================================================================================
+
+# import modules
+import json
+import pytest
+import threading
+
+# import submodules
+from email.parser import BytesParser
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from types import SimpleNamespace
+
+# import osintgpt config
+from osintgpt.config import Settings
+
+# import osintgpt llm
+from osintgpt.llm import (
+    BatchJob,
+    UsageRecorder,
+    build_embedding_provider,
+    build_generation_provider
+)
+from osintgpt.llm.anthropic_native import AnthropicGeneration
+from osintgpt.llm.batch import read_jsonl, wait_for
+from osintgpt.llm.openai_compat import OpenAICompatEmbedding
+from osintgpt.llm.usage import Usage
+
+# import exceptions
+from osintgpt.exceptions.errors import BatchJobError
+
+from conftest import FAKE_KEY
+
+
+class BatchServer(ThreadingHTTPServer):
+    '''
+    Serves the files and batches routes the way OpenAI does, answering each
+    request line itself. A job reports in_progress for `polls` retrievals
+    before it completes; ids in `fail` come back as errors.
+    '''
+    def __init__(self):
+        super().__init__(('127.0.0.1', 0), BatchHandler)
+        self.files = {}
+        self.batches = {}
+        self.polls = 1
+        self.fail = set()
+
+    def answer(self, line):
+        body = line['body']
+        if line['url'] == '/v1/embeddings':
+            return {
+                'object': 'list',
+                'usage': {'prompt_tokens': 2 * len(body['input'])},
+                # Reversed on purpose: results are not promised in order.
+                'data': [
+                    {'index': i, 'embedding': [float(len(text)), float(i)]}
+                    for i, text in reversed(list(enumerate(body['input'])))
+                ]
+            }
+
+        return {
+            'usage': {'prompt_tokens': 10, 'completion_tokens': 4},
+            'choices': [{'message': {
+                'role': 'assistant',
+                'content': body['messages'][-1]['content'].upper()
+            }}]
+        }
+
+    def run(self, batch):
+        lines = read_jsonl(self.files[batch['input_file_id']])
+        # Output files are not in request order either.
+        output = []
+        for line in reversed(lines):
+            if line['custom_id'] in self.fail:
+                output.append({
+                    'custom_id': line['custom_id'], 'response': None,
+                    'error': {'code': 'server_error'}
+                })
+                continue
+            output.append({
+                'custom_id': line['custom_id'], 'error': None,
+                'response': {'status_code': 200, 'body': self.answer(line)}
+            })
+        file_id = f'file-out-{batch["id"]}'
+        self.files[file_id] = ''.join(json.dumps(row) + '\n' for row in output)
+        batch.update(status='completed', output_file_id=file_id)
+
+
+class BatchHandler(BaseHTTPRequestHandler):
+    def log_message(self, *args):
+        pass
+
+    def reply(self, payload, content_type='application/json'):
+        data = payload if isinstance(payload, bytes) else json.dumps(
+            payload
+        ).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def read_body(self):
+        return self.rfile.read(int(self.headers['Content-Length']))
+
+    def do_POST(self):
+        server = self.server
+        if self.path == '/v1/files':
+            raw = self.read_body()
+            message = BytesParser().parsebytes(
+                f'Content-Type: {self.headers["Content-Type"]}\r\n\r\n'.encode()
+                + raw
+            )
+            part = next(
+                p for p in message.get_payload()
+                if p.get_param('name', header='content-disposition') == 'file'
+            )
+            file_id = f'file-{len(server.files)}'
+            server.files[file_id] = part.get_payload(decode=True).decode()
+            return self.reply({
+                'id': file_id, 'object': 'file', 'purpose': 'batch',
+                'filename': 'batch.jsonl', 'bytes': len(raw),
+                'created_at': 0, 'status': 'processed'
+            })
+
+        if self.path == '/v1/batches':
+            request = json.loads(self.read_body())
+            batch_id = f'batch-{len(server.batches)}'
+            server.batches[batch_id] = {
+                'id': batch_id, 'object': 'batch', 'status': 'validating',
+                'endpoint': request['endpoint'],
+                'input_file_id': request['input_file_id'],
+                'completion_window': request['completion_window'],
+                'created_at': 0, 'polls': 0
+            }
+            return self.reply(server.batches[batch_id])
+
+        self.send_error(404)
+
+    def do_GET(self):
+        server = self.server
+        parts = self.path.strip('/').split('/')
+        if parts[:2] == ['v1', 'batches']:
+            batch = server.batches[parts[2]]
+            batch['polls'] += 1
+            if batch['status'] != 'completed':
+                batch['status'] = 'in_progress'
+                if batch['polls'] > server.polls:
+                    server.run(batch)
+            return self.reply(batch)
+
+        if parts[:2] == ['v1', 'files'] and parts[-1] == 'content':
+            return self.reply(
+                server.files[parts[2]].encode('utf-8'), 'application/jsonl'
+            )
+
+        self.send_error(404)
+
+
+@pytest.fixture
+def server():
+    instance = BatchServer()
+    thread = threading.Thread(target=instance.serve_forever, daemon=True)
+    thread.start()
+    yield instance
+    instance.shutdown()
+    instance.server_close()
+
+
+@pytest.fixture
+def recorder():
+    return UsageRecorder()
+
+
+def no_wait(**overrides):
+    return {'poll_seconds': 0, 'sleep': lambda seconds: None, **overrides}
+
+
+def embedding(server, recorder, batch_size=3):
+    return OpenAICompatEmbedding(
+        model='text-embedding-3-small', api_key=FAKE_KEY,
+        base_url=f'http://127.0.0.1:{server.server_port}/v1',
+        batch_size=batch_size, provider='openai', recorder=recorder,
+        batches=True
+    )
+
+
+class TestOpenAIEmbeddings:
+    def test_maps_results_back_to_their_inputs(self, server, recorder):
+        texts = ['a', 'bb', 'ccc', 'dddd', 'eeeee', 'ffffff', 'g']
+        vectors = embedding(server, recorder).embed_batch(texts, **no_wait())
+
+        assert [v[0] for v in vectors] == [float(len(t)) for t in texts]
+
+    def test_packs_many_inputs_into_each_request_line(self, server, recorder):
+        provider = embedding(server, recorder, batch_size=3)
+        job = provider.submit_batch(['t'] * 7)
+
+        assert job.requests == 3
+        assert job.sizes == [3, 3, 1]
+
+    def test_records_usage_at_the_batch_rate(self, server, recorder):
+        embedding(server, recorder).embed_batch(['a'] * 4, **no_wait())
+
+        assert recorder.calls == 2
+        assert recorder.input_tokens == 8
+        assert all(usage.batch for usage in recorder)
+        assert '2 batched' in recorder.summary
+
+    def test_a_job_survives_the_process_that_submitted_it(
+        self, server, recorder
+    ):
+        submitted = embedding(server, recorder).submit_batch(['a', 'bb'])
+        job = BatchJob.from_dict(json.loads(json.dumps(submitted.to_dict())))
+
+        vectors = embedding(server, recorder).collect_batch(job, **no_wait())
+
+        assert [v[0] for v in vectors] == [1.0, 2.0]
+
+    def test_keeps_the_submitted_requests(self, server, recorder, tmp_path):
+        path = tmp_path / 'jobs' / 'requests.jsonl'
+        embedding(server, recorder).submit_batch(['a', 'b'], path)
+        lines = read_jsonl(path.read_text(encoding='utf-8'))
+
+        assert lines[0]['url'] == '/v1/embeddings'
+        assert lines[0]['body']['input'] == ['a', 'b']
+
+    def test_a_failed_line_names_the_missing_request(self, server, recorder):
+        server.fail = {'1'}
+
+        with pytest.raises(BatchJobError) as error:
+            embedding(server, recorder).embed_batch(['a'] * 6, **no_wait())
+
+        assert error.value.missing == ['1']
+
+    def test_times_out_without_losing_the_job(self, server, recorder):
+        server.polls = 1_000
+        provider = embedding(server, recorder)
+        job = provider.submit_batch(['a'])
+        ticks = iter(range(100))
+
+        with pytest.raises(TimeoutError):
+            provider.collect_batch(
+                job, **no_wait(poll_seconds=1, timeout=3,
+                               clock=lambda: next(ticks))
+            )
+        assert job.status == 'in_progress'
+
+
+class TestOpenAIGeneration:
+    def test_replies_come_back_in_prompt_order(self, server, recorder):
+        provider = build_generation_provider(
+            'openai',
+            Settings(openai_api_key=FAKE_KEY, openai_gpt_model='gpt-4o'),
+            recorder=recorder
+        )
+        provider.client = provider.client.with_options(
+            base_url=f'http://127.0.0.1:{server.server_port}/v1'
+        )
+
+        replies = provider.generate_batch(
+            [('be terse', 'one'), ('be terse', 'two'), ('be terse', 'three')],
+            **no_wait()
+        )
+
+        assert replies == ['ONE', 'TWO', 'THREE']
+        assert recorder.output_tokens == 12
+        assert recorder.estimated_cost == pytest.approx(
+            3 * Usage('openai', 'gpt-4o', 10, 4).estimated_cost / 2
+        )
+
+
+class TestAnthropic:
+    class Batches:
+        def __init__(self):
+            self.submitted = None
+            self.polls = 0
+
+        def create(self, *, requests):
+            self.submitted = requests
+            return SimpleNamespace(id='msgbatch-1', processing_status='in_progress')
+
+        def retrieve(self, batch_id):
+            self.polls += 1
+            status = 'ended' if self.polls > 1 else 'in_progress'
+            return SimpleNamespace(id=batch_id, processing_status=status)
+
+        def results(self, batch_id):
+            for request in reversed(self.submitted):
+                text = request['params']['messages'][0]['content']
+                yield SimpleNamespace(
+                    custom_id=request['custom_id'],
+                    result=SimpleNamespace(
+                        type='succeeded',
+                        message=SimpleNamespace(
+                            usage=SimpleNamespace(
+                                input_tokens=20, output_tokens=5
+                            ),
+                            content=[SimpleNamespace(
+                                type='text', text=text[::-1]
+                            )]
+                        )
+                    )
+                )
+
+    @pytest.fixture
+    def claude(self, recorder):
+        return AnthropicGeneration(
+            model='claude-opus-5', api_key=FAKE_KEY, recorder=recorder,
+            client=SimpleNamespace(
+                messages=SimpleNamespace(batches=self.Batches())
+            )
+        )
+
+    def test_replies_come_back_in_prompt_order(self, claude, recorder):
+        replies = claude.generate_batch(
+            [('s', 'abc'), ('s', 'xyz')], **no_wait()
+        )
+
+        assert replies == ['cba', 'zyx']
+        assert recorder.calls == 2
+        assert all(usage.batch for usage in recorder)
+
+    def test_sends_the_same_parameters_as_a_single_call(self, claude):
+        claude.submit_batch([('s', 'u')])
+        params = claude.client.messages.batches.submitted[0]['params']
+
+        assert params['max_tokens'] == claude.max_tokens
+        assert params['messages'] == [{'role': 'user', 'content': 'u'}]
+
+
+class TestAvailability:
+    def test_backends_without_batch_routes_refuse(self):
+        provider = build_embedding_provider(
+            'ollama', Settings(), model='nomic-embed-text'
+        )
+
+        with pytest.raises(NotImplementedError, match='batch'):
+            provider.submit_batch(['a'])
+
+    def test_the_batch_rate_halves_the_estimate(self):
+        single = Usage('openai', 'gpt-4o', 1_000, 1_000)
+        batched = Usage('openai', 'gpt-4o', 1_000, 1_000, batch=True)
+
+        assert batched.estimated_cost == pytest.approx(
+            single.estimated_cost / 2
+        )
+
+    def test_wait_for_returns_once_finished(self):
+        states = iter(['validating', 'in_progress', 'completed'])
+        job = BatchJob('b', 'openai', 'm', '/v1/embeddings')
+
+        wait_for(
+            lambda: next(states), lambda state: state, {'completed'}, job,
+            **no_wait()
+        )
+
+        assert job.status == 'completed'
@@ -0,0 +1,295 @@
+# -*- coding: utf-8 -*-
+
+# =================================================================================
+# osintgpt
+#
+# Author: @estebanpdl
+#
+# File: test_llm_budget.py
+# Description: The budget recorder — calls refused before they are sent once
+#   the ceiling cannot cover them, and spend that carries across sessions in
+#   the project store.
+# =================================================================================
+
+# import modules
+import pytest
+import threading
+
+# import osintgpt config
+from osintgpt.config import Settings
+
+# import osintgpt llm
+from osintgpt.llm import (
+    BatchJob,
+    BudgetRecorder,
+    UsageRecorder,
+    build_embedding_provider,
+    build_generation_provider
+)
+from osintgpt.llm.usage import Usage
+
+# import osintgpt llms
+from osintgpt.llms import OpenAIGPT
+
+# import osintgpt pricing
+from osintgpt.pricing import estimate_cost
+
+# import osintgpt projects
+from osintgpt.projects import Project
+
+# import exceptions
+from osintgpt.exceptions.errors import CostCeilingExceededError
+
+from conftest import FAKE_KEY, StubOpenAI
+
+
+def words(text, model):
+    return len(text.split())
+
+
+def generation(recorder):
+    provider = build_generation_provider(
+        'openai',
+        Settings(openai_api_key=FAKE_KEY, openai_gpt_model='gpt-4o'),
+        recorder=recorder
+    )
+    provider.client = StubOpenAI()
+
+    return provider
+
+
+# What one stub chat call costs on gpt-4o: 11 tokens in, 7 out.
+CALL_COST = Usage('openai', 'gpt-4o', 11, 7).estimated_cost
+
+
+class TestAdmission:
+    def test_no_ceiling_admits_everything(self):
+        recorder = BudgetRecorder(counter=words)
+        provider = generation(recorder)
+        for _ in range(10):
+            provider.generate('s', 'u')
+
+        assert recorder.calls == 10
+
+    def test_refuses_the_call_that_would_cross_the_ceiling(self):
+        recorder = BudgetRecorder(
+            ceiling_usd=3.5 * CALL_COST, expected_output_tokens=7,
+            counter=lambda text, model: 4
+        )
+        provider = generation(recorder)
+
+        with pytest.raises(CostCeilingExceededError):
+            for _ in range(10):
+                provider.generate('s', 'u')
+
+        # Refused before it was sent, not discovered afterwards.
+        assert len(provider.client.chat.completions.calls) == recorder.calls
+        assert recorder.spent_usd <= recorder.ceiling_usd
+
+    def test_a_local_provider_is_never_refused(self):
+        recorder = BudgetRecorder(ceiling_usd=0.0, counter=words)
+        provider = build_embedding_provider(
+            'ollama', Settings(), model='nomic-embed-text', recorder=recorder
+        )
+        provider.client = StubOpenAI()
+
+        provider.embed(['a', 'b'])
+
+    def test_an_unpriced_model_is_refused_under_a_ceiling(self):
+        recorder = BudgetRecorder(ceiling_usd=100.0, counter=words)
+
+        with pytest.raises(CostCeilingExceededError, match='no price'):
+            recorder.admit('gemini', 'gemini-9', ['text'])
+
+    def test_the_hold_is_replaced_by_the_actual_cost(self):
+        recorder = BudgetRecorder(ceiling_usd=1.0, counter=words)
+        generation(recorder).generate('s', 'u')
+
+        assert recorder.held_usd == 0.0
+        assert recorder.spent_usd == pytest.approx(CALL_COST)
+        assert recorder.remaining_usd == pytest.approx(1.0 - CALL_COST)
+
+    def test_a_failed_call_does_not_keep_its_hold(self):
+        recorder = BudgetRecorder(ceiling_usd=1.0, counter=words)
+        recorder.admit('openai', 'gpt-4o', ['sent but never answered'])
+        recorder.admit('openai', 'gpt-4o', ['the next call'])
+
+        assert recorder.held_usd == pytest.approx(
+            estimate_cost('gpt-4o', 3) + estimate_cost('gpt-4o', 500, 'output')
+        )
+
+    def test_a_call_that_raises_gives_its_hold_back(self):
+        recorder = BudgetRecorder(ceiling_usd=1.0, counter=words)
+        provider = generation(recorder)
+
+        def refuse(**kwargs):
+            raise ConnectionError('upstream closed the connection')
+
+        provider.client.chat.completions.create = refuse
+        with pytest.raises(ConnectionError):
+            provider.generate('s', 'u')
+
+        assert recorder.held_usd == 0.0
+        assert recorder.spent_usd == 0.0
+
+    def test_the_legacy_completions_are_held_to_the_ceiling(self, settings):
+        recorder = BudgetRecorder(ceiling_usd=0.0, counter=words)
+        gpt = OpenAIGPT(settings, recorder=recorder)
+        gpt.client = StubOpenAI()
+
+        with pytest.raises(CostCeilingExceededError):
+            gpt.get_model_completion('a question', verbose=False)
+
+        assert gpt.client.chat.completions.calls == []
+
+
+class TestBatches:
+    @pytest.fixture
+    def submitted(self, mocker):
+        return mocker.patch(
+            'osintgpt.llm.batch.submit_openai',
+            return_value=mocker.Mock(spec=BatchJob)
+        )
+
+    def test_a_batch_over_the_ceiling_is_never_submitted(self, submitted):
+        recorder = BudgetRecorder(ceiling_usd=0.0, counter=words)
+
+        with pytest.raises(CostCeilingExceededError):
+            generation(recorder).submit_batch([('s', 'u')] * 10)
+
+        submitted.assert_not_called()
+
+    def test_a_batch_is_estimated_at_the_batch_rate(self, submitted):
+        # Ten prompts of two words, each with room for its reply.
+        synchronous = (
+            estimate_cost('gpt-4o', 20)
+            + estimate_cost('gpt-4o', 10 * 500, 'output')
+        )
+        recorder = BudgetRecorder(ceiling_usd=0.6 * synchronous, counter=words)
+
+        generation(recorder).submit_batch([('s', 'u')] * 10)
+
+        submitted.assert_called_once()
+        assert recorder.held_usd == 0.0
+
+
+class TestParallel:
+    def test_parallel_calls_stop_at_the_ceiling(self):
+        '''Holds count against the ceiling, so threads cannot all slip in.'''
+        per_call = estimate_cost('text-embedding-3-small', 1_000)
+        recorder = BudgetRecorder(
+            ceiling_usd=10 * per_call, counter=lambda text, model: 1_000
+        )
+        admitted, refused = [], []
+        gate = threading.Barrier(30)
+
+        def worker():
+            gate.wait()
+            try:
+                recorder.admit('openai', 'text-embedding-3-small', ['t'])
+                admitted.append(1)
+            except CostCeilingExceededError:
+                refused.append(1)
+
+        threads = [threading.Thread(target=worker) for _ in range(30)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(admitted) == 10
+        assert len(refused) == 20
+
+    def test_waiting_admits_once_holds_settle(self):
+        recorder = BudgetRecorder(
+            ceiling_usd=estimate_cost('text-embedding-3-small', 1_500),
+            counter=lambda text, model: 1_000, wait=True
+        )
+        recorder.admit('openai', 'text-embedding-3-small', ['first'])
+        admitted = threading.Event()
+
+        def second():
+            recorder.admit('openai', 'text-embedding-3-small', ['second'])
+            admitted.set()
+
+        thread = threading.Thread(target=second)
+        thread.start()
+        assert not admitted.wait(0.1)
+
+        # The first call turns out cheaper than it was held at.
+        recorder.record(Usage('openai', 'text-embedding-3-small', 100))
+        thread.join(5)
+
+        assert admitted.is_set()
+
+    def test_a_released_hold_wakes_waiting_callers(self):
+        recorder = BudgetRecorder(
+            ceiling_usd=estimate_cost('text-embedding-3-small', 1_500),
+            counter=lambda text, model: 1_000, wait=True
+        )
+        recorder.admit('openai', 'text-embedding-3-small', ['first'])
+        admitted = threading.Event()
+
+        def second():
+            recorder.admit('openai', 'text-embedding-3-small', ['second'])
+            admitted.set()
+
+        thread = threading.Thread(target=second)
+        thread.start()
+        assert not admitted.wait(0.1)
+
+        # The first call raised and was never recorded.
+        recorder.release()
+        thread.join(5)
+
+        assert admitted.is_set()
+
+
+class TestPersistence:
+    def test_spend_carries_across_sessions(self, tmp_path):
+        project = Project.create('Case', home=tmp_path).with_settings(
+            cost_ceiling_usd=1.0
+        )
+        first = BudgetRecorder.for_project(project, counter=words)
+        generation(first).generate('s', 'u')
+        first.close()
+
+        second = BudgetRecorder.for_project(project, counter=words)
+
+        assert second.ceiling_usd == 1.0
+        assert second.spent_usd == pytest.approx(CALL_COST)
+        assert second.spend_by_model == {'gpt-4o': pytest.approx(CALL_COST)}
+
+    def test_a_spent_budget_refuses_in_a_new_session(self, tmp_path):
+        project = Project.create('Case', home=tmp_path)
+        first = BudgetRecorder.for_project(project)
+        first.record(Usage('openai', 'gpt-4o', 1_000_000))
+        first.close()
+
+        second = BudgetRecorder.for_project(
+            project.with_settings(cost_ceiling_usd=2.0), counter=words
+        )
+
+        with pytest.raises(CostCeilingExceededError, match='spent'):
+            generation(second).generate('s', 'u')
+
+    def test_recorders_open_together_share_the_ceiling(self, tmp_path):
+        project = Project.create('Case', home=tmp_path).with_settings(
+            cost_ceiling_usd=CALL_COST * 1.5
+        )
+        # A reply held at its actual length: each call fits alone.
+        first, second = (
+            BudgetRecorder.for_project(
+                project, counter=words, expected_output_tokens=7
+            )
+            for _ in range(2)
+        )
+        generation(first).generate('s', 'u')
+
+        with pytest.raises(CostCeilingExceededError, match='spent'):
+            generation(second).generate('s', 'u')
+        assert second.spent_usd == pytest.approx(CALL_COST)
+
+    def test_a_plain_recorder_refuses_nothing(self):
+        recorder = UsageRecorder()
+        recorder.admit('openai', 'gpt-4o', ['anything'])
@@ -0,0 +1,230 @@
+# -*- coding: utf-8 -*-
+
+# =================================================================================
+# osintgpt
+#
+# Author: @estebanpdl
+#
+# File: test_llm_cache.py
+# Description: The completion cache — what it keys on, when an entry stops
+#   being served, and that a hit is recorded as a free call.
+# =================================================================================
+
+# import modules
+import pytest
+
+# import submodules
+from types import SimpleNamespace
+
+# import osintgpt config
+from osintgpt.config import Settings
+
+# import osintgpt llm
+from osintgpt.llm import (
+    CachedGeneration,
+    CompletionCache,
+    UsageRecorder,
+    build_generation_provider
+)
+from osintgpt.llm.anthropic_native import AnthropicGeneration
+from osintgpt.llm.cache import request_key
+
+# import osintgpt llms
+from osintgpt.llms import OpenAIGPT
+
+# import osintgpt projects
+from osintgpt.projects import Project
+
+from conftest import FAKE_KEY, StubOpenAI
+
+
+class Clock:
+    def __init__(self):
+        self.now = 1_000.0
+
+    def __call__(self):
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return Clock()
+
+
+@pytest.fixture
+def cache(tmp_path, clock):
+    return CompletionCache(tmp_path / 'store.sqlite', clock=clock)
+
+
+@pytest.fixture
+def recorder():
+    return UsageRecorder()
+
+
+@pytest.fixture
+def cached(cache, recorder):
+    provider = build_generation_provider(
+        'openai',
+        Settings(openai_api_key=FAKE_KEY, openai_gpt_model='gpt-4o'),
+        recorder=recorder
+    )
+    provider.client = StubOpenAI()
+
+    return CachedGeneration(provider, cache)
+
+
+class TestKey:
+    MESSAGES = [{'role': 'user', 'content': 'hi'}]
+
+    def test_is_stable(self):
+        assert request_key('openai', 'gpt-4o', self.MESSAGES) == request_key(
+            'openai', 'gpt-4o', self.MESSAGES
+        )
+
+    @pytest.mark.parametrize('changed', [
+        ('gemini', 'gpt-4o', MESSAGES, None),
+        ('openai', 'gpt-4o-mini', MESSAGES, None),
+        ('openai', 'gpt-4o', [{'role': 'user', 'content': 'hello'}], None),
+        ('openai', 'gpt-4o', MESSAGES, {'max_tokens': 10})
+    ])
+    def test_changes_with_any_part_of_the_request(self, changed):
+        assert request_key(*changed) != request_key(
+            'openai', 'gpt-4o', self.MESSAGES
+        )
+
+
+class TestCache:
+    def test_a_miss_is_none(self, cache):
+        assert cache.get('absent') is None
+
+    def test_returns_what_was_stored(self, cache):
+        cache.put('k', 'openai', 'gpt-4o', 'reply')
+
+        assert cache.get('k') == 'reply'
+        assert len(cache) == 1
+
+    def test_persists_across_instances(self, tmp_path, cache, clock):
+        cache.put('k', 'openai', 'gpt-4o', 'reply')
+        reopened = CompletionCache(tmp_path / 'store.sqlite', clock=clock)
+
+        assert reopened.get('k') == 'reply'
+
+    def test_an_expired_entry_is_not_served(self, cache, clock):
+        cache.ttl_seconds = 60
+        cache.put('k', 'openai', 'gpt-4o', 'reply')
+        clock.now += 61
+
+        assert cache.get('k') is None
+        assert len(cache) == 0
+
+    def test_evicts_the_least_recently_used(self, tmp_path, clock):
+        cache = CompletionCache(
+            tmp_path / 'small.sqlite', max_entries=10, clock=clock
+        )
+        for index in range(10):
+            clock.now += 1
+            cache.put(f'k{index}', 'openai', 'gpt-4o', str(index))
+        clock.now += 1
+        cache.get('k0')
+        clock.now += 1
+        cache.put('k10', 'openai', 'gpt-4o', '10')
+
+        assert len(cache) <= 10
+        assert cache.get('k0') == '0'
+        assert cache.get('k1') is None
+
+    def test_for_project_shares_the_project_store(self, tmp_path):
+        project = Project.create('Case', home=tmp_path)
+        cache = CompletionCache.for_project(project)
+
+        assert cache.path == project.paths.store
+
+
+class TestCachedGeneration:
+    def test_a_repeat_makes_no_request(self, cached):
+        first = cached.generate('be terse', 'a question')
+        second = cached.generate('be terse', 'a question')
+
+        assert first == second == 'STUB REPLY'
+        assert len(cached.inner.client.chat.completions.calls) == 1
+
+    def test_a_different_prompt_is_a_miss(self, cached):
+        cached.generate('be terse', 'a question')
+        cached.generate('be terse', 'another question')
+
+        assert len(cached.inner.client.chat.completions.calls) == 2
+
+    def test_a_hit_is_recorded_as_free(self, cached, recorder):
+        cached.generate('s', 'u')
+        cached.generate('s', 'u')
+
+        assert recorder.calls == 2
+        assert recorder.cache_hits == 1
+        assert recorder.input_tokens == 11
+        assert recorder.records[1].estimated_cost == 0.0
+        assert 'answered from cache' in recorder.summary
+
+    def test_keys_on_parameters_that_shape_the_reply(self, cache):
+        def provider(max_tokens):
+            return AnthropicGeneration(
+                model='claude-opus-5', api_key=FAKE_KEY, max_tokens=max_tokens,
+                client=SimpleNamespace(messages=SimpleNamespace(
+                    create=lambda **kwargs: SimpleNamespace(content=[
+                        SimpleNamespace(type='text', text=str(max_tokens))
+                    ])
+                ))
+            )
+
+        CachedGeneration(provider(10), cache).generate('s', 'u')
+
+        assert CachedGeneration(provider(20), cache).generate('s', 'u') == '20'
+
+    def test_batch_jobs_reach_the_provider(self, cached, mocker):
+        submit = mocker.patch.object(cached.inner, 'submit_batch')
+        collect = mocker.patch.object(
+            cached.inner, 'collect_batch', return_value=['reply']
+        )
+
+        job = cached.submit_batch([('s', 'u')])
+
+        assert cached.collect_batch(job, timeout=1) == ['reply']
+        submit.assert_called_once_with([('s', 'u')], None)
+        collect.assert_called_once_with(submit.return_value, timeout=1)
+
+
+class TestSentenceAnalysis:
+    @pytest.fixture
+    def gpt(self, settings, stub_client, cache, recorder):
+        instance = OpenAIGPT(
+            settings, completion_cache=cache, recorder=recorder
+        )
+        instance.client = stub_client
+
+        return instance
+
+    def test_a_repeated_sentence_is_answered_locally(self, gpt):
+        gpt.analyze_sentence_details('¿Qué es la energía solar?')
+        result = gpt.analyze_sentence_details('¿Qué es la energía solar?')
+
+        assert result == 'STUB REPLY'
+        assert len(gpt.client.chat.completions.calls) == 1
+
+    def test_a_hit_is_recorded_as_free(self, gpt, recorder):
+        gpt.analyze_sentence_details('a sentence')
+        gpt.analyze_sentence_details('a sentence')
+
+        assert recorder.cache_hits == 1
+        assert recorder.records[-1].estimated_cost == 0.0
+
+    def test_providers_do_not_share_replies(self, gpt):
+        gpt.analyze_sentence_details('a sentence')
+        gpt.provider.provider = 'another'
+        gpt.analyze_sentence_details('a sentence')
+
+        assert len(gpt.client.chat.completions.calls) == 2
+
+    def test_a_sampled_analysis_is_never_cached(self, gpt):
+        gpt.analyze_sentence_details('a sentence', temperature=0.7)
+        gpt.analyze_sentence_details('a sentence', temperature=0.7)
+
+        assert len(gpt.client.chat.completions.calls) == 2
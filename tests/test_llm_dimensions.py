@@ -0,0 +1,185 @@
+# -*- coding: utf-8 -*-
+
+# =================================================================================
+# osintgpt
+#
+# Author: @estebanpdl
+#
+# File: test_llm_dimensions.py
+# Description: Shortened embeddings — the width a project chooses reaching the
+#   provider, holding on what comes back, and the two-stage search it allows.
+# =================================================================================
+
+# import modules
+import pytest
+
+# import submodules
+from types import SimpleNamespace
+
+# import osintgpt config
+from osintgpt.config import Settings
+
+# import osintgpt llm
+from osintgpt.llm import EMBEDDING_BACKENDS, build_embedding_provider
+from osintgpt.llm.dimensions import (
+    check_dimensions,
+    fit_vectors,
+    shorten,
+    two_stage_search
+)
+
+# import osintgpt projects
+from osintgpt.projects import Project
+
+from conftest import FAKE_KEY, StubOpenAI
+
+np = pytest.importorskip('numpy')
+
+
+class ShorteningEmbeddings:
+    '''Honours `dimensions` the way text-embedding-3-* does.'''
+
+    def __init__(self, width=8):
+        self.width = width
+        self.sent = []
+
+    def create(self, *, model, input, dimensions=None, **params):
+        self.sent.append(dimensions)
+        width = dimensions or self.width
+
+        return SimpleNamespace(
+            model=model,
+            usage=SimpleNamespace(prompt_tokens=len(input)),
+            data=[
+                SimpleNamespace(index=i, embedding=[1.0] * width)
+                for i in range(len(input))
+            ]
+        )
+
+
+class TestShorten:
+    def test_keeps_a_unit_length_prefix(self):
+        shortened = shorten([[3.0, 4.0, 12.0], [0.0, 2.0, 5.0]], 2)
+
+        assert shortened.dtype == np.float32
+        assert shortened.ravel().tolist() == pytest.approx([0.6, 0.8, 0.0, 1.0])
+
+    def test_a_single_vector_stays_one_dimensional(self):
+        assert shorten([2.0, 0.0, 1.0], 1).tolist() == [1.0]
+
+    def test_a_zero_prefix_stays_zero(self):
+        assert shorten([[0.0, 0.0, 1.0]], 2).tolist() == [[0.0, 0.0]]
+
+    def test_refuses_to_widen(self):
+        with pytest.raises(ValueError, match='fewer than'):
+            shorten([[1.0, 2.0]], 3)
+
+    def test_fit_leaves_vectors_of_the_right_width_alone(self):
+        vectors = [[3.0, 4.0]]
+
+        assert fit_vectors(vectors, 2) is vectors
+        assert fit_vectors(vectors, None) is vectors
+
+    @pytest.mark.parametrize('dimensions', [0, -1, 4096])
+    def test_impossible_widths_are_rejected(self, dimensions):
+        with pytest.raises(ValueError):
+            check_dimensions('text-embedding-3-large', dimensions)
+
+    def test_a_model_not_trained_for_it_is_never_shortened(self):
+        with pytest.raises(ValueError, match='not trained'):
+            check_dimensions('text-embedding-ada-002', 256)
+
+        assert check_dimensions('text-embedding-ada-002', 1536) == 1536
+
+    def test_an_unknown_model_is_taken_at_its_word(self):
+        assert check_dimensions('nomic-embed-text', 4096) == 4096
+
+
+class TestProviders:
+    def test_openai_is_asked_for_the_width(self):
+        provider = build_embedding_provider(
+            'openai', Settings(openai_api_key=FAKE_KEY, embedding_dimensions=4)
+        )
+        provider.client.embeddings = ShorteningEmbeddings()
+
+        assert provider.embed(['a', 'b']) == [[1.0] * 4] * 2
+        assert provider.client.embeddings.sent == [4]
+
+    def test_only_shortenable_models_are_sent_the_width(self):
+        provider = build_embedding_provider(
+            'openai', Settings(openai_api_key=FAKE_KEY, embedding_dimensions=2),
+            model='my-fine-tuned-embedder'
+        )
+        # The stub, like OpenAI for this model, takes no dimensions.
+        provider.client = StubOpenAI()
+
+        assert [len(vector) for vector in provider.embed(['a'])] == [2]
+
+    def test_an_endpoint_without_the_parameter_is_cut_here(self):
+        assert EMBEDDING_BACKENDS['ollama'].shortens_embeddings is False
+
+        provider = build_embedding_provider(
+            'ollama', Settings(embedding_dimensions=2), model='m'
+        )
+        provider.client = StubOpenAI()
+        vectors = provider.embed(['a', 'b'])
+
+        assert [len(vector) for vector in vectors] == [2, 2]
+        assert vectors[1] == pytest.approx([1 / 1.04 ** 0.5, 0.2 / 1.04 ** 0.5])
+        assert provider.embed_array(['a']).shape == (1, 2)
+
+    def test_an_argument_wins_over_settings(self):
+        provider = build_embedding_provider(
+            'openai', Settings(openai_api_key=FAKE_KEY, embedding_dimensions=4),
+            dimensions=256
+        )
+
+        assert provider.dimensions == 256
+
+    def test_a_project_width_reaches_the_provider(self, tmp_path):
+        project = Project.create('Case', home=tmp_path).with_settings(
+            embedding_model='text-embedding-3-large', embedding_dimensions=256
+        )
+        settings = project.settings_for(Settings(openai_api_key=FAKE_KEY))
+        provider = build_embedding_provider('openai', settings)
+
+        assert settings.embedding_dimensions == 256
+        assert provider.dimensions == 256
+
+    def test_the_width_is_read_from_the_environment(self, monkeypatch):
+        monkeypatch.setenv('EMBEDDING_DIMENSIONS', '512')
+
+        assert Settings.from_env().embedding_dimensions == 512
+
+
+class TestTwoStageSearch:
+    @pytest.fixture
+    def corpus(self):
+        rng = np.random.default_rng(7)
+        # Energy falls off along the vector, as in a model trained to be
+        # truncated, so the prefix carries most of the ranking.
+        scale = np.linspace(1.0, 0.05, 64, dtype=np.float32)
+        vectors = rng.standard_normal((2_000, 64)).astype(np.float32) * scale
+
+        return vectors, vectors[17] + 0.05 * rng.standard_normal(64) * scale
+
+    def test_matches_a_full_scan(self, corpus):
+        vectors, query = corpus
+        exact = vectors @ query / (
+            np.linalg.norm(vectors, axis=1) * np.linalg.norm(query)
+        )
+
+        top, scores = two_stage_search(vectors, query, 10, 16)
+
+        assert top == np.argsort(-exact)[:10].tolist()
+        assert scores == pytest.approx(exact[top].tolist(), rel=1e-5)
+
+    def test_a_kept_coarse_index_gives_the_same_answer(self, corpus):
+        vectors, query = corpus
+
+        assert two_stage_search(
+            vectors, query, 5, 16, coarse=shorten(vectors, 16)
+        ) == two_stage_search(vectors, query, 5, 16)
+
+    def test_nothing_to_search(self):
+        assert two_stage_search([], [1.0], 5, 1) == ([], [])
@@ -0,0 +1,192 @@
+# -*- coding: utf-8 -*-
+
+# =================================================================================
+# osintgpt
+#
+# Author: @estebanpdl
+#
+# File: test_llm_fake.py
+# Description: The fake backends — deterministic vectors and replies, usage
+#   that adds up, and latency, 429s and failures on demand.
+# =================================================================================
+
+# import modules
+import math
+import pytest
+
+# import osintgpt config
+from osintgpt.config import Settings
+
+# import osintgpt llm
+from osintgpt.llm import (
+    EMBEDDING_BACKENDS,
+    FAKE,
+    GENERATION_BACKENDS,
+    CachedGeneration,
+    CompletionCache,
+    FakeBehaviour,
+    RateLimiter,
+    UsageRecorder,
+    build_embedding_provider,
+    build_generation_provider
+)
+
+# import exceptions
+from osintgpt.exceptions.errors import SimulatedProviderError
+
+
+class FakeTime:
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+class TestRegistry:
+    def test_registered_for_both_roles(self):
+        assert EMBEDDING_BACKENDS['fake'].kind == FAKE
+        assert GENERATION_BACKENDS['fake'].kind == FAKE
+
+    def test_needs_no_key_or_model(self):
+        embedder = build_embedding_provider('fake', Settings())
+        generator = build_generation_provider('fake', Settings())
+
+        assert embedder.model == 'fake-embedding'
+        assert generator.model == 'fake-chat'
+        assert embedder.billable is False
+
+    def test_options_reach_the_backend(self):
+        provider = build_embedding_provider(
+            'fake', Settings(), dimensions=8, latency=0.5
+        )
+
+        assert provider.dimensions == 8
+        assert provider.behaviour.latency == 0.5
+
+
+class TestEmbedding:
+    def test_vectors_are_deterministic_and_unit_length(self):
+        first = build_embedding_provider('fake', Settings(), dimensions=16)
+        second = build_embedding_provider('fake', Settings(), dimensions=16)
+        [a, b] = first.embed(['alpha', 'beta'])
+
+        assert second.embed(['alpha']) == [a]
+        assert a != b
+        assert math.isclose(sum(value * value for value in a), 1.0)
+
+    def test_the_model_seeds_the_vectors_too(self):
+        one = build_embedding_provider('fake', Settings(), model='m1')
+        two = build_embedding_provider('fake', Settings(), model='m2')
+
+        assert one.embed(['same']) != two.embed(['same'])
+
+    def test_batches_and_records_usage(self):
+        recorder = UsageRecorder()
+        provider = build_embedding_provider(
+            'fake', Settings(), recorder=recorder, batch_size=2,
+            limiter=RateLimiter()
+        )
+        provider.embed(['one two', 'three', 'four five six'])
+
+        assert recorder.calls == 2
+        assert recorder.input_tokens == 6
+        assert recorder.estimated_cost == 0.0
+        assert recorder.latency_for('embed', 'fake').items == 3
+
+
+class TestGeneration:
+    def test_replies_repeat_for_the_same_prompt(self):
+        provider = build_generation_provider('fake', Settings())
+
+        assert provider.generate('s', 'u') == provider.generate('s', 'u')
+        assert provider.generate('s', 'u') != provider.generate('s', 'v')
+
+    def test_a_custom_reply(self):
+        provider = build_generation_provider(
+            'fake', Settings(), reply=lambda system, user: user.upper()
+        )
+
+        assert provider.generate('s', 'shout') == 'SHOUT'
+
+    def test_works_behind_the_completion_cache(self, tmp_path):
+        recorder = UsageRecorder()
+        provider = build_generation_provider(
+            'fake', Settings(), recorder=recorder
+        )
+        cached = CachedGeneration(provider, CompletionCache(tmp_path / 'c.db'))
+        cached.generate('s', 'u')
+        cached.generate('s', 'u')
+
+        assert provider.behaviour.requests == 1
+
+
+class TestBehaviour:
+    def test_latency_sleeps_the_median(self):
+        time = FakeTime()
+        provider = build_generation_provider(
+            'fake', Settings(), latency=0.25, sleep=time.sleep
+        )
+        provider.generate('s', 'u')
+
+        assert time.slept == [0.25]
+
+    def test_a_spread_varies_but_repeats_under_a_seed(self):
+        def draws(seed):
+            time = FakeTime()
+            behaviour = FakeBehaviour(
+                latency=0.1, latency_sigma=0.5, seed=seed, sleep=time.sleep
+            )
+            for _ in range(20):
+                behaviour.request()
+            return time.slept
+
+        assert len(set(draws(1))) > 1
+        assert draws(1) == draws(1)
+        assert draws(1) != draws(2)
+
+    def test_rate_limit_rate_raises_429s(self):
+        behaviour = FakeBehaviour(rate_limit_rate=0.3, seed=7)
+        statuses = []
+        for _ in range(200):
+            try:
+                behaviour.request()
+                statuses.append(200)
+            except SimulatedProviderError as error:
+                statuses.append(error.status_code)
+
+        assert 40 <= statuses.count(429) <= 80
+        assert 500 not in statuses
+
+    def test_failures_raise_500s(self):
+        provider = build_embedding_provider(
+            'fake', Settings(), failure_rate=1.0
+        )
+
+        with pytest.raises(SimulatedProviderError) as error:
+            provider.embed(['x'])
+
+        assert error.value.status_code == 500
+
+    def test_requests_per_minute_refuses_the_excess(self):
+        time = FakeTime()
+        behaviour = FakeBehaviour(
+            requests_per_minute=2, retry_after=3.0, clock=time.clock
+        )
+        behaviour.request()
+        behaviour.request()
+
+        with pytest.raises(SimulatedProviderError, match='retry after 3s'):
+            behaviour.request()
+
+        time.now = 60.0
+        behaviour.request()
+
+    def test_rates_are_checked(self):
+        with pytest.raises(ValueError, match='failure_rate'):
+            FakeBehaviour(failure_rate=2)
@@ -0,0 +1,208 @@
+# -*- coding: utf-8 -*-
+
+# =================================================================================
+# osintgpt
+#
+# Author: @estebanpdl
+#
+# File: test_llm_latency.py
+# Description: Per-stage latency — histograms and their quantiles, timing on
+#   provider and storage calls, and the Prometheus rendering of both.
+# =================================================================================
+
+# import modules
+import pytest
+
+# import osintgpt config
+from osintgpt.config import Settings
+
+# import osintgpt databases
+from osintgpt.databases import SQLDatabaseManager
+
+# import osintgpt llm
+from osintgpt.llm import (
+    Histogram,
+    UsageRecorder,
+    build_embedding_provider,
+    build_generation_provider,
+    prometheus_text
+)
+from osintgpt.llm.latency import LATENCY_BUCKETS, timed
+
+from conftest import FAKE_KEY, StubOpenAI
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+class TestHistogram:
+    def test_empty_has_no_quantiles(self):
+        hist = Histogram()
+
+        assert hist.p50 is None
+        assert hist.mean is None
+        assert hist.throughput is None
+
+    def test_quantiles_land_in_the_right_buckets(self):
+        hist = Histogram()
+        for _ in range(90):
+            hist.observe(0.03)
+        for _ in range(10):
+            hist.observe(3.0)
+
+        assert 0.025 <= hist.p50 <= 0.05
+        assert 2.5 <= hist.p95 <= 3.0
+        assert 2.5 <= hist.p99 <= 3.0
+
+    def test_never_reports_above_the_slowest(self):
+        hist = Histogram()
+        hist.observe(0.011)
+
+        assert hist.p99 <= 0.011
+
+    def test_overflow_is_bounded_by_the_maximum(self):
+        hist = Histogram()
+        hist.observe(LATENCY_BUCKETS[-1] * 2)
+
+        assert hist.p50 == pytest.approx(LATENCY_BUCKETS[-1] * 1.5)
+        assert hist.p99 <= hist.max_seconds
+
+    def test_merges_bucket_by_bucket(self):
+        first, second = Histogram(), Histogram()
+        first.observe(0.1, items=10)
+        second.observe(1.0, items=30)
+        first.merge(second)
+
+        assert first.count == 2
+        assert first.items == 40
+        assert first.throughput == pytest.approx(40 / 1.1)
+
+    def test_refuses_a_quantile_out_of_range(self):
+        with pytest.raises(ValueError):
+            Histogram().quantile(1.5)
+
+
+class TestTimed:
+    def test_records_seconds_and_items(self):
+        recorder = UsageRecorder()
+        clock = FakeClock()
+        with timed(recorder, 'embed', 'openai', 'm', items=8, clock=clock):
+            clock.now = 0.2
+
+        hist = recorder.latency_for('embed')
+        assert hist.count == 1
+        assert hist.total_seconds == pytest.approx(0.2)
+        assert hist.items == 8
+
+    def test_a_failure_is_timed_and_re_raised(self):
+        recorder = UsageRecorder()
+        with pytest.raises(RuntimeError):
+            with timed(recorder, 'generate', 'openai', 'm'):
+                raise RuntimeError('boom')
+
+        assert recorder.latency_for('generate').count == 1
+        assert recorder.failures == {('generate', 'openai', 'm'): 1}
+
+    def test_first_byte_and_retries_are_kept_apart(self):
+        recorder = UsageRecorder()
+        clock = FakeClock()
+        with timed(recorder, 'generate', 'p', 'm', clock=clock) as watch:
+            clock.now = 0.05
+            watch.first_byte()
+            watch.retries = 2
+            clock.now = 0.5
+
+        assert recorder.first_byte[('generate', 'p', 'm')].total_seconds == (
+            pytest.approx(0.05)
+        )
+        assert recorder.retries == {('generate', 'p', 'm'): 2}
+
+    def test_without_a_recorder_nothing_is_kept(self):
+        with timed(None, 'embed'):
+            pass
+
+    def test_listeners_see_each_timing(self):
+        seen = []
+        recorder = UsageRecorder(listeners=[seen.append])
+        with timed(recorder, 'embed', 'openai', 'm'):
+            pass
+
+        assert [timing.stage for timing in seen] == ['embed']
+
+    def test_opentelemetry_is_optional(self):
+        pytest.importorskip('opentelemetry')
+        from osintgpt.llm.latency import opentelemetry_listener
+
+        assert callable(opentelemetry_listener())
+
+
+class TestProviders:
+    def test_embedding_is_timed_per_request(self):
+        recorder = UsageRecorder()
+        provider = build_embedding_provider(
+            'openai', Settings(openai_api_key=FAKE_KEY), recorder=recorder
+        )
+        provider.client = StubOpenAI()
+        provider.batch_size = 2
+        provider.embed(['a', 'b', 'c'])
+
+        hist = recorder.latency_for('embed', 'openai', provider.model)
+        assert hist.count == 2
+        assert hist.items == 3
+
+    def test_generation_is_timed(self):
+        recorder = UsageRecorder()
+        provider = build_generation_provider(
+            'openai',
+            Settings(openai_api_key=FAKE_KEY, openai_gpt_model='gpt-4o'),
+            recorder=recorder
+        )
+        provider.client = StubOpenAI()
+        provider.generate('s', 'u')
+
+        assert recorder.latency_for('generate', model='gpt-4o').count == 1
+        assert 'generate: 1 op, p50' in recorder.latency_summary
+
+    def test_sql_writes_and_reads_are_timed(self, settings):
+        recorder = UsageRecorder()
+        manager = SQLDatabaseManager(settings, recorder=recorder)
+        manager.insert_data_to_chat_gpt_index('c1', '2026-01-01')
+        manager.insert_data_to_chat_gpt_conversations('c1', 'x', 'user', 'hi')
+        manager.load_messages_from_chat_gpt_conversations('c1')
+
+        assert recorder.latency_for('sql_write', 'sqlite').count == 2
+        assert recorder.latency_for(
+            'sql_read', model='chat_gpt_conversations'
+        ).count == 1
+
+
+class TestPrometheus:
+    def test_renders_cumulative_buckets(self):
+        recorder = UsageRecorder()
+        clock = FakeClock()
+        for seconds in (0.02, 0.2, 2.0):
+            clock.now = 0.0
+            with timed(recorder, 'embed', 'openai', 'm', clock=clock):
+                clock.now = seconds
+
+        text = prometheus_text(recorder)
+        labels = 'stage="embed",provider="openai",model="m"'
+
+        assert '# TYPE osintgpt_latency_seconds histogram' in text
+        assert f'osintgpt_latency_seconds_bucket{{{labels},le="0.025"}} 1' in text
+        assert f'osintgpt_latency_seconds_bucket{{{labels},le="0.25"}} 2' in text
+        assert f'osintgpt_latency_seconds_bucket{{{labels},le="+Inf"}} 3' in text
+        assert f'osintgpt_latency_seconds_count{{{labels}}} 3' in text
+        assert f'osintgpt_items_total{{{labels}}} 3' in text
+
+    def test_escapes_label_values(self):
+        recorder = UsageRecorder()
+        with timed(recorder, 'embed', 'p', 'a"b'):
+            pass
+
+        assert 'model="a\\"b"' in prometheus_text(recorder)
@@ -38,15 +38,48 @@ class StubEncoder:
 
     def __init__(self, dimensions=3):
         self.calls = []
+        self.options = []
         self.dimensions = dimensions
 
-    def encode(self, texts):
+    def encode(self, texts, **options):
         self.calls.append(list(texts))
+        self.options.append(options)
 
         # The real encoder returns NumPy rows, which expose tolist().
         return [_Row([float(i)] * self.dimensions) for i in range(len(texts))]
 
 
+class LengthEncoder(StubEncoder):
+    '''Encodes a text as its length, so order can be checked.'''
+
+    def encode(self, texts, **options):
+        super().encode(texts, **options)
+
+        return [[float(len(text))] * self.dimensions for text in texts]
+
+
+class PoolEncoder(LengthEncoder):
+    '''Records the multi-process calls sentence-transformers would make.'''
+
+    def __init__(self):
+        super().__init__()
+        self.pools = []
+        self.stopped = []
+
+    def start_multi_process_pool(self, target_devices):
+        self.pools.append(target_devices)
+
+        return {'pool': len(self.pools)}
+
+    def stop_multi_process_pool(self, pool):
+        self.stopped.append(pool)
+
+    def encode_multi_process(self, texts, pool, batch_size):
+        self.options.append({'pool': pool, 'batch_size': batch_size})
+
+        return [[float(len(text))] * self.dimensions for text in texts]
+
+
 class _Row(list):
     def tolist(self):
         return list(self)
@@ -154,6 +187,76 @@ class TestEmbed:
         assert provider.encoder.calls == []
 
 
+class TestThroughput:
+    def test_batch_size_reaches_the_encoder(self):
+        encoder = StubEncoder()
+        SentenceTransformerEmbedding(encoder=encoder, batch_size=256).embed(
+            ['a']
+        )
+
+        assert encoder.options[0]['batch_size'] == 256
+
+    def test_texts_are_encoded_shortest_first_and_returned_in_order(self):
+        encoder = LengthEncoder(dimensions=1)
+        provider = SentenceTransformerEmbedding(encoder=encoder)
+        texts = ['ccc', 'a', 'bb', 'dddd']
+
+        vectors = provider.embed(texts)
+
+        assert encoder.calls == [['a', 'bb', 'ccc', 'dddd']]
+        assert vectors == [[3.0], [1.0], [2.0], [4.0]]
+
+    def test_sorting_can_be_turned_off(self):
+        encoder = LengthEncoder(dimensions=1)
+        SentenceTransformerEmbedding(
+            encoder=encoder, sort_by_length=False
+        ).embed(['ccc', 'a'])
+
+        assert encoder.calls == [['ccc', 'a']]
+
+    def test_embed_array_is_float32_rows(self):
+        np = pytest.importorskip('numpy')
+        provider = SentenceTransformerEmbedding(encoder=LengthEncoder())
+        array = provider.embed_array(['ccc', 'a'])
+
+        assert array.dtype == np.float32
+        assert array.shape == (2, 3)
+        assert array[0, 0] == 3.0
+
+    def test_a_large_call_runs_on_the_pool_until_closed(self):
+        encoder = PoolEncoder()
+        texts = [str(i) for i in range(40)]
+        with SentenceTransformerEmbedding(
+            encoder=encoder, batch_size=4, processes=4
+        ) as provider:
+            vectors = provider.embed(texts)
+            provider.embed(texts)
+
+        assert encoder.pools == [['cpu'] * 4]
+        assert encoder.stopped == [{'pool': 1}]
+        assert [vector[0] for vector in vectors] == [
+            float(len(text)) for text in texts
+        ]
+
+    def test_a_small_call_skips_the_pool(self):
+        encoder = PoolEncoder()
+        SentenceTransformerEmbedding(
+            encoder=encoder, batch_size=4, processes=4
+        ).embed(['a', 'b'])
+
+        assert encoder.pools == []
+
+    def test_options_reach_it_through_the_factory(self, monkeypatch):
+        built = {}
+        monkeypatch.setattr(
+            'osintgpt.llm.SentenceTransformerEmbedding',
+            lambda model, **kwargs: built.update(kwargs)
+        )
+        build_embedding_provider(LOCAL, Settings(), processes=4)
+
+        assert built['processes'] == 4
+
+
 class TestMissingPackage:
     def test_names_the_extra_that_installs_it(self, monkeypatch):
         real_import = builtins.__import__
@@ -277,6 +277,60 @@ class TestEmbeddingCalls:
         assert provider.client.embeddings.models == []
 
 
+class TestEmbeddingArrays:
+    @pytest.fixture
+    def provider(self, keyed):
+        instance = build_embedding_provider('openai', keyed)
+        instance.client = StubOpenAI()
+
+        return instance
+
+    def test_openai_is_asked_for_base64(self):
+        assert EMBEDDING_BACKENDS['openai'].base64_embeddings is True
+        assert EMBEDDING_BACKENDS['ollama'].base64_embeddings is False
+
+    def test_decodes_base64_straight_into_float32_rows(self, provider):
+        np = pytest.importorskip('numpy')
+        import base64
+        from types import SimpleNamespace
+
+        sent = {}
+
+        def encoded(*, model, input, encoding_format):
+            sent['format'] = encoding_format
+            items = [
+                SimpleNamespace(index=i, embedding=base64.b64encode(
+                    np.array([i, 0.5], dtype='<f4').tobytes()
+                ).decode('ascii'))
+                for i in range(len(input))
+            ]
+            return SimpleNamespace(data=list(reversed(items)), model=model)
+
+        provider.client.embeddings.create = encoded
+        provider.batch_size = 2
+        array = provider.embed_array(['a', 'b', 'c'])
+
+        assert sent['format'] == 'base64'
+        assert array.dtype == np.float32
+        assert array.tolist() == [[0.0, 0.5], [1.0, 0.5], [0.0, 0.5]]
+
+    def test_an_endpoint_without_base64_is_converted(self, keyed):
+        np = pytest.importorskip('numpy')
+        provider = build_embedding_provider('ollama', keyed, model='m')
+        provider.client = StubOpenAI()
+        array = provider.embed_array(['a', 'b'])
+
+        assert array.dtype == np.float32
+        assert array.shape == (2, 3)
+        assert array[1, 0] == 1.0
+
+    def test_no_texts_is_an_empty_array(self, provider):
+        pytest.importorskip('numpy')
+
+        assert provider.embed_array([]).shape == (0, 0)
+        assert provider.client.embeddings.models == []
+
+
 class TestGenerationCalls:
     @pytest.fixture
     def provider(self, keyed):
@@ -306,3 +360,20 @@ class TestGenerationCalls:
         )
 
         assert provider.generate('s', 'u') == ''
+
+    def test_sends_no_cache_key_unless_asked(self, provider):
+        '''Other compatible endpoints may reject a field they do not know.'''
+        provider.generate('s', 'u')
+
+        assert 'prompt_cache_key' not in provider.client.chat.completions.calls[0]
+
+    def test_a_cache_key_routes_a_bulk_job_together(self, keyed):
+        instance = OpenAICompatGeneration(
+            model='gpt-4o', api_key=FAKE_KEY, prompt_cache_key='summaries'
+        )
+        instance.client = StubOpenAI()
+        instance.generate('s', 'u')
+
+        assert instance.client.chat.completions.calls[0][
+            'prompt_cache_key'
+        ] == 'summaries'
@@ -0,0 +1,215 @@
+# -*- coding: utf-8 -*-
+
+# =================================================================================
+# osintgpt
+#
+# Author: @estebanpdl
+#
+# File: test_llm_ratelimit.py
+# Description: The shared rate limiter — requests and tokens held to a per
+#   minute limit, estimates settled against actual usage, and one allowance
+#   for every provider the factories build.
+# =================================================================================
+
+# import modules
+import pytest
+import threading
+
+# import osintgpt config
+from osintgpt.config import Settings
+
+# import osintgpt llm
+from osintgpt.llm import (
+    RateLimiter,
+    build_embedding_provider,
+    build_generation_provider,
+    shared_limiter
+)
+
+from conftest import FAKE_KEY, StubOpenAI
+
+
+class FakeTime:
+    '''A clock that only moves when something sleeps.'''
+
+    def __init__(self):
+        self.now = 0.0
+        self.slept = []
+
+    def clock(self):
+        return self.now
+
+    def sleep(self, seconds):
+        self.slept.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def time():
+    return FakeTime()
+
+
+@pytest.fixture
+def limiter(time):
+    return RateLimiter(
+        counter=lambda text, model: len(text.split()),
+        clock=time.clock, sleep=time.sleep
+    )
+
+
+class TestRequests:
+    def test_an_unconfigured_key_never_waits(self, limiter, time):
+        for _ in range(1_000):
+            limiter.acquire('openai', 'gpt-4o')
+
+        assert time.slept == []
+
+    def test_a_full_minute_of_requests_goes_through_at_once(
+        self, limiter, time
+    ):
+        limiter.configure('openai', 'gpt-4o', requests_per_minute=60)
+        for _ in range(60):
+            limiter.acquire('openai', 'gpt-4o')
+
+        assert time.slept == []
+
+    def test_holds_the_sustained_rate(self, limiter, time):
+        limiter.configure('openai', 'gpt-4o', requests_per_minute=60)
+        for _ in range(180):
+            limiter.acquire('openai', 'gpt-4o')
+
+        # A minute's burst, then one a second for the remaining 120.
+        assert time.now == pytest.approx(120.0)
+
+
+class TestTokens:
+    def test_waits_for_the_tokens_a_request_needs(self, limiter, time):
+        limiter.configure('openai', 'gpt-4o', tokens_per_minute=600)
+        limiter.acquire('openai', 'gpt-4o', [' '.join(['w'] * 600)])
+        limiter.acquire('openai', 'gpt-4o', [' '.join(['w'] * 60)])
+
+        assert time.now == pytest.approx(6.0)
+
+    def test_settling_returns_an_overestimate(self, limiter, time):
+        limiter.configure('openai', 'gpt-4o', tokens_per_minute=600)
+        reservation = limiter.acquire(
+            'openai', 'gpt-4o', [' '.join(['w'] * 600)]
+        )
+        reservation.settle(60)
+        limiter.acquire('openai', 'gpt-4o', [' '.join(['w'] * 500)])
+
+        assert time.slept == []
+
+    def test_an_oversized_request_is_still_admitted(self, limiter, time):
+        limiter.configure('openai', 'gpt-4o', tokens_per_minute=100)
+        limiter.acquire('openai', 'gpt-4o', [' '.join(['w'] * 1_000)])
+
+        assert time.slept == []
+
+    def test_tokens_are_only_counted_under_a_token_limit(self, time):
+        def counter(text, model):
+            raise AssertionError('counted without a token limit')
+
+        limiter = RateLimiter(counter=counter, clock=time.clock)
+        limiter.configure('openai', requests_per_minute=10)
+
+        limiter.acquire('openai', 'gpt-4o', ['some text'])
+
+    def test_special_token_markers_are_counted_as_text(self, time, monkeypatch):
+        class Encoding:
+            def encode(self, text):
+                raise ValueError('disallowed special token')
+
+            def encode_ordinary_batch(self, texts, num_threads=1):
+                return [text.split() for text in texts]
+
+        monkeypatch.setattr(
+            'osintgpt.utils.encoding_for_model', lambda model: Encoding()
+        )
+        limiter = RateLimiter(clock=time.clock, sleep=time.sleep)
+        limiter.configure('openai', tokens_per_minute=100)
+
+        limiter.acquire('openai', 'gpt-4o', ['a post <|endoftext|> quoted'])
+
+        assert time.slept == []
+
+
+class TestKeys:
+    def test_models_are_limited_separately(self, limiter, time):
+        limiter.configure('openai', 'gpt-4o', requests_per_minute=1)
+        limiter.configure('openai', 'gpt-4o-mini', requests_per_minute=1)
+        limiter.acquire('openai', 'gpt-4o')
+        limiter.acquire('openai', 'gpt-4o-mini')
+
+        assert time.slept == []
+
+    def test_a_provider_wide_limit_covers_unlisted_models(self, limiter, time):
+        limiter.configure('gemini', requests_per_minute=1)
+        limiter.acquire('gemini', 'gemini-2.5-flash')
+        limiter.acquire('gemini', 'gemini-2.5-flash')
+
+        assert time.now == pytest.approx(60.0)
+
+    def test_concurrent_callers_share_one_allowance(self):
+        '''Several threads, one bucket: the admitted total is the limit.'''
+        waits = []
+        lock = threading.Lock()
+
+        def sleep(seconds):
+            with lock:
+                waits.append(seconds)
+
+        limiter = RateLimiter(clock=lambda: 0.0, sleep=sleep)
+        limiter.configure('openai', 'gpt-4o', requests_per_minute=10)
+        threads = [
+            threading.Thread(
+                target=lambda: limiter.acquire('openai', 'gpt-4o')
+            )
+            for _ in range(30)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        # Ten in the burst; the other twenty queue six seconds apart.
+        assert len(waits) == 20
+        assert max(waits) == pytest.approx(120.0)
+
+
+class TestProviders:
+    def test_factories_share_one_limiter(self):
+        settings = Settings(openai_api_key=FAKE_KEY, openai_gpt_model='gpt-4o')
+
+        assert build_generation_provider('openai', settings).limiter is (
+            shared_limiter()
+        )
+        assert build_embedding_provider('openai', settings).limiter is (
+            shared_limiter()
+        )
+
+    def test_generation_goes_through_the_limiter(self, limiter, time):
+        limiter.configure('openai', 'gpt-4o', requests_per_minute=1)
+        provider = build_generation_provider(
+            'openai',
+            Settings(openai_api_key=FAKE_KEY, openai_gpt_model='gpt-4o'),
+            limiter=limiter
+        )
+        provider.client = StubOpenAI()
+        provider.generate('s', 'u')
+        provider.generate('s', 'u')
+
+        assert time.now == pytest.approx(60.0)
+
+    def test_embeddings_take_one_request_per_chunk(self, limiter, time):
+        limiter.configure(
+            'openai', 'text-embedding-3-small', requests_per_minute=2
+        )
+        provider = build_embedding_provider(
+            'openai', Settings(openai_api_key=FAKE_KEY), limiter=limiter
+        )
+        provider.client = StubOpenAI()
+        provider.batch_size = 10
+        provider.embed(['t'] * 30)
+
+        assert time.now == pytest.approx(30.0)
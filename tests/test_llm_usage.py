@@ -12,6 +12,7 @@
 
 # import modules
 import pytest
+import threading
 
 # import submodules
 from types import SimpleNamespace
@@ -65,6 +66,24 @@ class TestUsage:
 
         assert usage.estimated_cost is None
 
+    def test_cached_input_prices_at_the_cache_rate(self):
+        usage = Usage(
+            'openai', PRICED, input_tokens=1_000_000,
+            cached_input_tokens=1_000_000
+        )
+
+        assert usage.estimated_cost == PRICES[PRICED]['cached_input']
+
+    def test_cached_input_is_part_of_input_not_extra(self):
+        usage = Usage(
+            'openai', PRICED, input_tokens=1_000, cached_input_tokens=400
+        )
+
+        assert usage.total_tokens == 1_000
+        assert usage.estimated_cost < Usage(
+            'openai', PRICED, input_tokens=1_000
+        ).estimated_cost
+
     def test_a_local_provider_costs_a_real_zero(self):
         '''
         Zero and unknown are different answers. A model nobody can bill for
@@ -134,6 +153,14 @@ class TestRecorder:
         assert '1,500 tokens' in summary
         assert summary.index('tokens') < summary.index('$')
 
+    def test_sums_cached_input(self):
+        recorder = UsageRecorder()
+        recorder.record(Usage('openai', PRICED, 1_000, cached_input_tokens=600))
+        recorder.record(Usage('openai', PRICED, 1_000))
+
+        assert recorder.cached_input_tokens == 600
+        assert '600 from cache' in recorder.summary
+
     def test_summary_states_the_gaps(self):
         recorder = UsageRecorder()
         recorder.record(Usage('openai', UNPRICED, 1_000))
@@ -200,7 +227,9 @@ class TestProviderRecording:
     def test_the_local_encoder_reports_zero_cost_and_no_count(self):
         recorder = UsageRecorder()
         provider = SentenceTransformerEmbedding(
-            encoder=SimpleNamespace(encode=lambda texts: [[0.1]] * len(texts)),
+            encoder=SimpleNamespace(
+                encode=lambda texts, **options: [[0.1]] * len(texts)
+            ),
             recorder=recorder
         )
         provider.embed(['a', 'b'])
@@ -224,6 +253,47 @@ class TestProviderRecording:
         assert recorder.input_tokens == 31
         assert recorder.output_tokens == 9
 
+    def test_reads_openai_cached_prompt_tokens(self, keyed):
+        recorder = UsageRecorder()
+        provider = build_generation_provider('openai', keyed, recorder=recorder)
+        provider.client = StubOpenAI()
+        provider.client.chat.completions.create = lambda **kwargs: (
+            SimpleNamespace(
+                usage=SimpleNamespace(
+                    prompt_tokens=2_000, completion_tokens=10,
+                    prompt_tokens_details=SimpleNamespace(cached_tokens=1_536)
+                ),
+                choices=[SimpleNamespace(message=SimpleNamespace(content='hi'))]
+            )
+        )
+        provider.generate('s', 'u')
+
+        assert recorder.input_tokens == 2_000
+        assert recorder.cached_input_tokens == 1_536
+
+    def test_anthropic_counts_cache_reads_and_writes_as_input(self):
+        '''Anthropic reports them beside input_tokens rather than within.'''
+        recorder = UsageRecorder()
+        provider = AnthropicGeneration(
+            model='claude-opus-5', api_key=FAKE_KEY, recorder=recorder,
+            client=SimpleNamespace(messages=SimpleNamespace(
+                create=lambda **kwargs: SimpleNamespace(
+                    content=[SimpleNamespace(type='text', text='hi')],
+                    usage=SimpleNamespace(
+                        input_tokens=20, output_tokens=9,
+                        cache_read_input_tokens=3_000,
+                        cache_creation_input_tokens=500
+                    )
+                )
+            ))
+        )
+        provider.generate('s', 'u')
+        usage = recorder.records[0]
+
+        assert usage.input_tokens == 3_520
+        assert usage.cached_input_tokens == 3_000
+        assert usage.cache_write_tokens == 500
+
     def test_one_recorder_spans_several_providers(self):
         '''A project session mixes an embedder and a generator.'''
         recorder = UsageRecorder()
@@ -243,3 +313,97 @@ class TestProviderRecording:
 
         assert recorder.calls == 2
         assert set(recorder.by_model) == {PRICED, 'text-embedding-3-small'}
+
+
+class TestRunningTotals:
+    def test_a_bounded_recorder_keeps_recent_records_and_every_total(self):
+        recorder = UsageRecorder(max_records=3)
+        for tokens in range(1, 11):
+            recorder.record(Usage('openai', PRICED, tokens))
+
+        assert [usage.input_tokens for usage in recorder] == [8, 9, 10]
+        assert recorder.records[0].input_tokens == 8
+        assert len(recorder) == 10
+        assert recorder.input_tokens == 55
+
+    def test_no_records_kept_still_totals(self):
+        recorder = UsageRecorder(max_records=0)
+        recorder.record(Usage('openai', PRICED, 100, 10))
+
+        assert list(recorder) == []
+        assert recorder.total_tokens == 110
+        assert recorder.by_model == {PRICED: 110}
+
+    def test_totals_are_kept_per_provider_and_model(self):
+        recorder = UsageRecorder()
+        recorder.record(Usage('openai', PRICED, 100))
+        recorder.record(Usage('azure', PRICED, 50))
+        recorder.record(Usage('openai', PRICED, 25))
+
+        assert recorder.totals_by_key[('openai', PRICED)].input_tokens == 125
+        assert recorder.totals_by_key[('azure', PRICED)].calls == 1
+        assert recorder.by_model == {PRICED: 175}
+
+    def test_concurrent_records_are_all_counted(self):
+        recorder = UsageRecorder(max_records=10)
+
+        def worker():
+            for _ in range(500):
+                recorder.record(Usage('openai', PRICED, 1, 1))
+
+        threads = [threading.Thread(target=worker) for _ in range(8)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert recorder.calls == 4_000
+        assert recorder.total_tokens == 8_000
+        assert recorder.estimated_cost == pytest.approx(
+            4_000 * Usage('openai', PRICED, 1, 1).estimated_cost
+        )
+
+
+class TestStoreFlush:
+    def test_flushes_every_n_calls(self, tmp_path):
+        store = tmp_path / 'store.sqlite'
+        recorder = UsageRecorder(store=store, flush_every=3, flush_seconds=None)
+        for _ in range(4):
+            recorder.record(Usage('openai', PRICED, 10))
+
+        reader = UsageRecorder(store=store)
+        assert reader.stored_totals()[('openai', PRICED)].calls == 3
+        # The writer counts what it has not flushed yet.
+        assert recorder.stored_totals()[('openai', PRICED)].calls == 4
+
+    def test_close_flushes_the_rest_and_sessions_add_up(self, tmp_path):
+        store = tmp_path / 'store.sqlite'
+        for _ in range(2):
+            recorder = UsageRecorder(store=store)
+            recorder.record(Usage('openai', PRICED, 100, 10))
+            recorder.record(Usage('openai', UNPRICED, 5))
+            recorder.close()
+
+        totals = UsageRecorder(store=store).stored_totals()
+        assert totals[('openai', PRICED)].calls == 2
+        assert totals[('openai', PRICED)].output_tokens == 20
+        assert totals[('openai', PRICED)].estimated_cost == pytest.approx(
+            2 * Usage('openai', PRICED, 100, 10).estimated_cost
+        )
+        assert totals[('openai', UNPRICED)].unpriced_calls == 2
+
+    def test_flushes_once_the_interval_passes(self, tmp_path):
+        store = tmp_path / 'store.sqlite'
+        recorder = UsageRecorder(store=store, flush_seconds=0.0)
+        recorder.record(Usage('openai', PRICED, 10))
+
+        assert UsageRecorder(store=store).stored_totals()[
+            ('openai', PRICED)
+        ].calls == 1
+
+    def test_without_a_store_nothing_is_stored(self):
+        recorder = UsageRecorder()
+        recorder.record(Usage('openai', PRICED, 10))
+        recorder.flush()
+
+        assert recorder.stored_totals() == {}
@@ -187,3 +187,47 @@ class TestVectorSearchGuards:
             gpt.search_results_from_vector(
                 vector_engine=object(), query='a question'
             )
+
+
+class TestDataframeSearch:
+    @pytest.fixture
+    def df(self):
+        pd = pytest.importorskip('pandas')
+
+        return pd.DataFrame({
+            'text': ['east', 'north', 'north-east', 'west', 'also east'],
+            'embeddings': [
+                [1.0, 0.0], [0.0, 1.0], [1.0, 1.0], [-1.0, 0.0], [2.0, 0.0]
+            ]
+        })
+
+    def test_ranks_by_cosine_and_keeps_top_k(self, gpt, df):
+        results = gpt.search_results_from_dataframe(
+            df, embeddings=[1.0, 0.0], top_k=3
+        )['results']
+
+        # Equal scores keep row order.
+        assert [text for _, text, _ in results] == [
+            'east', 'also east', 'north-east'
+        ]
+        assert results[2][2] == pytest.approx(2 ** -0.5, rel=1e-6)
+        assert results[0][0] == [1.0, 0.0]
+
+    def test_matches_the_per_row_relatedness(self, gpt, df):
+        query = [0.3, 0.7]
+        results = gpt.search_results_from_dataframe(
+            df, embeddings=query, top_k=10
+        )['results']
+
+        assert len(results) == 5
+        for embedding, _, score in results:
+            assert score == pytest.approx(
+                gpt._relatedness_fn(query, embedding), abs=1e-6
+            )
+
+    def test_takes_a_float32_matrix(self, gpt):
+        np = pytest.importorskip('numpy')
+        matrix = np.array([[1, 0], [0, 1]], dtype=np.float32)
+        scores = gpt._relatedness_scores(matrix, [0.0, 1.0])
+
+        assert scores.tolist() == [0.0, 1.0]
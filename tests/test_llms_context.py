@@ -0,0 +1,201 @@
+# -*- coding: utf-8 -*-
+
+# =================================================================================
+# osintgpt
+#
+# Author: @estebanpdl
+#
+# File: test_llms_context.py
+# Description: The per-turn context window — system prompts pinned, old turns
+#   evicted or summarized, and a request that stops growing with the session.
+# =================================================================================
+
+# import modules
+import builtins
+import pytest
+
+# import osintgpt llms
+from osintgpt.llms import OpenAIGPT
+from osintgpt.llms.context import (
+    MEMORY_PREFIX,
+    TOKENS_PER_MESSAGE,
+    ContextWindow,
+    summarize_with
+)
+
+
+class WordEncoding:
+    '''One token per word, so budgets in these tests read as word counts.'''
+
+    def encode(self, text):
+        # As tiktoken does when the text holds a special-token marker.
+        if '<|' in text:
+            raise ValueError(text)
+        return text.split()
+
+    def encode_ordinary(self, text):
+        return text.split()
+
+
+def window(budget, summarizer=None):
+    return ContextWindow(
+        'gpt-4o', budget=budget, summarizer=summarizer, encoding=WordEncoding()
+    )
+
+
+def turn(role, words):
+    return {'role': role, 'content': ' '.join(['w'] * words)}
+
+
+class TestCounting:
+    def test_counts_content_plus_framing(self):
+        assert window(100).count(turn('user', 5)) == 5 + TOKENS_PER_MESSAGE
+
+    def test_special_token_markers_are_plain_text(self):
+        message = {'role': 'user', 'content': 'quoted <|endoftext|> here'}
+
+        assert window(100).count(message) == 3 + TOKENS_PER_MESSAGE
+
+    def test_tracks_the_running_total(self):
+        context = window(100)
+        context.extend([turn('system', 4), turn('user', 6)])
+
+        assert context.tokens == 10 + 2 * TOKENS_PER_MESSAGE
+
+
+class TestEviction:
+    def test_keeps_everything_under_the_budget(self):
+        context = window(100)
+        context.extend([turn('user', 2), turn('assistant', 2)])
+
+        assert len(context.messages()) == 2
+
+    def test_drops_the_oldest_turns_first(self):
+        context = window(30)
+        for index in range(5):
+            context.add({'role': 'user', 'content': f'turn {index} ' + 'w ' * 5})
+
+        contents = [m['content'] for m in context.messages()]
+
+        assert contents[-1].startswith('turn 4')
+        assert not any(c.startswith('turn 0') for c in contents)
+        assert context.tokens <= 30
+
+    def test_never_evicts_the_system_prompt(self):
+        context = window(20)
+        context.add(turn('system', 10))
+        for _ in range(10):
+            context.add(turn('user', 3))
+
+        assert context.messages()[0]['role'] == 'system'
+
+    def test_the_newest_turn_stays_even_over_budget(self):
+        context = window(5)
+        context.add(turn('user', 50))
+
+        assert len(context.messages()) == 1
+
+    def test_the_request_stops_growing(self):
+        '''What makes a long session cost the same per turn as a short one.'''
+        context = window(40)
+        sizes = []
+        for _ in range(50):
+            context.add(turn('user', 4))
+            context.add(turn('assistant', 4))
+            sizes.append(context.tokens)
+
+        assert max(sizes[10:]) <= 40
+
+    def test_no_budget_keeps_every_turn(self):
+        context = window(None)
+        for _ in range(20):
+            context.add(turn('user', 10))
+
+        assert len(context.messages()) == 20
+
+
+class TestMemory:
+    def test_evicted_turns_reach_the_summarizer(self):
+        folded = []
+
+        def summarizer(memory, evicted):
+            folded.extend(evicted)
+            return 'short memory'
+
+        context = window(25, summarizer)
+        for _ in range(4):
+            context.add(turn('user', 5))
+
+        assert folded
+        assert context.memory == 'short memory'
+
+    def test_memory_travels_after_the_system_prompt(self):
+        context = window(25, lambda memory, evicted: 'remembered')
+        context.add(turn('system', 2))
+        for _ in range(4):
+            context.add(turn('user', 5))
+        messages = context.messages()
+
+        assert messages[0]['role'] == 'system'
+        assert messages[1]['content'].startswith(MEMORY_PREFIX)
+        assert 'remembered' in messages[1]['content']
+
+    def test_memory_counts_against_the_budget(self):
+        context = window(30, lambda memory, evicted: 'm ' * 10)
+        for _ in range(6):
+            context.add(turn('user', 5))
+
+        assert context.tokens <= 30
+
+    def test_summarize_with_sends_the_memory_and_the_turns(self):
+        class Provider:
+            def __init__(self):
+                self.calls = []
+
+            def generate(self, system, user):
+                self.calls.append((system, user))
+                return '  new memory  '
+
+        provider = Provider()
+        summarizer = summarize_with(provider)
+        memory = summarizer('old memory', [{'role': 'user', 'content': 'hi'}])
+
+        assert memory == 'new memory'
+        assert 'old memory' in provider.calls[0][1]
+        assert 'user: hi' in provider.calls[0][1]
+
+
+class TestInteractiveCompletion:
+    @pytest.fixture
+    def gpt(self, settings, stub_client, monkeypatch):
+        monkeypatch.setattr(
+            'osintgpt.llms.context.encoding_for_model',
+            lambda model: WordEncoding()
+        )
+        instance = OpenAIGPT(settings)
+        instance.client = stub_client
+
+        return instance
+
+    def chat(self, monkeypatch, lines):
+        replies = iter(lines + ['exit'])
+        monkeypatch.setattr(builtins, 'input', lambda prompt='': next(replies))
+
+    def test_each_turn_sends_a_bounded_request(self, gpt, monkeypatch):
+        self.chat(monkeypatch, [' '.join(['w'] * 20)] * 30)
+        gpt.interactive_completion('be terse', max_context_tokens=100)
+        calls = gpt.client.chat.completions.calls
+
+        assert len(calls) == 30
+        assert sum(
+            len(m['content'].split()) + 3 for m in calls[-1]['messages']
+        ) <= 100
+        assert calls[-1]['messages'][0] == {
+            'role': 'system', 'content': 'be terse'
+        }
+
+    def test_no_budget_resends_the_whole_conversation(self, gpt, monkeypatch):
+        self.chat(monkeypatch, ['one', 'two', 'three'])
+        gpt.interactive_completion('be terse', max_context_tokens=None)
+
+        assert len(gpt.client.chat.completions.calls[-1]['messages']) == 6
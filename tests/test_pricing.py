@@ -16,6 +16,7 @@ import pytest
 
 # import osintgpt pricing
 from osintgpt.pricing import (
+    CACHE_WRITE_RATE,
     PRICES,
     PRICES_UPDATED,
     TOKENS_PER_UNIT,
@@ -56,6 +57,26 @@ class TestLookup:
     def test_unknown_model_is_none(self):
         assert price_per_million('gpt-does-not-exist') is None
 
+    def test_cached_input_is_cheaper_where_listed(self):
+        assert price_per_million('gpt-4o', 'cached_input') < (
+            price_per_million('gpt-4o')
+        )
+
+    def test_an_unlisted_cache_rate_falls_back_to_input(self):
+        '''Overstating a cached read is safe; inventing a discount is not.'''
+        assert price_per_million('gpt-4-turbo', 'cached_input') == (
+            PRICES['gpt-4-turbo']['input']
+        )
+
+    def test_an_unlisted_cache_write_costs_more_than_input(self):
+        '''Writing a cache entry is billed above plain input.'''
+        assert price_per_million('gpt-4o', 'cache_write') == pytest.approx(
+            PRICES['gpt-4o']['input'] * CACHE_WRITE_RATE
+        )
+
+    def test_a_cache_rate_for_an_unknown_model_is_none(self):
+        assert price_per_million('gpt-does-not-exist', 'cached_input') is None
+
 
 class TestEstimate:
     def test_one_unit_costs_the_unit_price(self):
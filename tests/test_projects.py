@@ -187,6 +187,47 @@ class TestLoad:
         assert loaded.slug == 'case-a'
 
 
+class TestLoadCache:
+    def test_an_unchanged_file_is_not_parsed_again(self, tmp_path, mocker):
+        project = Project.create('Case A', home=tmp_path)
+        parse = mocker.spy(Project, '_parse')
+
+        first = Project.load(project.paths.root)
+        second = Project.load(project.paths.root)
+
+        assert parse.call_count == 1
+        assert second is first
+
+    def test_saving_is_seen_at_once(self, tmp_path):
+        project = Project.create('Case A', home=tmp_path)
+        Project.load(project.paths.root)
+        project.with_settings(generation_model='gpt-4o').save()
+
+        loaded = Project.load(project.paths.root)
+
+        assert loaded.settings.generation_model == 'gpt-4o'
+
+    def test_an_edit_from_elsewhere_is_seen(self, tmp_path):
+        project = Project.create('Case A', home=tmp_path)
+        Project.load(project.paths.root)
+        text = project.paths.config.read_text(encoding='utf-8')
+        # Written around the cache, as another process would.
+        project.paths.config.write_text(
+            text.replace('name = "Case A"', 'name = "Case A, renamed"'),
+            encoding='utf-8'
+        )
+
+        assert Project.load(project.paths.root).name == 'Case A, renamed'
+
+    def test_a_deleted_project_is_not_served_from_the_cache(self, tmp_path):
+        project = Project.create('Case A', home=tmp_path)
+        Project.load(project.paths.root)
+        shutil.rmtree(project.paths.root)
+
+        with pytest.raises(FileNotFoundError):
+            Project.load(project.paths.root)
+
+
 class TestSettingsComposition:
     def test_redirects_the_conversation_store_into_the_project(self, tmp_path):
         project = Project.create('Case A', home=tmp_path)
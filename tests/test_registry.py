@@ -14,6 +14,9 @@
 import shutil
 import pytest
 
+# import submodules
+from dataclasses import replace
+
 # import osintgpt config
 from osintgpt.config import Settings
 
@@ -23,6 +26,7 @@ from osintgpt.projects import (
     ProjectSettings,
     Registry,
     RegistryEntry,
+    SQLiteRegistry,
     load_user_defaults,
     save_user_defaults
 )
@@ -142,6 +146,87 @@ class TestOpen:
         )
 
 
+class TestOpenMany:
+    def test_opens_in_the_order_asked(self, registered):
+        registry, projects = registered
+
+        opened = registry.open_many(['case-b', projects[0].id])
+
+        assert [p.id for p in opened] == [projects[1].id, projects[0].id]
+
+    def test_defaults_to_every_project(self, registered):
+        registry, projects = registered
+
+        assert {p.id for p in registry.open_many()} == {p.id for p in projects}
+
+    def test_names_every_unknown_key_before_reading(self, registered, mocker):
+        registry, _ = registered
+        load = mocker.spy(Project, 'load')
+
+        with pytest.raises(KeyError, match="'x'.*'y'"):
+            registry.open_many(['case-a', 'x', 'y'])
+        assert load.call_count == 0
+
+
+class TestIndexes:
+    def test_an_unchanged_registry_is_not_parsed_again(self, registered, home, mocker):
+        parse = mocker.spy(Registry, '_parse')
+        Registry.load(home)
+        Registry.load(home)
+
+        assert parse.call_count <= 1
+
+    def test_loads_do_not_share_a_list(self, registered, home):
+        first = Registry.load(home)
+        first.entries = []
+
+        assert len(Registry.load(home)) == 2
+
+    def test_entries_cannot_be_changed_in_place(self, registered, home):
+        registry = Registry.load(home)
+
+        with pytest.raises(TypeError):
+            registry.entries[0] = registry.entries[1]
+
+    def test_find_follows_changes_to_the_entries(self, registered, home):
+        registry, projects = registered
+        assert registry.find('case-a') is not None
+
+        registry.unregister('case-a')
+        assert registry.find('case-a') is None
+
+        registry.entries = [*registry.entries, RegistryEntry.of(projects[0])]
+        assert registry.find(projects[0].id).slug == 'case-a'
+
+        registry.entries = [
+            replace(entry, slug='renamed') if entry.slug == 'case-a' else entry
+            for entry in registry.entries
+        ]
+        assert registry.find('case-a') is None
+        assert registry.find('renamed').id == projects[0].id
+
+    def test_projects_are_grouped_by_model_and_width(self, home):
+        registry = Registry.load(home)
+        for name, model, dimensions in (
+            ('A', 'large', None), ('B', '', None), ('C', 'large', 256),
+            ('D', 'large', None)
+        ):
+            registry.register(Project.create(name, home=home, settings=(
+                ProjectSettings(
+                    embedding_model=model, embedding_dimensions=dimensions
+                )
+            )))
+
+        assert registry.model_counts(ProjectSettings(embedding_model='large')) == {
+            'large': 3, 'large@256': 1
+        }
+        assert [e.slug for e in registry.entries_for_model('large@256')] == ['c']
+        assert [e.slug for e in registry.entries_for_model(
+            'large', ProjectSettings(embedding_model='large')
+        )] == ['a', 'b', 'd']
+        assert registry.entries_for_model('small') == []
+
+
 class TestRebuild:
     def test_recovers_a_deleted_index(self, registered, home):
         registry, _ = registered
@@ -200,6 +285,158 @@ class TestRebuild:
         assert Registry.file_for(home).is_file()
 
 
+class TestIncrementalRebuild:
+    def test_only_changed_projects_are_read(self, registered, home, mocker):
+        registry, projects = registered
+        Registry.rebuild(home)
+        projects[0].with_settings(embedding_model='text-embedding-3-large').save()
+        load = mocker.spy(Project, 'load')
+
+        rebuilt = Registry.rebuild(home)
+
+        assert [call.args[0] for call in load.call_args_list] == [
+            projects[0].paths.root
+        ]
+        assert rebuilt.find('case-a').embedding_model == 'text-embedding-3-large'
+
+    def test_a_full_rebuild_reads_everything(self, registered, home, mocker):
+        Registry.rebuild(home)
+        load = mocker.spy(Project, 'load')
+
+        Registry.rebuild(home, incremental=False)
+
+        assert load.call_count == 2
+
+    def test_a_current_index_is_not_rewritten(self, registered, home):
+        Registry.rebuild(home)
+        before = Registry.file_for(home).stat().st_mtime_ns
+
+        Registry.rebuild(home)
+
+        assert Registry.file_for(home).stat().st_mtime_ns == before
+
+    def test_scans_serially_and_in_parallel_alike(self, home):
+        for index in range(12):
+            Project.create(f'Case {index}', home=home)
+
+        serial = Registry.rebuild(home, incremental=False, max_workers=1)
+        parallel = Registry.rebuild(home, incremental=False, max_workers=8)
+
+        assert [e.id for e in parallel] == [e.id for e in serial]
+
+
+class TestAtomicWrite:
+    def test_a_failed_write_leaves_the_old_file(self, registered, home, mocker):
+        registry, _ = registered
+        before = Registry.file_for(home).read_text(encoding='utf-8')
+        mocker.patch('os.replace', side_effect=OSError('disk full'))
+
+        with pytest.raises(OSError):
+            registry.save()
+
+        assert Registry.file_for(home).read_text(encoding='utf-8') == before
+        assert [p.name for p in home.iterdir() if p.suffix == '.tmp'] == []
+
+
+class TestSQLiteRegistry:
+    def test_carries_over_the_toml_index(self, registered, home):
+        _, projects = registered
+        SQLiteRegistry.create(home)
+
+        registry = Registry.load(home)
+
+        assert isinstance(registry, SQLiteRegistry)
+        assert [e.id for e in registry] == [p.id for p in projects]
+
+    def test_register_find_and_unregister(self, home):
+        registry = SQLiteRegistry.create(home)
+        project = Project.create('Case A', home=home)
+
+        registry.register(project)
+        registry.register(project)
+
+        assert len(registry) == 1
+        assert registry.find('case-a').id == project.id
+        assert registry.find(project.id).slug == 'case-a'
+        assert registry.open('case-a').id == project.id
+        assert registry.unregister('case-a') is True
+        assert registry.find('case-a') is None
+        assert registry.unregister('case-a') is False
+
+    def test_filters_by_model(self, home):
+        registry = SQLiteRegistry.create(home)
+        for name, model in (('A', 'large'), ('B', ''), ('C', 'large')):
+            registry.register(Project.create(
+                name, home=home,
+                settings=ProjectSettings(embedding_model=model)
+            ))
+
+        assert [e.slug for e in registry.by_model('large')] == ['a', 'c']
+        assert [e.slug for e in registry.by_model('')] == ['b']
+
+    def test_groups_by_model_and_width_in_the_database(self, home):
+        registry = SQLiteRegistry.create(home)
+        for name, model, dimensions in (
+            ('A', 'large', 256), ('B', '', None), ('C', 'large', 256)
+        ):
+            registry.register(Project.create(name, home=home, settings=(
+                ProjectSettings(
+                    embedding_model=model, embedding_dimensions=dimensions
+                )
+            )))
+
+        assert registry.model_counts() == {
+            'large@256': 2, 'text-embedding-3-small': 1
+        }
+        assert [
+            e.slug for e in registry.entries_for_model('large@256')
+        ] == ['a', 'c']
+        assert registry.find('a').embedding_dimensions == 256
+
+    def test_loads_share_one_connection(self, home):
+        created = SQLiteRegistry.create(home)
+
+        assert Registry.load(home) is created
+        assert SQLiteRegistry.load(home) is created
+
+        created.close()
+        reopened = Registry.load(home)
+
+        assert reopened is not created
+        assert len(reopened) == 0
+
+    def test_rebuild_stays_in_the_database(self, registered, home):
+        SQLiteRegistry.create(home)
+        Project.create('Case C', home=home)
+        Registry.file_for(home).unlink()
+
+        rebuilt = Registry.rebuild(home)
+
+        assert isinstance(rebuilt, SQLiteRegistry)
+        assert {e.slug for e in rebuilt} == {'case-a', 'case-b', 'case-c'}
+        assert not Registry.file_for(home).exists()
+
+    def test_concurrent_registers_are_all_kept(self, home):
+        import threading
+
+        SQLiteRegistry.create(home)
+        projects = [Project.create(f'Case {i}', home=home) for i in range(20)]
+
+        def register(project):
+            # A registry per thread, as separate workers would each open.
+            SQLiteRegistry(home).register(project)
+
+        threads = [
+            threading.Thread(target=register, args=(p,)) for p in projects
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        assert len(Registry.load(home)) == 20
+
+
 class TestRegistryFile:
     def test_says_it_is_not_the_source_of_truth(self, registered, home):
         text = Registry.file_for(home).read_text(encoding='utf-8')
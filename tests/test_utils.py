@@ -11,12 +11,16 @@
 # =================================================================================
 
 # import modules
+import csv
 import pytest
+import tiktoken
 
 # import utils
 from osintgpt.utils import (
     DEFAULT_ENCODING,
+    allow_long_csv_fields,
     count_tokens,
+    count_tokens_many,
     create_unique_id,
     encoding_for_model
 )
@@ -64,6 +68,91 @@ class TestCountTokens:
         assert count_tokens(SAMPLE, 'gpt-99-unreleased') > 0
 
 
+class WordEncoding:
+    '''One token per word; records how it was asked to encode.'''
+
+    name = 'words'
+
+    def __init__(self):
+        self.batches = []
+
+    def encode(self, text):
+        # As tiktoken does when the text holds a special-token marker.
+        if '<|' in text:
+            raise ValueError(text)
+        return text.split()
+
+    def encode_ordinary(self, text):
+        return text.split()
+
+    def encode_ordinary_batch(self, texts, num_threads=1):
+        self.batches.append((len(texts), num_threads))
+        return [text.split() for text in texts]
+
+
+@pytest.fixture
+def resolved(monkeypatch):
+    '''Stands in for tiktoken's lookup and counts how often it runs.'''
+    calls = []
+    encoding = WordEncoding()
+
+    def lookup(model):
+        calls.append(model)
+        return encoding
+
+    encoding_for_model.cache_clear()
+    monkeypatch.setattr(tiktoken, 'encoding_for_model', lookup)
+    yield calls, encoding
+    encoding_for_model.cache_clear()
+
+
+class TestEncodingCache:
+    def test_resolves_each_model_once(self, resolved):
+        calls, _ = resolved
+        for _ in range(100):
+            encoding_for_model('gpt-4o')
+        encoding_for_model('text-embedding-3-small')
+
+        assert calls == ['gpt-4o', 'text-embedding-3-small']
+
+    def test_count_tokens_uses_the_cache(self, resolved):
+        calls, _ = resolved
+        for _ in range(100):
+            count_tokens('a b c', 'gpt-4o')
+
+        assert calls == ['gpt-4o']
+
+    def test_count_tokens_treats_markers_as_text(self, resolved):
+        assert count_tokens('a <|endoftext|> b', 'gpt-4o') == 3
+
+
+class TestCountTokensMany:
+    def test_counts_each_text_in_order(self, resolved):
+        assert count_tokens_many(['a', 'a b', '', 'a b c'], 'gpt-4o') == [
+            1, 2, 0, 3
+        ]
+
+    def test_encodes_in_bounded_chunks(self, resolved):
+        _, encoding = resolved
+        counts = count_tokens_many(
+            (f'text {i}' for i in range(25)), 'gpt-4o',
+            num_threads=4, chunk_size=10
+        )
+
+        assert len(counts) == 25
+        assert encoding.batches == [(10, 4), (10, 4), (5, 4)]
+
+    def test_an_empty_corpus_is_no_counts(self, resolved):
+        assert count_tokens_many([], 'gpt-4o') == []
+
+    def test_agrees_with_count_tokens(self, resolved):
+        texts = ['one two', 'three four five']
+
+        assert count_tokens_many(texts, 'gpt-4o') == [
+            count_tokens(text, 'gpt-4o') for text in texts
+        ]
+
+
 class TestCreateUniqueId:
     def test_returns_a_plain_hex_string(self):
         unique_id = create_unique_id()
@@ -80,3 +169,26 @@ class TestCreateUniqueId:
 
     def test_successive_ids_differ(self):
         assert create_unique_id() != create_unique_id()
+
+
+class TestCsvFieldLimit:
+    @pytest.fixture(autouse=True)
+    def restored(self):
+        limit = csv.field_size_limit()
+        allow_long_csv_fields.cache_clear()
+        yield
+        csv.field_size_limit(limit)
+        allow_long_csv_fields.cache_clear()
+
+    def test_raises_the_default_limit(self):
+        csv.field_size_limit(131072)
+        allow_long_csv_fields()
+
+        assert csv.field_size_limit() > 131072
+
+    def test_runs_once_per_process(self):
+        allow_long_csv_fields()
+        csv.field_size_limit(10)
+        allow_long_csv_fields()
+
+        assert csv.field_size_limit() == 10